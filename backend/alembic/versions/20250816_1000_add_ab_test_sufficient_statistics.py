@@ -0,0 +1,67 @@
+"""Add running sufficient statistics to A/B test variants
+
+Revision ID: 20250816_1000_ab_test_stats
+Revises: 20250815_1600_mt_arch
+Create Date: 2025-08-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20250816_1000_ab_test_stats"
+down_revision: Union[str, None] = "20250815_1600_mt_arch"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_VARIANT_COLUMNS = (
+    "value_sum",
+    "value_sum_sq",
+    "covariate_sum",
+    "covariate_sum_sq",
+    "covariate_conversion_sum",
+)
+
+
+def upgrade() -> None:
+    """Add incremental statistics columns and backfill them from assignments."""
+    for column in _VARIANT_COLUMNS:
+        op.add_column(
+            "ab_test_variants",
+            sa.Column(column, sa.Float(), nullable=False, server_default="0"),
+        )
+    op.add_column(
+        "ab_test_assignments", sa.Column("covariate", sa.Float(), nullable=True)
+    )
+
+    op.execute(
+        """
+        UPDATE ab_test_variants v SET
+            total_users = s.users,
+            total_conversions = s.conversions,
+            conversion_rate = CASE WHEN s.users > 0
+                THEN s.conversions::float / s.users ELSE 0 END,
+            value_sum = s.value_sum,
+            value_sum_sq = s.value_sum_sq
+        FROM (
+            SELECT variant_id,
+                   COUNT(*) AS users,
+                   COUNT(*) FILTER (WHERE converted) AS conversions,
+                   COALESCE(SUM(conversion_value), 0) AS value_sum,
+                   COALESCE(SUM(conversion_value * conversion_value), 0)
+                       AS value_sum_sq
+            FROM ab_test_assignments
+            GROUP BY variant_id
+        ) s
+        WHERE v.id = s.variant_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Remove incremental statistics columns."""
+    op.drop_column("ab_test_assignments", "covariate")
+    for column in reversed(_VARIANT_COLUMNS):
+        op.drop_column("ab_test_variants", column)
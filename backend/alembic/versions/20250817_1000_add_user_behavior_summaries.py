@@ -0,0 +1,77 @@
+"""Add per-user behaviour summaries for recommendation candidate generation
+
+Revision ID: 20250817_1000_behavior_summaries
+Revises: 20250816_1000_ab_test_stats
+Create Date: 2025-08-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "20250817_1000_behavior_summaries"
+down_revision: Union[str, None] = "20250816_1000_ab_test_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the user_behavior_summaries table.
+
+    Summaries are built lazily from events the first time a user's
+    recommendations are generated, so no backfill is needed here.
+    """
+    op.create_table(
+        "user_behavior_summaries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("summary", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column(
+            "last_event_id", sa.Integer(), nullable=False, server_default=sa.text("0")
+        ),
+        sa.Column(
+            "refreshed_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id"),
+    )
+    op.create_index(
+        "ix_user_behavior_summaries_user_id",
+        "user_behavior_summaries",
+        ["user_id"],
+    )
+    op.create_index(
+        "idx_user_behavior_summaries_refreshed",
+        "user_behavior_summaries",
+        ["refreshed_at"],
+    )
+
+
+def downgrade() -> None:
+    """Drop the user_behavior_summaries table."""
+    op.drop_index(
+        "idx_user_behavior_summaries_refreshed", table_name="user_behavior_summaries"
+    )
+    op.drop_index(
+        "ix_user_behavior_summaries_user_id", table_name="user_behavior_summaries"
+    )
+    op.drop_table("user_behavior_summaries")
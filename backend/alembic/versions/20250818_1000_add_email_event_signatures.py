@@ -0,0 +1,53 @@
+"""Add unique event signatures to email events for webhook deduplication
+
+Revision ID: 20250818_1000_email_event_signatures
+Revises: 20250817_1000_behavior_summaries
+Create Date: 2025-08-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20250818_1000_email_event_signatures"
+down_revision: Union[str, None] = "20250817_1000_behavior_summaries"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add email_events.event_signature with a unique index.
+
+    Existing events already carry their signature in event_metadata. It is
+    copied to the new column for the oldest event with each signature, so the
+    unique index can be built over historical duplicates.
+    """
+    op.add_column(
+        "email_events", sa.Column("event_signature", sa.String(64), nullable=True)
+    )
+    op.execute(
+        """
+        UPDATE email_events
+        SET event_signature = event_metadata->>'event_signature'
+        WHERE id IN (
+            SELECT MIN(id)
+            FROM email_events
+            WHERE event_metadata->>'event_signature' IS NOT NULL
+            GROUP BY event_metadata->>'event_signature'
+        )
+        """
+    )
+    op.create_index(
+        "ix_email_events_event_signature",
+        "email_events",
+        ["event_signature"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Drop email_events.event_signature."""
+    op.drop_index("ix_email_events_event_signature", table_name="email_events")
+    op.drop_column("email_events", "event_signature")
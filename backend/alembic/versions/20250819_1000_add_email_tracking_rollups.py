@@ -0,0 +1,108 @@
+"""Add daily email status and latency rollup tables
+
+Revision ID: 20250819_1000_email_tracking_rollups
+Revises: 20250818_1000_email_event_signatures
+Create Date: 2025-08-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "20250819_1000_email_tracking_rollups"
+down_revision: Union[str, None] = "20250818_1000_email_event_signatures"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match app.crud.email_tracking.LATENCY_BUCKET_BOUNDS
+LATENCY_BUCKET_BOUNDS = "0,60,300,900,1800,3600,10800,21600,43200,86400,172800,604800"
+
+
+def upgrade() -> None:
+    """Create the rollup tables and backfill them from email_tracking."""
+    op.create_table(
+        "email_status_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("template_name", sa.String(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="emailstatus", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("email_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "day",
+            "template_name",
+            "status",
+            name="uq_email_status_rollups_day_template_status",
+        ),
+    )
+    op.create_index(
+        "ix_email_status_rollups_id", "email_status_rollups", ["id"], unique=False
+    )
+
+    op.create_table(
+        "email_latency_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("template_name", sa.String(), nullable=False),
+        sa.Column("metric", sa.String(16), nullable=False),
+        sa.Column("bucket", sa.Integer(), nullable=False),
+        sa.Column("email_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "day",
+            "template_name",
+            "metric",
+            "bucket",
+            name="uq_email_latency_rollups_day_template_metric_bucket",
+        ),
+    )
+    op.create_index(
+        "ix_email_latency_rollups_id", "email_latency_rollups", ["id"], unique=False
+    )
+
+    op.execute(
+        """
+        INSERT INTO email_status_rollups
+            (day, template_name, status, email_count, created_at, updated_at)
+        SELECT date(timezone('UTC', created_at)), template_name, status, count(*),
+               now(), now()
+        FROM email_tracking
+        GROUP BY 1, 2, 3
+        """
+    )
+    for metric, field in (("open", "opened_at"), ("click", "clicked_at")):
+        op.execute(
+            f"""
+            INSERT INTO email_latency_rollups
+                (day, template_name, metric, bucket, email_count,
+                 created_at, updated_at)
+            SELECT date(timezone('UTC', created_at)), template_name, '{metric}',
+                   greatest(width_bucket(
+                       extract(epoch FROM {field} - sent_at)::numeric,
+                       ARRAY[{LATENCY_BUCKET_BOUNDS}]::numeric[]
+                   ) - 1, 0),
+                   count(*), now(), now()
+            FROM email_tracking
+            WHERE {field} IS NOT NULL AND sent_at IS NOT NULL
+            GROUP BY 1, 2, 4
+            """
+        )
+
+
+def downgrade() -> None:
+    """Drop the email rollup tables."""
+    op.drop_index("ix_email_latency_rollups_id", table_name="email_latency_rollups")
+    op.drop_table("email_latency_rollups")
+    op.drop_index("ix_email_status_rollups_id", table_name="email_status_rollups")
+    op.drop_table("email_status_rollups")
@@ -0,0 +1,99 @@
+"""Add hourly and daily event rollups for analytics queries
+
+Revision ID: 20250820_1000_event_rollups
+Revises: 20250819_1000_email_tracking_rollups
+Create Date: 2025-08-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20250820_1000_event_rollups"
+down_revision: Union[str, None] = "20250819_1000_email_tracking_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the rollup tables and materialize existing events.
+
+    The backfill and the watermark use the same transaction timestamp, so
+    the event worker continues exactly where the migration stopped.
+    """
+    op.create_index("idx_events_created_at", "events", ["created_at"])
+
+    op.create_table(
+        "event_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("granularity", sa.String(8), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("event_type", sa.String(50), nullable=False),
+        sa.Column("event_name", sa.String(100), nullable=False),
+        sa.Column("source", sa.String(50), nullable=False),
+        sa.Column("event_count", sa.Integer(), nullable=False),
+        sa.Column("value_count", sa.Integer(), nullable=False),
+        sa.Column("value_sum", sa.Float(), nullable=True),
+        sa.Column("value_min", sa.Float(), nullable=True),
+        sa.Column("value_max", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "granularity",
+            "bucket_start",
+            "event_type",
+            "event_name",
+            "source",
+            name="uq_event_rollups_bucket",
+        ),
+    )
+    op.create_index(
+        "idx_event_rollups_granularity_bucket",
+        "event_rollups",
+        ["granularity", "bucket_start"],
+    )
+
+    op.create_table(
+        "event_rollup_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+
+    for granularity in ("hour", "day"):
+        op.execute(
+            f"""
+            INSERT INTO event_rollups
+                (granularity, bucket_start, event_type, event_name, source,
+                 event_count, value_count, value_sum, value_min, value_max,
+                 created_at, updated_at)
+            SELECT '{granularity}', date_trunc('{granularity}', timestamp),
+                   event_type, event_name, source,
+                   count(*), count(value), sum(value), min(value), max(value),
+                   now(), now()
+            FROM events
+            WHERE created_at <= now()
+            GROUP BY 2, 3, 4, 5
+            """
+        )
+    op.execute(
+        """
+        INSERT INTO event_rollup_state (name, watermark, created_at, updated_at)
+        VALUES ('events', now(), now(), now())
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop the event rollup tables."""
+    op.drop_table("event_rollup_state")
+    op.drop_index("idx_event_rollups_granularity_bucket", table_name="event_rollups")
+    op.drop_table("event_rollups")
+    op.drop_index("idx_events_created_at", table_name="events")
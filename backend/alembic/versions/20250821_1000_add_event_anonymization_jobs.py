@@ -0,0 +1,73 @@
+"""Add resumable event anonymization jobs
+
+Revision ID: 20250821_1000_event_anonymization_jobs
+Revises: 20250820_1000_event_rollups
+Create Date: 2025-08-21 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20250821_1000_event_anonymization_jobs"
+down_revision: Union[str, None] = "20250820_1000_event_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the event anonymization job table.
+
+    Jobs restricted to some users read their events in id order, which the
+    (user_id, id) index serves as a range scan per user.
+    """
+    op.create_index("idx_events_user_id_id", "events", ["user_id", "id"])
+
+    op.create_table(
+        "event_anonymization_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_id", sa.String(36), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("claim_token", sa.String(36), nullable=True),
+        sa.Column("user_ids", sa.JSON(), nullable=True),
+        sa.Column("event_types", sa.JSON(), nullable=True),
+        sa.Column("before_date", sa.DateTime(), nullable=True),
+        sa.Column("chunk_size", sa.Integer(), nullable=False),
+        sa.Column("pause_ms", sa.Integer(), nullable=False),
+        sa.Column("max_event_id", sa.Integer(), nullable=False),
+        sa.Column("last_event_id", sa.Integer(), nullable=False),
+        sa.Column("events_anonymized", sa.Integer(), nullable=False),
+        sa.Column("chunks_processed", sa.Integer(), nullable=False),
+        sa.Column("processing_time_seconds", sa.Float(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_event_anonymization_jobs_job_id",
+        "event_anonymization_jobs",
+        ["job_id"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_event_anonymization_jobs_status",
+        "event_anonymization_jobs",
+        ["status"],
+    )
+
+
+def downgrade() -> None:
+    """Drop the event anonymization job table."""
+    op.drop_index(
+        "ix_event_anonymization_jobs_status", table_name="event_anonymization_jobs"
+    )
+    op.drop_index(
+        "ix_event_anonymization_jobs_job_id", table_name="event_anonymization_jobs"
+    )
+    op.drop_table("event_anonymization_jobs")
+    op.drop_index("idx_events_user_id_id", table_name="events")
@@ -0,0 +1,46 @@
+"""Add audit_logs table for the audit logger's database sink
+
+Revision ID: 20250822_1000_audit_logs
+Revises: 20250821_1000_event_anonymization_jobs
+Create Date: 2025-08-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20250822_1000_audit_logs"
+down_revision: Union[str, None] = "20250821_1000_event_anonymization_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the audit_logs table (app.models.audit_log.AuditLog)."""
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("resource", sa.String(), nullable=True),
+        sa.Column("event_metadata", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+    op.create_index("ix_audit_logs_user_id", "audit_logs", ["user_id"])
+    op.create_index("ix_audit_logs_action", "audit_logs", ["action"])
+    op.create_index("ix_audit_logs_resource", "audit_logs", ["resource"])
+    op.create_index("ix_audit_logs_created_at", "audit_logs", ["created_at"])
+
+
+def downgrade() -> None:
+    """Drop the audit_logs table."""
+    op.drop_index("ix_audit_logs_created_at", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_resource", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_action", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_user_id", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_id", table_name="audit_logs")
+    op.drop_table("audit_logs")
@@ -0,0 +1,552 @@
+"""Indexed checkpoint storage for workflow state.
+
+Layout under ``base_path``::
+
+    checkpoints.idx                 append-only "<checkpoint_id>\\t<session_id>" log
+    <session_id>/manifest.json      per-session manifest snapshot (entries + latest)
+    <session_id>/manifest.log       JSON-lines changes since the snapshot
+    <session_id>/checkpoints/*.ckpt compressed checkpoint payloads
+
+Payloads and manifest snapshots are written to a temporary file that is
+fsynced and renamed over the target, so readers never observe a partially
+written one. Manifest changes are appended to the session's log instead of
+rewriting the snapshot; the log is folded into a new snapshot once it holds
+more than twice as many records as the manifest has entries.
+
+Payloads are either full snapshots or deltas against the agent's most recent
+full snapshot. A new full snapshot is taken every ``full_snapshot_interval``
+checkpoints, so restoring reads at most two payload files regardless of how
+long the session has been running.
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = structlog.get_logger(__name__)
+
+_MAGIC = b"WFC1"
+_HEADER = struct.Struct("!4sB")
+_CODEC_ZLIB = 1
+_CODEC_ZSTD = 2
+_UNSET = "__unset__"
+_MANIFEST_LOG_SLACK = 256
+
+
+def _compress(data: bytes) -> Tuple[int, bytes]:
+    if zstandard is not None:
+        return _CODEC_ZSTD, zstandard.ZstdCompressor(level=3).compress(data)
+    return _CODEC_ZLIB, zlib.compress(data, 6)
+
+
+def _decompress(codec: int, data: bytes) -> bytes:
+    if codec == _CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == _CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError(
+                "Checkpoint is zstd-compressed but zstandard is not installed"
+            )
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown checkpoint codec: {codec}")
+
+
+def encode_payload(payload: Dict[str, Any]) -> bytes:
+    """Serialize a checkpoint payload to the compressed on-disk format."""
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    codec, body = _compress(raw)
+    return _HEADER.pack(_MAGIC, codec) + body
+
+
+def decode_payload(data: bytes) -> Dict[str, Any]:
+    """Inverse of ``encode_payload``."""
+    magic, codec = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError("Not a workflow checkpoint payload")
+    return json.loads(_decompress(codec, data[_HEADER.size :]))
+
+
+def compute_delta(base: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level key delta turning ``base`` into ``current``."""
+    delta: Dict[str, Any] = {
+        key: value
+        for key, value in current.items()
+        if key not in base or base[key] != value
+    }
+    removed = [key for key in base if key not in current]
+    if removed:
+        delta[_UNSET] = removed
+    return delta
+
+
+def apply_delta(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a delta produced by ``compute_delta``."""
+    result = dict(base)
+    for key in delta.get(_UNSET, []):
+        result.pop(key, None)
+    result.update({key: value for key, value in delta.items() if key != _UNSET})
+    return result
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CheckpointStore:
+    """Checkpoint storage with O(1) lookup by id and by (session, agent).
+
+    Manifests and the id index are cached in memory, so a store instance
+    assumes it is the only writer for its ``base_path``. Callers ``release``
+    a session once its workflow completes to drop its cached state. Methods do blocking
+    file I/O and are meant to be called via ``asyncio.to_thread`` under the
+    caller's per-session lock.
+    """
+
+    def __init__(self, base_path: Path, full_snapshot_interval: int = 10):
+        self.base_path = base_path
+        self.full_snapshot_interval = max(1, full_snapshot_interval)
+        self._index_path = base_path / "checkpoints.idx"
+        self._index: Optional[Dict[str, str]] = None
+        self._index_records = 0
+        self._index_lock = threading.RLock()
+        self._manifests: Dict[str, Dict[str, Any]] = {}
+        self._manifest_records: Dict[str, int] = {}
+        # Materialized context of the latest full snapshot per (session, agent)
+        self._base_cache: Dict[Tuple[str, str], Tuple[str, Dict[str, Any]]] = {}
+
+    # --- Paths ---
+
+    def _session_path(self, session_id: str) -> Path:
+        return self.base_path / session_id
+
+    def _checkpoints_path(self, session_id: str) -> Path:
+        path = self._session_path(session_id) / "checkpoints"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _manifest_path(self, session_id: str) -> Path:
+        return self._session_path(session_id) / "manifest.json"
+
+    def _manifest_log_path(self, session_id: str) -> Path:
+        return self._session_path(session_id) / "manifest.log"
+
+    # --- Global id -> session index ---
+
+    def _load_index(self) -> Dict[str, str]:
+        if self._index is not None:
+            return self._index
+        with self._index_lock:
+            if self._index is None:
+                self._read_index()
+        return self._index
+
+    def _read_index(self) -> None:
+        index: Dict[str, str] = {}
+        records = 0
+        if self._index_path.exists():
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 2:
+                        continue
+                    records += 1
+                    checkpoint_id, session_id = parts
+                    if session_id:
+                        index[checkpoint_id] = session_id
+                    else:
+                        index.pop(checkpoint_id, None)
+        self._index = index
+        self._index_records = records
+
+        if records > 2 * len(index) + 1000:
+            self._compact_index()
+
+    def _append_index(self, checkpoint_id: str, session_id: str) -> None:
+        """Record (or tombstone, with an empty session) a checkpoint location."""
+        index = self._load_index()
+        with self._index_lock:
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write(f"{checkpoint_id}\t{session_id}\n")
+            self._index_records += 1
+            if session_id:
+                index[checkpoint_id] = session_id
+            else:
+                index.pop(checkpoint_id, None)
+
+    def _compact_index(self) -> None:
+        index = self._index or {}
+        data = "".join(f"{cid}\t{sid}\n" for cid, sid in index.items())
+        _atomic_write(self._index_path, data.encode("utf-8"))
+        self._index_records = len(index)
+
+    def session_for(self, checkpoint_id: str) -> Optional[str]:
+        """Session that owns ``checkpoint_id``, if known."""
+        session_id = self._load_index().get(checkpoint_id)
+        if session_id is None:
+            session_id = self._find_legacy(checkpoint_id)
+        return session_id
+
+    # --- Per-session manifests ---
+
+    def load_manifest(self, session_id: str) -> Dict[str, Any]:
+        """Return the (cached) manifest for a session."""
+        manifest = self._manifests.get(session_id)
+        if manifest is not None:
+            return manifest
+
+        path = self._manifest_path(session_id)
+        log_path = self._manifest_log_path(session_id)
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        else:
+            manifest = {"entries": {}, "latest": {}, "history": {}}
+            if not log_path.exists():
+                self._import_legacy(session_id, manifest)
+        self._manifests[session_id] = manifest
+
+        records = 0
+        torn = False
+        if log_path.exists():
+            with open(log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A write cut short by a crash; later records follow it
+                        torn = True
+                        continue
+                    records += 1
+                    self._apply_record(manifest, record)
+        self._manifest_records[session_id] = records
+        if torn:
+            self._compact_manifest(session_id)
+        return manifest
+
+    @classmethod
+    def _apply_record(cls, manifest: Dict[str, Any], record: Dict[str, Any]) -> None:
+        checkpoint_id = record["id"]
+        if record["op"] == "del":
+            if checkpoint_id in manifest["entries"]:
+                cls._remove_entry(manifest, checkpoint_id)
+        elif checkpoint_id in manifest["entries"]:
+            # Replayed over a snapshot that already has it, or a promotion
+            manifest["entries"][checkpoint_id] = record["entry"]
+        else:
+            cls._add_entry(manifest, checkpoint_id, record["entry"])
+
+    def _log_manifest(self, session_id: str, records: List[Dict[str, Any]]) -> None:
+        """Append manifest changes in one write, compacting when the log is long."""
+        if not records:
+            return
+        self._session_path(session_id).mkdir(parents=True, exist_ok=True)
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        with open(self._manifest_log_path(session_id), "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        count = self._manifest_records.get(session_id, 0) + len(records)
+        self._manifest_records[session_id] = count
+        entries = len(self._manifests[session_id]["entries"])
+        if count > 2 * entries + _MANIFEST_LOG_SLACK:
+            self._compact_manifest(session_id)
+
+    def _compact_manifest(self, session_id: str) -> None:
+        """Write the cached manifest as the snapshot and empty the log.
+
+        Replaying a log over a snapshot that already contains it is a no-op,
+        so a crash between the two writes loses nothing.
+        """
+        manifest = self._manifests[session_id]
+        self._session_path(session_id).mkdir(parents=True, exist_ok=True)
+        _atomic_write(
+            self._manifest_path(session_id),
+            json.dumps(manifest, separators=(",", ":")).encode("utf-8"),
+        )
+        _atomic_write(self._manifest_log_path(session_id), b"")
+        self._manifest_records[session_id] = 0
+
+    def _import_legacy(self, session_id: str, manifest: Dict[str, Any]) -> None:
+        """Index plain JSON checkpoints written before the manifest existed."""
+        legacy_dir = self._session_path(session_id) / "checkpoints"
+        if not legacy_dir.exists():
+            return
+
+        legacy = []
+        for checkpoint_file in legacy_dir.glob("*.json"):
+            try:
+                with open(checkpoint_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                legacy.append(data)
+            except Exception as e:
+                logger.warning(
+                    "Failed to read checkpoint file",
+                    file=str(checkpoint_file),
+                    error=str(e),
+                )
+
+        legacy.sort(key=lambda data: data.get("created_at", ""))
+        for data in legacy:
+            entry = {
+                "agent_id": data["agent_id"],
+                "file": f"{data['id']}.json",
+                "format": "json",
+                "kind": "full",
+                "base_id": None,
+                "created_at": data.get("created_at"),
+                "checkpoint_type": data.get("checkpoint_type"),
+                "previous_checkpoint_id": data.get("previous_checkpoint_id"),
+                "tags": data.get("tags", []),
+                "description": data.get("description"),
+                "size_bytes": (data.get("context") or {}).get("size_bytes"),
+                "compressed": (data.get("context") or {}).get("compressed", False),
+            }
+            self._add_entry(manifest, data["id"], entry)
+            self._append_index(data["id"], session_id)
+
+        if legacy:
+            self._manifests[session_id] = manifest
+            self._compact_manifest(session_id)
+
+    def _find_legacy(self, checkpoint_id: str) -> Optional[str]:
+        """Fallback scan for JSON checkpoints from sessions never indexed."""
+        if not self.base_path.exists():
+            return None
+        for session_dir in self.base_path.iterdir():
+            if (session_dir / "checkpoints" / f"{checkpoint_id}.json").exists():
+                self.load_manifest(session_dir.name)
+                return session_dir.name
+        return None
+
+    @staticmethod
+    def _add_entry(manifest: Dict[str, Any], checkpoint_id: str, entry: Dict[str, Any]):
+        agent_id = entry["agent_id"]
+        manifest["entries"][checkpoint_id] = entry
+        manifest["latest"][agent_id] = checkpoint_id
+        manifest["history"].setdefault(agent_id, []).append(checkpoint_id)
+
+    @staticmethod
+    def _remove_entry(manifest: Dict[str, Any], checkpoint_id: str) -> None:
+        agent_id = manifest["entries"].pop(checkpoint_id)["agent_id"]
+        history = manifest["history"][agent_id]
+        history.remove(checkpoint_id)
+        if history:
+            manifest["latest"][agent_id] = history[-1]
+        else:
+            manifest["latest"].pop(agent_id, None)
+            del manifest["history"][agent_id]
+
+    # --- Public API ---
+
+    def latest_id(self, session_id: str, agent_id: str) -> Optional[str]:
+        """Most recent checkpoint id for an agent in a session."""
+        return self.load_manifest(session_id)["latest"].get(agent_id)
+
+    def entries(
+        self, session_id: str, agent_id: Optional[str] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Manifest entries for a session, newest first."""
+        manifest = self.load_manifest(session_id)
+        agents = [agent_id] if agent_id is not None else list(manifest["history"])
+        items = [
+            (checkpoint_id, manifest["entries"][checkpoint_id])
+            for agent in agents
+            for checkpoint_id in manifest["history"].get(agent, [])
+        ]
+        items.sort(key=lambda item: item[1].get("created_at") or "", reverse=True)
+        return items
+
+    def save(
+        self,
+        checkpoint_id: str,
+        session_id: str,
+        agent_id: str,
+        context_data: Dict[str, Any],
+        context_meta: Dict[str, Any],
+        entry: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Persist a checkpoint and index it; returns its manifest entry.
+
+        ``context_meta`` holds the remaining ``WorkflowContext`` fields and
+        ``entry`` the checkpoint attributes kept in the manifest.
+        """
+        manifest = self.load_manifest(session_id)
+        history = manifest["history"].get(agent_id, [])
+        # Detach from the caller's objects so later mutations cannot leak into
+        # the cached delta base
+        context_data = json.loads(json.dumps(context_data, default=str))
+
+        base = self._base_cache.get((session_id, agent_id))
+        if base is None and history:
+            base = self._latest_full(session_id, agent_id)
+
+        deltas_since_full = 0
+        if base is not None:
+            for previous_id in reversed(history):
+                if previous_id == base[0]:
+                    break
+                deltas_since_full += 1
+
+        payload: Dict[str, Any] = {"context": context_meta}
+        if base is not None and deltas_since_full + 1 < self.full_snapshot_interval:
+            payload["delta"] = compute_delta(base[1], context_data)
+            entry.update(kind="delta", base_id=base[0])
+        else:
+            payload["context_data"] = context_data
+            entry.update(kind="full", base_id=None)
+
+        entry.update(agent_id=agent_id, file=f"{checkpoint_id}.ckpt", format="ckpt")
+        _atomic_write(
+            self._checkpoints_path(session_id) / entry["file"], encode_payload(payload)
+        )
+
+        self._add_entry(manifest, checkpoint_id, entry)
+        self._log_manifest(
+            session_id, [{"op": "put", "id": checkpoint_id, "entry": entry}]
+        )
+        self._append_index(checkpoint_id, session_id)
+        if entry["kind"] == "full":
+            self._base_cache[(session_id, agent_id)] = (checkpoint_id, context_data)
+        return entry
+
+    def _latest_full(
+        self, session_id: str, agent_id: str
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        manifest = self.load_manifest(session_id)
+        for checkpoint_id in reversed(manifest["history"].get(agent_id, [])):
+            if manifest["entries"][checkpoint_id]["kind"] == "full":
+                context_data, _ = self.load(session_id, checkpoint_id)
+                self._base_cache[(session_id, agent_id)] = (checkpoint_id, context_data)
+                return checkpoint_id, context_data
+        return None
+
+    def _read_file(self, session_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        path = self._session_path(session_id) / "checkpoints" / entry["file"]
+        with open(path, "rb") as f:
+            data = f.read()
+        if entry.get("format") == "json":
+            legacy = json.loads(data)
+            context = legacy["context"]
+            return {
+                "context": {k: v for k, v in context.items() if k != "context_data"},
+                "context_data": context["context_data"],
+            }
+        return decode_payload(data)
+
+    def load(
+        self, session_id: str, checkpoint_id: str
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return ``(context_data, context_meta)`` for a checkpoint."""
+        manifest = self.load_manifest(session_id)
+        entry = manifest["entries"].get(checkpoint_id)
+        if entry is None:
+            raise ValueError(f"Checkpoint {checkpoint_id} not found")
+
+        payload = self._read_file(session_id, entry)
+        if entry["kind"] == "delta":
+            base_entry = manifest["entries"][entry["base_id"]]
+            base_data = self._read_file(session_id, base_entry)["context_data"]
+            return apply_delta(base_data, payload["delta"]), payload["context"]
+        return payload["context_data"], payload["context"]
+
+    def delete(self, session_id: str, checkpoint_id: str) -> bool:
+        """Remove a checkpoint, promoting deltas that depend on it to full snapshots."""
+        return bool(self._delete_many(session_id, [checkpoint_id]))
+
+    def prune(self, session_id: str, agent_id: str, keep: int) -> List[str]:
+        """Drop an agent's oldest checkpoints beyond ``keep``."""
+        history = self.load_manifest(session_id)["history"].get(agent_id, [])
+        return self._delete_many(session_id, history[: max(len(history) - keep, 0)])
+
+    def _delete_many(self, session_id: str, checkpoint_ids: List[str]) -> List[str]:
+        """Remove checkpoints oldest first, logging the changes in one append.
+
+        Deltas based on a removed checkpoint are rewritten as full snapshots
+        unless they are being removed too.
+        """
+        manifest = self.load_manifest(session_id)
+        doomed = set(checkpoint_ids)
+        records: List[Dict[str, Any]] = []
+        removed = []
+        for checkpoint_id in checkpoint_ids:
+            entry = manifest["entries"].get(checkpoint_id)
+            if entry is None:
+                continue
+
+            agent_id = entry["agent_id"]
+            dependents = [
+                dependent_id
+                for dependent_id in manifest["history"].get(agent_id, [])
+                if manifest["entries"][dependent_id].get("base_id") == checkpoint_id
+                and dependent_id not in doomed
+            ]
+            for dependent_id in dependents:
+                context_data, context_meta = self.load(session_id, dependent_id)
+                dependent = manifest["entries"][dependent_id]
+                dependent.update(kind="full", base_id=None, format="ckpt")
+                dependent["file"] = f"{dependent_id}.ckpt"
+                _atomic_write(
+                    self._checkpoints_path(session_id) / dependent["file"],
+                    encode_payload(
+                        {"context": context_meta, "context_data": context_data}
+                    ),
+                )
+                records.append({"op": "put", "id": dependent_id, "entry": dependent})
+
+            path = self._session_path(session_id) / "checkpoints" / entry["file"]
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+            self._remove_entry(manifest, checkpoint_id)
+            records.append({"op": "del", "id": checkpoint_id})
+            removed.append(checkpoint_id)
+
+            cached = self._base_cache.get((session_id, agent_id))
+            if cached is not None and (
+                cached[0] == checkpoint_id or cached[0] not in manifest["entries"]
+            ):
+                del self._base_cache[(session_id, agent_id)]
+            if dependents:
+                # The newest promoted snapshot is now the agent's delta base
+                self._base_cache.pop((session_id, agent_id), None)
+
+        self._log_manifest(session_id, records)
+        for checkpoint_id in removed:
+            self._append_index(checkpoint_id, "")
+        return removed
+
+    def release(self, session_id: str) -> None:
+        """Drop a finished session's cached manifest and delta bases.
+
+        Nothing is deleted from disk; the session is re-read if used again.
+        """
+        self._manifests.pop(session_id, None)
+        self._manifest_records.pop(session_id, None)
+        for key in [key for key in self._base_cache if key[0] == session_id]:
+            del self._base_cache[key]
+
+    def cached_sessions(self) -> int:
+        """Number of sessions whose manifest is held in memory."""
+        return len(self._manifests)
+
+    def checkpoint_count(self) -> int:
+        """Number of indexed checkpoints across all sessions."""
+        return len(self._load_index())
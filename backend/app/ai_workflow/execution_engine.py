@@ -5,11 +5,14 @@ rollback capabilities, and comprehensive error handling.
 """
 
 import asyncio
+import heapq
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from enum import Enum
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
 
 import aiofiles
 import structlog
@@ -17,6 +20,7 @@ from pydantic import BaseModel, Field
 
 from app.core.config import get_settings
 
+from .keyed_lock import KeyedLock
 from .messaging import AgentMessageBus
 from .metrics import increment_counter
 from .state_manager import WorkflowStateManager
@@ -45,6 +49,15 @@ class TaskPriority(str, Enum):
     LOW = "low"
 
 
+# Lower rank is dispatched first when several tasks are ready
+_PRIORITY_RANK = {
+    TaskPriority.CRITICAL: 0,
+    TaskPriority.HIGH: 1,
+    TaskPriority.NORMAL: 2,
+    TaskPriority.LOW: 3,
+}
+
+
 class TaskDependency(BaseModel):
     """Task dependency definition."""
 
@@ -110,6 +123,17 @@ class ExecutionContext(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+class DagTiming(BaseModel):
+    """Timing of a DAG batch run, including its critical path."""
+
+    batch_id: str
+    makespan_seconds: float
+    critical_path: List[str]
+    critical_path_seconds: float
+    max_parallelism: int
+    queue_wait_seconds: float
+
+
 TaskHandler = Callable[[Task, ExecutionContext], Awaitable[TaskResult]]
 
 
@@ -125,8 +149,20 @@ class TaskExecutionEngine:
         message_bus: AgentMessageBus,
         state_manager: WorkflowStateManager,
         base_path: Optional[Path] = None,
+        max_concurrency: Optional[int] = None,
+        task_type_concurrency: Optional[Dict[str, int]] = None,
+        max_dag_timings: int = 1000,
     ):
-        """Initialize execution engine."""
+        """Initialize execution engine.
+
+        Args:
+            message_bus: Message bus for agent communication
+            state_manager: State manager used for execution checkpoints
+            base_path: Directory for stored task definitions
+            max_concurrency: Maximum tasks running at once in a DAG batch
+            task_type_concurrency: Per task-type caps for DAG batches
+            max_dag_timings: DAG timings kept for the most recent batches
+        """
         self.message_bus = message_bus
         self.state_manager = state_manager
 
@@ -140,6 +176,12 @@ class TaskExecutionEngine:
         # Active executions
         self._active_executions: Dict[str, asyncio.Task] = {}
         self._execution_results: Dict[str, List[TaskResult]] = {}
+        self._dag_timings: "OrderedDict[str, DagTiming]" = OrderedDict()
+        self._max_dag_timings = max_dag_timings
+
+        # DAG scheduling limits
+        self.max_concurrency = max_concurrency
+        self._task_type_concurrency: Dict[str, int] = dict(task_type_concurrency or {})
 
         # Metrics
         self._tasks_executed = 0
@@ -147,13 +189,7 @@ class TaskExecutionEngine:
         self._rollbacks_performed = 0
 
         # Execution locks
-        self._locks: Dict[str, asyncio.Lock] = {}
-
-    async def _get_lock(self, key: str) -> asyncio.Lock:
-        """Get or create lock for a given key."""
-        if key not in self._locks:
-            self._locks[key] = asyncio.Lock()
-        return self._locks[key]
+        self._locks = KeyedLock("execution_engine")
 
     def register_task_handler(self, task_type: str, handler: TaskHandler) -> None:
         """Register a task handler for a specific task type.
@@ -165,6 +201,20 @@ class TaskExecutionEngine:
         self._task_handlers[task_type] = handler
         logger.info("Task handler registered", task_type=task_type)
 
+    def set_task_type_concurrency(self, task_type: str, limit: Optional[int]) -> None:
+        """Cap how many tasks of ``task_type`` run at once in a DAG batch.
+
+        Args:
+            task_type: Task type to limit
+            limit: Maximum concurrent tasks, or None to remove the cap
+        """
+        if limit is None:
+            self._task_type_concurrency.pop(task_type, None)
+        elif limit < 1:
+            raise ValueError("Concurrency limit must be at least 1")
+        else:
+            self._task_type_concurrency[task_type] = limit
+
     async def schedule_task(
         self, task: Task, execution_context: Optional[ExecutionContext] = None
     ) -> str:
@@ -240,6 +290,8 @@ class TaskExecutionEngine:
     ) -> List[TaskResult]:
         """Execute batch of tasks with rollback capability.
 
+        Concurrent calls for the same batch ID run one after the other.
+
         Args:
             batch: Batch of tasks to execute
             execution_context: Execution context
@@ -248,100 +300,117 @@ class TaskExecutionEngine:
         Returns:
             List of task results
         """
-        execution_context.dry_run = dry_run
-        execution_context.batch_id = batch.id
+        # Runs of the same batch would overwrite each other's results and timings
+        async with self._locks.hold(f"batch_{batch.id}"):
+            execution_context.dry_run = dry_run
+            execution_context.batch_id = batch.id
 
-        results: List[TaskResult] = []
-        executed_tasks: List[Task] = []
+            results: List[TaskResult] = []
+            executed_tasks: List[Task] = []
 
-        try:
-            logger.info(
-                "Starting batch execution",
-                batch_id=batch.id,
-                task_count=len(batch.tasks),
-                strategy=batch.execution_strategy,
-                dry_run=dry_run,
-            )
+            try:
+                logger.info(
+                    "Starting batch execution",
+                    batch_id=batch.id,
+                    task_count=len(batch.tasks),
+                    strategy=batch.execution_strategy,
+                    dry_run=dry_run,
+                )
 
-            # Validate all tasks first
-            for task in batch.tasks:
-                await self._validate_task(task)
+                # Validate all tasks first
+                for task in batch.tasks:
+                    await self._validate_task(task)
 
-            if dry_run:
-                # Return mock results for dry run
-                return [
-                    TaskResult(
-                        task_id=task.id,
-                        status=TaskStatus.COMPLETED,
-                        result_data={"dry_run": True},
+                if dry_run:
+                    # Return mock results for dry run
+                    return [
+                        TaskResult(
+                            task_id=task.id,
+                            status=TaskStatus.COMPLETED,
+                            result_data={"dry_run": True},
+                        )
+                        for task in batch.tasks
+                    ]
+
+                # Execute based on strategy
+                if batch.execution_strategy == "sequential":
+                    results = await self._execute_sequential(
+                        batch.tasks, execution_context
+                    )
+                elif batch.execution_strategy == "parallel":
+                    results = await self._execute_parallel(
+                        batch.tasks, execution_context
+                    )
+                elif batch.execution_strategy == "dag":
+                    results = await self._execute_dag(batch.tasks, execution_context)
+                else:
+                    raise ValueError(
+                        f"Unknown execution strategy: {batch.execution_strategy}"
                     )
-                    for task in batch.tasks
-                ]
 
-            # Execute based on strategy
-            if batch.execution_strategy == "sequential":
-                results = await self._execute_sequential(batch.tasks, execution_context)
-            elif batch.execution_strategy == "parallel":
-                results = await self._execute_parallel(batch.tasks, execution_context)
-            elif batch.execution_strategy == "dag":
-                results = await self._execute_dag(batch.tasks, execution_context)
-            else:
-                raise ValueError(
-                    f"Unknown execution strategy: {batch.execution_strategy}"
-                )
+                # Check for failures and rollback if needed
+                failed_tasks = [r for r in results if r.status == TaskStatus.FAILED]
+                if failed_tasks and execution_context.rollback_enabled:
+                    logger.warning(
+                        "Tasks failed, initiating rollback",
+                        batch_id=batch.id,
+                        failed_count=len(failed_tasks),
+                    )
 
-            # Check for failures and rollback if needed
-            failed_tasks = [r for r in results if r.status == TaskStatus.FAILED]
-            if failed_tasks and execution_context.rollback_enabled:
-                logger.warning(
-                    "Tasks failed, initiating rollback",
-                    batch_id=batch.id,
-                    failed_count=len(failed_tasks),
-                )
+                    rollback_results = await self._rollback_batch(
+                        executed_tasks, execution_context, batch.rollback_strategy
+                    )
 
-                rollback_results = await self._rollback_batch(
-                    executed_tasks, execution_context, batch.rollback_strategy
-                )
+                    # Update results with rollback status
+                    for result in results:
+                        if result.status == TaskStatus.COMPLETED:
+                            result.status = TaskStatus.ROLLED_BACK
 
-                # Update results with rollback status
-                for result in results:
-                    if result.status == TaskStatus.COMPLETED:
-                        result.status = TaskStatus.ROLLED_BACK
+                # Store final results
+                self._execution_results[batch.id] = results
 
-            # Store final results
-            self._execution_results[batch.id] = results
+                logger.info(
+                    "Batch execution completed",
+                    batch_id=batch.id,
+                    completed_count=len(
+                        [r for r in results if r.status == TaskStatus.COMPLETED]
+                    ),
+                    failed_count=len(
+                        [r for r in results if r.status == TaskStatus.FAILED]
+                    ),
+                    rolled_back_count=len(
+                        [r for r in results if r.status == TaskStatus.ROLLED_BACK]
+                    ),
+                )
+                increment_counter("ai_workflow_batch_executed")
 
-            logger.info(
-                "Batch execution completed",
-                batch_id=batch.id,
-                completed_count=len(
-                    [r for r in results if r.status == TaskStatus.COMPLETED]
-                ),
-                failed_count=len([r for r in results if r.status == TaskStatus.FAILED]),
-                rolled_back_count=len(
-                    [r for r in results if r.status == TaskStatus.ROLLED_BACK]
-                ),
-            )
-            increment_counter("ai_workflow_batch_executed")
+                return results
 
-            return results
+            except Exception as e:
+                logger.error("Batch execution failed", batch_id=batch.id, error=str(e))
 
-        except Exception as e:
-            logger.error("Batch execution failed", batch_id=batch.id, error=str(e))
+                # Attempt rollback on exception
+                if executed_tasks and execution_context.rollback_enabled:
+                    try:
+                        await self._rollback_batch(
+                            executed_tasks, execution_context, batch.rollback_strategy
+                        )
+                    except Exception as rollback_error:
+                        logger.error(
+                            "Rollback failed",
+                            batch_id=batch.id,
+                            error=str(rollback_error),
+                        )
 
-            # Attempt rollback on exception
-            if executed_tasks and execution_context.rollback_enabled:
-                try:
-                    await self._rollback_batch(
-                        executed_tasks, execution_context, batch.rollback_strategy
-                    )
-                except Exception as rollback_error:
-                    logger.error(
-                        "Rollback failed", batch_id=batch.id, error=str(rollback_error)
-                    )
+                increment_counter("ai_workflow_batch_execution_error")
+                raise
 
-            increment_counter("ai_workflow_batch_execution_error")
-            raise
+            finally:
+                # The batch is done writing checkpoints for its session
+                if self.state_manager is not None:
+                    await self.state_manager.release_session(
+                        execution_context.session_id
+                    )
 
     async def _execute_sequential(
         self, tasks: List[Task], execution_context: ExecutionContext
@@ -419,65 +488,219 @@ class TaskExecutionEngine:
     async def _execute_dag(
         self, tasks: List[Task], execution_context: ExecutionContext
     ) -> List[TaskResult]:
-        """Execute tasks based on dependency graph (DAG)."""
-        # Build dependency graph
+        """Execute tasks based on dependency graph (DAG).
+
+        Tasks are launched as soon as their last dependency completes, using
+        in-degree counting over the dependency graph. Ready tasks are
+        dispatched in ``TaskPriority`` order (then batch order) within the
+        engine's global and per-task-type concurrency caps.
+
+        A failed task stops further dispatch when rollback is enabled (tasks
+        already running are allowed to finish); otherwise only its dependents
+        are skipped. Tasks that can never become ready (dependency cycles or
+        dependencies outside the batch) are reported as failed.
+        """
         task_map = {task.id: task for task in tasks}
-        completed_tasks: set[str] = set()
+        order = {task.id: index for index, task in enumerate(tasks)}
+        in_degree: Dict[str, int] = {}
+        dependents: Dict[str, List[str]] = {task.id: [] for task in tasks}
+        unresolvable: Set[str] = set()
+
+        for task in tasks:
+            dependency_ids = {dep.task_id for dep in task.dependencies}
+            in_degree[task.id] = len(dependency_ids)
+            for dependency_id in dependency_ids:
+                if dependency_id in dependents:
+                    dependents[dependency_id].append(task.id)
+                else:
+                    unresolvable.add(task.id)
+
+        ready: List[Tuple[int, int, str]] = []
+
+        def push_ready(task_id: str) -> None:
+            task = task_map[task_id]
+            heapq.heappush(
+                ready, (_PRIORITY_RANK.get(task.priority, 2), order[task_id], task_id)
+            )
+
+        for task in tasks:
+            if in_degree[task.id] == 0:
+                push_ready(task.id)
+
         results: List[TaskResult] = []
+        running: Dict[asyncio.Task, str] = {}
+        running_by_type: Dict[str, int] = {}
+        started_at: Dict[str, float] = {}
+        finished_at: Dict[str, float] = {}
+        ready_since: Dict[str, float] = {}
+        queue_wait = 0.0
+        max_parallelism = 0
+        stop_dispatch = False
+        batch_start = time.monotonic()
+
+        for _, _, task_id in ready:
+            ready_since[task_id] = batch_start
+
+        def can_start(task: Task) -> bool:
+            if self.max_concurrency is not None and len(running) >= self.max_concurrency:
+                return False
+            limit = self._task_type_concurrency.get(task.task_type)
+            return limit is None or running_by_type.get(task.task_type, 0) < limit
 
-        while len(completed_tasks) < len(tasks):
-            # Find tasks that can be executed (all dependencies completed)
-            ready_tasks = []
-            for task in tasks:
-                if task.id in completed_tasks:
-                    continue
+        try:
+            while running or (ready and not stop_dispatch):
+                # Dispatch as many ready tasks as the caps allow; tasks blocked
+                # only by their type cap are deferred, not skipped.
+                deferred: List[Tuple[int, int, str]] = []
+                while ready and not stop_dispatch:
+                    if (
+                        self.max_concurrency is not None
+                        and len(running) >= self.max_concurrency
+                    ):
+                        break
+                    entry = heapq.heappop(ready)
+                    task = task_map[entry[2]]
+                    if not can_start(task):
+                        deferred.append(entry)
+                        continue
+
+                    now = time.monotonic()
+                    started_at[task.id] = now
+                    queue_wait += now - ready_since.get(task.id, now)
+                    running_by_type[task.task_type] = (
+                        running_by_type.get(task.task_type, 0) + 1
+                    )
+                    running[
+                        asyncio.create_task(
+                            self._execute_single_task(task, execution_context)
+                        )
+                    ] = task.id
+                for entry in deferred:
+                    heapq.heappush(ready, entry)
+                max_parallelism = max(max_parallelism, len(running))
 
-                dependencies_met = all(
-                    dep.task_id in completed_tasks for dep in task.dependencies
-                )
+                if not running:
+                    break
 
-                if dependencies_met:
-                    ready_tasks.append(task)
+                done, _ = await asyncio.wait(
+                    running.keys(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for finished in done:
+                    task_id = running.pop(finished)
+                    task = task_map[task_id]
+                    finished_at[task_id] = time.monotonic()
+                    running_by_type[task.task_type] -= 1
+
+                    try:
+                        result = finished.result()
+                    except Exception as e:
+                        result = TaskResult(
+                            task_id=task_id, status=TaskStatus.FAILED, error=str(e)
+                        )
+                    results.append(result)
 
-            if not ready_tasks:
-                # Check for circular dependencies
-                remaining_tasks = [
-                    task for task in tasks if task.id not in completed_tasks
-                ]
+                    if result.status == TaskStatus.COMPLETED:
+                        for dependent_id in dependents[task_id]:
+                            in_degree[dependent_id] -= 1
+                            if (
+                                in_degree[dependent_id] == 0
+                                and dependent_id not in unresolvable
+                            ):
+                                ready_since[dependent_id] = finished_at[task_id]
+                                push_ready(dependent_id)
+                    elif execution_context.rollback_enabled and not stop_dispatch:
+                        logger.warning(
+                            "Task failed in DAG execution, stopping remaining tasks",
+                            task_id=task_id,
+                        )
+                        stop_dispatch = True
+        finally:
+            for pending in running:
+                pending.cancel()
+
+        if not stop_dispatch:
+            remaining = [task for task in tasks if task.id not in started_at]
+            if remaining:
                 logger.error(
                     "Circular dependency detected or no tasks ready",
-                    remaining_tasks=[task.id for task in remaining_tasks],
+                    remaining_tasks=[task.id for task in remaining],
                 )
-
-                # Mark remaining tasks as failed
-                for task in remaining_tasks:
-                    results.append(
-                        TaskResult(
-                            task_id=task.id,
-                            status=TaskStatus.FAILED,
-                            error="Circular dependency or unmet dependencies",
-                        )
-                    )
-                break
-
-            # Execute ready tasks in parallel
-            batch_results = await self._execute_parallel(ready_tasks, execution_context)
-            results.extend(batch_results)
-
-            # Update completed tasks
-            for result in batch_results:
-                if result.status == TaskStatus.COMPLETED:
-                    completed_tasks.add(result.task_id)
-                elif execution_context.rollback_enabled:
-                    # Stop execution on failure
-                    logger.warning(
-                        "Task failed in DAG execution, stopping remaining tasks",
-                        task_id=result.task_id,
+            for task in remaining:
+                results.append(
+                    TaskResult(
+                        task_id=task.id,
+                        status=TaskStatus.FAILED,
+                        error="Circular dependency or unmet dependencies",
                     )
-                    return results
+                )
+
+        self._record_dag_timing(
+            execution_context.batch_id,
+            task_map,
+            started_at,
+            finished_at,
+            makespan=time.monotonic() - batch_start,
+            max_parallelism=max_parallelism,
+            queue_wait=queue_wait,
+        )
 
         return results
 
+    def _record_dag_timing(
+        self,
+        batch_id: str,
+        task_map: Dict[str, Task],
+        started_at: Dict[str, float],
+        finished_at: Dict[str, float],
+        makespan: float,
+        max_parallelism: int,
+        queue_wait: float,
+    ) -> None:
+        """Derive the critical path from observed start/finish times.
+
+        Starting at the task that finished last, walk back through the
+        dependency that finished latest before it, i.e. the one that actually
+        gated its start.
+        """
+        critical_path: List[str] = []
+        if finished_at:
+            current: Optional[str] = max(finished_at, key=finished_at.__getitem__)
+            while current is not None:
+                critical_path.append(current)
+                gating = [
+                    dep.task_id
+                    for dep in task_map[current].dependencies
+                    if dep.task_id in finished_at
+                ]
+                current = (
+                    max(gating, key=finished_at.__getitem__) if gating else None
+                )
+            critical_path.reverse()
+
+        timing = DagTiming(
+            batch_id=batch_id,
+            makespan_seconds=makespan,
+            critical_path=critical_path,
+            critical_path_seconds=sum(
+                finished_at[task_id] - started_at[task_id] for task_id in critical_path
+            ),
+            max_parallelism=max_parallelism,
+            queue_wait_seconds=queue_wait,
+        )
+        self._dag_timings[batch_id] = timing
+        self._dag_timings.move_to_end(batch_id)
+        while len(self._dag_timings) > self._max_dag_timings:
+            self._dag_timings.popitem(last=False)
+
+        logger.info(
+            "DAG execution timing",
+            batch_id=batch_id,
+            makespan_seconds=round(makespan, 4),
+            critical_path_seconds=round(timing.critical_path_seconds, 4),
+            critical_path_length=len(critical_path),
+            max_parallelism=max_parallelism,
+        )
+
     async def _execute_single_task(
         self, task: Task, execution_context: ExecutionContext
     ) -> TaskResult:
@@ -738,6 +961,11 @@ class TaskExecutionEngine:
                     [r for r in results if r.status == TaskStatus.ROLLED_BACK]
                 ),
                 "results": [result.model_dump() for result in results],
+                "dag_timing": (
+                    self._dag_timings[batch_id].model_dump()
+                    if batch_id in self._dag_timings
+                    else None
+                ),
             }
 
         return None
@@ -784,4 +1012,5 @@ class TaskExecutionEngine:
             "success_rate": self._tasks_executed
             / max(self._tasks_executed + self._tasks_failed, 1),
             "base_path": str(self.base_path),
+            "locks": self._locks.stats(),
         }
@@ -0,0 +1,220 @@
+"""Persistent state for quality gates: input hashing, result cache, history.
+
+Layout under ``base_path``::
+
+    file_digests.json       path -> [size, mtime_ns, sha256] so unchanged files
+                            are not re-read when computing input hashes
+    results/<gate>.json     last cacheable result and the input hash it ran on
+    history.jsonl           append-only per-run records (durations, status)
+
+Result and digest files are replaced atomically (temporary file, fsync,
+rename). The history log is compacted to the newest ``max_history_records``
+entries once it grows past twice that size.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_READ_CHUNK = 1024 * 1024
+
+
+def _atomic_write_json(path: Path, data: Any) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"), default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_READ_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InputHasher:
+    """Content hash over a gate's declared input files and configuration.
+
+    File digests are memoised by ``(size, mtime_ns)``, so a run only reads
+    files that changed since the previous run.
+    """
+
+    def __init__(self, digest_path: Path):
+        self.digest_path = digest_path
+        self._lock = threading.Lock()
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._dirty = False
+        if digest_path.exists():
+            try:
+                with open(digest_path, "r", encoding="utf-8") as f:
+                    self._digests = {k: tuple(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                logger.warning("Discarding unreadable gate digest cache", error=str(e))
+
+    def expand(self, root: Path, patterns: Iterable[str]) -> List[str]:
+        """Resolve glob patterns relative to ``root`` to sorted file paths."""
+        files = set()
+        for pattern in patterns:
+            for match in glob.iglob(str(root / pattern), recursive=True):
+                if os.path.isfile(match):
+                    files.add(os.path.relpath(match, root))
+        return sorted(files)
+
+    def _digest(self, path: str) -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = os.path.abspath(path)
+        cached = self._digests.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = _file_sha256(path)
+        with self._lock:
+            self._digests[key] = (stat.st_size, stat.st_mtime_ns, digest)
+            self._dirty = True
+        return digest
+
+    def compute(self, root: Path, patterns: Iterable[str], config: Dict[str, Any]) -> str:
+        """Hash of the gate configuration plus every matched file's content."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(config, sort_keys=True, default=str).encode("utf-8"))
+        for relative in self.expand(root, patterns):
+            file_digest = self._digest(str(root / relative))
+            if file_digest is None:
+                continue
+            digest.update(b"\x00")
+            digest.update(relative.encode("utf-8"))
+            digest.update(b"\x00")
+            digest.update(file_digest.encode("ascii"))
+        return digest.hexdigest()
+
+    def save(self) -> None:
+        """Persist memoised digests if any changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {k: list(v) for k, v in self._digests.items()}
+            self._dirty = False
+        _atomic_write_json(self.digest_path, snapshot)
+
+
+class GateStore:
+    """Result cache and run history for quality gates."""
+
+    def __init__(self, base_path: Path, max_history_records: int = 5000):
+        self.base_path = base_path
+        self.results_path = base_path / "results"
+        self.results_path.mkdir(parents=True, exist_ok=True)
+        self.history_path = base_path / "history.jsonl"
+        self.max_history_records = max_history_records
+        self.hasher = InputHasher(base_path / "file_digests.json")
+        self._history_lock = threading.Lock()
+        self._history_records = self._count_history()
+
+    def _count_history(self) -> int:
+        if not self.history_path.exists():
+            return 0
+        with open(self.history_path, "rb") as f:
+            return sum(1 for _ in f)
+
+    # Result cache
+
+    def get_cached(self, gate: str, input_hash: str) -> Optional[Dict[str, Any]]:
+        """Cached result for ``gate`` if it last ran on the same inputs."""
+        path = self.results_path / f"{gate}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable gate result", gate=gate, error=str(e))
+            return None
+        if entry.get("input_hash") != input_hash:
+            return None
+        return entry.get("result")
+
+    def put_cached(self, gate: str, input_hash: str, result: Dict[str, Any]) -> None:
+        _atomic_write_json(
+            self.results_path / f"{gate}.json",
+            {"input_hash": input_hash, "result": result},
+        )
+        self.hasher.save()
+
+    def invalidate(self, gate: Optional[str] = None) -> None:
+        """Drop cached results for one gate, or all of them."""
+        paths = (
+            [self.results_path / f"{gate}.json"]
+            if gate
+            else list(self.results_path.glob("*.json"))
+        )
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    # History
+
+    def append_history(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        with self._history_lock:
+            with open(self.history_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._history_records += 1
+            if self._history_records > 2 * self.max_history_records:
+                self._compact_history()
+
+    def _compact_history(self) -> None:
+        records = self._read_history()[-self.max_history_records :]
+        tmp_path = self.history_path.with_name(f".{self.history_path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.history_path)
+        self._history_records = len(records)
+
+    def _read_history(self) -> List[Dict[str, Any]]:
+        if not self.history_path.exists():
+            return []
+        records = []
+        with open(self.history_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Torn trailing line from an interrupted write
+                    continue
+        return records
+
+    def history(
+        self, gate: Optional[str] = None, limit: int = 50, include_cached: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Newest-first history records, optionally for one gate."""
+        with self._history_lock:
+            records = self._read_history()
+        selected = []
+        for record in reversed(records):
+            if gate and record.get("gate_type") != gate:
+                continue
+            if not include_cached and record.get("cached"):
+                continue
+            selected.append(record)
+            if len(selected) >= limit:
+                break
+        return selected
@@ -0,0 +1,105 @@
+"""Keyed asyncio locks with reference-counted eviction.
+
+``KeyedLock`` hands out one ``asyncio.Lock`` per key, but only keeps an entry
+while some coroutine holds or waits for it; the last release drops the entry.
+Memory therefore tracks the number of keys in use, not the number of keys ever
+seen. Lookup needs no registry-wide lock: the entry is found or created and
+its reference count bumped without yielding to the event loop.
+
+Acquisition counts and wait times are aggregated exactly in-process (see
+``stats``). A ``sample_rate`` fraction of acquisitions is also reported to the
+workflow metrics as ``ai_workflow_lock_wait_seconds``, labelled with whether
+the key was already held, so contention stays visible without emitting a
+metric on every lock.
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Hashable
+
+from .metrics import record_histogram
+
+
+class _Entry:
+    __slots__ = ("lock", "refs")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.refs = 0
+
+
+class KeyedLock:
+    """Per-key mutual exclusion whose registry only holds keys in use."""
+
+    def __init__(self, name: str, sample_rate: float = 0.01):
+        self.name = name
+        self.sample_rate = sample_rate
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._labels = {"registry": name}
+
+        self._acquisitions = 0
+        self._contended = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._peak_keys = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def locked(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.lock.locked()
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        """Hold the lock for ``key`` for the duration of the block."""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry()
+            self._peak_keys = max(self._peak_keys, len(self._entries))
+        entry.refs += 1
+
+        contended = entry.lock.locked()
+        started = time.perf_counter()
+        try:
+            await entry.lock.acquire()
+        except BaseException:
+            self._unref(key, entry)
+            raise
+        self._record_wait(time.perf_counter() - started, contended)
+
+        try:
+            yield
+        finally:
+            entry.lock.release()
+            self._unref(key, entry)
+
+    def _unref(self, key: Hashable, entry: _Entry) -> None:
+        entry.refs -= 1
+        if entry.refs == 0 and self._entries.get(key) is entry:
+            del self._entries[key]
+
+    def _record_wait(self, waited: float, contended: bool) -> None:
+        self._acquisitions += 1
+        self._wait_total += waited
+        if waited > self._wait_max:
+            self._wait_max = waited
+        if contended:
+            self._contended += 1
+        if random.random() < self.sample_rate:
+            labels = {**self._labels, "contended": str(contended).lower()}
+            record_histogram("ai_workflow_lock_wait_seconds", waited, labels=labels)
+
+    def stats(self) -> Dict[str, Any]:
+        """Acquisition and wait-time counters since creation."""
+        return {
+            "active_keys": len(self._entries),
+            "peak_keys": self._peak_keys,
+            "acquisitions": self._acquisitions,
+            "contended": self._contended,
+            "contention_rate": self._contended / max(self._acquisitions, 1),
+            "wait_seconds_total": round(self._wait_total, 6),
+            "wait_seconds_max": round(self._wait_max, 6),
+        }
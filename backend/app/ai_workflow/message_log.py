@@ -0,0 +1,314 @@
+"""Append-only storage primitives for the agent message bus.
+
+- ``SegmentLog`` is one message stream (an agent inbox or the broadcast
+  channel) stored as size-bounded append-only segment files. Every record has
+  a monotonically increasing offset; a segment file is deleted once none of
+  its records are live any more.
+- ``AckTracker`` persists a consumer's acknowledged offsets as a low
+  watermark (everything below it is acknowledged) plus the sparse set of
+  acknowledged offsets above it, so acknowledging out of order is cheap. The
+  watermark is also advanced past offsets released from the stream without
+  the consumer acknowledging them (expired messages, or its own broadcasts).
+- ``PriorityIndex`` keeps live messages in a heap on ``(priority, timestamp,
+  offset)``, so adding is O(log n) and reading the highest-priority page
+  walks only as much of the heap as the page needs.
+
+All methods do blocking file I/O and are called from the bus via
+``asyncio.to_thread`` under per-stream locks.
+"""
+
+import bisect
+import heapq
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_SEGMENT_SUFFIX = ".log"
+
+
+class SegmentLog:
+    """Append-only, segmented record log for one message stream."""
+
+    def __init__(self, path: Path, max_segment_bytes: int = 8 * 1024 * 1024):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.next_offset = 0
+        # Segment base offset -> number of live records in it
+        self._live: Dict[int, int] = {}
+        self._segment_of: Dict[int, int] = {}
+        self._tail_base: Optional[int] = None
+        self._tail_size = 0
+
+    def _segment_path(self, base_offset: int) -> Path:
+        return self.path / f"{base_offset:020d}{_SEGMENT_SUFFIX}"
+
+    def recover(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield ``(offset, record)`` for every stored record, oldest first.
+
+        A torn trailing record left by a crash is truncated away so the next
+        append starts on a clean line.
+        """
+        segments = sorted(self.path.glob(f"*{_SEGMENT_SUFFIX}"))
+        for segment in segments:
+            base_offset = int(segment.stem)
+            self._live.setdefault(base_offset, 0)
+            self._tail_base = base_offset
+            valid_bytes = 0
+            with open(segment, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    valid_bytes += len(line)
+                    offset = record["o"]
+                    self.next_offset = max(self.next_offset, offset + 1)
+                    self._segment_of[offset] = base_offset
+                    self._live[base_offset] += 1
+                    yield offset, record["m"]
+            if valid_bytes != segment.stat().st_size:
+                logger.warning(
+                    "Truncating torn message log record",
+                    segment=str(segment),
+                    valid_bytes=valid_bytes,
+                )
+                with open(segment, "r+b") as f:
+                    f.truncate(valid_bytes)
+            self._tail_size = valid_bytes
+
+    def append(self, message: Dict[str, Any]) -> int:
+        """Append a record and return its offset."""
+        offset = self.next_offset
+        line = (
+            json.dumps({"o": offset, "m": message}, separators=(",", ":"), default=str)
+            + "\n"
+        ).encode("utf-8")
+
+        if (
+            self._tail_base is None
+            or self._tail_size + len(line) > self.max_segment_bytes
+        ):
+            previous_tail = self._tail_base
+            self._tail_base = offset
+            self._tail_size = 0
+            self._live[offset] = 0
+            if previous_tail is not None:
+                self._drop_if_dead(previous_tail)
+
+        with open(self._segment_path(self._tail_base), "ab") as f:
+            f.write(line)
+            f.flush()
+        self._tail_size += len(line)
+        self._segment_of[offset] = self._tail_base
+        self._live[self._tail_base] += 1
+        self.next_offset = offset + 1
+        return offset
+
+    def release(self, offset: int) -> None:
+        """Mark a record as no longer live; reclaims fully released segments."""
+        base_offset = self._segment_of.pop(offset, None)
+        if base_offset is None:
+            return
+        self._live[base_offset] -= 1
+        self._drop_if_dead(base_offset)
+
+    def _drop_if_dead(self, base_offset: int) -> None:
+        if base_offset == self._tail_base or self._live.get(base_offset, 1) > 0:
+            return
+        del self._live[base_offset]
+        try:
+            os.remove(self._segment_path(base_offset))
+        except FileNotFoundError:
+            pass
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._live)
+
+
+class AckTracker:
+    """Persistent acknowledged-offset set for one consumer of one stream."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.watermark = 0
+        self._acked: Set[int] = set()
+        self._records = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                self._records += 1
+                if line.startswith("w"):
+                    self.watermark = max(self.watermark, int(line[1:]))
+                else:
+                    self._acked.add(int(line))
+        self._acked = {offset for offset in self._acked if offset >= self.watermark}
+        self._advance()
+
+    def _advance(self) -> None:
+        while self.watermark in self._acked:
+            self._acked.discard(self.watermark)
+            self.watermark += 1
+
+    def is_acked(self, offset: int) -> bool:
+        return offset < self.watermark or offset in self._acked
+
+    def ack(self, offset: int) -> bool:
+        """Persist an acknowledgement; returns False if it was already acked."""
+        with self._lock:
+            if self.is_acked(offset):
+                return False
+            self._append(f"{offset}")
+            self._acked.add(offset)
+            if offset == self.watermark:
+                self._advance()
+            self._maybe_compact()
+            return True
+
+    def advance(self, offset: int) -> bool:
+        """Treat every offset below ``offset`` as acknowledged.
+
+        Called with the stream's lowest live offset, so offsets released
+        without this consumer's acknowledgement stop holding the watermark
+        back. Returns False if the watermark was already past ``offset``.
+        """
+        with self._lock:
+            if offset <= self.watermark:
+                return False
+            self._append(f"w{offset}")
+            self.watermark = offset
+            self._acked = {acked for acked in self._acked if acked >= offset}
+            self._advance()
+            self._maybe_compact()
+            return True
+
+    @property
+    def pending_count(self) -> int:
+        """Acknowledged offsets held above the watermark."""
+        return len(self._acked)
+
+    def _append(self, line: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"{line}\n")
+        self._records += 1
+
+    def _maybe_compact(self) -> None:
+        if self._records > 2 * len(self._acked) + 1000:
+            self._compact()
+
+    def _compact(self) -> None:
+        lines = [f"w{self.watermark}"] + [str(offset) for offset in sorted(self._acked)]
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._records = len(lines)
+
+
+class PriorityIndex:
+    """Live messages ordered by ``(priority, timestamp, offset)``.
+
+    Removal only drops the entry; its heap key and offset are skipped when
+    read and discarded once stale keys outnumber live ones. Compaction builds
+    new lists rather than editing the old ones, so iterators already running
+    keep a consistent view.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, float, int]] = []
+        # Offsets in log order, including removed ones until compaction
+        self._offsets: List[int] = []
+        self._entries: Dict[int, Tuple[Tuple[int, float, int], Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, offset: int) -> bool:
+        return offset in self._entries
+
+    def add(self, offset: int, priority: int, timestamp: float, message: Any) -> None:
+        key = (priority, timestamp, offset)
+        heapq.heappush(self._heap, key)
+        if self._offsets and offset < self._offsets[-1]:
+            bisect.insort(self._offsets, offset)
+        else:
+            self._offsets.append(offset)
+        self._entries[offset] = (key, message)
+
+    def first_offset(self) -> Optional[int]:
+        """Lowest live offset; entries are added in log (offset) order."""
+        return next(iter(self._entries), None)
+
+    def get(self, offset: int) -> Optional[Any]:
+        entry = self._entries.get(offset)
+        return entry[1] if entry else None
+
+    def remove(self, offset: int) -> Optional[Any]:
+        entry = self._entries.pop(offset, None)
+        if entry is None:
+            return None
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._compact()
+        return entry[1]
+
+    def _compact(self) -> None:
+        heap = [key for key, _ in self._entries.values()]
+        heapq.heapify(heap)
+        self._heap = heap
+        self._offsets = list(self._entries)
+
+    def iter_ordered(self) -> Iterator[Tuple[Tuple[int, float, int], Any]]:
+        """Yield ``(key, message)`` in priority order.
+
+        Walks the heap from the root through a frontier of candidate nodes, so
+        taking the first k entries costs O(k log k) and nothing is copied.
+        Callers may remove entries while iterating.
+        """
+        heap = self._heap
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            key, position = heapq.heappop(frontier)
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+            entry = self._entries.get(key[2])
+            if entry is not None:
+                yield key, entry[1]
+
+    def iter_by_offset(self, after: int) -> Iterator[Tuple[int, Any]]:
+        """Yield ``(offset, message)`` with ``offset > after`` in log order."""
+        offsets = self._offsets
+        for position in range(bisect.bisect_right(offsets, after), len(offsets)):
+            entry = self._entries.get(offsets[position])
+            if entry is not None:
+                yield offsets[position], entry[1]
+
+    def remove_where(self, predicate: Callable[[Any], bool]) -> List[int]:
+        """Remove entries whose message matches ``predicate``; returns offsets."""
+        removed = [
+            offset
+            for offset, (_, message) in self._entries.items()
+            if predicate(message)
+        ]
+        for offset in removed:
+            self.remove(offset)
+        return removed
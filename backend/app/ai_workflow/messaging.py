@@ -5,19 +5,21 @@ persistence, and error handling. Supports point-to-point and broadcast messaging
 """
 
 import asyncio
-import json
+import heapq
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-import aiofiles
-import aiofiles.os
 import structlog
 from pydantic import BaseModel, Field
 
 from app.core.config import get_settings
 
+from .keyed_lock import KeyedLock
+from .message_log import AckTracker, PriorityIndex, SegmentLog
 from .metrics import increment_counter
 
 logger = structlog.get_logger(__name__)
@@ -54,15 +56,23 @@ class AgentMessageBus:
     """File-based messaging system for agent coordination.
 
     Provides reliable message passing between agents with delivery confirmation,
-    message persistence, and error handling. Messages are stored as JSON files
-    in agent-specific directories for isolation and reliability.
+    message persistence, and error handling. Each agent inbox and the broadcast
+    channel is an append-only segmented log; pending messages are held in an
+    in-memory priority index so polling never touches the disk. Consumers
+    acknowledge by offset, and waiting consumers are woken by an
+    ``asyncio.Event`` when a message arrives instead of polling.
     """
 
-    def __init__(self, base_path: Optional[Path] = None):
+    def __init__(
+        self,
+        base_path: Optional[Path] = None,
+        max_segment_bytes: int = 8 * 1024 * 1024,
+    ):
         """Initialize message bus with base path for message storage."""
         settings = get_settings()
         self.base_path = base_path or Path("/tmp/ai_workflow/messages")
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
 
         # Message counters for metrics
         self._message_counter = 0
@@ -72,13 +82,27 @@ class AgentMessageBus:
         self._active_agents: Dict[str, datetime] = {}
 
         # Message locks for concurrent access
-        self._locks: Dict[str, asyncio.Lock] = {}
+        self._locks = KeyedLock("message_bus")
+
+        # Per-agent inbox streams
+        self._inbox_logs: Dict[str, SegmentLog] = {}
+        self._inbox_index: Dict[str, PriorityIndex] = {}
+        self._inbox_acks: Dict[str, AckTracker] = {}
+
+        # Shared broadcast stream with per-agent acknowledgements
+        self._broadcast_log: Optional[SegmentLog] = None
+        self._broadcast_index = PriorityIndex()
+        self._broadcast_acks: Dict[str, AckTracker] = {}
+        # Broadcast offsets released from the stream, so recovery skips them
+        self._broadcast_released: Optional[AckTracker] = None
 
-    async def _get_lock(self, key: str) -> asyncio.Lock:
-        """Get or create lock for a given key."""
-        if key not in self._locks:
-            self._locks[key] = asyncio.Lock()
-        return self._locks[key]
+        # message id -> (recipient agent, or None for broadcast; offset)
+        self._locations: Dict[str, Tuple[Optional[str], int]] = {}
+        self._delivered: "OrderedDict[str, datetime]" = OrderedDict()
+        self._max_delivery_records = 10000
+
+        # Push notification for waiting consumers
+        self._events: Dict[str, asyncio.Event] = {}
 
     async def _get_agent_inbox(self, agent_id: str) -> Path:
         """Get agent inbox directory path."""
@@ -86,25 +110,112 @@ class AgentMessageBus:
         inbox_path.mkdir(parents=True, exist_ok=True)
         return inbox_path
 
-    async def _get_agent_outbox(self, agent_id: str) -> Path:
-        """Get agent outbox directory path."""
-        outbox_path = self.base_path / agent_id / "outbox"
-        outbox_path.mkdir(parents=True, exist_ok=True)
-        return outbox_path
-
     async def _get_broadcast_inbox(self) -> Path:
         """Get broadcast inbox directory path."""
         broadcast_path = self.base_path / "broadcast"
         broadcast_path.mkdir(parents=True, exist_ok=True)
         return broadcast_path
 
+    @staticmethod
+    def _is_expired(message: Message, now: datetime) -> bool:
+        return message.expires_at is not None and now > message.expires_at
+
+    @staticmethod
+    def _index_key(message: Message) -> Tuple[int, float]:
+        return message.priority, message.timestamp.timestamp()
+
+    @staticmethod
+    def _low_offset(log: SegmentLog, index: PriorityIndex) -> int:
+        """Offset below which every record of the stream has been released."""
+        first = index.first_offset()
+        return log.next_offset if first is None else first
+
+    def _open_stream(
+        self, path: Path, acks: AckTracker
+    ) -> Tuple[SegmentLog, PriorityIndex]:
+        """Recover a stream from disk, indexing messages that are still live.
+
+        ``acks`` holds the offsets already released from the stream: the
+        inbox acknowledgements, or the broadcasts every agent is done with.
+
+        Plain JSON message files from the previous one-file-per-message layout
+        are appended to the log and removed.
+        """
+        log = SegmentLog(path, max_segment_bytes=self.max_segment_bytes)
+        index = PriorityIndex()
+        now = datetime.now(timezone.utc)
+
+        for offset, data in log.recover():
+            message = Message.model_validate(data)
+            if acks.is_acked(offset) or self._is_expired(message, now):
+                log.release(offset)
+                continue
+            index.add(offset, *self._index_key(message), message)
+
+        # Expired records released above are settled without an ack
+        acks.advance(self._low_offset(log, index))
+
+        for legacy_file in sorted(path.glob("*.json")):
+            try:
+                message = Message.model_validate_json(legacy_file.read_text())
+                offset = log.append(message.model_dump(mode="json"))
+                index.add(offset, *self._index_key(message), message)
+                legacy_file.unlink()
+            except Exception as e:
+                logger.warning(
+                    "Failed to import message file",
+                    file=str(legacy_file),
+                    error=str(e),
+                )
+
+        return log, index
+
+    async def _ensure_broadcast_stream(self) -> SegmentLog:
+        if self._broadcast_log is None:
+            broadcast_path = await self._get_broadcast_inbox()
+            released = await asyncio.to_thread(
+                AckTracker, self.base_path / "broadcast.acks"
+            )
+            log, index = await asyncio.to_thread(
+                self._open_stream, broadcast_path, released
+            )
+            if self._broadcast_log is None:
+                self._broadcast_log, self._broadcast_index = log, index
+                self._broadcast_released = released
+                for offset, message in index.iter_by_offset(-1):
+                    self._locations[message.id] = (None, offset)
+        return self._broadcast_log
+
     async def register_agent(self, agent_id: str) -> None:
         """Register an agent as active in the system."""
         self._active_agents[agent_id] = datetime.now(timezone.utc)
+        self._events.setdefault(agent_id, asyncio.Event())
+
+        async with self._locks.hold(f"inbox_{agent_id}"):
+            if agent_id not in self._inbox_logs:
+                inbox_path = await self._get_agent_inbox(agent_id)
+                agent_path = self.base_path / agent_id
+                acks = await asyncio.to_thread(AckTracker, agent_path / "inbox.acks")
+                broadcast_acks = await asyncio.to_thread(
+                    AckTracker, agent_path / "broadcast.acks"
+                )
+                log, index = await asyncio.to_thread(
+                    self._open_stream, inbox_path, acks
+                )
 
-        # Create agent directories
-        await self._get_agent_inbox(agent_id)
-        await self._get_agent_outbox(agent_id)
+                self._inbox_logs[agent_id] = log
+                self._inbox_index[agent_id] = index
+                self._inbox_acks[agent_id] = acks
+                self._broadcast_acks[agent_id] = broadcast_acks
+                for offset, message in index.iter_by_offset(-1):
+                    self._locations[message.id] = (agent_id, offset)
+
+        broadcast_log = await self._ensure_broadcast_stream()
+        async with self._locks.hold("broadcast"):
+            await asyncio.to_thread(
+                self._broadcast_acks[agent_id].advance,
+                self._low_offset(broadcast_log, self._broadcast_index),
+            )
 
         logger.info("Agent registered", agent_id=agent_id)
         increment_counter("ai_workflow_agent_registered")
@@ -117,6 +228,16 @@ class AgentMessageBus:
         logger.info("Agent unregistered", agent_id=agent_id)
         increment_counter("ai_workflow_agent_unregistered")
 
+    def _record_delivery(self, message_id: str) -> None:
+        self._delivered[message_id] = datetime.now(timezone.utc)
+        while len(self._delivered) > self._max_delivery_records:
+            self._delivered.popitem(last=False)
+
+    def _notify(self, agent_id: str) -> None:
+        event = self._events.get(agent_id)
+        if event is not None:
+            event.set()
+
     async def send_message(
         self,
         from_agent: str,
@@ -165,21 +286,18 @@ class AgentMessageBus:
         )
 
         try:
-            # Get target agent inbox and lock
-            inbox_path = await self._get_agent_inbox(to_agent)
-            lock = await self._get_lock(f"inbox_{to_agent}")
-
-            async with lock:
-                # Write message to target inbox
-                message_file = inbox_path / f"{message.id}.json"
-                async with aiofiles.open(message_file, "w") as f:
-                    await f.write(message.model_dump_json(indent=2))
-
-                # Store in sender's outbox for tracking
-                outbox_path = await self._get_agent_outbox(from_agent)
-                outbox_file = outbox_path / f"{message.id}.json"
-                async with aiofiles.open(outbox_file, "w") as f:
-                    await f.write(message.model_dump_json(indent=2))
+            async with self._locks.hold(f"inbox_{to_agent}"):
+                # Append message to the target inbox log
+                offset = await asyncio.to_thread(
+                    self._inbox_logs[to_agent].append, message.model_dump(mode="json")
+                )
+                self._inbox_index[to_agent].add(
+                    offset, *self._index_key(message), message
+                )
+                self._locations[message.id] = (to_agent, offset)
+
+            self._record_delivery(message.id)
+            self._notify(to_agent)
 
             self._message_counter += 1
             logger.info(
@@ -236,14 +354,18 @@ class AgentMessageBus:
         )
 
         try:
-            # Write to broadcast directory
-            broadcast_path = await self._get_broadcast_inbox()
-            lock = await self._get_lock("broadcast")
+            broadcast_log = await self._ensure_broadcast_stream()
+            async with self._locks.hold("broadcast"):
+                offset = await asyncio.to_thread(
+                    broadcast_log.append, message.model_dump(mode="json")
+                )
+                self._broadcast_index.add(offset, *self._index_key(message), message)
+                self._locations[message.id] = (None, offset)
 
-            async with lock:
-                message_file = broadcast_path / f"{message.id}.json"
-                async with aiofiles.open(message_file, "w") as f:
-                    await f.write(message.model_dump_json(indent=2))
+            self._record_delivery(message.id)
+            for agent_id in self._active_agents:
+                if agent_id != from_agent:
+                    self._notify(agent_id)
 
             self._message_counter += 1
             logger.info(
@@ -268,6 +390,31 @@ class AgentMessageBus:
             increment_counter("ai_workflow_broadcast_error")
             raise
 
+    def _pending_for(
+        self, agent_id: str, now: datetime, expired: List[Tuple[Optional[str], int]]
+    ) -> Iterator[Message]:
+        """Pending inbox and broadcast messages for an agent in priority order."""
+        acks = self._broadcast_acks[agent_id]
+
+        def inbox() -> Iterator[Tuple[Tuple[int, float, int], Message]]:
+            for key, message in self._inbox_index[agent_id].iter_ordered():
+                if self._is_expired(message, now):
+                    expired.append((agent_id, key[2]))
+                    continue
+                yield key, message
+
+        def broadcasts() -> Iterator[Tuple[Tuple[int, float, int], Message]]:
+            for key, message in self._broadcast_index.iter_ordered():
+                if message.from_agent == agent_id or acks.is_acked(key[2]):
+                    continue
+                if self._is_expired(message, now):
+                    expired.append((None, key[2]))
+                    continue
+                yield key, message
+
+        for _, message in heapq.merge(inbox(), broadcasts(), key=lambda e: e[0][:2]):
+            yield message
+
     async def get_messages(self, agent_id: str, limit: int = 50) -> List[Message]:
         """Get pending messages for an agent.
 
@@ -281,83 +428,138 @@ class AgentMessageBus:
         if agent_id not in self._active_agents:
             raise ValueError(f"Agent {agent_id} is not registered")
 
-        messages: List[Message] = []
-
         try:
-            # Get direct messages from inbox
-            inbox_path = await self._get_agent_inbox(agent_id)
-            lock = await self._get_lock(f"inbox_{agent_id}")
-
-            async with lock:
-                if inbox_path.exists():
-                    for message_file in inbox_path.glob("*.json"):
-                        try:
-                            async with aiofiles.open(message_file, "r") as f:
-                                content = await f.read()
-                                message = Message.model_validate_json(content)
-
-                                # Check if message expired
-                                if (
-                                    message.expires_at
-                                    and datetime.now(timezone.utc) > message.expires_at
-                                ):
-                                    await aiofiles.os.remove(message_file)
-                                    continue
-
-                                messages.append(message)
-                        except Exception as e:
-                            logger.warning(
-                                "Failed to read message file",
-                                file=str(message_file),
-                                error=str(e),
-                            )
-
-            # Get broadcast messages
-            broadcast_path = await self._get_broadcast_inbox()
-            broadcast_lock = await self._get_lock("broadcast")
-
-            async with broadcast_lock:
-                if broadcast_path.exists():
-                    for message_file in broadcast_path.glob("*.json"):
-                        try:
-                            async with aiofiles.open(message_file, "r") as f:
-                                content = await f.read()
-                                message = Message.model_validate_json(content)
-
-                                # Skip messages from self
-                                if message.from_agent == agent_id:
-                                    continue
-
-                                # Check if message expired
-                                if (
-                                    message.expires_at
-                                    and datetime.now(timezone.utc) > message.expires_at
-                                ):
-                                    continue
-
-                                messages.append(message)
-                        except Exception as e:
-                            logger.warning(
-                                "Failed to read broadcast message",
-                                file=str(message_file),
-                                error=str(e),
-                            )
-
-            # Sort by priority (lower number = higher priority) then timestamp
-            messages.sort(key=lambda m: (m.priority, m.timestamp))
+            expired: List[Tuple[Optional[str], int]] = []
+            messages = list(
+                islice(
+                    self._pending_for(agent_id, datetime.now(timezone.utc), expired),
+                    limit,
+                )
+            )
+            if expired:
+                await self._drop_expired(expired)
 
             logger.debug(
                 "Retrieved messages", agent_id=agent_id, message_count=len(messages)
             )
             increment_counter("ai_workflow_messages_retrieved")
 
-            return messages[:limit]
+            return messages
 
         except Exception as e:
             logger.error("Failed to get messages", agent_id=agent_id, error=str(e))
             increment_counter("ai_workflow_message_retrieval_error")
             raise
 
+    async def wait_for_messages(
+        self, agent_id: str, timeout: Optional[float] = None, limit: int = 50
+    ) -> List[Message]:
+        """Wait until messages are pending for an agent, then return them.
+
+        Args:
+            agent_id: Agent identifier
+            timeout: Maximum seconds to wait; None waits indefinitely
+            limit: Maximum number of messages to return
+
+        Returns:
+            Pending messages, or an empty list if the timeout expired
+        """
+        if agent_id not in self._active_agents:
+            raise ValueError(f"Agent {agent_id} is not registered")
+
+        event = self._events.setdefault(agent_id, asyncio.Event())
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        while True:
+            # Clear before checking so a send between the check and the wait
+            # still wakes us up
+            event.clear()
+            messages = await self.get_messages(agent_id, limit=limit)
+            if messages:
+                return messages
+
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return []
+            try:
+                await asyncio.wait_for(event.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return []
+
+    async def get_messages_since(
+        self, agent_id: str, cursor: int = -1, limit: int = 50
+    ) -> Tuple[List[Message], int]:
+        """Read unacknowledged inbox messages in log order after ``cursor``.
+
+        Args:
+            agent_id: Agent identifier
+            cursor: Offset returned by the previous call (-1 to start)
+            limit: Maximum number of messages to return
+
+        Returns:
+            Tuple of messages and the cursor to pass to the next call
+        """
+        if agent_id not in self._active_agents:
+            raise ValueError(f"Agent {agent_id} is not registered")
+
+        now = datetime.now(timezone.utc)
+        messages: List[Message] = []
+        next_cursor = cursor
+        for offset, message in self._inbox_index[agent_id].iter_by_offset(cursor):
+            next_cursor = offset
+            if self._is_expired(message, now):
+                continue
+            messages.append(message)
+            if len(messages) >= limit:
+                break
+        return messages, next_cursor
+
+    async def _release_inbox(self, agent_id: str, offset: int) -> bool:
+        """Acknowledge an inbox offset, drop it from the index and the log."""
+        async with self._locks.hold(f"inbox_{agent_id}"):
+            message = self._inbox_index[agent_id].remove(offset)
+            if message is None:
+                return False
+            self._locations.pop(message.id, None)
+            acks = self._inbox_acks[agent_id]
+            await asyncio.to_thread(acks.ack, offset)
+            self._inbox_logs[agent_id].release(offset)
+            await asyncio.to_thread(
+                acks.advance,
+                self._low_offset(
+                    self._inbox_logs[agent_id], self._inbox_index[agent_id]
+                ),
+            )
+            return True
+
+    async def _release_broadcast(self, offset: int) -> None:
+        """Drop a broadcast from the index and the log.
+
+        Every agent's broadcast watermark then moves past released offsets,
+        including broadcasts the agent sent or never acknowledged.
+        """
+        async with self._locks.hold("broadcast"):
+            message = self._broadcast_index.remove(offset)
+            if message is not None:
+                self._locations.pop(message.id, None)
+                await asyncio.to_thread(self._broadcast_released.ack, offset)
+                self._broadcast_log.release(offset)
+                low = self._low_offset(self._broadcast_log, self._broadcast_index)
+                await asyncio.to_thread(self._advance_broadcast_acks, low)
+
+    def _advance_broadcast_acks(self, low: int) -> None:
+        self._broadcast_released.advance(low)
+        for acks in list(self._broadcast_acks.values()):
+            acks.advance(low)
+
+    async def _drop_expired(self, expired: List[Tuple[Optional[str], int]]) -> None:
+        for agent_id, offset in expired:
+            if agent_id is None:
+                await self._release_broadcast(offset)
+            else:
+                await self._release_inbox(agent_id, offset)
+
     async def acknowledge_message(self, agent_id: str, message_id: str) -> bool:
         """Acknowledge receipt and processing of a message.
 
@@ -369,36 +571,34 @@ class AgentMessageBus:
             True if message was acknowledged successfully
         """
         try:
-            # Remove from agent inbox
-            inbox_path = await self._get_agent_inbox(agent_id)
-            message_file = inbox_path / f"{message_id}.json"
-
-            lock = await self._get_lock(f"inbox_{agent_id}")
-            async with lock:
-                if message_file.exists():
-                    await aiofiles.os.remove(message_file)
-
-                    logger.debug(
-                        "Message acknowledged", agent_id=agent_id, message_id=message_id
-                    )
-                    increment_counter("ai_workflow_message_acknowledged")
-                    return True
-
-            # Message might be a broadcast - check if it still exists
-            broadcast_path = await self._get_broadcast_inbox()
-            broadcast_file = broadcast_path / f"{message_id}.json"
-
-            broadcast_lock = await self._get_lock("broadcast")
-            async with broadcast_lock:
-                if broadcast_file.exists():
-                    # For broadcasts, we don't remove the file but log the acknowledgment
-                    logger.debug(
-                        "Broadcast message acknowledged",
-                        agent_id=agent_id,
-                        message_id=message_id,
-                    )
-                    increment_counter("ai_workflow_broadcast_acknowledged")
-                    return True
+            owner, offset = self._locations.get(message_id, ("", -1))
+
+            if owner == agent_id and await self._release_inbox(agent_id, offset):
+                logger.debug(
+                    "Message acknowledged", agent_id=agent_id, message_id=message_id
+                )
+                increment_counter("ai_workflow_message_acknowledged")
+                return True
+
+            if owner is None and agent_id in self._broadcast_acks:
+                await asyncio.to_thread(self._broadcast_acks[agent_id].ack, offset)
+
+                # Reclaim the broadcast once every other active agent has it
+                message = self._broadcast_index.get(offset)
+                if message is not None and all(
+                    self._broadcast_acks[other].is_acked(offset)
+                    for other in self._active_agents
+                    if other != message.from_agent and other in self._broadcast_acks
+                ):
+                    await self._release_broadcast(offset)
+
+                logger.debug(
+                    "Broadcast message acknowledged",
+                    agent_id=agent_id,
+                    message_id=message_id,
+                )
+                increment_counter("ai_workflow_broadcast_acknowledged")
+                return True
 
             logger.warning(
                 "Message not found for acknowledgment",
@@ -428,102 +628,43 @@ class AgentMessageBus:
         Returns:
             Delivery status or None if message not found
         """
-        # For now, we'll implement basic status checking
-        # In a production system, this would track actual delivery confirmations
-
-        # Check if message exists in any outbox (sent)
-        for agent_id in self._active_agents:
-            try:
-                outbox_path = await self._get_agent_outbox(agent_id)
-                message_file = outbox_path / f"{message_id}.json"
-
-                if message_file.exists():
-                    return MessageDeliveryStatus(
-                        message_id=message_id,
-                        delivered=True,  # Simplified for now
-                        delivered_at=datetime.now(timezone.utc),
-                        attempts=1,
-                    )
-            except Exception:
-                continue
-
-        # Check broadcast directory
-        try:
-            broadcast_path = await self._get_broadcast_inbox()
-            message_file = broadcast_path / f"{message_id}.json"
-
-            if message_file.exists():
-                return MessageDeliveryStatus(
-                    message_id=message_id,
-                    delivered=True,
-                    delivered_at=datetime.now(timezone.utc),
-                    attempts=1,
-                )
-        except Exception:
-            pass
-
-        return None
+        # A message is delivered once it has been appended to the recipient's
+        # log; recent deliveries are remembered even after acknowledgement.
+        delivered_at = self._delivered.get(message_id)
+        if delivered_at is None and message_id in self._locations:
+            delivered_at = datetime.now(timezone.utc)
+
+        if delivered_at is None:
+            return None
+
+        return MessageDeliveryStatus(
+            message_id=message_id,
+            delivered=True,
+            delivered_at=delivered_at,
+            attempts=1,
+        )
 
     async def cleanup_expired_messages(self) -> int:
-        """Clean up expired messages from all agent directories.
+        """Clean up expired messages from all agent inboxes and broadcasts.
 
         Returns:
             Number of messages cleaned up
         """
-        cleaned_count = 0
         current_time = datetime.now(timezone.utc)
+        expired: List[Tuple[Optional[str], int]] = []
 
         try:
-            # Clean agent inboxes
-            for agent_id in self._active_agents:
-                inbox_path = await self._get_agent_inbox(agent_id)
-                lock = await self._get_lock(f"inbox_{agent_id}")
-
-                async with lock:
-                    if inbox_path.exists():
-                        for message_file in inbox_path.glob("*.json"):
-                            try:
-                                async with aiofiles.open(message_file, "r") as f:
-                                    content = await f.read()
-                                    message = Message.model_validate_json(content)
-
-                                    if (
-                                        message.expires_at
-                                        and current_time > message.expires_at
-                                    ):
-                                        await aiofiles.os.remove(message_file)
-                                        cleaned_count += 1
-                            except Exception as e:
-                                logger.warning(
-                                    "Failed to check message expiration",
-                                    file=str(message_file),
-                                    error=str(e),
-                                )
-
-            # Clean broadcast directory
-            broadcast_path = await self._get_broadcast_inbox()
-            broadcast_lock = await self._get_lock("broadcast")
-
-            async with broadcast_lock:
-                if broadcast_path.exists():
-                    for message_file in broadcast_path.glob("*.json"):
-                        try:
-                            async with aiofiles.open(message_file, "r") as f:
-                                content = await f.read()
-                                message = Message.model_validate_json(content)
-
-                                if (
-                                    message.expires_at
-                                    and current_time > message.expires_at
-                                ):
-                                    await aiofiles.os.remove(message_file)
-                                    cleaned_count += 1
-                        except Exception as e:
-                            logger.warning(
-                                "Failed to check broadcast message expiration",
-                                file=str(message_file),
-                                error=str(e),
-                            )
+            for agent_id, index in self._inbox_index.items():
+                for key, message in index.iter_ordered():
+                    if self._is_expired(message, current_time):
+                        expired.append((agent_id, key[2]))
+
+            for key, message in self._broadcast_index.iter_ordered():
+                if self._is_expired(message, current_time):
+                    expired.append((None, key[2]))
+
+            await self._drop_expired(expired)
+            cleaned_count = len(expired)
 
             if cleaned_count > 0:
                 logger.info("Cleaned up expired messages", count=cleaned_count)
@@ -549,4 +690,11 @@ class AgentMessageBus:
             "error_rate": self._error_counter / max(self._message_counter, 1),
             "base_path": str(self.base_path),
             "agents": list(self._active_agents.keys()),
+            "pending_messages": {
+                agent_id: len(index) for agent_id, index in self._inbox_index.items()
+            },
+            "pending_broadcasts": len(self._broadcast_index),
+            "segment_files": sum(log.segment_count for log in self._inbox_logs.values())
+            + (self._broadcast_log.segment_count if self._broadcast_log else 0),
+            "locks": self._locks.stats(),
         }
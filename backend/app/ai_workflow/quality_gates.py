@@ -5,18 +5,20 @@ security compliance checks, and intelligent rollback capabilities.
 """
 
 import asyncio
-import subprocess
-import time
+import os
+import re
+import signal
+import statistics
+from collections import deque
 from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 import structlog
 from pydantic import BaseModel, Field
 
-from app.core.config import get_settings
-
+from .gate_store import GateStore
 from .metrics import increment_counter
 
 logger = structlog.get_logger(__name__)
@@ -71,6 +73,10 @@ class QualityGateConfig(BaseModel):
     success_patterns: List[str] = Field(default_factory=list)
     failure_patterns: List[str] = Field(default_factory=list)
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    # Globs (relative to the working directory) whose contents, together with
+    # this config, determine the result. Gates without inputs always run.
+    inputs: List[str] = Field(default_factory=list)
+    cacheable: bool = True
 
 
 class PerformanceMetrics(BaseModel):
@@ -95,6 +101,109 @@ class SecurityFinding(BaseModel):
     recommendation: Optional[str] = None
 
 
+_PYTHON_INPUTS = ["**/*.py", "pyproject.toml", "setup.cfg"]
+_TEST_INPUTS = _PYTHON_INPUTS + ["pytest.ini", "requirements*.txt", "tests/**/*.json"]
+_STREAM_CHUNK = 64 * 1024
+
+
+def _default_parallelism() -> int:
+    """Cores available to this process."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class GateOutputScanner:
+    """Incrementally parses a gate command's output as it is produced.
+
+    Pattern checks and test metrics are evaluated line by line, so only a
+    bounded tail of each stream is retained. Gates whose tools emit a JSON
+    report (code quality, security scan) still keep stdout, since the report
+    can only be parsed once complete.
+    """
+
+    def __init__(self, config: QualityGateConfig, tail_lines: int = 200):
+        self.gate_type = config.gate_type
+        self._failure_patterns = [p.lower() for p in config.failure_patterns]
+        self._success_patterns = [p.lower() for p in config.success_patterns]
+        self.failure_matched = False
+        self.success_matched = False
+        self.tails: Dict[str, Deque[str]] = {
+            "stdout": deque(maxlen=tail_lines),
+            "stderr": deque(maxlen=tail_lines)
+        }
+        self.line_counts = {"stdout": 0, "stderr": 0}
+        self._keep_stdout = config.gate_type in (
+            QualityGateType.CODE_QUALITY,
+            QualityGateType.SECURITY_SCAN
+        )
+        self._stdout_lines: List[str] = []
+        self.test_state: Dict[str, Any] = {"metrics": {}}
+
+    def feed(self, stream: str, line: str) -> None:
+        """Consume one line of ``stream`` ("stdout" or "stderr")."""
+        self.tails[stream].append(line)
+        self.line_counts[stream] += 1
+        lowered = line.lower()
+        if not self.failure_matched:
+            self.failure_matched = any(p in lowered for p in self._failure_patterns)
+        if not self.success_matched:
+            self.success_matched = any(p in lowered for p in self._success_patterns)
+        if stream == "stdout":
+            if self._keep_stdout:
+                self._stdout_lines.append(line)
+            if self.gate_type == QualityGateType.UNIT_TESTS:
+                _scan_test_line(line, self.test_state)
+
+    @property
+    def stdout(self) -> str:
+        """Full stdout for report-producing gates, otherwise the retained tail."""
+        lines = self._stdout_lines if self._keep_stdout else self.tails["stdout"]
+        return "\n".join(lines)
+
+    @property
+    def stderr(self) -> str:
+        return "\n".join(self.tails["stderr"])
+
+
+def _scan_test_line(line: str, state: Dict[str, Any]) -> None:
+    """Update pytest metrics from one line of output."""
+    metrics_data = state["metrics"]
+    if 'coverage' in line.lower() and '%' in line:
+        match = re.search(r'(\d+)%', line)
+        if match:
+            coverage = float(match.group(1)) / 100
+            metrics_data['coverage'] = coverage
+            state["coverage"] = coverage
+
+    if 'passed' in line and 'failed' in line:
+        passed_match = re.search(r'(\d+) passed', line)
+        failed_match = re.search(r'(\d+) failed', line)
+
+        if passed_match:
+            passed = int(passed_match.group(1))
+            metrics_data['tests_passed'] = passed
+
+        if failed_match:
+            failed = int(failed_match.group(1))
+            metrics_data['tests_failed'] = failed
+
+            if passed_match:
+                total = passed + failed
+                if total > 0:
+                    pass_rate = passed / total
+                    metrics_data['pass_rate'] = pass_rate
+                    state.setdefault("pass_rate", pass_rate)
+
+
+def _test_score(state: Dict[str, Any]) -> Optional[float]:
+    """Coverage when reported, otherwise the first pass rate seen."""
+    if "coverage" in state:
+        return state["coverage"]
+    return state.get("pass_rate")
+
+
 class AutomatedQualityGates:
     """Automated quality validation and rollback system.
 
@@ -102,10 +211,24 @@ class AutomatedQualityGates:
     performance validation, security scanning, and intelligent rollback.
     """
 
-    def __init__(self, project_root: Optional[Path] = None):
-        """Initialize quality gates system."""
-        settings = get_settings()
+    def __init__(
+        self,
+        project_root: Optional[Path] = None,
+        state_path: Optional[Path] = None,
+        max_parallel: Optional[int] = None
+    ):
+        """Initialize quality gates system.
+
+        Args:
+            project_root: Directory gate commands and input globs resolve against
+            state_path: Where the result cache and run history are persisted
+            max_parallel: Concurrent gate subprocesses (defaults to available cores)
+        """
         self.project_root = project_root or Path.cwd()
+        self.store = GateStore(state_path or Path("/tmp/ai_workflow/quality_gates"))
+        self.max_parallel = max_parallel or _default_parallelism()
+        self._subprocess_slots = asyncio.Semaphore(self.max_parallel)
+        self.output_tail_lines = 200
 
         # Default quality gate configurations
         self.gate_configs: Dict[QualityGateType, QualityGateConfig] = {
@@ -115,31 +238,36 @@ class AutomatedQualityGates:
                 timeout_seconds=180,
                 failure_threshold=0.8,
                 success_patterns=["test passed", "coverage"],
-                failure_patterns=["FAILED", "ERROR", "test failed"]
+                failure_patterns=["FAILED", "ERROR", "test failed"],
+                inputs=_TEST_INPUTS
             ),
             QualityGateType.INTEGRATION_TESTS: QualityGateConfig(
                 gate_type=QualityGateType.INTEGRATION_TESTS,
                 command="pytest tests/integration/ -v",
                 timeout_seconds=300,
-                failure_threshold=0.9
+                failure_threshold=0.9,
+                inputs=_TEST_INPUTS
             ),
             QualityGateType.BUILD_VALIDATION: QualityGateConfig(
                 gate_type=QualityGateType.BUILD_VALIDATION,
                 command="python -m py_compile $(find . -name '*.py')",
                 timeout_seconds=60,
-                failure_threshold=1.0
+                failure_threshold=1.0,
+                inputs=["**/*.py"]
             ),
             QualityGateType.CODE_QUALITY: QualityGateConfig(
                 gate_type=QualityGateType.CODE_QUALITY,
                 command="ruff check . --format json",
                 timeout_seconds=120,
-                failure_threshold=0.8
+                failure_threshold=0.8,
+                inputs=_PYTHON_INPUTS + ["ruff.toml", ".ruff.toml"]
             ),
             QualityGateType.SECURITY_SCAN: QualityGateConfig(
                 gate_type=QualityGateType.SECURITY_SCAN,
                 command="bandit -r . -f json",
                 timeout_seconds=180,
-                failure_threshold=0.7
+                failure_threshold=0.7,
+                inputs=_PYTHON_INPUTS + [".bandit"]
             )
         }
 
@@ -147,6 +275,7 @@ class AutomatedQualityGates:
         self._gates_executed = 0
         self._gates_passed = 0
         self._gates_failed = 0
+        self._cache_hits = 0
 
         # Active gate executions
         self._active_gates: Dict[str, asyncio.Task] = {}
@@ -203,31 +332,61 @@ class AutomatedQualityGates:
     async def check_performance_regression(self) -> Dict[str, Any]:
         """Detect performance regressions.
 
+        Runs the performance test gate (when configured) against the metric
+        baseline, and compares every gate's latest duration with its recorded
+        duration history.
+
         Returns:
             Performance regression analysis results
         """
         try:
-            # Run performance tests
-            perf_result = await self._run_single_gate(QualityGateType.PERFORMANCE_TESTS)
-
-            if perf_result.status != QualityGateStatus.PASSED:
-                return {
-                    "regression_detected": True,
-                    "severity": "high",
-                    "details": "Performance tests failed",
-                    "recommendations": ["Check recent changes", "Review performance logs"]
-                }
-
-            # Extract current metrics
-            current_metrics = self._extract_performance_metrics(perf_result)
+            regression_analysis: Dict[str, Any] = {
+                "regression_detected": False,
+                "severity": "none",
+                "details": [],
+                "recommendations": []
+            }
 
-            # Compare with baseline
-            regression_analysis = await self._analyze_performance_regression(current_metrics)
+            if QualityGateType.PERFORMANCE_TESTS in self.gate_configs:
+                # Run performance tests
+                perf_result = await self._run_single_gate(QualityGateType.PERFORMANCE_TESTS)
+
+                if perf_result.status != QualityGateStatus.PASSED:
+                    return {
+                        "regression_detected": True,
+                        "severity": "high",
+                        "details": "Performance tests failed",
+                        "recommendations": ["Check recent changes", "Review performance logs"],
+                        "duration_regressions": await self._analyze_duration_regressions()
+                    }
+
+                # Extract current metrics
+                current_metrics = self._extract_performance_metrics(perf_result)
+
+                # Compare with baseline
+                regression_analysis = await self._analyze_performance_regression(current_metrics)
+
+            duration_regressions = await self._analyze_duration_regressions()
+            regression_analysis["duration_regressions"] = duration_regressions
+            if duration_regressions:
+                regression_analysis["details"].extend(
+                    f"{r['gate_type']} took {r['latest_seconds']:.1f}s "
+                    f"({r['ratio']:.1f}x its median of {r['median_seconds']:.1f}s)"
+                    for r in duration_regressions
+                )
+                if not regression_analysis["regression_detected"]:
+                    regression_analysis["regression_detected"] = True
+                    regression_analysis["severity"] = "medium"
+                    regression_analysis["recommendations"] = [
+                        "Profile the slowed-down gates",
+                        "Check recent changes to their inputs"
+                    ]
 
             logger.info(
                 "Performance regression check completed",
                 regression_detected=regression_analysis["regression_detected"],
-                severity=regression_analysis.get("severity", "none")
+                severity=regression_analysis.get("severity", "none"),
+                duration_regressions=len(duration_regressions)
             )
 
             return regression_analysis
@@ -326,12 +485,12 @@ class AutomatedQualityGates:
             List of quality gate results
         """
         if parallel:
-            # Run gates concurrently
-            tasks = [
-                self._run_single_gate(gate_type)
-                for gate_type in gate_types
+            # Run gates concurrently; subprocesses are bounded by _subprocess_slots
+            enabled = [
+                gate_type for gate_type in gate_types
                 if gate_type in self.gate_configs and self.gate_configs[gate_type].enabled
             ]
+            tasks = [self._run_single_gate(gate_type) for gate_type in enabled]
 
             results = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -340,7 +499,7 @@ class AutomatedQualityGates:
             for i, result in enumerate(results):
                 if isinstance(result, Exception):
                     final_results.append(QualityGateResult(
-                        gate_type=gate_types[i],
+                        gate_type=enabled[i],
                         status=QualityGateStatus.FAILED,
                         error_message=str(result),
                         execution_time_seconds=0,
@@ -377,6 +536,16 @@ class AutomatedQualityGates:
             self._gates_executed += 1
             increment_counter("ai_workflow_quality_gate_executed")
 
+            input_hash = await self._input_hash(config)
+            if input_hash:
+                cached = await asyncio.to_thread(
+                    self.store.get_cached, gate_type.value, input_hash
+                )
+                if cached is not None:
+                    result = self._cached_result(cached, start_time)
+                    await self._record_history(result, cached=True, input_hash=input_hash)
+                    return result
+
             logger.info(
                 "Starting quality gate",
                 gate_type=gate_type.value,
@@ -396,6 +565,16 @@ class AutomatedQualityGates:
             result.completed_at = end_time
             result.execution_time_seconds = execution_time
 
+            # Timeouts and crashes say nothing about the inputs; don't cache them
+            if input_hash and result.error_message is None:
+                await asyncio.to_thread(
+                    self.store.put_cached,
+                    gate_type.value,
+                    input_hash,
+                    result.model_dump(mode="json")
+                )
+            await self._record_history(result, cached=False, input_hash=input_hash)
+
             if result.status == QualityGateStatus.PASSED:
                 self._gates_passed += 1
                 increment_counter("ai_workflow_quality_gate_passed")
@@ -427,7 +606,7 @@ class AutomatedQualityGates:
                 execution_time=execution_time
             )
 
-            return QualityGateResult(
+            result = QualityGateResult(
                 gate_type=gate_type,
                 status=QualityGateStatus.FAILED,
                 error_message=str(e),
@@ -435,59 +614,182 @@ class AutomatedQualityGates:
                 started_at=start_time,
                 completed_at=end_time
             )
+            await self._record_history(result, cached=False, input_hash=None)
+            return result
 
-    async def _execute_command(self, config: QualityGateConfig) -> QualityGateResult:
-        """Execute a command-based quality gate."""
-        # Prepare environment
-        env = {**config.environment_variables}
-        working_dir = config.working_directory or str(self.project_root)
-
-        try:
-            # Execute command with timeout
-            process = await asyncio.create_subprocess_shell(
-                config.command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=working_dir,
-                env=env
-            )
+    async def _input_hash(self, config: QualityGateConfig) -> Optional[str]:
+        """Content hash of the gate's declared inputs, or None if uncacheable."""
+        if not (config.cacheable and config.inputs and config.command):
+            return None
+        root = Path(config.working_directory or self.project_root)
+        fingerprint = config.model_dump(
+            mode="json", exclude={"enabled", "retry_count", "inputs", "cacheable"}
+        )
+        fingerprint["inputs"] = sorted(config.inputs)
+        return await asyncio.to_thread(
+            self.store.hasher.compute, root, config.inputs, fingerprint
+        )
 
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=config.timeout_seconds
-            )
+    def _cached_result(
+        self,
+        cached: Dict[str, Any],
+        start_time: datetime
+    ) -> QualityGateResult:
+        """Rebuild a cached result; counted like a fresh run of the same outcome."""
+        result = QualityGateResult(**cached)
+        result.details["cached"] = True
+        result.details["cached_execution_time_seconds"] = result.execution_time_seconds
+        result.started_at = start_time
+        result.completed_at = datetime.now(timezone.utc)
+        result.execution_time_seconds = (result.completed_at - start_time).total_seconds()
+
+        self._cache_hits += 1
+        increment_counter("ai_workflow_quality_gate_cache_hit")
+        if result.status == QualityGateStatus.PASSED:
+            self._gates_passed += 1
+        else:
+            self._gates_failed += 1
 
-            # Decode output
-            stdout_text = stdout.decode('utf-8') if stdout else ""
-            stderr_text = stderr.decode('utf-8') if stderr else ""
+        logger.info(
+            "Quality gate served from cache",
+            gate_type=result.gate_type.value,
+            status=result.status.value
+        )
+        return result
 
-            # Analyze output
-            return self._analyze_command_output(
-                config,
-                process.returncode or 0,
-                stdout_text,
-                stderr_text
-            )
+    def _history_record(
+        self,
+        result: QualityGateResult,
+        cached: bool,
+        input_hash: Optional[str]
+    ) -> Dict[str, Any]:
+        return {
+            "gate_type": result.gate_type.value,
+            "status": result.status.value,
+            "score": result.score,
+            "metrics": result.metrics,
+            "error_message": result.error_message,
+            "execution_time_seconds": result.execution_time_seconds,
+            "started_at": result.started_at.isoformat(),
+            "completed_at": result.completed_at.isoformat(),
+            "cached": cached,
+            "input_hash": input_hash
+        }
 
-        except asyncio.TimeoutError:
-            return QualityGateResult(
-                gate_type=config.gate_type,
-                status=QualityGateStatus.FAILED,
-                error_message=f"Command timed out after {config.timeout_seconds} seconds",
-                execution_time_seconds=config.timeout_seconds,
-                started_at=datetime.now(timezone.utc),
-                completed_at=datetime.now(timezone.utc)
+    async def _record_history(
+        self,
+        result: QualityGateResult,
+        cached: bool,
+        input_hash: Optional[str]
+    ) -> None:
+        try:
+            await asyncio.to_thread(
+                self.store.append_history,
+                self._history_record(result, cached, input_hash)
             )
-        except Exception as e:
-            return QualityGateResult(
-                gate_type=config.gate_type,
-                status=QualityGateStatus.FAILED,
-                error_message=str(e),
-                execution_time_seconds=0,
-                started_at=datetime.now(timezone.utc),
-                completed_at=datetime.now(timezone.utc)
+        except OSError as e:
+            logger.warning(
+                "Failed to record quality gate history",
+                gate_type=result.gate_type.value,
+                error=str(e)
             )
 
+    async def _execute_command(self, config: QualityGateConfig) -> QualityGateResult:
+        """Execute a command-based quality gate.
+
+        At most ``max_parallel`` gate subprocesses run at once. Output is parsed
+        line by line while the command runs instead of being buffered whole.
+        """
+        # Prepare environment; gate variables extend the inherited environment
+        env = {**os.environ, **config.environment_variables}
+        working_dir = config.working_directory or str(self.project_root)
+        scanner = GateOutputScanner(config, tail_lines=self.output_tail_lines)
+
+        async with self._subprocess_slots:
+            try:
+                process = await asyncio.create_subprocess_shell(
+                    config.command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=working_dir,
+                    env=env,
+                    # Own process group, so a timeout kills the whole command tree
+                    start_new_session=True
+                )
+            except Exception as e:
+                return QualityGateResult(
+                    gate_type=config.gate_type,
+                    status=QualityGateStatus.FAILED,
+                    error_message=str(e),
+                    execution_time_seconds=0,
+                    started_at=datetime.now(timezone.utc),
+                    completed_at=datetime.now(timezone.utc)
+                )
+
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(
+                        self._pump_stream(process.stdout, "stdout", scanner),
+                        self._pump_stream(process.stderr, "stderr", scanner),
+                        process.wait()
+                    ),
+                    timeout=config.timeout_seconds
+                )
+            except asyncio.TimeoutError:
+                await self._kill(process)
+                return QualityGateResult(
+                    gate_type=config.gate_type,
+                    status=QualityGateStatus.FAILED,
+                    error_message=f"Command timed out after {config.timeout_seconds} seconds",
+                    details={"stdout_tail": scanner.stdout[-10000:], "stderr_tail": scanner.stderr[-10000:]},
+                    execution_time_seconds=config.timeout_seconds,
+                    started_at=datetime.now(timezone.utc),
+                    completed_at=datetime.now(timezone.utc)
+                )
+            except Exception as e:
+                await self._kill(process)
+                return QualityGateResult(
+                    gate_type=config.gate_type,
+                    status=QualityGateStatus.FAILED,
+                    error_message=str(e),
+                    execution_time_seconds=0,
+                    started_at=datetime.now(timezone.utc),
+                    completed_at=datetime.now(timezone.utc)
+                )
+
+        # Analyze output
+        return self._result_from_scan(config, process.returncode or 0, scanner)
+
+    @staticmethod
+    async def _pump_stream(
+        stream: Optional[asyncio.StreamReader],
+        name: str,
+        scanner: GateOutputScanner
+    ) -> None:
+        """Feed a subprocess stream to the scanner one decoded line at a time."""
+        if stream is None:
+            return
+        pending = b""
+        while True:
+            chunk = await stream.read(_STREAM_CHUNK)
+            if not chunk:
+                break
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                scanner.feed(name, line.decode("utf-8", errors="replace"))
+        if pending:
+            scanner.feed(name, pending.decode("utf-8", errors="replace"))
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process) -> None:
+        if process.returncode is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
     def _analyze_command_output(
         self,
         config: QualityGateConfig,
@@ -495,45 +797,51 @@ class AutomatedQualityGates:
         stdout: str,
         stderr: str
     ) -> QualityGateResult:
-        """Analyze command output to determine quality gate result."""
+        """Analyze complete command output to determine quality gate result."""
+        scanner = GateOutputScanner(config, tail_lines=self.output_tail_lines)
+        for line in stdout.split("\n"):
+            scanner.feed("stdout", line)
+        for line in stderr.split("\n"):
+            scanner.feed("stderr", line)
+        return self._result_from_scan(config, return_code, scanner)
+
+    def _result_from_scan(
+        self,
+        config: QualityGateConfig,
+        return_code: int,
+        scanner: GateOutputScanner
+    ) -> QualityGateResult:
+        """Build the gate result from a scanner that has seen all output."""
         # Basic status determination
         if return_code == 0:
             base_status = QualityGateStatus.PASSED
         else:
             base_status = QualityGateStatus.FAILED
 
-        # Check patterns
-        combined_output = f"{stdout}\n{stderr}"
-
         # Check failure patterns
-        for pattern in config.failure_patterns:
-            if pattern.lower() in combined_output.lower():
-                base_status = QualityGateStatus.FAILED
-                break
+        if scanner.failure_matched:
+            base_status = QualityGateStatus.FAILED
 
         # Check success patterns (only if not already failed)
         if base_status != QualityGateStatus.FAILED:
-            success_found = False
-            for pattern in config.success_patterns:
-                if pattern.lower() in combined_output.lower():
-                    success_found = True
-                    break
-
-            if config.success_patterns and not success_found:
+            if config.success_patterns and not scanner.success_matched:
                 base_status = QualityGateStatus.FAILED
 
         # Extract metrics based on gate type
+        stdout = scanner.stdout
         details = {
             "return_code": return_code,
             "stdout": stdout,
-            "stderr": stderr
+            "stderr": scanner.stderr,
+            "output_lines": dict(scanner.line_counts)
         }
 
         score = None
         metrics_data = {}
 
         if config.gate_type == QualityGateType.UNIT_TESTS:
-            score, metrics_data = self._extract_test_metrics(stdout)
+            score = _test_score(scanner.test_state)
+            metrics_data = scanner.test_state["metrics"]
         elif config.gate_type == QualityGateType.CODE_QUALITY:
             score, metrics_data = self._extract_code_quality_metrics(stdout)
         elif config.gate_type == QualityGateType.SECURITY_SCAN:
@@ -559,45 +867,10 @@ class AutomatedQualityGates:
 
     def _extract_test_metrics(self, output: str) -> Tuple[Optional[float], Dict[str, float]]:
         """Extract test metrics from test output."""
-        score = None
-        metrics_data = {}
-
-        # Parse pytest output for coverage and test results
-        lines = output.split('\n')
-
-        for line in lines:
-            if 'coverage' in line.lower() and '%' in line:
-                # Extract coverage percentage
-                import re
-                match = re.search(r'(\d+)%', line)
-                if match:
-                    coverage = float(match.group(1)) / 100
-                    metrics_data['coverage'] = coverage
-                    score = coverage
-
-            if 'passed' in line and 'failed' in line:
-                # Extract test counts
-                import re
-                passed_match = re.search(r'(\d+) passed', line)
-                failed_match = re.search(r'(\d+) failed', line)
-
-                if passed_match:
-                    passed = int(passed_match.group(1))
-                    metrics_data['tests_passed'] = passed
-
-                if failed_match:
-                    failed = int(failed_match.group(1))
-                    metrics_data['tests_failed'] = failed
-
-                    if passed_match:
-                        total = passed + failed
-                        if total > 0:
-                            pass_rate = passed / total
-                            metrics_data['pass_rate'] = pass_rate
-                            if score is None:
-                                score = pass_rate
-
-        return score, metrics_data
+        state: Dict[str, Any] = {"metrics": {}}
+        for line in output.split('\n'):
+            _scan_test_line(line, state)
+        return _test_score(state), state["metrics"]
 
     def _extract_code_quality_metrics(self, output: str) -> Tuple[Optional[float], Dict[str, float]]:
         """Extract code quality metrics from linter output."""
@@ -722,18 +995,16 @@ class AutomatedQualityGates:
                 current_metrics.response_time_ms > baseline.response_time_ms * 1.2):
                 regression_detected = True
                 severity = "high"
-                details.append(f"Response time increased by {
-                    ((current_metrics.response_time_ms / baseline.response_time_ms) - 1) * 100:.1f
-                }%")
+                increase = (current_metrics.response_time_ms / baseline.response_time_ms - 1) * 100
+                details.append(f"Response time increased by {increase:.1f}%")
 
             # Check throughput regression
             if (current_metrics.throughput_rps and baseline.throughput_rps and
                 current_metrics.throughput_rps < baseline.throughput_rps * 0.8):
                 regression_detected = True
                 severity = "high"
-                details.append(f"Throughput decreased by {
-                    (1 - (current_metrics.throughput_rps / baseline.throughput_rps)) * 100:.1f
-                }%")
+                decrease = (1 - current_metrics.throughput_rps / baseline.throughput_rps) * 100
+                details.append(f"Throughput decreased by {decrease:.1f}%")
 
         return {
             "regression_detected": regression_detected,
@@ -747,6 +1018,62 @@ class AutomatedQualityGates:
             ] if regression_detected else []
         }
 
+    async def _analyze_duration_regressions(
+        self,
+        window: int = 20,
+        min_samples: int = 5,
+        threshold: float = 1.5,
+        min_increase_seconds: float = 1.0
+    ) -> List[Dict[str, Any]]:
+        """Gates whose latest real run took much longer than their recent median.
+
+        Only executed runs count; cache hits and runs that errored or timed out
+        would skew the series.
+        """
+        regressions = []
+        for gate_type in self.gate_configs:
+            series = await self.get_duration_history(gate_type, limit=window + 1)
+            if len(series) < min_samples + 1:
+                continue
+            latest = series[-1]["execution_time_seconds"]
+            median = statistics.median(point["execution_time_seconds"] for point in series[:-1])
+            if median > 0 and latest > median * threshold and latest - median >= min_increase_seconds:
+                regressions.append({
+                    "gate_type": gate_type.value,
+                    "latest_seconds": latest,
+                    "median_seconds": median,
+                    "ratio": latest / median,
+                    "samples": len(series) - 1
+                })
+        return regressions
+
+    async def get_duration_history(
+        self,
+        gate_type: QualityGateType,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Duration time series for a gate, oldest first.
+
+        Args:
+            gate_type: Gate to read
+            limit: Maximum number of points
+
+        Returns:
+            Points with ``completed_at``, ``execution_time_seconds`` and ``status``
+        """
+        records = await asyncio.to_thread(
+            self.store.history, gate_type.value, limit, False
+        )
+        return [
+            {
+                "completed_at": record["completed_at"],
+                "execution_time_seconds": record["execution_time_seconds"],
+                "status": record["status"]
+            }
+            for record in reversed(records)
+            if record.get("error_message") is None
+        ]
+
     async def get_gate_history(
         self,
         gate_type: Optional[QualityGateType] = None,
@@ -759,11 +1086,25 @@ class AutomatedQualityGates:
             limit: Maximum number of results
 
         Returns:
-            List of quality gate results
+            List of quality gate results, newest first
         """
-        # In a real implementation, this would query a database
-        # For now, return empty list
-        return []
+        records = await asyncio.to_thread(
+            self.store.history, gate_type.value if gate_type else None, limit
+        )
+        return [
+            QualityGateResult(
+                gate_type=record["gate_type"],
+                status=record["status"],
+                score=record.get("score"),
+                metrics=record.get("metrics") or {},
+                error_message=record.get("error_message"),
+                execution_time_seconds=record["execution_time_seconds"],
+                started_at=record["started_at"],
+                completed_at=record["completed_at"],
+                details={"cached": record.get("cached", False), "input_hash": record.get("input_hash")}
+            )
+            for record in records
+        ]
 
     async def get_statistics(self) -> Dict[str, Any]:
         """Get quality gates statistics.
@@ -780,6 +1121,8 @@ class AutomatedQualityGates:
             "total_passed": self._gates_passed,
             "total_failed": self._gates_failed,
             "success_rate": success_rate,
+            "cache_hits": self._cache_hits,
+            "max_parallel": self.max_parallel,
             "active_gates": len(self._active_gates),
             "project_root": str(self.project_root)
         }
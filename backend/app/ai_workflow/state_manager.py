@@ -12,8 +12,6 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 
-import aiofiles
-import aiofiles.os
 import structlog
 from app.db.session import get_db
 from pydantic import BaseModel, Field
@@ -21,6 +19,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
 
+from .checkpoint_store import CheckpointStore
+from .keyed_lock import KeyedLock
 from .metrics import increment_counter
 
 logger = structlog.get_logger(__name__)
@@ -89,19 +89,16 @@ class WorkflowStateManager:
         self.compression_threshold = 1 * 1024 * 1024  # 1MB
         self.max_checkpoints_per_session = 50
 
+        # Indexed, compressed checkpoint storage
+        self._store = CheckpointStore(self.base_path)
+
         # Metrics
         self._checkpoint_counter = 0
         self._recovery_counter = 0
         self._compression_counter = 0
 
         # State locks for concurrent access
-        self._locks: Dict[str, asyncio.Lock] = {}
-
-    async def _get_lock(self, key: str) -> asyncio.Lock:
-        """Get or create lock for a given key."""
-        if key not in self._locks:
-            self._locks[key] = asyncio.Lock()
-        return self._locks[key]
+        self._locks = KeyedLock("state_manager")
 
     async def _get_session_path(self, session_id: str) -> Path:
         """Get session directory path."""
@@ -160,31 +157,39 @@ class WorkflowStateManager:
             if context.size_bytes and context.size_bytes > self.compression_threshold:
                 context = await self._compress_context(context)
 
-            # Get most recent checkpoint for linking
-            previous_checkpoint = await self._get_latest_checkpoint(
-                session_id, agent_id
-            )
-            previous_id = previous_checkpoint.id if previous_checkpoint else None
-
-            # Create checkpoint
-            checkpoint = WorkflowCheckpoint(
-                session_id=session_id,
-                agent_id=agent_id,
-                checkpoint_type=checkpoint_type,
-                context=context,
-                previous_checkpoint_id=previous_id,
-                tags=tags or [],
-                description=description,
-            )
+            async with self._locks.hold(f"checkpoint_{session_id}"):
+                # Link to the agent's most recent checkpoint
+                previous_id = await asyncio.to_thread(
+                    self._store.latest_id, session_id, agent_id
+                )
 
-            # Save checkpoint
-            checkpoints_path = await self._get_checkpoints_path(session_id)
-            lock = await self._get_lock(f"checkpoint_{session_id}")
+                checkpoint = WorkflowCheckpoint(
+                    session_id=session_id,
+                    agent_id=agent_id,
+                    checkpoint_type=checkpoint_type,
+                    context=context,
+                    previous_checkpoint_id=previous_id,
+                    tags=tags or [],
+                    description=description,
+                )
 
-            async with lock:
-                checkpoint_file = checkpoints_path / f"{checkpoint.id}.json"
-                async with aiofiles.open(checkpoint_file, "w") as f:
-                    await f.write(checkpoint.model_dump_json(indent=2))
+                await asyncio.to_thread(
+                    self._store.save,
+                    checkpoint.id,
+                    session_id,
+                    agent_id,
+                    context.context_data,
+                    context.model_dump(mode="json", exclude={"context_data"}),
+                    {
+                        "created_at": checkpoint.created_at.isoformat(),
+                        "checkpoint_type": checkpoint_type,
+                        "previous_checkpoint_id": previous_id,
+                        "tags": checkpoint.tags,
+                        "description": description,
+                        "size_bytes": context.size_bytes,
+                        "compressed": context.compressed,
+                    },
+                )
 
                 # Cleanup old checkpoints if needed
                 await self._cleanup_old_checkpoints(session_id, agent_id)
@@ -226,24 +231,7 @@ class WorkflowStateManager:
             ValueError: If checkpoint not found
         """
         try:
-            # Find checkpoint file
-            checkpoint_file = None
-            for session_dir in self.base_path.iterdir():
-                if session_dir.is_dir():
-                    checkpoints_dir = session_dir / "checkpoints"
-                    if checkpoints_dir.exists():
-                        potential_file = checkpoints_dir / f"{checkpoint_id}.json"
-                        if potential_file.exists():
-                            checkpoint_file = potential_file
-                            break
-
-            if not checkpoint_file:
-                raise ValueError(f"Checkpoint {checkpoint_id} not found")
-
-            # Load checkpoint
-            async with aiofiles.open(checkpoint_file, "r") as f:
-                content = await f.read()
-                checkpoint = WorkflowCheckpoint.model_validate_json(content)
+            checkpoint = await self._load_checkpoint(checkpoint_id)
 
             # Decompress context if needed
             context_data = checkpoint.context.context_data
@@ -408,39 +396,45 @@ class WorkflowStateManager:
 
         return context_data
 
+    async def _load_checkpoint(self, checkpoint_id: str) -> WorkflowCheckpoint:
+        """Load a checkpoint via the index, materializing delta payloads."""
+        session_id = await asyncio.to_thread(self._store.session_for, checkpoint_id)
+        if session_id is None:
+            raise ValueError(f"Checkpoint {checkpoint_id} not found")
+        return await asyncio.to_thread(
+            self._build_checkpoint, session_id, checkpoint_id
+        )
+
+    def _build_checkpoint(self, session_id: str, checkpoint_id: str) -> WorkflowCheckpoint:
+        entry = self._store.load_manifest(session_id)["entries"].get(checkpoint_id)
+        if entry is None:
+            raise ValueError(f"Checkpoint {checkpoint_id} not found")
+        context_data, context_meta = self._store.load(session_id, checkpoint_id)
+        return WorkflowCheckpoint(
+            id=checkpoint_id,
+            session_id=session_id,
+            agent_id=entry["agent_id"],
+            checkpoint_type=entry["checkpoint_type"],
+            context=WorkflowContext(**context_meta, context_data=context_data),
+            previous_checkpoint_id=entry.get("previous_checkpoint_id"),
+            created_at=entry["created_at"],
+            tags=entry.get("tags", []),
+            description=entry.get("description"),
+        )
+
     async def _get_latest_checkpoint(
         self, session_id: str, agent_id: str
     ) -> Optional[WorkflowCheckpoint]:
         """Get the latest checkpoint for a session and agent."""
         try:
-            checkpoints_path = await self._get_checkpoints_path(session_id)
-            if not checkpoints_path.exists():
+            checkpoint_id = await asyncio.to_thread(
+                self._store.latest_id, session_id, agent_id
+            )
+            if checkpoint_id is None:
                 return None
-
-            latest_checkpoint = None
-            latest_timestamp = None
-
-            for checkpoint_file in checkpoints_path.glob("*.json"):
-                try:
-                    async with aiofiles.open(checkpoint_file, "r") as f:
-                        content = await f.read()
-                        checkpoint = WorkflowCheckpoint.model_validate_json(content)
-
-                        if checkpoint.agent_id == agent_id:
-                            if (
-                                latest_timestamp is None
-                                or checkpoint.created_at > latest_timestamp
-                            ):
-                                latest_checkpoint = checkpoint
-                                latest_timestamp = checkpoint.created_at
-                except Exception as e:
-                    logger.warning(
-                        "Failed to read checkpoint file",
-                        file=str(checkpoint_file),
-                        error=str(e),
-                    )
-
-            return latest_checkpoint
+            return await asyncio.to_thread(
+                self._build_checkpoint, session_id, checkpoint_id
+            )
 
         except Exception as e:
             logger.error(
@@ -454,45 +448,19 @@ class WorkflowStateManager:
     async def _cleanup_old_checkpoints(self, session_id: str, agent_id: str) -> None:
         """Clean up old checkpoints beyond the maximum limit."""
         try:
-            checkpoints_path = await self._get_checkpoints_path(session_id)
-            if not checkpoints_path.exists():
-                return
-
-            # Get all checkpoints for this agent
-            agent_checkpoints = []
-            for checkpoint_file in checkpoints_path.glob("*.json"):
-                try:
-                    async with aiofiles.open(checkpoint_file, "r") as f:
-                        content = await f.read()
-                        checkpoint = WorkflowCheckpoint.model_validate_json(content)
-
-                        if checkpoint.agent_id == agent_id:
-                            agent_checkpoints.append((checkpoint, checkpoint_file))
-                except Exception:
-                    continue
-
-            # Sort by creation time (newest first)
-            agent_checkpoints.sort(key=lambda x: x[0].created_at, reverse=True)
-
-            # Remove oldest checkpoints beyond limit
-            if len(agent_checkpoints) > self.max_checkpoints_per_session:
-                for checkpoint, checkpoint_file in agent_checkpoints[
-                    self.max_checkpoints_per_session :
-                ]:
-                    try:
-                        await aiofiles.os.remove(checkpoint_file)
-                        logger.debug(
-                            "Old checkpoint removed",
-                            checkpoint_id=checkpoint.id,
-                            session_id=session_id,
-                            agent_id=agent_id,
-                        )
-                    except Exception as e:
-                        logger.warning(
-                            "Failed to remove old checkpoint",
-                            checkpoint_id=checkpoint.id,
-                            error=str(e),
-                        )
+            removed = await asyncio.to_thread(
+                self._store.prune,
+                session_id,
+                agent_id,
+                self.max_checkpoints_per_session,
+            )
+            for checkpoint_id in removed:
+                logger.debug(
+                    "Old checkpoint removed",
+                    checkpoint_id=checkpoint_id,
+                    session_id=session_id,
+                    agent_id=agent_id,
+                )
 
         except Exception as e:
             logger.error(
@@ -516,29 +484,25 @@ class WorkflowStateManager:
             List of checkpoints sorted by creation time (newest first)
         """
         try:
-            checkpoints_path = await self._get_checkpoints_path(session_id)
-            if not checkpoints_path.exists():
-                return []
+            entries = await asyncio.to_thread(
+                self._store.entries, session_id, agent_id
+            )
 
             checkpoints = []
-            for checkpoint_file in checkpoints_path.glob("*.json"):
+            for checkpoint_id, _ in entries[:limit]:
                 try:
-                    async with aiofiles.open(checkpoint_file, "r") as f:
-                        content = await f.read()
-                        checkpoint = WorkflowCheckpoint.model_validate_json(content)
-
-                        if agent_id is None or checkpoint.agent_id == agent_id:
-                            checkpoints.append(checkpoint)
+                    checkpoints.append(
+                        await asyncio.to_thread(
+                            self._build_checkpoint, session_id, checkpoint_id
+                        )
+                    )
                 except Exception as e:
                     logger.warning(
-                        "Failed to read checkpoint file",
-                        file=str(checkpoint_file),
+                        "Failed to read checkpoint",
+                        checkpoint_id=checkpoint_id,
                         error=str(e),
                     )
 
-            # Sort by creation time (newest first)
-            checkpoints.sort(key=lambda x: x.created_at, reverse=True)
-
             return checkpoints[:limit]
 
         except Exception as e:
@@ -560,19 +524,16 @@ class WorkflowStateManager:
             True if checkpoint was deleted successfully
         """
         try:
-            # Find and delete checkpoint file
-            for session_dir in self.base_path.iterdir():
-                if session_dir.is_dir():
-                    checkpoints_dir = session_dir / "checkpoints"
-                    if checkpoints_dir.exists():
-                        checkpoint_file = checkpoints_dir / f"{checkpoint_id}.json"
-                        if checkpoint_file.exists():
-                            await aiofiles.os.remove(checkpoint_file)
-                            logger.info(
-                                "Checkpoint deleted", checkpoint_id=checkpoint_id
-                            )
-                            increment_counter("ai_workflow_checkpoint_deleted")
-                            return True
+            session_id = await asyncio.to_thread(self._store.session_for, checkpoint_id)
+            if session_id is not None:
+                async with self._locks.hold(f"checkpoint_{session_id}"):
+                    deleted = await asyncio.to_thread(
+                        self._store.delete, session_id, checkpoint_id
+                    )
+                if deleted:
+                    logger.info("Checkpoint deleted", checkpoint_id=checkpoint_id)
+                    increment_counter("ai_workflow_checkpoint_deleted")
+                    return True
 
             logger.warning(
                 "Checkpoint not found for deletion", checkpoint_id=checkpoint_id
@@ -586,6 +547,15 @@ class WorkflowStateManager:
             increment_counter("ai_workflow_checkpoint_delete_error")
             return False
 
+    async def release_session(self, session_id: str) -> None:
+        """Release cached checkpoint state once a session's workflow completes.
+
+        Args:
+            session_id: Session whose workflow has completed
+        """
+        async with self._locks.hold(f"checkpoint_{session_id}"):
+            await asyncio.to_thread(self._store.release, session_id)
+
     async def get_statistics(self) -> Dict[str, Any]:
         """Get state manager statistics.
 
@@ -603,7 +573,9 @@ class WorkflowStateManager:
                     session_count += 1
                     checkpoints_dir = session_dir / "checkpoints"
                     if checkpoints_dir.exists():
-                        for checkpoint_file in checkpoints_dir.glob("*.json"):
+                        for checkpoint_file in checkpoints_dir.iterdir():
+                            if checkpoint_file.suffix not in (".ckpt", ".json"):
+                                continue
                             checkpoint_count += 1
                             try:
                                 total_size += checkpoint_file.stat().st_size
@@ -622,4 +594,6 @@ class WorkflowStateManager:
             "base_path": str(self.base_path),
             "max_context_size": self.max_context_size,
             "compression_threshold": self.compression_threshold,
+            "cached_sessions": self._store.cached_sessions(),
+            "locks": self._locks.stats(),
         }
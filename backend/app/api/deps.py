@@ -1,6 +1,7 @@
 """Dependencies for API endpoints."""
 import logging
-from typing import Annotated, AsyncGenerator, Optional
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncGenerator, AsyncIterator, Optional
 
 from app.db.query_monitor import QueryMonitor
 from app.db.session import AsyncSessionLocal, get_db
@@ -43,6 +44,21 @@ async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+@asynccontextmanager
+async def open_db_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """Open a session that outlives the request's dependencies.
+
+    FastAPI closes ``yield`` dependencies before a StreamingResponse body is
+    sent, so generators producing a streamed body use this instead of get_db.
+    """
+    if hasattr(request.app.state, "_test_session") and request.app.state._test_session:
+        yield request.app.state._test_session
+        return
+
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 async def get_current_active_user(
     # Now depend directly on the components needed by get_current_user
     settings: Settings = Depends(get_settings),
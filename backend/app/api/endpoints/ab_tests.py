@@ -11,6 +11,8 @@ from app.schemas.ab_test import (
     AbTestAnalyticsResponse,
     AbTestAssignmentRequest,
     AbTestAssignmentResponse,
+    AbTestBatchAssignmentRequest,
+    AbTestBatchAssignmentResponse,
     AbTestConversionRequest,
     AbTestCreate,
     AbTestListResponse,
@@ -20,9 +22,11 @@ from app.schemas.ab_test import (
     AbTestUpdate,
     AbTestVariantResponse,
     AbTestVariantUpdate,
+    StatisticalMethod,
 )
 from app.schemas.common import PaginatedResponse
 from app.schemas.event import EventCreate, EventType
+from app.services.ab_assignment import Assignment, get_ab_assignment_service
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -80,6 +84,7 @@ async def create_ab_test(
     db_test = await ab_test.create_with_variants(
         db, obj_in=test_in, created_by=current_user.id
     )
+    get_ab_assignment_service().catalog.invalidate()
 
     return db_test
 
@@ -131,6 +136,7 @@ async def update_ab_test(
             )
 
     updated_test = await ab_test.update(db, db_obj=test, obj_in=test_in)
+    get_ab_assignment_service().catalog.invalidate()
     return updated_test
 
 
@@ -162,6 +168,7 @@ async def delete_ab_test(
         )
 
     await ab_test.remove(db, id=test_id)
+    get_ab_assignment_service().catalog.invalidate()
 
 
 @router.post("/{test_id}/start", response_model=AbTestResponse)
@@ -181,6 +188,7 @@ async def start_ab_test(
             status_code=status.HTTP_404_NOT_FOUND, detail="Test not found"
         )
 
+    get_ab_assignment_service().catalog.invalidate()
     return updated_test
 
 
@@ -204,6 +212,7 @@ async def stop_ab_test(
             status_code=status.HTTP_404_NOT_FOUND, detail="Test not found"
         )
 
+    get_ab_assignment_service().catalog.invalidate()
     return updated_test
 
 
@@ -215,10 +224,19 @@ async def get_ab_test_analytics(
     test_id: int,
     start_date: Optional[datetime] = Query(None, description="Analysis start date"),
     end_date: Optional[datetime] = Query(None, description="Analysis end date"),
+    statistical_method: StatisticalMethod = Query(
+        StatisticalMethod.FREQUENTIST, description="Statistical method"
+    ),
+    use_cuped: bool = Query(False, description="Apply CUPED variance reduction"),
 ) -> AbTestStatisticalReport:
     """Get comprehensive analytics for an A/B test."""
     analytics = await ab_test.get_test_analytics(
-        db, test_id=test_id, start_date=start_date, end_date=end_date
+        db,
+        test_id=test_id,
+        start_date=start_date,
+        end_date=end_date,
+        statistical_method=statistical_method,
+        use_cuped=use_cuped,
     )
 
     if not analytics:
@@ -277,6 +295,7 @@ async def update_ab_test_variant(
 
     await db.commit()
     await db.refresh(variant)
+    get_ab_assignment_service().catalog.invalidate()
 
     return variant
 
@@ -291,29 +310,47 @@ async def assign_user_to_test(
     assignment_request: AbTestAssignmentRequest,
 ) -> AbTestAssignmentResponse:
     """Assign user to A/B test variant."""
-    result = await ab_test.assign_user_to_test(db, request=assignment_request)
+    service = get_ab_assignment_service()
+    await service.catalog.ensure_fresh(db)
+
+    assignments = await service.resolve(
+        db,
+        user_id=assignment_request.user_id,
+        session_id=assignment_request.session_id,
+        test_keys=[assignment_request.test_key],
+        context=assignment_request.context,
+    )
+    assignment = assignments.get(assignment_request.test_key)
 
-    if not result:
+    if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Test not found or user not eligible",
         )
 
-    test_obj, variant = result
+    return _assignment_response(assignment)
 
-    # Track assignment event
-    await _track_assignment_event(
-        db, test_obj, variant, assignment_request.user_id, assignment_request.session_id
+
+@router.post("/assign/batch", response_model=AbTestBatchAssignmentResponse)
+async def assign_user_to_tests(
+    *,
+    db: AsyncSession = Depends(get_db),
+    assignment_request: AbTestBatchAssignmentRequest,
+) -> AbTestBatchAssignmentResponse:
+    """Assign user to several A/B tests in one call."""
+    service = get_ab_assignment_service()
+    await service.catalog.ensure_fresh(db)
+
+    assignments = await service.resolve(
+        db,
+        user_id=assignment_request.user_id,
+        session_id=assignment_request.session_id,
+        test_keys=assignment_request.test_keys,
+        context=assignment_request.context,
     )
 
-    return AbTestAssignmentResponse(
-        test_id=test_obj.id,
-        test_key=test_obj.test_key,
-        variant_id=variant.id,
-        variant_key=variant.variant_key,
-        variant_configuration=variant.configuration,
-        assigned_at=datetime.utcnow(),
-        is_control=variant.is_control,
+    return AbTestBatchAssignmentResponse(
+        assignments=[_assignment_response(a) for a in assignments.values()]
     )
 
 
@@ -324,6 +361,19 @@ async def track_conversion(
     conversion_request: AbTestConversionRequest,
 ) -> Dict[str, Any]:
     """Track conversion for A/B test."""
+    # The exposure may be buffered in another worker, so derive the assignment
+    # from the catalog and write it here; a stored assignment is left as is
+    service = get_ab_assignment_service()
+    await service.catalog.ensure_fresh(db)
+    assignment = service.assign(
+        conversion_request.test_key,
+        user_id=conversion_request.user_id,
+        session_id=conversion_request.session_id,
+        log_exposure=False,
+    )
+    if assignment is not None:
+        await service.exposures.persist(assignment)
+
     success = await ab_test.track_conversion(db, request=conversion_request)
 
     if not success:
@@ -423,29 +473,18 @@ def _is_valid_status_transition(current_status: str, new_status: str) -> bool:
     return new_status in valid_transitions.get(current_status, [])
 
 
-async def _track_assignment_event(
-    db: AsyncSession,
-    test: Any,
-    variant: Any,
-    user_id: Optional[int],
-    session_id: Optional[str],
-) -> None:
-    """Track A/B test assignment as an event."""
-    event_data = EventCreate(
-        event_type=EventType.INTERACTION,
-        event_name="ab_test_assignment",
-        session_id=session_id,
-        properties={
-            "test_id": test.id,
-            "test_key": test.test_key,
-            "variant_id": variant.id,
-            "variant_key": variant.variant_key,
-            "is_control": variant.is_control,
-        },
+def _assignment_response(assignment: Assignment) -> AbTestAssignmentResponse:
+    """Build the API response for a catalog assignment."""
+    return AbTestAssignmentResponse(
+        test_id=assignment.test_id,
+        test_key=assignment.test_key,
+        variant_id=assignment.variant.id,
+        variant_key=assignment.variant.variant_key,
+        variant_configuration=assignment.variant.configuration,
+        assigned_at=assignment.assigned_at,
+        is_control=assignment.variant.is_control,
     )
 
-    await event_crud.create(db, obj_in=event_data, user_id=user_id)
-
 
 async def _track_conversion_event(
     db: AsyncSession,
@@ -1,6 +1,7 @@
 """Middleware module exports."""
 from .caching import ResponseCachingMiddleware, setup_caching_middleware
 from .http_metrics import HTTPMetricsMiddleware, setup_http_metrics_middleware
+from .query_budget import QueryAccountingMiddleware, setup_query_accounting_middleware
 from .security import setup_security_middleware
 from .validation import setup_validation_middleware
 
@@ -11,4 +12,6 @@ __all__ = [
     "ResponseCachingMiddleware",
     "setup_http_metrics_middleware",
     "HTTPMetricsMiddleware",
+    "setup_query_accounting_middleware",
+    "QueryAccountingMiddleware",
 ]
@@ -7,6 +7,8 @@ This middleware provides intelligent HTTP response caching with:
 - Performance metrics and monitoring
 - Cost-efficient caching strategies for bootstrapped applications
 """
+import asyncio
+import base64
 import hashlib
 import json
 import time
@@ -28,6 +30,7 @@ from starlette.types import ASGIApp
 
 from app.core.cache import Cache, get_cache
 from app.core.config import Environment, get_settings
+from app.core.performance import negotiate_encoding, response_compressor
 
 logger = structlog.get_logger()
 
@@ -117,6 +120,7 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
 
             # Cache successful responses
             if self._should_cache_response(response):
+                response = await self._buffer_response(response)
                 await self._cache_response(cache_key, response, request)
                 cache_status = "MISS-CACHED"
             else:
@@ -215,12 +219,33 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
                 json.loads(cached_data) if isinstance(cached_data, str) else cached_data
             )
 
-            # Create response from cached data
-            response = JSONResponse(
-                content=response_data.get("content"),
-                status_code=response_data.get("status_code", 200),
-                headers=response_data.get("headers", {}),
+            headers = {
+                name: value
+                for name, value in response_data.get("headers", {}).items()
+                if name.lower() not in ("content-length", "content-encoding")
+            }
+
+            # Serve a stored encoding when the client accepts one, so hits
+            # never recompress
+            variants = response_data.get("encoded") or {}
+            encoding = negotiate_encoding(
+                request.headers.get("accept-encoding", ""), list(variants)
             )
+            if encoding:
+                response = Response(
+                    content=base64.b64decode(variants[encoding]),
+                    status_code=response_data.get("status_code", 200),
+                    headers=headers,
+                )
+                response.headers["content-encoding"] = encoding
+                response.headers["vary"] = "Accept-Encoding"
+            else:
+                # Create response from cached data
+                response = JSONResponse(
+                    content=response_data.get("content"),
+                    status_code=response_data.get("status_code", 200),
+                    headers=headers,
+                )
 
             # Check ETags for conditional requests
             etag = response.headers.get("etag")
@@ -254,6 +279,7 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
                 "status_code": response.status_code,
                 "headers": dict(response.headers),
                 "cached_at": time.time(),
+                "encoded": await self._precompress(response),
             }
 
             # Determine cache TTL based on request type
@@ -272,6 +298,41 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             logger.warning("cache_set_error", cache_key=cache_key, error=str(e))
 
+    async def _buffer_response(self, response: Response) -> Response:
+        """Materialize a streamed ``call_next`` response so it can be cached."""
+        if getattr(response, "body", None) is not None:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            background=response.background,
+        )
+
+    async def _precompress(self, response: Response) -> Dict[str, str]:
+        """Encode a cacheable body once per available encoding.
+
+        Variants are stored base64-encoded next to the JSON content so the
+        cache entry stays JSON-serializable.
+        """
+        body = response.body or b""
+        if len(body) < response_compressor.min_size:
+            return {}
+        if response.headers.get("content-encoding"):
+            return {}
+        if not response_compressor.is_compressible(
+            response.headers.get("content-type", "")
+        ):
+            return {}
+
+        variants = await asyncio.to_thread(response_compressor.precompress, body)
+        return {
+            encoding: base64.b64encode(data).decode("ascii")
+            for encoding, data in variants.items()
+            if len(data) < len(body) * 0.9
+        }
+
     def _calculate_cache_ttl(self, request: Request, response: Response) -> int:
         """Calculate appropriate cache TTL based on request characteristics."""
         path = request.url.path
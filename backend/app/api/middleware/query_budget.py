@@ -0,0 +1,159 @@
+"""Per-request database query accounting, budgets and N+1 detection."""
+from typing import Dict, Optional
+
+import structlog
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import get_metrics
+from app.db.query_monitor import (
+    QueryBudgetExceeded,
+    RequestQueryStats,
+    track_request_queries,
+)
+
+logger = structlog.get_logger()
+
+
+class QueryAccountingMiddleware:
+    """Pure ASGI middleware that accounts database work per request.
+
+    Every request runs inside ``track_request_queries`` so the cursor event
+    listeners in ``app.db.query_monitor`` attribute statements to it. On
+    completion the middleware:
+
+    - adds a ``Server-Timing: db;dur=..;desc="N queries"`` response header
+    - observes ``db_queries_per_request`` / ``db_time_per_request_seconds``
+      labelled with the matched route template (never the raw path)
+    - logs and counts requests whose statement fingerprints repeat past the
+      N+1 threshold
+    - checks the optional per-endpoint query budget, raising
+      ``QueryBudgetExceeded`` when ``enforce`` is set so tests fail loudly
+
+    Statements issued while a streaming body is still being sent are counted
+    in metrics and budgets but cannot be reflected in the header.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        n_plus_one_threshold: int = 10,
+        default_budget: Optional[int] = None,
+        budgets: Optional[Dict[str, int]] = None,
+        enforce: bool = False,
+    ):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.default_budget = default_budget
+        self.budgets = budgets or {}
+        self.enforce = enforce
+        self.metrics = get_metrics()
+        self.excluded_paths = {
+            "/metrics",
+            "/health",
+            "/ready",
+            "/docs",
+            "/redoc",
+            "/openapi.json",
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        with track_request_queries(self.n_plus_one_threshold) as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", stats.server_timing())
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+        self._finish(scope, stats)
+
+    def _route_template(self, scope: Scope) -> Optional[str]:
+        """Return the matched route template, set on the scope by the router."""
+        route = scope.get("route")
+        if route is None:
+            return None
+        return getattr(route, "path_format", None) or getattr(route, "path", None)
+
+    def budget_for(self, method: str, route: str) -> Optional[int]:
+        """Resolve the query budget for an endpoint."""
+        return self.budgets.get(f"{method} {route}", self.default_budget)
+
+    def _finish(self, scope: Scope, stats: RequestQueryStats) -> None:
+        route = self._route_template(scope)
+        if route is None:
+            return
+        method = scope["method"]
+
+        try:
+            self.metrics["db_queries_per_request"].labels(
+                method=method, route=route
+            ).observe(stats.query_count)
+            self.metrics["db_time_per_request_seconds"].labels(
+                method=method, route=route
+            ).observe(stats.total_duration)
+        except Exception as e:
+            logger.error("query_accounting_metrics_failed", route=route, error=str(e))
+
+        repeated = stats.repeated_statements
+        if repeated:
+            self.metrics["db_n_plus_one_detected"].labels(
+                method=method, route=route
+            ).inc()
+            logger.warning(
+                "n_plus_one_detected",
+                method=method,
+                route=route,
+                query_count=stats.query_count,
+                repeated=[
+                    {"count": count, "statement": fingerprint[:200]}
+                    for fingerprint, count in repeated[:5]
+                ],
+            )
+
+        budget = self.budget_for(method, route)
+        if budget is not None and stats.query_count > budget:
+            self.metrics["db_query_budget_exceeded"].labels(
+                method=method, route=route
+            ).inc()
+            logger.warning(
+                "query_budget_exceeded",
+                method=method,
+                route=route,
+                query_count=stats.query_count,
+                budget=budget,
+            )
+            if self.enforce:
+                raise QueryBudgetExceeded(stats, budget, scope=f"{method} {route}")
+
+
+def setup_query_accounting_middleware(app) -> None:
+    """Set up per-request query accounting on the FastAPI app."""
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    if not settings.query_accounting_enabled:
+        return
+
+    app.add_middleware(
+        QueryAccountingMiddleware,
+        n_plus_one_threshold=settings.query_n_plus_one_threshold,
+        default_budget=settings.query_budget_default,
+        budgets=settings.query_budgets,
+        enforce=settings.query_budget_enforce,
+    )
+
+    logger.info(
+        "query_accounting_middleware_configured",
+        n_plus_one_threshold=settings.query_n_plus_one_threshold,
+        default_budget=settings.query_budget_default,
+        endpoint_budgets=len(settings.query_budgets),
+        enforce=settings.query_budget_enforce,
+    )
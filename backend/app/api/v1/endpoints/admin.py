@@ -1,12 +1,13 @@
 """Admin API endpoints."""
 import logging
-from datetime import datetime
-from typing import Any, List
+from datetime import UTC, date, datetime, time, timedelta
+from typing import Any, List, Optional
 
 from app.crud.audit_log import audit_log as audit_crud
 from app.models.admin import Admin, AdminRole
 from app.schemas import admin as schemas
 from app.schemas.common import PaginatedResponse
+from app.schemas.email_tracking import EmailStatsReport
 from app.schemas.user import UserCreate
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -138,6 +139,55 @@ async def read_admin_me(
     )
 
 
+@router.get("/email-stats", response_model=EmailStatsReport)
+async def get_email_stats(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    current_admin: Admin = Depends(deps.get_current_admin),
+    start_day: date,
+    end_day: date,
+    template_name: Optional[str] = None,
+) -> EmailStatsReport:
+    """Email delivery and engagement stats for a day range (admin only).
+
+    Served from the daily email rollups, so cost depends on the number of
+    days rather than the number of emails sent.
+    """
+    check_admin_permission(
+        current_admin=current_admin,
+        required_role=AdminRole.READONLY_ADMIN,
+        action="read",
+        resource="email_stats",
+    )
+    if end_day < start_day:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_day must not be before start_day",
+        )
+
+    stats = await crud.email_tracking.get_stats(
+        db,
+        start_date=datetime.combine(start_day, time.min, tzinfo=UTC),
+        end_date=datetime.combine(end_day + timedelta(days=1), time.min, tzinfo=UTC)
+        - timedelta(microseconds=1),
+        template_name=template_name,
+    )
+    daily = await crud.email_tracking.get_daily_rollups(
+        db, start_day=start_day, end_day=end_day, template_name=template_name
+    )
+    latency = await crud.email_tracking.get_latency_percentiles(
+        db, start_day=start_day, end_day=end_day, template_name=template_name
+    )
+    return EmailStatsReport(
+        start_day=start_day,
+        end_day=end_day,
+        template_name=template_name,
+        stats=stats,
+        daily=daily,
+        latency=latency,
+    )
+
+
 @router.get("/{admin_id}", response_model=schemas.AdminWithUser)
 async def read_admin(
     *,
@@ -42,6 +42,12 @@ async def list_posts(
     include_total: bool = Query(
         False, description="Include total count (expensive for large datasets)"
     ),
+    total_mode: str = Query(
+        "exact",
+        pattern="^(exact|estimate)$",
+        description="Total count mode: exact COUNT(*) or fast planner estimate",
+    ),
+    prefetch: bool = Query(False, description="Warm the next page into cache"),
     # Filters
     author: Optional[str] = Query(None, description="Filter by exact author name"),
     author_like: Optional[str] = Query(
@@ -159,6 +165,8 @@ async def list_posts(
             cursor=cursor,
             limit=limit,
             include_total=include_total,
+            total_mode=total_mode,
+            prefetch=prefetch,
             filters=filters,
             sort_by=sort_by,
             sort_direction=sort_direction,
@@ -40,6 +40,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.core.cache import get_cache
+from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -796,17 +797,19 @@ async def analyze_content_item(
             else ",".join(analysis_types),
         )
 
-        # Add background task for analysis
-        background_tasks.add_task(
-            _analyze_content_background,
-            db,
-            content_item,
-            analysis_job.job_id,
-            analysis_types,
-        )
+        # The job stays pending for app.worker.content_analysis_worker unless
+        # inline analysis is enabled (e.g. in development without a worker)
+        if get_settings().content_analysis_inline:
+            background_tasks.add_task(
+                _analyze_content_background,
+                db,
+                content_item,
+                analysis_job.job_id,
+                analysis_types,
+            )
 
         logger.info(
-            f"Started content analysis job {analysis_job.job_id} for content {content_id}"
+            f"Queued content analysis job {analysis_job.job_id} for content {content_id}"
         )
         return ContentAnalysisJob.model_validate(analysis_job)
 
@@ -7,6 +7,7 @@ from app.schemas.event import (
     EventAggregateResult,
     EventAnalyticsQuery,
     EventAnalyticsResponse,
+    EventAnonymizationJobResponse,
     EventAnonymizationRequest,
     EventCreate,
     EventCreateBulk,
@@ -15,7 +16,21 @@ from app.schemas.event import (
     EventSource,
     EventType,
 )
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from app.services.event_export import (
+    EXPORT_MEDIA_TYPES,
+    decode_position,
+    stream_export,
+)
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from redis.asyncio import Redis
@@ -458,54 +473,166 @@ async def anonymize_events(
     db: Annotated[AsyncSession, Depends(deps.get_db)],
     request: EventAnonymizationRequest,
     current_user: Annotated[models.User, Depends(deps.get_current_active_superuser)],
+    settings: Annotated[Settings, Depends(get_settings)],
 ) -> Dict[str, Any]:
-    """Anonymize events for GDPR compliance (admin only)."""
-    count = await crud.event.anonymize_user_events(db, request=request)
+    """
+    Anonymize events for GDPR compliance (admin only).
+
+    A dry run returns the number of matching events. Otherwise a job is
+    queued for the event worker, which anonymizes the events in paced chunks;
+    poll GET /anonymize/jobs/{job_id} for its progress.
+    """
+    if request.dry_run:
+        count = await crud.event.anonymize_user_events(db, request=request)
+        return {
+            "message": f"Would anonymize {count} events",
+            "count": count,
+            "dry_run": True,
+        }
 
+    job = await crud.event.create_anonymization_job(
+        db,
+        request=request,
+        chunk_size=request.chunk_size or settings.event_anonymization_chunk_size,
+        pause_ms=(
+            request.pause_ms
+            if request.pause_ms is not None
+            else settings.event_anonymization_pause_ms
+        ),
+    )
     return {
-        "message": f"{'Would anonymize' if request.dry_run else 'Anonymized'} {count} events",
-        "count": count,
-        "dry_run": request.dry_run,
+        "message": f"Anonymization job {job.job_id} queued",
+        "dry_run": False,
+        "job": EventAnonymizationJobResponse.model_validate(job),
     }
 
 
-@router.post("/export", response_model=List[EventResponse])
-async def export_user_events(
+@router.get("/anonymize/jobs/{job_id}", response_model=EventAnonymizationJobResponse)
+async def get_anonymization_job(
     *,
     db: Annotated[AsyncSession, Depends(deps.get_db)],
-    request: EventDataExportRequest,
-    current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
+    job_id: str,
+    current_user: Annotated[models.User, Depends(deps.get_current_active_superuser)],
 ) -> Any:
-    """Export user events for GDPR compliance."""
+    """Get the progress and throughput of an anonymization job (admin only)."""
+    job = await crud.event.get_anonymization_job(db, job_id=job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Anonymization job not found"
+        )
+    return job
+
+
+@router.post(
+    "/anonymize/jobs/{job_id}/resume", response_model=EventAnonymizationJobResponse
+)
+async def resume_anonymization_job(
+    *,
+    db: Annotated[AsyncSession, Depends(deps.get_db)],
+    job_id: str,
+    current_user: Annotated[models.User, Depends(deps.get_current_active_superuser)],
+) -> Any:
+    """Queue a failed anonymization job to continue from its cursor (admin only)."""
+    job = await crud.event.get_anonymization_job(db, job_id=job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Anonymization job not found"
+        )
+    if job.status != "failed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Only failed jobs can be resumed (job is {job.status})",
+        )
+    job.status = "pending"
+    job.error_message = None
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+@router.post("/export", response_class=StreamingResponse)
+async def export_user_events(
+    *,
+    request: Request,
+    export_request: EventDataExportRequest,
+    current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
+) -> StreamingResponse:
+    """
+    Export user events for GDPR compliance.
+
+    The export is streamed as a JSON array, NDJSON or CSV and can be gzipped
+    on the fly. Each record has a ``position``; send the last one received
+    as ``position`` to resume an interrupted export.
+    """
     # Users can only export their own events
-    if current_user.id != request.user_id and not current_user.is_superuser:
+    if current_user.id != export_request.user_id and not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
 
-    events = await crud.event.export_user_events(
-        db,
-        user_id=request.user_id,
-        event_types=request.event_types,
-        start_date=request.start_date,
-        end_date=request.end_date,
-        include_anonymized=request.include_anonymized,
+    after = None
+    if export_request.position:
+        try:
+            after = decode_position(export_request.position)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            ) from e
+
+    async def body():
+        async with deps.open_db_session(request) as db:
+            events = crud.event.stream_user_events(
+                db,
+                user_id=export_request.user_id,
+                event_types=export_request.event_types,
+                start_date=export_request.start_date,
+                end_date=export_request.end_date,
+                include_anonymized=export_request.include_anonymized,
+                after=after,
+            )
+            async for chunk in stream_export(
+                events, export_request.format, compress=export_request.compress
+            ):
+                yield chunk
+
+    filename = f"events-{export_request.user_id}.{export_request.format}"
+    if export_request.compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+    else:
+        media_type = EXPORT_MEDIA_TYPES[export_request.format]
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
-    return events
-
 
 @router.delete("/cleanup", status_code=status.HTTP_200_OK)
 async def cleanup_expired_events(
     *,
     db: Annotated[AsyncSession, Depends(deps.get_db)],
-    batch_size: int = 1000,
+    batch_size: int = Query(1000, ge=1, description="Rows per batched delete"),
     current_user: Annotated[models.User, Depends(deps.get_current_active_superuser)],
+    settings: Annotated[Settings, Depends(get_settings)],
 ) -> Dict[str, Any]:
-    """Clean up expired events based on retention policies (admin only)."""
-    deleted_count = await crud.event.delete_expired_events(db, batch_size=batch_size)
+    """
+    Clean up expired events based on retention policies (admin only).
+
+    One call runs at most event_retention_max_batches batched deletes; call
+    again (or leave it to the event worker) to remove the rest.
+    """
+    report = await crud.event.purge_expired_events(
+        db,
+        batch_size=batch_size,
+        max_batches=settings.event_retention_max_batches,
+    )
+    deleted_count = report.rows_removed
 
     return {
         "message": f"Deleted {deleted_count} expired events",
         "deleted_count": deleted_count,
+        "bytes_reclaimed": report.bytes_reclaimed,
+        "partitions_dropped": report.partitions_dropped,
+        "batches": report.batches,
     }
@@ -43,6 +43,12 @@ async def list_projects(
     include_total: bool = Query(
         False, description="Include total count (expensive for large datasets)"
     ),
+    total_mode: str = Query(
+        "exact",
+        pattern="^(exact|estimate)$",
+        description="Total count mode: exact COUNT(*) or fast planner estimate",
+    ),
+    prefetch: bool = Query(False, description="Warm the next page into cache"),
     # Filters
     owner_id: Optional[int] = Query(None, description="Filter by owner ID"),
     name_like: Optional[str] = Query(
@@ -141,6 +147,8 @@ async def list_projects(
             cursor=cursor,
             limit=limit,
             include_total=include_total,
+            total_mode=total_mode,
+            prefetch=prefetch,
             filters=filters,
             sort_by=sort_by,
             sort_direction=sort_direction,
@@ -28,6 +28,7 @@ from app.schemas.recommendation import (
     UserPreferences,
     UserPreferencesUpdate,
 )
+from app.services.recommendation_serving import get_recommendation_store
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -64,24 +65,19 @@ async def get_user_recommendations(
         )
 
     try:
-        cache = get_cache()
-        cache_key = f"recommendations:user:{user_id}:types:{':'.join(types or [])}:limit:{limit}"
+        store = get_recommendation_store()
 
-        # Check cache first (unless generating new)
+        # Serve from the materialized top-N list unless generating new
         if not generate_new:
-            cached_response = await cache.get(cache_key)
-            if cached_response:
-                logger.info(f"Serving cached recommendations for user {user_id}")
-                try:
-                    cached_data = (
-                        json.loads(cached_response)
-                        if isinstance(cached_response, str)
-                        else cached_response
-                    )
-                    return RecommendationResponse(**cached_data)
-                except Exception as e:
-                    logger.warning(f"Failed to parse cached recommendations: {e}")
-                    # Continue to generate fresh recommendations
+            served = await store.get_user_recommendations(
+                user_id,
+                types=types,
+                limit=limit,
+                include_context=include_context,
+                exclude_dismissed=exclude_dismissed,
+            )
+            if served is not None:
+                return served
 
         # Get existing recommendations
         statuses = [RecommendationStatus.ACTIVE] if exclude_dismissed else None
@@ -164,8 +160,14 @@ async def get_user_recommendations(
             },
         )
 
-        # Cache response for 5 minutes
-        await cache.set(cache_key, response.model_dump_json(), expire=300)
+        # Rematerialize so the next read is served from Redis
+        try:
+            rankings = await crud_recommendation.recommendation.get_active_for_users(
+                db, user_ids=[user_id], limit_per_user=store.top_n + 1
+            )
+            await store.materialize(rankings, {user_id: user_prefs})
+        except Exception as e:
+            logger.warning(f"Failed to materialize recommendations for {user_id}: {e}")
 
         logger.info(
             f"Generated {len(recommendations_data)} recommendations for user {user_id}"
@@ -277,25 +279,28 @@ async def submit_recommendation_feedback(
         )
 
         # Update recommendation status based on feedback
+        updated = None
         if feedback_in.action_taken == "clicked":
-            await crud_recommendation.recommendation.update_engagement(
+            updated = await crud_recommendation.recommendation.update_engagement(
                 db,
                 recommendation_id=feedback_in.recommendation_id,
                 action="clicked",
                 increment_clicks=True,
             )
         elif feedback_in.action_taken == "dismissed":
-            await crud_recommendation.recommendation.update_engagement(
+            updated = await crud_recommendation.recommendation.update_engagement(
                 db,
                 recommendation_id=feedback_in.recommendation_id,
                 action="dismissed",
             )
         elif feedback_in.action_taken == "converted":
-            await crud_recommendation.recommendation.update_engagement(
+            updated = await crud_recommendation.recommendation.update_engagement(
                 db,
                 recommendation_id=feedback_in.recommendation_id,
                 action="converted",
             )
+        if updated:
+            await _apply_served_engagement(updated)
 
         logger.info(
             f"User {current_user.id} provided feedback on recommendation {feedback_in.recommendation_id}"
@@ -540,6 +545,12 @@ async def create_bulk_recommendations(
             db, obj_in=bulk_request
         )
 
+        # Served lists of these users no longer match Postgres
+        try:
+            await get_recommendation_store().invalidate(user_ids)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate served recommendations: {e}")
+
         # Convert to response format
         recommendations_data = [
             Recommendation.model_validate(rec) for rec in recommendations
@@ -613,6 +624,7 @@ async def update_recommendation_engagement(
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Recommendation not found"
             )
+        await _apply_served_engagement(updated_recommendation)
 
         logger.info(f"Updated recommendation {recommendation_id} with action {action}")
         return Recommendation.model_validate(updated_recommendation)
@@ -680,6 +692,11 @@ async def update_user_preferences(
             db, user_id=user_id, obj_in=preferences_update
         )
 
+        try:
+            await get_recommendation_store().invalidate([user_id])
+        except Exception as e:
+            logger.warning(f"Failed to invalidate served recommendations: {e}")
+
         logger.info(f"Updated preferences for user {user_id}")
         return UserPreferences.model_validate(preferences)
 
@@ -691,6 +708,17 @@ async def update_user_preferences(
         )
 
 
+async def _apply_served_engagement(recommendation) -> None:
+    """Mirror an engagement update into the materialized top-N list."""
+    try:
+        await get_recommendation_store().apply_engagement(recommendation)
+    except Exception as e:
+        logger.warning(
+            f"Failed to update served recommendation "
+            f"{recommendation.recommendation_id}: {e}"
+        )
+
+
 async def _retrain_models_background(
     db: AsyncSession,
     retrain_request: ModelRetrainingRequest,
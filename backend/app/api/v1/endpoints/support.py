@@ -64,6 +64,12 @@ async def list_tickets(
     include_total: bool = Query(
         False, description="Include total count (expensive for large datasets)"
     ),
+    total_mode: str = Query(
+        "exact",
+        pattern="^(exact|estimate)$",
+        description="Total count mode: exact COUNT(*) or fast planner estimate",
+    ),
+    prefetch: bool = Query(False, description="Warm the next page into cache"),
     # Filters
     status: Optional[str] = Query(
         None, description="Filter by ticket status (open, closed, pending)"
@@ -183,6 +189,8 @@ async def list_tickets(
             cursor=cursor,
             limit=limit,
             include_total=include_total,
+            total_mode=total_mode,
+            prefetch=prefetch,
             filters=filters,
             sort_by=sort_by,
             sort_direction=sort_direction,
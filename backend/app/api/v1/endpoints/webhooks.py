@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional
 from app.api.deps import get_db
 from app.crud.email_tracking import email_tracking
 from app.models.email_tracking import EmailStatus
+from app.schemas.email_tracking import EmailEventCreate
 from app.schemas.webhooks import (
     SendGridEvent,
     SendGridWebhookPayload,
@@ -330,27 +331,142 @@ async def process_webhook_event(
 async def process_webhook_events_batch(
     db: AsyncSession,
     event_mappings: List[WebhookEventMapping],
+    provider: Optional[str] = None,
+    *,
+    raise_errors: bool = False,
 ) -> WebhookProcessingResult:
-    """Process multiple webhook events in batch."""
+    """
+    Process a webhook delivery as one set-based batch.
+
+    Tracking records for every event are resolved in one query, and duplicates
+    are dropped with one signature lookup against the unique event signature
+    index. Accepted events are written with one bulk UPDATE and one INSERT and
+    committed together, so a delivery costs a handful of queries regardless of
+    its size.
+
+    Args:
+        raise_errors: Re-raise database errors after rolling back instead of
+            reporting every event as failed, so a queued batch can be retried
+
+    Returns:
+        Processing result; duplicates count as successful events
+    """
     result = WebhookProcessingResult(
         processed_events=len(event_mappings),
         successful_events=0,
         failed_events=0,
         errors=[],
     )
+    if not event_mappings:
+        return result
+
+    try:
+        trackings = await email_tracking.resolve_for_events(
+            db,
+            events=[(m.email_id, m.recipient, m.timestamp) for m in event_mappings],
+            time_window_hours=24,
+        )
+        signatures = [_generate_event_signature(m) for m in event_mappings]
+        seen = await email_tracking.get_existing_signatures(db, signatures=signatures)
+
+        accepted = []
+        duplicates = 0
+        for event_mapping, tracking, event_signature in zip(
+            event_mappings, trackings, signatures
+        ):
+            if not tracking:
+                error_msg = (
+                    f"No tracking record found - email_id: {event_mapping.email_id}, "
+                    f"recipient: {event_mapping.recipient}, event: {event_mapping.status}"
+                )
+                logger.warning(error_msg)
+                result.failed_events += 1
+                result.errors.append(error_msg)
+                continue
 
-    for event_mapping in event_mappings:
-        success, error = await process_webhook_event(db, event_mapping)
-        if success:
             result.successful_events += 1
-        else:
-            result.failed_events += 1
-            if error:
-                result.errors.append(error)
+            if event_signature in seen:
+                duplicates += 1
+                continue
+            seen.add(event_signature)
+
+            accepted.append(
+                (
+                    tracking,
+                    EmailEventCreate(
+                        event_type=event_mapping.status,
+                        occurred_at=event_mapping.timestamp,
+                        user_agent=event_mapping.user_agent,
+                        ip_address=event_mapping.ip_address,
+                        location=event_mapping.location,
+                        event_metadata={
+                            **(event_mapping.event_metadata or {}),
+                            "event_signature": event_signature,
+                        },
+                    ),
+                    event_mapping.error_message,
+                )
+            )
 
+        applied = await email_tracking.bulk_apply_events(db, events=accepted)
+        await db.commit()
+
+    except Exception as e:
+        logger.error(
+            f"Error processing {provider or 'webhook'} batch of "
+            f"{len(event_mappings)} events: {str(e)}",
+            exc_info=True,
+        )
+        await db.rollback()
+        if raise_errors:
+            raise
+        return WebhookProcessingResult(
+            processed_events=len(event_mappings),
+            successful_events=0,
+            failed_events=len(event_mappings),
+            errors=[str(e)],
+        )
+
+    logger.info(
+        f"Processed {provider or 'webhook'} batch: {applied} applied, "
+        f"{duplicates} duplicates, {result.failed_events} unresolved"
+    )
     return result
 
 
+def defer_webhook_events(
+    event_mappings: List[WebhookEventMapping], provider: str
+) -> Optional[WebhookProcessingResult]:
+    """
+    Hand a webhook batch to the email worker when deferral is enabled.
+
+    Returns:
+        Acknowledgement result, or None to process the batch inline
+    """
+    if not get_settings().email_webhook_defer_processing:
+        return None
+
+    from app.worker.email_worker import process_email_webhook_events_task
+
+    try:
+        process_email_webhook_events_task.delay(
+            [m.model_dump(mode="json") for m in event_mappings], provider
+        )
+    except Exception as e:
+        logger.error(
+            f"Failed to defer {provider} webhook batch, processing inline: {e}"
+        )
+        return None
+
+    return WebhookProcessingResult(
+        processed_events=len(event_mappings),
+        successful_events=0,
+        failed_events=0,
+        errors=[],
+        deferred=True,
+    )
+
+
 @router.post(
     "/sendgrid",
     response_model=WebhookProcessingResult,
@@ -413,6 +529,11 @@ async def sendgrid_webhook(
                 errors=["No valid events found"],
             )
 
+        # Acknowledge immediately when a worker takes the batch
+        deferred = defer_webhook_events(event_mappings, "sendgrid")
+        if deferred:
+            return deferred
+
         # Process events with provider context
         result = await process_webhook_events_batch(
             db, event_mappings, provider="sendgrid"
@@ -475,6 +596,11 @@ async def smtp_webhook(
                 errors=["No valid events found"],
             )
 
+        # Acknowledge immediately when a worker takes the batch
+        deferred = defer_webhook_events(event_mappings, "smtp")
+        if deferred:
+            return deferred
+
         # Process events with provider context
         result = await process_webhook_events_batch(db, event_mappings, provider="smtp")
 
@@ -5,13 +5,20 @@ Comprehensive security event logging and compliance tracking.
 
 import logging
 import json
+import os
 import hashlib
 import secrets
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Set, Union
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timedelta
+from collections import deque
 import asyncio
+import time
+
+from app.core.audit_segments import AuditSegmentStore, SegmentVerification
+from app.core.audit_sinks import AuditDatabaseSink, AuditFileSink, AuditSpillFile
+from app.core.metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -151,6 +158,17 @@ class AuditEvent:
         data["timestamp"] = self.timestamp.isoformat()
         return data
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AuditEvent":
+        """Rebuild an audit event from its stored dictionary form."""
+        known = {name for name in cls.__dataclass_fields__}
+        values = {k: v for k, v in data.items() if k in known}
+        values["event_type"] = AuditEventType(values["event_type"])
+        values["severity"] = AuditEventSeverity(values["severity"])
+        values["outcome"] = AuditEventOutcome(values["outcome"])
+        values["timestamp"] = datetime.fromisoformat(values["timestamp"])
+        return cls(**values)
+
     def to_json(self) -> str:
         """Convert audit event to JSON string."""
         return json.dumps(self.to_dict(), default=str, ensure_ascii=False)
@@ -170,6 +188,7 @@ class AuditLogConfig:
     enabled: bool = True
     log_to_file: bool = True
     log_to_database: bool = True
+    log_to_segments: bool = False
     log_to_external: bool = False
     log_level: str = "INFO"
     max_file_size: int = 104857600  # 100MB
@@ -189,6 +208,21 @@ class AuditLogConfig:
     enable_event_correlation: bool = True
     enable_anomaly_detection: bool = False
 
+    # Delivery pipeline: events are queued in memory and drained in batches
+    queue_max_events: int = 10000
+    batch_size: int = 500
+    flush_interval: float = 1.0  # seconds between background drains
+    overflow_policy: str = "spill"  # drop_oldest, drop_newest or spill
+    log_file_path: str = "logs/audit/audit.log"
+    spill_path: str = "logs/audit/audit.spill"
+    fsync_interval: float = 1.0  # at most one fsync per interval, 0 syncs every batch
+    sink_max_retries: int = 30  # failed writes retried once per drain, then dropped
+
+    # Hash-chained segment storage backing search and integrity checks, opt-in
+    # and only with an absolute directory so no process writes into its cwd
+    segment_directory: Optional[str] = None
+    segment_block_records: int = 1000
+
 
 class AuditEventFilter:
     """Filter for audit events based on various criteria."""
@@ -243,6 +277,19 @@ class AuditEventFilter:
         self.add_filter(ip_filter)
 
 
+class _PendingAuditEvent:
+    """A queued event record and the sinks it still has to reach."""
+
+    __slots__ = ("record", "sinks", "enqueued_at", "attempts", "abandoned")
+
+    def __init__(self, record: Dict[str, Any], sinks: tuple):
+        self.record = record
+        self.sinks = sinks
+        self.enqueued_at = time.monotonic()
+        self.attempts: Dict[str, int] = {}
+        self.abandoned = False
+
+
 class AuditLogger:
     """
     Main audit logging service.
@@ -254,20 +301,74 @@ class AuditLogger:
     - Real-time monitoring and alerting
     - Compliance and security event tracking
     - Data masking and encryption
+
+    log_event never waits on storage. Events are serialized and appended to a
+    bounded in-memory ring buffer. A background task drains the buffer in
+    batches to every enabled sink. When the buffer is full, the overflow
+    policy drops the oldest event, drops the newest event, or spills the event
+    to disk for later replay. High and critical events wake the drainer
+    instead of being written on the caller's path.
+
+    A sink whose write fails gets its own backlog of the events it missed,
+    retried once per drain and capped at queue_max_events, so one broken sink
+    never holds back the others. Events still failing after sink_max_retries
+    drains are dropped for that sink only.
     """
 
     def __init__(self, config: AuditLogConfig):
         self.config = config
         self.event_filter = AuditEventFilter()
-        self.pending_events: List[AuditEvent] = []
-        self.event_buffer_size = 1000
-        self._lock = asyncio.Lock()
+        self.pending_events: deque = deque()
+        self._sink_backlog: Dict[str, deque] = {}
+        self.sinks: Dict[str, Callable] = self._build_sinks()
+        self._spill = AuditSpillFile(config.spill_path)
+        self._wake = asyncio.Event()
+        self._drainer: Optional[asyncio.Task] = None
+        self._drainer_loop = None
+        self._stopping = False
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "sink_errors": 0,
+            "sink_dropped": 0
+        }
 
         # Set up default filters
         self._setup_default_filters()
 
         logger.info("Initialized Audit Logger")
 
+    def _build_sinks(self) -> Dict[str, Callable]:
+        """Create the batch writers for every enabled destination."""
+        sinks = {}
+        if self.config.log_to_file:
+            self._file_sink = AuditFileSink(
+                self.config.log_file_path,
+                max_bytes=self.config.max_file_size,
+                backup_count=self.config.max_files,
+                fsync_interval=self.config.fsync_interval
+            )
+            sinks["file"] = self._file_sink.write
+        if self.config.log_to_database:
+            sinks["database"] = AuditDatabaseSink().write
+        self.segments: Optional[AuditSegmentStore] = None
+        if self.config.log_to_segments:
+            directory = self.config.segment_directory
+            if not directory or not os.path.isabs(directory):
+                raise ValueError(
+                    "log_to_segments requires an absolute segment_directory"
+                )
+            self.segments = AuditSegmentStore(
+                self.config.segment_directory,
+                block_records=self.config.segment_block_records
+            )
+            sinks["segments"] = self.segments.write
+        if self.config.log_to_external:
+            sinks["external"] = self._log_to_external
+        return sinks
+
     def _setup_default_filters(self):
         """Set up default event filters."""
         # Always log critical and high severity events
@@ -301,17 +402,14 @@ class AuditLogger:
         if self.config.encrypt_sensitive_data:
             self._encrypt_sensitive_data(event)
 
-        # Add event to buffer
-        async with self._lock:
-            self.pending_events.append(event)
-
-            # Flush buffer if it's full
-            if len(self.pending_events) >= self.event_buffer_size:
-                await self._flush_events()
+        # Queue for the background drainer; storage is never awaited here
+        self._ensure_started()
+        self._enqueue(event.to_dict())
 
-        # Log immediately for high/critical events
-        if event.severity in [AuditEventSeverity.HIGH, AuditEventSeverity.CRITICAL]:
-            await self._log_event_immediately(event)
+        # Drain promptly for high/critical events or a full batch
+        if (event.severity in [AuditEventSeverity.HIGH, AuditEventSeverity.CRITICAL]
+                or len(self.pending_events) >= self.config.batch_size):
+            self._wake.set()
 
         # Trigger alerts if configured
         if self.config.alert_on_high_severity and event.severity == AuditEventSeverity.HIGH:
@@ -516,69 +614,188 @@ class AuditLogger:
         if any(sensitive in str(event.details).lower() for sensitive in self.config.sensitive_fields):
             event.security_flags.append("encrypted_data")
 
-    async def _log_event_immediately(self, event: AuditEvent):
-        """Log a high-priority event immediately."""
+    def _enqueue(self, record: Dict[str, Any]):
+        """Append a record to the ring buffer, applying the overflow policy."""
+        metrics = get_metrics()
+        if len(self.pending_events) >= self.config.queue_max_events:
+            policy = self.config.overflow_policy
+            if policy == "spill":
+                try:
+                    self._spill.append(record)
+                    self.stats["spilled"] += 1
+                    metrics["audit_events"].labels(outcome="spilled").inc()
+                    return
+                except OSError as e:
+                    logger.error(f"Failed to spill audit event, dropping oldest: {e}")
+                    policy = "drop_oldest"
+            self.stats["dropped"] += 1
+            metrics["audit_events"].labels(outcome="dropped").inc()
+            if policy == "drop_newest":
+                return
+            self.pending_events.popleft()
+
+        self.pending_events.append(_PendingAuditEvent(record, tuple(self.sinks)))
+        self.stats["enqueued"] += 1
+        metrics["audit_events"].labels(outcome="enqueued").inc()
+        metrics["audit_queue_depth"].set(len(self.pending_events))
+
+    def _ensure_started(self):
+        """Start the background drainer on the running loop if needed."""
+        if self._stopping:
+            return
         try:
-            # Log to file
-            if self.config.log_to_file:
-                await self._log_to_file(event)
-
-            # Log to database
-            if self.config.log_to_database:
-                await self._log_to_database(event)
-
-            # Log to external service
-            if self.config.log_to_external:
-                await self._log_to_external(event)
-
-        except Exception as e:
-            logger.error(f"Failed to log event immediately: {e}")
-
-    async def _flush_events(self):
-        """Flush pending events to storage."""
-        if not self.pending_events:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
             return
+        if self._drainer is None or self._drainer.done() or self._drainer_loop is not loop:
+            self._drainer_loop = loop
+            self._drainer = loop.create_task(self._drain_loop())
+
+    async def start(self):
+        """Start draining queued events in the background."""
+        self._stopping = False
+        self._ensure_started()
+
+    async def stop(self):
+        """Stop the drainer, flush what is queued and close the sinks."""
+        self._stopping = True
+        self._wake.set()
+        if self._drainer is not None and self._drainer_loop is asyncio.get_running_loop():
+            await self._drainer
+        self._drainer = None
+        await self._flush_events()
+        if self.config.log_to_file:
+            await self._file_sink.close()
+
+    async def flush(self):
+        """Write every queued event to the sinks now."""
+        await self._flush_events()
+
+    async def _drain_loop(self):
+        """Drain the queue every flush interval, or sooner when woken."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.config.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self._flush_events()
+            except Exception as e:
+                logger.error(f"Audit drainer failed: {e}")
 
-        events_to_flush = self.pending_events.copy()
-        self.pending_events.clear()
+    async def _flush_events(self):
+        """Flush pending events to storage in batches.
+
+        Sink backlogs are retried first, once per drain. Each queued batch is
+        then written once per sink; a sink that failed during this drain is
+        skipped and its share of the batch joins its backlog, while the other
+        sinks keep receiving batches. Once the queue is empty, spilled events
+        are read back in.
+        """
+        failing: Set[str] = set()
+        for name, backlog in list(self._sink_backlog.items()):
+            while backlog and name not in failing:
+                count = min(self.config.batch_size, len(backlog))
+                items = [backlog.popleft() for _ in range(count)]
+                if not await self._write_to_sink(name, items, retry=True):
+                    failing.add(name)
+
+        while self.pending_events:
+            count = min(self.config.batch_size, len(self.pending_events))
+            batch = [self.pending_events.popleft() for _ in range(count)]
+
+            by_sink: Dict[str, List[_PendingAuditEvent]] = {}
+            for item in batch:
+                for name in item.sinks:
+                    by_sink.setdefault(name, []).append(item)
+
+            for name, items in by_sink.items():
+                if name in failing:
+                    self._defer(name, items)
+                elif not await self._write_to_sink(name, items):
+                    failing.add(name)
+
+        get_metrics()["audit_queue_depth"].set(len(self.pending_events))
+        if self._spill.pending:
+            await self._replay_spilled()
+            if self.pending_events:
+                await self._flush_events()
 
+    async def _write_to_sink(
+        self, name: str, items: List[_PendingAuditEvent], retry: bool = False
+    ) -> bool:
+        """Write items to one sink; failed items go to that sink's backlog."""
+        metrics = get_metrics()
+        started = time.perf_counter()
         try:
-            # Batch log events
-            if self.config.log_to_database:
-                await self._batch_log_to_database(events_to_flush)
-
-            if self.config.log_to_file:
-                await self._batch_log_to_file(events_to_flush)
-
+            await self.sinks[name]([item.record for item in items])
         except Exception as e:
-            logger.error(f"Failed to flush events: {e}")
-            # Put events back in queue
-            self.pending_events.extend(events_to_flush)
-
-    async def _log_to_file(self, event: AuditEvent):
-        """Log event to file."""
-        # Implementation would write to log file
-        # For now, just use the standard logger
-        logger.info(f"AUDIT: {event.to_json()}")
-
-    async def _log_to_database(self, event: AuditEvent):
-        """Log event to database."""
-        # Implementation would insert into audit log table
-        # For now, just log the action
-        logger.info(f"Database audit log: {event.event_id}")
-
-    async def _log_to_external(self, event: AuditEvent):
-        """Log event to external service."""
-        # Implementation would send to external logging service
-        logger.info(f"External audit log: {event.event_id}")
-
-    async def _batch_log_to_database(self, events: List[AuditEvent]):
-        """Batch log events to database."""
-        logger.info(f"Batch database audit log: {len(events)} events")
+            logger.error(f"Failed to write {len(items)} audit events to {name}: {e}")
+            self.stats["sink_errors"] += 1
+            metrics["audit_events"].labels(outcome="sink_error").inc(len(items))
+            kept = []
+            for item in items:
+                item.attempts[name] = item.attempts.get(name, 0) + 1
+                if item.attempts[name] > self.config.sink_max_retries:
+                    self._abandon(name, item)
+                else:
+                    kept.append(item)
+            # Retried items go back in front to keep the sink's ordering
+            self._defer(name, kept, front=retry)
+            return False
+        finally:
+            metrics["audit_sink_write_seconds"].labels(sink=name).observe(
+                time.perf_counter() - started
+            )
+        for item in items:
+            self._done(name, item)
+        return True
 
-    async def _batch_log_to_file(self, events: List[AuditEvent]):
-        """Batch log events to file."""
-        logger.info(f"Batch file audit log: {len(events)} events")
+    def _defer(
+        self, name: str, items: List[_PendingAuditEvent], front: bool = False
+    ):
+        """Queue items on a sink's backlog, dropping the oldest beyond the cap."""
+        backlog = self._sink_backlog.setdefault(name, deque())
+        if front:
+            backlog.extendleft(reversed(items))
+        else:
+            backlog.extend(items)
+        while len(backlog) > self.config.queue_max_events:
+            self._abandon(name, backlog.popleft())
+
+    def _abandon(self, name: str, item: _PendingAuditEvent):
+        """Give up delivering an event to one sink."""
+        self.stats["sink_dropped"] += 1
+        get_metrics()["audit_events"].labels(outcome="sink_dropped").inc()
+        item.abandoned = True
+        self._done(name, item)
+
+    def _done(self, name: str, item: _PendingAuditEvent):
+        """Record that a sink is finished with an event."""
+        item.sinks = tuple(sink for sink in item.sinks if sink != name)
+        if item.sinks or item.abandoned:
+            return
+        metrics = get_metrics()
+        self.stats["written"] += 1
+        metrics["audit_events"].labels(outcome="written").inc()
+        metrics["audit_event_latency"].observe(time.monotonic() - item.enqueued_at)
+
+    async def _replay_spilled(self):
+        """Move spilled events back into the queue, re-spilling any excess."""
+        records = await self._spill.take()
+        room = self.config.queue_max_events - len(self.pending_events)
+        for record in records[:room]:
+            self.pending_events.append(_PendingAuditEvent(record, tuple(self.sinks)))
+        for record in records[room:]:
+            self._spill.append(record)
+        if records:
+            logger.info(f"Replayed {min(len(records), room)} spilled audit events")
+
+    async def _log_to_external(self, records: List[Dict[str, Any]]):
+        """Log a batch of events to an external service."""
+        # Implementation would send to external logging service
+        logger.info(f"External audit log: {len(records)} events")
 
     async def _trigger_alert(self, event: AuditEvent):
         """Trigger alert for high severity event."""
@@ -592,6 +809,17 @@ class AuditLogger:
         """Get audit logging statistics."""
         return {
             "pending_events": len(self.pending_events),
+            "spilled_pending": self._spill.pending,
+            "sink_backlog": {
+                name: len(backlog) for name, backlog in self._sink_backlog.items()
+            },
+            "events_enqueued": self.stats["enqueued"],
+            "events_written": self.stats["written"],
+            "events_dropped": self.stats["dropped"],
+            "events_spilled": self.stats["spilled"],
+            "sink_errors": self.stats["sink_errors"],
+            "sink_events_dropped": self.stats["sink_dropped"],
+            "overflow_policy": self.config.overflow_policy,
             "config_enabled": self.config.enabled,
             "filters_active": len(self.event_filter.filters),
             "file_logging_enabled": self.config.log_to_file,
@@ -608,20 +836,51 @@ class AuditLogger:
         severity: Optional[AuditEventSeverity] = None,
         limit: int = 100
     ) -> List[AuditEvent]:
-        """Search audit events with filters."""
-        # This would implement actual search functionality
-        # For now, return empty list
-        logger.info(f"Search audit events: type={event_type}, actor={actor_id}, limit={limit}")
-        return []
+        """Search audit events with filters, newest first.
+
+        Reads the hash-chained segments and decompresses only the blocks whose
+        sparse index entry can match. Events still queued in memory are not
+        included.
+        """
+        if self.segments is None:
+            logger.warning("Audit search requires segment storage to be enabled")
+            return []
+
+        records = await asyncio.to_thread(
+            self.segments.search,
+            start=start_date,
+            end=end_date,
+            actor_id=actor_id,
+            event_type=event_type.value if event_type else None,
+            severity=severity.value if severity else None,
+            limit=limit
+        )
+        return [AuditEvent.from_dict(record) for record in records]
+
+    async def verify_integrity(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[SegmentVerification]:
+        """Verify the hash chain of every segment in the date range."""
+        if self.segments is None:
+            return []
+        return await asyncio.to_thread(
+            self.segments.verify,
+            start_date.date() if start_date else None,
+            end_date.date() if end_date else None
+        )
 
     async def cleanup_old_events(self, days_to_keep: int = 90):
         """Clean up old audit events."""
         cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
         logger.info(f"Cleaning up audit events older than {cutoff_date}")
 
-        # Implementation would delete old events from storage
-        # For now, just log the action
-        logger.info("Audit event cleanup completed")
+        # Segments are partitioned by day, so retention drops whole files
+        dropped = 0
+        if self.segments is not None:
+            dropped = await asyncio.to_thread(self.segments.drop_before, cutoff_date.date())
+        logger.info(f"Audit event cleanup completed, dropped {dropped} segments")
 
 
 # Global audit logger instance
@@ -0,0 +1,429 @@
+"""Hash-chained, compressed, time-partitioned audit segments.
+
+The audit log is stored as one append-only segment file per UTC day
+(``audit-YYYYMMDD.seg``). Each write appends one or more blocks. A block is a
+4-byte length header followed by a zlib-compressed run of JSON lines. Every
+record carries a ``chain_hash``, which is the SHA-256 of the previous record's
+hash plus the record's canonical JSON. The chain runs across blocks and
+segments in write order, so editing, removing or reordering any record breaks
+every hash after it.
+
+Next to each segment is a sparse index (``audit-YYYYMMDD.idx``). It holds one
+JSON line per block with the block's offset and length, its time range, its
+event types and actor ids (or ``null`` when a block has too many distinct
+actors), and the hashes at the block's boundaries. A range query loads the
+small indexes, skips blocks that cannot match, and reads and decompresses
+only the rest. Integrity verification streams a segment once, one block at a
+time, and checks it against both its index and the hash chain.
+
+Several processes may share a directory. Writers serialize on an exclusive
+``flock`` of the directory's lock file and re-read the chain head under it on
+every append, so the chain never forks and blocks never interleave.
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GENESIS_HASH = "0" * 64
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+LOCK_NAME = "audit.lock"
+_HEADER = struct.Struct(">I")
+
+
+def _canonical(record: Dict[str, Any]) -> str:
+    return json.dumps(
+        record, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False
+    )
+
+
+def chain_hash(prev_hash: str, record: Dict[str, Any]) -> str:
+    """Hash linking ``record`` to the record written before it."""
+    return hashlib.sha256((prev_hash + _canonical(record)).encode("utf-8")).hexdigest()
+
+
+def _as_naive_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+@dataclass
+class SegmentBlock:
+    """Sparse index entry for one compressed block."""
+
+    offset: int
+    length: int
+    count: int
+    min_ts: str
+    max_ts: str
+    event_types: List[str]
+    actors: Optional[List[int]]
+    prev_hash: str
+    last_hash: str
+
+    def may_match(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        actor_id: Optional[int],
+        event_type: Optional[str],
+    ) -> bool:
+        if start is not None and datetime.fromisoformat(self.max_ts) < start:
+            return False
+        if end is not None and datetime.fromisoformat(self.min_ts) > end:
+            return False
+        if event_type is not None and event_type not in self.event_types:
+            return False
+        if (
+            actor_id is not None
+            and self.actors is not None
+            and actor_id not in self.actors
+        ):
+            return False
+        return True
+
+
+@dataclass
+class SegmentVerification:
+    """Outcome of verifying one segment."""
+
+    segment: str
+    blocks: int = 0
+    records: int = 0
+    last_hash: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class AuditSegmentStore:
+    """Append-only audit segment storage with a sparse block index."""
+
+    name = "segments"
+
+    def __init__(
+        self,
+        directory: str,
+        block_records: int = 1000,
+        max_indexed_actors: int = 256,
+        compression_level: int = 6,
+    ):
+        self.directory = directory
+        self.block_records = block_records
+        self.max_indexed_actors = max_indexed_actors
+        self.compression_level = compression_level
+        self.blocks_read = 0
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, Tuple[int, List[SegmentBlock]]] = {}
+
+    # Layout
+    def _segment_path(self, day: date) -> str:
+        return os.path.join(
+            self.directory, f"{SEGMENT_PREFIX}{day:%Y%m%d}{SEGMENT_SUFFIX}"
+        )
+
+    def _index_path(self, segment_path: str) -> str:
+        return segment_path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold the store lock against this and every other process."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, LOCK_NAME), "a") as handle:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def segments(self) -> List[Tuple[date, str]]:
+        """All segments as ``(day, path)``, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                stamp = name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]
+                try:
+                    day = datetime.strptime(stamp, "%Y%m%d").date()
+                except ValueError:
+                    continue
+                found.append((day, os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def load_index(self, segment_path: str) -> List[SegmentBlock]:
+        """Block index of a segment, cached until the index file grows."""
+        index_path = self._index_path(segment_path)
+        try:
+            size = os.path.getsize(index_path)
+        except OSError:
+            return []
+        cached = self._indexes.get(index_path)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+
+        blocks = []
+        with open(index_path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    blocks.append(SegmentBlock(**json.loads(line)))
+                except (ValueError, TypeError):
+                    # A torn trailing line from an interrupted append
+                    break
+        self._indexes[index_path] = (size, blocks)
+        return blocks
+
+    # Writing
+    def _recover_head(self) -> str:
+        for _, path in reversed(self.segments()):
+            blocks = self.load_index(path)
+            if blocks:
+                return blocks[-1].last_hash
+        return GENESIS_HASH
+
+    def _block_entry(
+        self, offset: int, payload: bytes, records: List[Dict[str, Any]], prev: str
+    ) -> SegmentBlock:
+        timestamps = [record["timestamp"] for record in records]
+        actors = {
+            record["actor_id"]
+            for record in records
+            if record.get("actor_id") is not None
+        }
+        return SegmentBlock(
+            offset=offset,
+            length=len(payload),
+            count=len(records),
+            min_ts=min(timestamps, key=datetime.fromisoformat),
+            max_ts=max(timestamps, key=datetime.fromisoformat),
+            event_types=sorted({record["event_type"] for record in records}),
+            actors=(sorted(actors) if len(actors) <= self.max_indexed_actors else None),
+            prev_hash=prev,
+            last_hash=records[-1]["chain_hash"],
+        )
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        """Chain, compress and append ``records`` to today's segment."""
+        if not records:
+            return
+        with self._exclusive():
+            # Another process may have extended the chain since our last append
+            head = self._recover_head()
+            segment_path = self._segment_path(datetime.utcnow().date())
+            blocks = self.load_index(segment_path)
+            indexed_end = (
+                blocks[-1].offset + _HEADER.size + blocks[-1].length if blocks else 0
+            )
+
+            entries = []
+            with open(segment_path, "ab") as segment:
+                if segment.seek(0, os.SEEK_END) > indexed_end:
+                    # Drop a block whose writer died before indexing it
+                    segment.truncate(indexed_end)
+                    segment.seek(indexed_end)
+                for start in range(0, len(records), self.block_records):
+                    chunk = []
+                    prev = head
+                    for record in records[start : start + self.block_records]:
+                        head = chain_hash(head, record)
+                        chunk.append({**record, "chain_hash": head})
+                    payload = zlib.compress(
+                        "".join(_canonical(r) + "\n" for r in chunk).encode("utf-8"),
+                        self.compression_level,
+                    )
+                    offset = segment.tell()
+                    segment.write(_HEADER.pack(len(payload)) + payload)
+                    entries.append(self._block_entry(offset, payload, chunk, prev))
+                segment.flush()
+                os.fsync(segment.fileno())
+
+            with open(self._index_path(segment_path), "a", encoding="utf-8") as index:
+                for entry in entries:
+                    index.write(json.dumps(asdict(entry)) + "\n")
+                index.flush()
+                os.fsync(index.fileno())
+
+    async def write(self, records: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self.append, records)
+
+    # Reading
+    def _read_block(self, handle, block: SegmentBlock) -> List[Dict[str, Any]]:
+        handle.seek(block.offset + _HEADER.size)
+        payload = handle.read(block.length)
+        self.blocks_read += 1
+        return [
+            json.loads(line)
+            for line in zlib.decompress(payload).decode("utf-8").splitlines()
+        ]
+
+    def search(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        actor_id: Optional[int] = None,
+        event_type: Optional[str] = None,
+        severity: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Matching records, newest first, reading only candidate blocks."""
+        start = _as_naive_utc(start) if start is not None else None
+        end = _as_naive_utc(end) if end is not None else None
+        found: List[Dict[str, Any]] = []
+        for day, path in reversed(self.segments()):
+            # A segment only holds records written on its day, never later ones
+            if start is not None and day < start.date():
+                break
+            candidates = [
+                block
+                for block in self.load_index(path)
+                if block.may_match(start, end, actor_id, event_type)
+            ]
+            if not candidates:
+                continue
+            with open(path, "rb") as handle:
+                for block in reversed(candidates):
+                    for record in reversed(self._read_block(handle, block)):
+                        if not self._matches(
+                            record, start, end, actor_id, event_type, severity
+                        ):
+                            continue
+                        found.append(record)
+                        if len(found) >= limit:
+                            return found
+        return found
+
+    @staticmethod
+    def _matches(record, start, end, actor_id, event_type, severity) -> bool:
+        if actor_id is not None and record.get("actor_id") != actor_id:
+            return False
+        if event_type is not None and record.get("event_type") != event_type:
+            return False
+        if severity is not None and record.get("severity") != severity:
+            return False
+        if start is not None or end is not None:
+            moment = datetime.fromisoformat(record["timestamp"])
+            if start is not None and moment < start:
+                return False
+            if end is not None and moment > end:
+                return False
+        return True
+
+    # Integrity
+    def _iter_blocks(self, handle) -> Iterator[Tuple[int, bytes]]:
+        while True:
+            header = handle.read(_HEADER.size)
+            if not header:
+                return
+            if len(header) < _HEADER.size:
+                raise ValueError("truncated block header")
+            (length,) = _HEADER.unpack(header)
+            payload = handle.read(length)
+            if len(payload) < length:
+                raise ValueError("truncated block")
+            yield handle.tell() - length - _HEADER.size, payload
+
+    def verify_segment(
+        self, segment_path: str, expected_prev: Optional[str] = None
+    ) -> SegmentVerification:
+        """Stream one segment and check it against its index and the chain.
+
+        ``expected_prev`` is the last hash of the preceding segment. When it is
+        not given, the segment's first recorded ``prev_hash`` is trusted.
+        """
+        blocks = self.load_index(segment_path)
+        result = SegmentVerification(segment=os.path.basename(segment_path))
+        prev = expected_prev
+        if prev is None:
+            prev = blocks[0].prev_hash if blocks else GENESIS_HASH
+        try:
+            with open(segment_path, "rb") as handle:
+                for offset, payload in self._iter_blocks(handle):
+                    position = result.blocks
+                    block = blocks[position] if position < len(blocks) else None
+                    if block is None or (block.offset, block.length) != (
+                        offset,
+                        len(payload),
+                    ):
+                        result.error = f"block {position} does not match the index"
+                        return result
+                    if block.prev_hash != prev:
+                        result.error = f"chain broken before block {position}"
+                        return result
+                    text = zlib.decompress(payload).decode("utf-8")
+                    for line in text.splitlines():
+                        record = json.loads(line)
+                        stored = record.pop("chain_hash", None)
+                        prev = chain_hash(prev, record)
+                        if stored != prev:
+                            result.error = (
+                                f"hash mismatch at event {record.get('event_id')}"
+                            )
+                            return result
+                        result.records += 1
+                    if block.last_hash != prev:
+                        result.error = f"block {position} last hash differs from index"
+                        return result
+                    result.blocks += 1
+        except (OSError, ValueError, zlib.error) as e:
+            result.error = f"unreadable segment: {e}"
+            return result
+
+        if result.blocks != len(blocks):
+            result.error = (
+                f"index lists {len(blocks)} blocks, segment holds {result.blocks}"
+            )
+            return result
+        result.last_hash = prev
+        return result
+
+    def verify(
+        self, start_day: Optional[date] = None, end_day: Optional[date] = None
+    ) -> List[SegmentVerification]:
+        """Verify segments in order, checking the chain across segments too."""
+        results = []
+        expected_prev = None
+        for day, path in self.segments():
+            if start_day is not None and day < start_day:
+                continue
+            if end_day is not None and day > end_day:
+                break
+            result = self.verify_segment(path, expected_prev)
+            results.append(result)
+            expected_prev = result.last_hash
+            if not result.ok:
+                logger.error(f"Audit segment {result.segment} failed: {result.error}")
+                expected_prev = None
+        return results
+
+    # Retention
+    def drop_before(self, cutoff: date) -> int:
+        """Delete whole segments older than ``cutoff``; returns how many."""
+        dropped = 0
+        with self._exclusive():
+            for day, path in self.segments():
+                if day >= cutoff:
+                    break
+                index_path = self._index_path(path)
+                for target in (path, index_path):
+                    if os.path.exists(target):
+                        os.remove(target)
+                self._indexes.pop(index_path, None)
+                dropped += 1
+        return dropped
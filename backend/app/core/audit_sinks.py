@@ -0,0 +1,204 @@
+"""Persistence sinks for the audit logging pipeline.
+
+``AuditLogger`` queues events in memory and a background task drains them
+in batches into these sinks. Every sink accepts a batch of event records,
+which are the dictionaries produced by ``AuditEvent.to_dict``:
+
+- ``AuditDatabaseSink`` bulk-inserts a batch into ``audit_logs`` with one
+  executemany INSERT and one commit.
+- ``AuditFileSink`` appends JSON lines to a size-rotated file. It fsyncs at
+  most once per ``fsync_interval``, so one fsync covers many batches.
+- ``AuditSpillFile`` is the overflow area used when the in-memory queue is
+  full. The drainer reads it back once the queue has room again.
+
+File I/O runs in a worker thread so the event loop never blocks on disk.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+AuditRecord = Dict[str, Any]
+
+
+class AuditDatabaseSink:
+    """Bulk insert of audit records into the ``audit_logs`` table."""
+
+    name = "database"
+
+    def __init__(self, session_factory: Optional[Callable] = None):
+        self._session_factory = session_factory
+
+    def _rows(self, records: List[AuditRecord]) -> List[Dict[str, Any]]:
+        rows = []
+        for record in records:
+            resource = record.get("target_resource")
+            if resource is None and record.get("target_id") is not None:
+                resource = (
+                    f"{record.get('target_type') or 'resource'}:{record['target_id']}"
+                )
+            timestamp = record.get("timestamp")
+            rows.append(
+                {
+                    "user_id": record.get("actor_id"),
+                    "action": record["event_type"],
+                    "resource": resource,
+                    "event_metadata": json.dumps(record, default=str),
+                    "created_at": (
+                        datetime.fromisoformat(timestamp)
+                        if isinstance(timestamp, str)
+                        else timestamp or datetime.utcnow()
+                    ),
+                }
+            )
+        return rows
+
+    async def write(self, records: List[AuditRecord]) -> None:
+        from app.models.audit_log import AuditLog
+        from sqlalchemy import insert
+
+        session_factory = self._session_factory
+        if session_factory is None:
+            from app.db.session import AsyncSessionLocal
+
+            session_factory = AsyncSessionLocal
+
+        async with session_factory() as db:
+            await db.execute(insert(AuditLog), self._rows(records))
+            await db.commit()
+
+    async def close(self) -> None:
+        pass
+
+
+class AuditFileSink:
+    """Append-only JSON-lines audit file with size rotation and batched fsync."""
+
+    name = "file"
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 104857600,
+        backup_count: int = 10,
+        fsync_interval: float = 1.0,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._last_fsync = 0.0
+        self._unsynced = False
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "ab")
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._file.close()
+        self._file = None
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = False
+            self._last_fsync = time.monotonic()
+
+    def write_lines(self, lines: List[str]) -> None:
+        """Append ``lines``; blocking, meant to run in a worker thread."""
+        if self._file is None:
+            self._open()
+        self._file.write("".join(line + "\n" for line in lines).encode("utf-8"))
+        self._file.flush()
+        self._unsynced = True
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._sync()
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    async def write(self, records: List[AuditRecord]) -> None:
+        lines = [
+            json.dumps(record, default=str, ensure_ascii=False) for record in records
+        ]
+        await asyncio.to_thread(self.write_lines, lines)
+
+    async def close(self) -> None:
+        def _close() -> None:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+        await asyncio.to_thread(_close)
+
+
+class AuditSpillFile:
+    """On-disk overflow for audit events that did not fit in the queue."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        # Count records left behind by a previous process, so they are replayed
+        self.pending = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as handle:
+                self.pending = sum(1 for line in handle if line.strip())
+
+    def append(self, record: AuditRecord) -> None:
+        """Append one record.
+
+        Called on the request path, but only when the queue is full. This is a
+        buffered write with no fsync.
+        """
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.pending += 1
+
+    def _take(self) -> List[AuditRecord]:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.pending = 0
+        if not os.path.exists(self.path):
+            return []
+        claimed = f"{self.path}.draining"
+        os.replace(self.path, claimed)
+        records = []
+        with open(claimed, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.error(f"Skipping corrupt audit spill line in {claimed}")
+        os.remove(claimed)
+        return records
+
+    async def take(self) -> List[AuditRecord]:
+        """Claim every spilled record, leaving the spill file empty."""
+        return await asyncio.to_thread(self._take)
@@ -12,7 +12,7 @@ def create_celery_app(settings: Settings) -> Celery:
         "neoforge",
         broker=str(settings.redis_url),
         backend=str(settings.redis_url),
-        include=["app.worker.email_worker"],
+        include=["app.worker.email_worker", "app.worker.recommendation_worker"],
     )
 
     # Load Celery configuration from settings
@@ -130,6 +130,32 @@ class Settings(BaseSettings):
         default=None, env="SENDGRID_WEBHOOK_PUBLIC_KEY"
     )
     WEBHOOK_SECRET_KEY: Optional[str] = Field(default=None, env="WEBHOOK_SECRET_KEY")
+    # Hand email webhook batches to a Celery worker and acknowledge immediately
+    email_webhook_defer_processing: bool = Field(default=False, env="EMAIL_WEBHOOK_DEFER_PROCESSING")
+    # Days of email rollups the periodic compaction job rebuilds from raw rows
+    email_rollup_compaction_days: int = Field(default=7, env="EMAIL_ROLLUP_COMPACTION_DAYS")
+    # How often the event worker folds new events into the analytics rollups
+    event_rollup_interval_seconds: int = Field(default=60, env="EVENT_ROLLUP_INTERVAL_SECONDS")
+    # Newest events left out of each rollup run so in-flight inserts can commit
+    event_rollup_lag_seconds: int = Field(default=30, env="EVENT_ROLLUP_LAG_SECONDS")
+    # Recount of recent rollup buckets for events whose commit outlasted the lag
+    event_rollup_refold_interval_seconds: int = Field(default=3600, env="EVENT_ROLLUP_REFOLD_INTERVAL_SECONDS")
+    event_rollup_refold_hours: int = Field(default=2, env="EVENT_ROLLUP_REFOLD_HOURS")
+    # Event partitions (used once the events table is range-partitioned)
+    event_partition_interval: str = Field(default="month", env="EVENT_PARTITION_INTERVAL")
+    event_partitions_ahead: int = Field(default=3, env="EVENT_PARTITIONS_AHEAD")
+    # Event retention run by the event worker: rows per DELETE and DELETEs per run
+    event_retention_batch_size: int = Field(default=1000, env="EVENT_RETENTION_BATCH_SIZE")
+    event_retention_max_batches: int = Field(default=100, env="EVENT_RETENTION_MAX_BATCHES")
+    # Detach fully expired event partitions for archiving instead of dropping them
+    event_retention_detach_partitions: bool = Field(default=False, env="EVENT_RETENTION_DETACH_PARTITIONS")
+    # Event anonymization jobs: events per transaction and pause between chunks
+    event_anonymization_chunk_size: int = Field(default=1000, env="EVENT_ANONYMIZATION_CHUNK_SIZE")
+    event_anonymization_pause_ms: int = Field(default=100, env="EVENT_ANONYMIZATION_PAUSE_MS")
+    # How often the event worker looks for anonymization jobs to run
+    event_anonymization_poll_seconds: int = Field(default=10, env="EVENT_ANONYMIZATION_POLL_SECONDS")
+    # Running jobs without a committed chunk for this long are resumed by another worker
+    event_anonymization_stale_seconds: int = Field(default=300, env="EVENT_ANONYMIZATION_STALE_SECONDS")
 
     # OpenTelemetry OTLP Configuration
     # Core OTLP settings
@@ -200,6 +226,65 @@ class Settings(BaseSettings):
     proration_enabled: bool = Field(default=True, env="PRORATION_ENABLED")
     invoice_generation_enabled: bool = Field(default=True, env="INVOICE_GENERATION_ENABLED")
 
+    # Response compression (zstd/br are offered only when their packages are installed)
+    response_compression_enabled: bool = Field(default=True, env="RESPONSE_COMPRESSION_ENABLED")
+    response_compression_min_size: int = Field(default=1024, env="RESPONSE_COMPRESSION_MIN_SIZE")
+    # Chunks at least this large are compressed in a worker thread
+    response_compression_offload_bytes: int = Field(default=262144, env="RESPONSE_COMPRESSION_OFFLOAD_BYTES")
+
+    # Cross-worker request coalescing: identical in-flight GETs share one computation
+    request_coalescing_enabled: bool = Field(default=True, env="REQUEST_COALESCING_ENABLED")
+    # How long a leader may hold the computation before followers take over
+    request_coalescing_lock_ttl_ms: int = Field(default=10000, env="REQUEST_COALESCING_LOCK_TTL_MS")
+    # How long a finished result stays available to late followers
+    request_coalescing_result_ttl_ms: int = Field(default=2000, env="REQUEST_COALESCING_RESULT_TTL_MS")
+
+    # Per-request query accounting
+    query_accounting_enabled: bool = Field(default=True, env="QUERY_ACCOUNTING_ENABLED")
+    query_n_plus_one_threshold: int = Field(default=10, env="QUERY_N_PLUS_ONE_THRESHOLD")
+    query_budget_default: Optional[int] = Field(default=None, env="QUERY_BUDGET_DEFAULT")
+    # Per-endpoint budgets keyed by "METHOD /route/{template}", e.g.
+    # {"GET /api/v1/items/": 2}
+    query_budgets: Dict[str, int] = Field(default_factory=dict, env="QUERY_BUDGETS")
+    # Raise QueryBudgetExceeded instead of logging (meant for test runs)
+    query_budget_enforce: bool = Field(default=False, env="QUERY_BUDGET_ENFORCE")
+
+    # AI content analysis
+    OPENAI_API_KEY: Optional[str] = Field(default=None, env="OPENAI_API_KEY")
+    ANTHROPIC_API_KEY: Optional[str] = Field(default=None, env="ANTHROPIC_API_KEY")
+    # "auto" picks OpenAI, then Anthropic, then the local stub
+    ai_provider: str = Field(default="auto", env="AI_PROVIDER")
+    ai_http_pool_size: int = Field(default=20, env="AI_HTTP_POOL_SIZE")
+    ai_openai_tokens_per_minute: int = Field(default=90_000, env="AI_OPENAI_TOKENS_PER_MINUTE")
+    ai_anthropic_tokens_per_minute: int = Field(default=80_000, env="AI_ANTHROPIC_TOKENS_PER_MINUTE")
+    ai_analysis_cache_size: int = Field(default=5000, env="AI_ANALYSIS_CACHE_SIZE")
+    ai_analysis_cache_ttl: int = Field(default=3600, env="AI_ANALYSIS_CACHE_TTL")  # seconds
+    ai_analysis_batch_size: int = Field(default=8, env="AI_ANALYSIS_BATCH_SIZE")
+    # Simulated latency of the local stub provider, for offline benchmarks
+    ai_stub_latency_ms: int = Field(default=0, env="AI_STUB_LATENCY_MS")
+
+    # Content analysis worker
+    # Run analysis jobs inside the API process instead of queueing them for
+    # app.worker.content_analysis_worker (handy without a worker in dev)
+    content_analysis_inline: bool = Field(default=False, env="CONTENT_ANALYSIS_INLINE")
+    content_analysis_claim_size: int = Field(default=64, env="CONTENT_ANALYSIS_CLAIM_SIZE")
+    content_analysis_concurrency: int = Field(default=8, env="CONTENT_ANALYSIS_CONCURRENCY")
+    content_analysis_poll_interval: float = Field(default=2.0, env="CONTENT_ANALYSIS_POLL_INTERVAL")
+    # Running jobs older than this are assumed orphaned and requeued
+    content_analysis_stale_after: int = Field(default=900, env="CONTENT_ANALYSIS_STALE_AFTER")
+    # Port for the worker's Prometheus endpoint (0 disables it)
+    content_analysis_metrics_port: int = Field(default=9102, env="CONTENT_ANALYSIS_METRICS_PORT")
+
+    # Daily recommendation generation
+    # Width of each shard's user-id range; every shard runs as its own Celery task
+    recommendation_shard_size: int = Field(default=10000, env="RECOMMENDATION_SHARD_SIZE")
+    # Users generated and bulk-inserted per checkpoint within a shard
+    recommendation_batch_size: int = Field(default=200, env="RECOMMENDATION_BATCH_SIZE")
+    # Ranked recommendations materialized per user in Redis for the serving path
+    recommendation_serving_top_n: int = Field(default=100, env="RECOMMENDATION_SERVING_TOP_N")
+    # Lifetime of a materialized list; daily generation refreshes it well before expiry
+    recommendation_serving_ttl_seconds: int = Field(default=172800, env="RECOMMENDATION_SERVING_TTL_SECONDS")
+
     model_config = SettingsConfigDict(
         validate_default=True,
         case_sensitive=True,
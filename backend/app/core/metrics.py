@@ -77,6 +77,33 @@ def initialize_metrics() -> Dict[str, Any]:
     )
     _metrics["db_query_duration_seconds"] = hist_db
 
+    # Per-request query accounting (see app/api/middleware/query_budget.py)
+    _metrics["db_queries_per_request"] = Histogram(
+        "db_queries_per_request",
+        "Number of database statements executed per HTTP request",
+        ["method", "route"],
+        buckets=[0, 1, 2, 5, 10, 20, 50, 100, 250],
+    )
+
+    _metrics["db_time_per_request_seconds"] = Histogram(
+        "db_time_per_request_seconds",
+        "Time spent in database statements per HTTP request",
+        ["method", "route"],
+        buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0],
+    )
+
+    _metrics["db_n_plus_one_detected"] = Counter(
+        "db_n_plus_one_detected_total",
+        "Requests in which a statement shape repeated past the N+1 threshold",
+        ["method", "route"],
+    )
+
+    _metrics["db_query_budget_exceeded"] = Counter(
+        "db_query_budget_exceeded_total",
+        "Requests that executed more statements than their query budget",
+        ["method", "route"],
+    )
+
     _metrics["redis_operations_total"] = Counter(
         "redis_operations_total", "Total number of Redis operations", ["operation"]
     )
@@ -85,11 +112,91 @@ def initialize_metrics() -> Dict[str, Any]:
         "redis_errors_total", "Total number of Redis errors", ["error_type"]
     )
 
+    # Request coalescing (RequestDeduplicator)
+    _metrics["request_coalescing"] = Counter(
+        "request_coalescing_total",
+        "Deduplicated GET requests by how they were answered",
+        ["outcome"],
+    )
+
     # Celery queue depth gauges (Redis broker)
     _metrics["celery_queue_depth"] = Gauge(
         "celery_queue_depth", "Current depth of Celery queues", ["queue"]
     )
 
+    # Content analysis worker
+    _metrics["content_analysis_jobs"] = Counter(
+        "content_analysis_jobs_total",
+        "Content analysis jobs finished by the analysis worker",
+        ["status"],
+    )
+    _metrics["content_analysis_queue_lag_seconds"] = Histogram(
+        "content_analysis_queue_lag_seconds",
+        "Time between a content analysis job being created and claimed",
+        buckets=[1, 5, 15, 60, 300, 900, 3600, 14400, 43200, 86400],
+    )
+    _metrics["content_analysis_stage_seconds"] = Histogram(
+        "content_analysis_stage_seconds",
+        "Duration of content analysis worker stages per batch",
+        ["stage"],
+        buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0],
+    )
+    _metrics["content_analysis_queue_depth"] = Gauge(
+        "content_analysis_queue_depth", "Pending content analysis jobs"
+    )
+    _metrics["content_analysis_oldest_pending_seconds"] = Gauge(
+        "content_analysis_oldest_pending_seconds",
+        "Age of the oldest pending content analysis job",
+    )
+
+    # Sharded daily recommendation generation
+    _metrics["recommendation_shard_users"] = Counter(
+        "recommendation_shard_users_total",
+        "Users handled by daily recommendation shards",
+        ["outcome"],
+    )
+    _metrics["recommendation_shard_recommendations"] = Counter(
+        "recommendation_shard_recommendations_total",
+        "Recommendations written by daily recommendation shards",
+    )
+    _metrics["recommendation_shard_seconds"] = Histogram(
+        "recommendation_shard_seconds",
+        "Wall time of one daily recommendation shard run",
+        buckets=[1, 5, 15, 60, 300, 900, 1800, 3600, 7200],
+    )
+    _metrics["recommendation_shard_throughput"] = Histogram(
+        "recommendation_shard_users_per_second",
+        "Users processed per second by one daily recommendation shard run",
+        buckets=[0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500],
+    )
+    _metrics["recommendation_serving_reads"] = Counter(
+        "recommendation_serving_reads_total",
+        "Recommendation reads by materialized top-N outcome",
+        ["outcome"],
+    )
+
+    # Audit log pipeline metrics
+    _metrics["audit_events"] = Counter(
+        "audit_events_total",
+        "Audit events by pipeline outcome",
+        ["outcome"],
+    )
+    _metrics["audit_queue_depth"] = Gauge(
+        "audit_queue_depth",
+        "Audit events buffered in memory awaiting their sinks",
+    )
+    _metrics["audit_event_latency"] = Histogram(
+        "audit_event_latency_seconds",
+        "Time from an audit event being queued to reaching every sink",
+        buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60],
+    )
+    _metrics["audit_sink_write_seconds"] = Histogram(
+        "audit_sink_write_seconds",
+        "Duration of one batched audit sink write",
+        ["sink"],
+        buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+    )
+
     # Email metrics (totals reported from tracking table)
     _metrics["email_metrics"] = {
         "sent": Gauge("email_sent_total", "Total emails sent"),
@@ -6,10 +6,14 @@ costs. Includes response compression, request deduplication, and background
 job optimization.
 """
 import asyncio
+import base64
 import gzip
+import hashlib
 import json
 import time
-from collections import defaultdict
+import uuid
+import zlib
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
 from functools import wraps
 from typing import Any, Callable, Dict, List, Optional, Set, Union
@@ -17,38 +21,160 @@ from typing import Any, Callable, Dict, List, Optional, Set, Union
 import structlog
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 from redis.asyncio import Redis
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.cache import Cache, get_cache
 from app.core.config import Environment, get_settings
+from app.core.metrics import get_metrics
 
 logger = structlog.get_logger()
 
 
+# Optional encoders: Brotli and Zstandard are offered only when installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Server preference when a client accepts several encodings with equal q
+ENCODING_PREFERENCE = ("zstd", "br", "gzip")
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, most preferred first."""
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return [encoding for encoding in ENCODING_PREFERENCE if installed[encoding]]
+
+
+def negotiate_encoding(
+    accept_encoding: str, offered: Optional[List[str]] = None
+) -> Optional[str]:
+    """Pick the best of ``offered`` for an ``Accept-Encoding`` header.
+
+    Honours q-values, including ``q=0`` refusals and the ``*`` wildcard. Ties
+    are broken by ``ENCODING_PREFERENCE`` order.
+    """
+    offered = available_encodings() if offered is None else offered
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token.strip()] = q
+
+    best, best_q = None, 0.0
+    for encoding in offered:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class StreamEncoder:
+    """Incremental encoder for one response body.
+
+    ``compress`` returns everything encodable so far, flushed to a block
+    boundary so streamed chunks reach the client promptly. ``finish`` returns
+    the trailer.
+    """
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "gzip":
+            return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        if self.encoding == "gzip":
+            return self._obj.flush(zlib.Z_FINISH)
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress_bytes(data: bytes, encoding: str, level: int) -> bytes:
+    """One-shot encode of a complete payload."""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
 class ResponseCompressor:
     """Intelligent response compression for cost optimization.
 
     Provides adaptive compression based on content type, size, and client support.
     Optimized for bootstrapped applications to reduce bandwidth costs.
+
+    Negotiates zstd, br or gzip (whichever the client accepts and this process
+    can produce). ``CompressionMiddleware`` uses it to encode streamed bodies
+    chunk by chunk. ``compress_response`` handles fully materialized bodies.
+    Payloads of at least ``offload_size`` bytes are encoded in a worker thread,
+    so large exports don't stall the event loop.
     """
 
-    def __init__(self, min_size: int = 1024, compression_level: int = 6):
+    def __init__(
+        self,
+        min_size: int = 1024,
+        compression_level: int = 6,
+        offload_size: int = 256 * 1024,
+    ):
         """Initialize compressor with cost-optimized defaults.
 
         Args:
             min_size: Minimum response size to compress (bytes)
             compression_level: Compression level (1-9, 6 is optimal for speed/size)
+            offload_size: Chunk size from which encoding runs in a thread (bytes)
         """
         self.min_size = min_size
         self.compression_level = compression_level
+        self.offload_size = offload_size
         self.compressible_types = {
             "application/json",
             "application/javascript",
+            "application/x-ndjson",
             "text/plain",
             "text/html",
             "text/css",
             "text/csv",
         }
+        # Per-encoding levels for on-the-fly encoding; br/zstd levels are
+        # picked for speed comparable to gzip at ``compression_level``
+        self.levels = {"gzip": compression_level, "br": 4, "zstd": 3}
+        # Precompressed cache variants are encoded once and served many times
+        self.precompress_levels = {"gzip": 9, "br": 9, "zstd": 12}
 
         # Track compression metrics for cost analysis
         self.stats = {
@@ -57,18 +183,54 @@ class ResponseCompressor:
             "original_bytes": 0,
             "compressed_bytes": 0,
             "compression_time_ms": 0,
+            "offloaded_chunks": 0,
+            "encodings": defaultdict(int),
+        }
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """Best encoding for an ``Accept-Encoding`` header, if any."""
+        return negotiate_encoding(accept_encoding)
+
+    def is_compressible(self, content_type: str) -> bool:
+        """Whether a ``Content-Type`` header value is worth compressing."""
+        return content_type.split(";")[0].strip() in self.compressible_types
+
+    def encoder(self, encoding: str) -> StreamEncoder:
+        """New incremental encoder at this compressor's level for ``encoding``."""
+        return StreamEncoder(encoding, self.levels[encoding])
+
+    async def encode_chunk(self, encoder: StreamEncoder, data: bytes) -> bytes:
+        """Encode one chunk, in a worker thread when it is large."""
+        if len(data) >= self.offload_size:
+            self.stats["offloaded_chunks"] += 1
+            return await asyncio.to_thread(encoder.compress, data)
+        return encoder.compress(data)
+
+    def precompress(self, data: bytes) -> Dict[str, bytes]:
+        """Encode ``data`` with every available encoding, for cache storage."""
+        return {
+            encoding: compress_bytes(data, encoding, self.precompress_levels[encoding])
+            for encoding in available_encodings()
         }
 
+    def record(
+        self, encoding: str, original: int, compressed: int, elapsed: float
+    ) -> None:
+        """Account one compressed response."""
+        self.stats["responses_compressed"] += 1
+        self.stats["original_bytes"] += original
+        self.stats["compressed_bytes"] += compressed
+        self.stats["compression_time_ms"] += elapsed * 1000
+        self.stats["encodings"][encoding] += 1
+
     def should_compress(self, response: Response, request: Request) -> bool:
         """Determine if response should be compressed."""
         # Check client support
-        accept_encoding = request.headers.get("accept-encoding", "")
-        if "gzip" not in accept_encoding:
+        if not self.negotiate(request.headers.get("accept-encoding", "")):
             return False
 
         # Check content type
-        content_type = response.headers.get("content-type", "").split(";")[0]
-        if content_type not in self.compressible_types:
+        if not self.is_compressible(response.headers.get("content-type", "")):
             return False
 
         # Check response size
@@ -95,10 +257,11 @@ class ResponseCompressor:
             if hasattr(response, "body") and response.body:
                 original_content = response.body
                 original_size = len(original_content)
+                encoding = self.negotiate(request.headers.get("accept-encoding", ""))
 
                 # Compress content
-                compressed_content = gzip.compress(
-                    original_content, compresslevel=self.compression_level
+                compressed_content = compress_bytes(
+                    original_content, encoding, self.levels[encoding]
                 )
                 compressed_size = len(compressed_content)
 
@@ -109,23 +272,21 @@ class ResponseCompressor:
 
                 # Update response
                 response.body = compressed_content
-                response.headers["content-encoding"] = "gzip"
+                response.headers["content-encoding"] = encoding
                 response.headers["content-length"] = str(compressed_size)
+                response.headers["vary"] = "Accept-Encoding"
 
                 # Update statistics
-                self.stats["responses_compressed"] += 1
-                self.stats["original_bytes"] += original_size
-                self.stats["compressed_bytes"] += compressed_size
-
-                compression_time = (time.time() - start_time) * 1000
-                self.stats["compression_time_ms"] += compression_time
+                compression_time = time.time() - start_time
+                self.record(encoding, original_size, compressed_size, compression_time)
 
                 logger.debug(
                     "response_compressed",
+                    encoding=encoding,
                     original_size=original_size,
                     compressed_size=compressed_size,
                     savings_ratio=round(savings_ratio, 3),
-                    compression_time_ms=round(compression_time, 2),
+                    compression_time_ms=round(compression_time * 1000, 2),
                 )
 
         except Exception as e:
@@ -154,46 +315,248 @@ class ResponseCompressor:
             "average_compression_time_ms": (
                 self.stats["compression_time_ms"] / max(compressed_requests, 1)
             ),
+            "offloaded_chunks": self.stats["offloaded_chunks"],
+            "encodings": dict(self.stats["encodings"]),
+            "available_encodings": available_encodings(),
         }
 
 
+class CompressionMiddleware:
+    """Pure ASGI middleware that compresses response bodies as they stream.
+
+    The encoding is negotiated from ``Accept-Encoding`` once per request.
+    Bodies sent in one message are compressed in one shot, and skipped below
+    ``min_size`` or when saving less than 10%. Streamed bodies are compressed
+    chunk by chunk, with each chunk flushed so clients see progress. Responses
+    that already carry ``Content-Encoding`` pass through untouched, such as
+    precompressed cache hits from ``ResponseCachingMiddleware``.
+    """
+
+    def __init__(self, app: ASGIApp, compressor: Optional[ResponseCompressor] = None):
+        self.app = app
+        self.compressor = compressor or response_compressor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.compressor.negotiate(
+            Headers(scope=scope).get("accept-encoding", "")
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self.compressor, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request send wrapper for ``CompressionMiddleware``."""
+
+    def __init__(self, compressor: ResponseCompressor, encoding: str, send: Send):
+        self.compressor = compressor
+        self.encoding = encoding
+        self._send = send
+        self.start: Optional[Message] = None
+        self.encoder: Optional[StreamEncoder] = None
+        self.passthrough = False
+        self.original_size = 0
+        self.compressed_size = 0
+        self.elapsed = 0.0
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk decides the encoding
+            self.start = message
+            self.compressor.stats["requests_processed"] += 1
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            if not self._eligible(body, more_body):
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send(message)
+                return
+            if not more_body:
+                await self._send_whole(body)
+                return
+            self.encoder = self.compressor.encoder(self.encoding)
+            self._set_headers(None)
+            await self._send(self.start)
+
+        started = time.perf_counter()
+        chunk = await self.compressor.encode_chunk(self.encoder, body) if body else b""
+        if not more_body:
+            chunk += self.encoder.finish()
+        self.elapsed += time.perf_counter() - started
+        self.original_size += len(body)
+        self.compressed_size += len(chunk)
+
+        if chunk or not more_body:
+            await self._send(
+                {"type": "http.response.body", "body": chunk, "more_body": more_body}
+            )
+        if not more_body:
+            self.compressor.record(
+                self.encoding, self.original_size, self.compressed_size, self.elapsed
+            )
+
+    def _eligible(self, body: bytes, more_body: bool) -> bool:
+        headers = Headers(raw=self.start["headers"])
+        if self.start["status"] < 200 or self.start["status"] in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        if not self.compressor.is_compressible(headers.get("content-type", "")):
+            return False
+        if not more_body and len(body) < self.compressor.min_size:
+            return False
+        return True
+
+    async def _send_whole(self, body: bytes) -> None:
+        started = time.perf_counter()
+        encoder = self.compressor.encoder(self.encoding)
+        compressed = await self.compressor.encode_chunk(encoder, body)
+        compressed += encoder.finish()
+        elapsed = time.perf_counter() - started
+
+        if len(compressed) > len(body) * 0.9:
+            # Less than 10% savings: not worth the client's decode
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        self._set_headers(len(compressed))
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": compressed})
+        self.compressor.record(self.encoding, len(body), len(compressed), elapsed)
+
+    def _set_headers(self, content_length: Optional[int]) -> None:
+        headers = MutableHeaders(scope=self.start)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+
+
+class _BoundedCounter(OrderedDict):
+    """Request counts for at most ``maxlen`` keys, least recently seen evicted."""
+
+    def __init__(self, maxlen: int):
+        super().__init__()
+        self.maxlen = maxlen
+
+    def increment(self, key: str) -> int:
+        count = self.get(key, 0) + 1
+        self[key] = count
+        self.move_to_end(key)
+        if len(self) > self.maxlen:
+            self.popitem(last=False)
+        return count
+
+
+# Deletes the lock only if this worker still owns it
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
 class RequestDeduplicator:
     """Request deduplication for cost optimization.
 
     Prevents duplicate expensive operations by caching in-flight requests
     and returning cached results for identical concurrent requests.
+
+    Identical GETs within a process share one in-flight task. With
+    ``distributed`` set, the task also coordinates through Redis (single
+    flight). The first worker to ``SET NX`` the request's lock computes the
+    result and publishes it under a short-lived result key. Workers that lose
+    the race poll that key instead of running the handler. Results that
+    cannot be shared are never published. That includes responses setting
+    cookies, streaming responses and non-JSON values; followers then run the
+    handler themselves. Redis errors fall back to local execution and pause
+    the distributed layer for ``redis_backoff`` seconds.
     """
 
-    def __init__(self, cache_ttl: int = 60, max_concurrent: int = 100):
+    def __init__(
+        self,
+        cache_ttl: int = 60,
+        max_concurrent: int = 100,
+        max_tracked_keys: int = 1000,
+        distributed: bool = False,
+        redis: Optional[Redis] = None,
+        lock_ttl_ms: int = 10000,
+        result_ttl_ms: int = 2000,
+        redis_backoff: float = 30.0,
+    ):
         """Initialize request deduplicator.
 
         Args:
             cache_ttl: How long to cache in-flight requests (seconds)
             max_concurrent: Maximum concurrent unique requests to track
+            max_tracked_keys: Request keys kept for duplicate statistics
+            distributed: Coalesce identical requests across workers via Redis
+            redis: Redis client for coalescing (defaults to the shared pool)
+            lock_ttl_ms: Longest a leader may compute before followers take over
+            result_ttl_ms: How long a published result stays readable
+            redis_backoff: Seconds to skip Redis after a Redis error
         """
         self.cache_ttl = cache_ttl
         self.max_concurrent = max_concurrent
+        self.distributed = distributed
+        self.lock_ttl_ms = lock_ttl_ms
+        self.result_ttl_ms = result_ttl_ms
+        self.redis_backoff = redis_backoff
+        self._redis = redis
+        self._redis_paused_until = 0.0
         self.in_flight: Dict[str, asyncio.Future] = {}
-        self.request_counts: Dict[str, int] = defaultdict(int)
+        self.request_counts = _BoundedCounter(max_tracked_keys)
         self.stats = {
             "total_requests": 0,
             "deduplicated_requests": 0,
+            "local_coalesced": 0,
+            "distributed_coalesced": 0,
+            "distributed_leader": 0,
+            "distributed_timeouts": 0,
+            "distributed_errors": 0,
             "active_requests": 0,
         }
 
     def _generate_request_key(self, request: Request) -> str:
-        """Generate unique key for request deduplication."""
+        """Generate unique key for request deduplication.
+
+        The key covers the request's credentials (Authorization header and
+        cookies), so requests made as different users never share a result,
+        locally or through Redis.
+        """
         # Include method, path, query params, and user context
         path = request.url.path
         query = str(sorted(request.query_params.items()))
         method = request.method
         user_id = getattr(request.state, "user_id", "anonymous")
+        authorization = request.headers.get("authorization", "")
+        cookies = request.headers.get("cookie", "")
+        credentials = hashlib.sha256(f"{authorization}\n{cookies}".encode()).hexdigest()
 
         # Create hash for consistent key length
-        import hashlib
+        key_data = f"{method}:{path}:{query}:{user_id}:{credentials}"
+        return hashlib.sha256(key_data.encode()).hexdigest()
 
-        key_data = f"{method}:{path}:{query}:{user_id}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+    def _count(self, outcome: str) -> None:
+        get_metrics()["request_coalescing"].labels(outcome=outcome).inc()
 
     async def deduplicate_request(self, request: Request, handler: Callable) -> Any:
         """Deduplicate request execution."""
@@ -204,17 +567,19 @@ class RequestDeduplicator:
             return await handler()
 
         request_key = self._generate_request_key(request)
-        self.request_counts[request_key] += 1
+        duplicate_count = self.request_counts.increment(request_key)
 
         # Check if request is already in flight
         if request_key in self.in_flight:
             self.stats["deduplicated_requests"] += 1
+            self.stats["local_coalesced"] += 1
+            self._count("local")
 
             logger.debug(
                 "request_deduplicated",
                 request_key=request_key,
                 path=request.url.path,
-                duplicate_count=self.request_counts[request_key],
+                duplicate_count=duplicate_count,
             )
 
             try:
@@ -252,13 +617,111 @@ class RequestDeduplicator:
     async def _execute_with_cleanup(self, request_key: str, handler: Callable) -> Any:
         """Execute handler and clean up request tracking."""
         try:
-            result = await handler()
-            return result
+            redis = self._get_redis()
+            if redis is None:
+                return await handler()
+            return await self._single_flight(redis, request_key, handler)
         finally:
             # Clean up completed request
             self.in_flight.pop(request_key, None)
             self.stats["active_requests"] = len(self.in_flight)
 
+    # Cross-worker single flight
+
+    def _get_redis(self) -> Optional[Redis]:
+        if not self.distributed or time.monotonic() < self._redis_paused_until:
+            return None
+        if self._redis is None:
+            from app.core.redis import redis_client
+
+            self._redis = redis_client
+        return self._redis
+
+    async def _single_flight(
+        self, redis: Redis, request_key: str, handler: Callable
+    ) -> Any:
+        """Run ``handler`` at most once across workers for ``request_key``."""
+        lock_key = f"singleflight:{request_key}:lock"
+        result_key = f"singleflight:{request_key}:result"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl_ms / 1000
+        delay = 0.01
+
+        try:
+            while True:
+                published = await redis.get(result_key)
+                if published is not None:
+                    return await self._follow(published, handler)
+                if await redis.set(lock_key, token, nx=True, px=self.lock_ttl_ms):
+                    # A leader may have published between our GET and SET
+                    published = await redis.get(result_key)
+                    if published is not None:
+                        await redis.eval(_RELEASE_LOCK, 1, lock_key, token)
+                        return await self._follow(published, handler)
+                    break
+                if time.monotonic() >= deadline:
+                    self.stats["distributed_timeouts"] += 1
+                    self._count("timeout")
+                    return await handler()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.1)
+        except Exception as e:
+            self._pause_redis(e)
+            return await handler()
+
+        self.stats["distributed_leader"] += 1
+        self._count("leader")
+        try:
+            result = await handler()
+        except BaseException:
+            await self._release(redis, lock_key, token, None, result_key)
+            raise
+        encoded = _encode_shared_result(result)
+        await self._release(redis, lock_key, token, encoded, result_key)
+        shared = json.loads(encoded)
+        if shared["kind"] == "json":
+            # Return what followers decode, so every caller gets the same type
+            return _decode_shared_result(shared)
+        return result
+
+    async def _follow(self, published: str, handler: Callable) -> Any:
+        shared = json.loads(published)
+        if shared["kind"] == "unshareable":
+            self._count("unshareable")
+            return await handler()
+        self.stats["deduplicated_requests"] += 1
+        self.stats["distributed_coalesced"] += 1
+        self._count("remote")
+        return _decode_shared_result(shared)
+
+    async def _release(
+        self,
+        redis: Redis,
+        lock_key: str,
+        token: str,
+        encoded: Optional[str],
+        result_key: str,
+    ) -> None:
+        try:
+            pipe = redis.pipeline(transaction=True)
+            if encoded is not None:
+                pipe.set(result_key, encoded, px=self.result_ttl_ms)
+            pipe.eval(_RELEASE_LOCK, 1, lock_key, token)
+            await pipe.execute()
+        except Exception as e:
+            self._pause_redis(e)
+
+    def _pause_redis(self, error: Exception) -> None:
+        self.stats["distributed_errors"] += 1
+        self._count("error")
+        self._redis_paused_until = time.monotonic() + self.redis_backoff
+        logger.warning(
+            "request_coalescing_redis_error",
+            error=str(error),
+            error_type=type(error).__name__,
+            paused_seconds=self.redis_backoff,
+        )
+
     def get_deduplication_stats(self) -> Dict[str, Any]:
         """Get request deduplication statistics."""
         total_requests = self.stats["total_requests"]
@@ -268,14 +731,64 @@ class RequestDeduplicator:
             "total_requests": total_requests,
             "deduplicated_requests": deduplicated_requests,
             "deduplication_rate": deduplicated_requests / max(total_requests, 1),
+            "local_coalesced": self.stats["local_coalesced"],
+            "distributed_coalesced": self.stats["distributed_coalesced"],
+            "distributed_leader": self.stats["distributed_leader"],
+            "distributed_timeouts": self.stats["distributed_timeouts"],
+            "distributed_errors": self.stats["distributed_errors"],
             "active_requests": self.stats["active_requests"],
             "requests_saved": deduplicated_requests,
+            "tracked_keys": len(self.request_counts),
             "top_duplicate_requests": sorted(
                 self.request_counts.items(), key=lambda x: x[1], reverse=True
             )[:10],
         }
 
 
+def _encode_shared_result(result: Any) -> str:
+    """Serialize a handler result for other workers.
+
+    Returns an ``unshareable`` marker for results that must not or cannot be
+    replayed, so followers stop waiting and run the handler themselves.
+    """
+    unshareable = json.dumps({"kind": "unshareable"})
+    if isinstance(result, Response):
+        body = getattr(result, "body", None)
+        if body is None or "set-cookie" in result.headers:
+            return unshareable
+        return json.dumps(
+            {
+                "kind": "response",
+                "status_code": result.status_code,
+                "headers": [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in result.raw_headers
+                ],
+                "body": base64.b64encode(body).decode("ascii"),
+            }
+        )
+    try:
+        if isinstance(result, BaseModel):
+            return json.dumps({"kind": "json", "value": result.model_dump(mode="json")})
+        return json.dumps({"kind": "json", "value": result})
+    except (TypeError, ValueError):
+        return unshareable
+
+
+def _decode_shared_result(shared: Dict[str, Any]) -> Any:
+    if shared["kind"] == "response":
+        response = Response(
+            content=base64.b64decode(shared["body"]),
+            status_code=shared["status_code"],
+        )
+        response.raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in shared["headers"]
+        ]
+        return response
+    return shared["value"]
+
+
 class BackgroundJobOptimizer:
     """Optimize background job processing for cost efficiency."""
 
@@ -327,10 +840,32 @@ class BackgroundJobOptimizer:
 
 # Global instances for performance optimization
 response_compressor = ResponseCompressor()
-request_deduplicator = RequestDeduplicator()
+request_deduplicator = RequestDeduplicator(
+    distributed=get_settings().request_coalescing_enabled,
+    lock_ttl_ms=get_settings().request_coalescing_lock_ttl_ms,
+    result_ttl_ms=get_settings().request_coalescing_result_ttl_ms,
+)
 background_job_optimizer = BackgroundJobOptimizer()
 
 
+def setup_compression_middleware(app) -> None:
+    """Install ``CompressionMiddleware`` configured from settings."""
+    settings = get_settings()
+    if not settings.response_compression_enabled:
+        return
+
+    response_compressor.min_size = settings.response_compression_min_size
+    response_compressor.offload_size = settings.response_compression_offload_bytes
+    app.add_middleware(CompressionMiddleware, compressor=response_compressor)
+
+    logger.info(
+        "compression_middleware_configured",
+        encodings=available_encodings(),
+        min_size=response_compressor.min_size,
+        offload_size=response_compressor.offload_size,
+    )
+
+
 def compress_response(handler: Callable) -> Callable:
     """Decorator to compress API responses."""
 
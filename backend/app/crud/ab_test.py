@@ -1,8 +1,7 @@
 """CRUD operations for A/B Testing with statistical analysis and user assignment."""
-import hashlib
 import math
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from uuid import uuid4
 
 from app.crud.base import CRUDBase
@@ -21,7 +20,25 @@ from app.schemas.ab_test import (
     StatisticalMethod,
     VariantStatistics,
 )
-from sqlalchemy import and_, desc, func, or_, select, update
+from app.services.ab_assignment import compute_user_hash, covariate_from_context
+from app.services.ab_statistics import (
+    VariantSufficientStats,
+    cuped_adjusted,
+    cuped_theta,
+    msprt_p_value,
+    two_sample_z_test,
+)
+from sqlalchemy import (
+    Float,
+    Integer,
+    and_,
+    cast,
+    desc,
+    func,
+    or_,
+    select,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -157,17 +174,22 @@ class CRUDAbTest(CRUDBase[AbTest, AbTestCreate, AbTestUpdate]):
             return None
 
         # Create assignment record
+        assignment_context = context or request.context
         assignment_data = {
             "test_id": test.id,
             "variant_id": variant.id,
             "user_id": request.user_id,
             "session_id": request.session_id,
             "user_hash": user_hash,
-            "context": context or request.context,
+            "context": assignment_context,
+            "covariate": covariate_from_context(assignment_context),
         }
 
         db_assignment = AbTestAssignment(**assignment_data)
         db.add(db_assignment)
+        await self.increment_variant_exposures(
+            db, exposures=[(variant.id, assignment_data["covariate"])]
+        )
         await db.commit()
 
         return test, variant
@@ -192,13 +214,34 @@ class CRUDAbTest(CRUDBase[AbTest, AbTestCreate, AbTestUpdate]):
         if not assignment:
             return False
 
-        # Update assignment with conversion
-        if not assignment.converted and request.metric_name == test.primary_metric:
-            assignment.mark_conversion(request.value)
-            await db.commit()
+        if request.metric_name != test.primary_metric:
+            return True
 
-            # Update variant metrics
-            await self._update_variant_metrics(db, assignment.variant_id)
+        # Flip the conversion flag atomically so concurrent requests count once
+        result = await db.execute(
+            update(AbTestAssignment)
+            .where(
+                and_(
+                    AbTestAssignment.id == assignment.id,
+                    AbTestAssignment.converted.is_(False),
+                )
+            )
+            .values(
+                converted=True,
+                converted_at=datetime.utcnow(),
+                conversion_value=request.value,
+            )
+            .returning(AbTestAssignment.covariate)
+        )
+        row = result.first()
+        if row is not None:
+            await self._increment_variant_conversion(
+                db,
+                assignment.variant_id,
+                value=request.value,
+                covariate=row.covariate,
+            )
+        await db.commit()
 
         return True
 
@@ -209,42 +252,60 @@ class CRUDAbTest(CRUDBase[AbTest, AbTestCreate, AbTestUpdate]):
         test_id: int,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
+        statistical_method: StatisticalMethod = StatisticalMethod.FREQUENTIST,
+        use_cuped: bool = False,
     ) -> Optional[AbTestStatisticalReport]:
-        """Get comprehensive analytics for an A/B test."""
+        """Get comprehensive analytics for an A/B test.
+
+        Without a date range the report is built from the running counters on
+        each variant; with one, a single GROUP BY aggregates the assignments in
+        the database. Either way no assignment rows are loaded into Python.
+        """
         test = await self.get(db, id=test_id)
         if not test:
             return None
 
-        # Get assignment data
-        query = select(AbTestAssignment).where(AbTestAssignment.test_id == test_id)
-
-        if start_date:
-            query = query.where(AbTestAssignment.assigned_at >= start_date)
-        if end_date:
-            query = query.where(AbTestAssignment.assigned_at <= end_date)
-
-        result = await db.execute(query)
-        assignments = list(result.scalars().all())
+        if start_date or end_date:
+            sufficient = await self._aggregate_variant_stats(
+                db, test_id=test_id, start_date=start_date, end_date=end_date
+            )
+        else:
+            sufficient = {
+                v.id: VariantSufficientStats.from_variant(v) for v in test.variants
+            }
+
+        total_participants = sum(s.participants for s in sufficient.values())
+        theta = cuped_theta(sufficient.values()) if use_cuped else 0.0
+        covariate_mean = (
+            sum(s.covariate_sum for s in sufficient.values()) / total_participants
+            if total_participants
+            else 0.0
+        )
 
         # Calculate statistics for each variant
         variant_stats = []
         control_variant = None
 
         for variant in test.variants:
-            variant_assignments = [a for a in assignments if a.variant_id == variant.id]
-            participants = len(variant_assignments)
-            conversions = sum(1 for a in variant_assignments if a.converted)
-            conversion_rate = conversions / participants if participants > 0 else 0.0
+            variant_sufficient = sufficient.setdefault(
+                variant.id, VariantSufficientStats()
+            )
 
             stats = VariantStatistics(
                 variant_id=variant.id,
                 variant_key=variant.variant_key,
                 variant_name=variant.name,
                 is_control=variant.is_control,
-                participants=participants,
-                conversions=conversions,
-                conversion_rate=conversion_rate,
+                participants=variant_sufficient.participants,
+                conversions=variant_sufficient.conversions,
+                conversion_rate=variant_sufficient.conversion_rate,
+                mean_value=variant_sufficient.mean_value,
+                value_std_dev=math.sqrt(variant_sufficient.value_variance),
             )
+            if use_cuped:
+                stats.adjusted_conversion_rate = cuped_adjusted(
+                    variant_sufficient, theta, covariate_mean
+                )[0]
 
             if variant.is_control:
                 control_variant = stats
@@ -255,10 +316,28 @@ class CRUDAbTest(CRUDBase[AbTest, AbTestCreate, AbTestUpdate]):
             return None
 
         # Calculate statistical significance
+        control_sufficient = sufficient[control_variant.variant_id]
         for stats in variant_stats:
-            p_value, ci = self._calculate_significance(
-                control_variant, stats, test.confidence_level
-            )
+            treatment_sufficient = sufficient[stats.variant_id]
+            if use_cuped:
+                p_value, ci = self._calculate_adjusted_significance(
+                    control_sufficient,
+                    treatment_sufficient,
+                    theta,
+                    covariate_mean,
+                    test.confidence_level,
+                )
+            else:
+                p_value, ci = self._calculate_significance(
+                    control_variant, stats, test.confidence_level
+                )
+            if (
+                statistical_method == StatisticalMethod.SEQUENTIAL
+                and p_value is not None
+            ):
+                p_value = self._calculate_sequential_p_value(
+                    test, control_sufficient, treatment_sufficient
+                )
             stats.p_value = p_value
             stats.confidence_interval = ci
             if control_variant.conversion_rate > 0:
@@ -282,13 +361,10 @@ class CRUDAbTest(CRUDBase[AbTest, AbTestCreate, AbTestUpdate]):
             test_key=test.test_key,
             test_name=test.name,
             analysis_date=datetime.utcnow(),
-            statistical_method=StatisticalMethod.FREQUENTIST,
+            statistical_method=statistical_method,
             confidence_level=test.confidence_level,
             minimum_detectable_effect=test.minimum_detectable_effect,
-            total_participants=sum(
-                len([a for a in assignments if a.variant_id == v.id])
-                for v in test.variants
-            ),
+            total_participants=total_participants,
             test_duration_days=(datetime.utcnow() - test.start_date).days
             if test.start_date
             else None,
@@ -302,6 +378,71 @@ class CRUDAbTest(CRUDBase[AbTest, AbTestCreate, AbTestUpdate]):
             insights=insights,
         )
 
+    async def increment_variant_exposures(
+        self,
+        db: AsyncSession,
+        *,
+        exposures: Iterable[Tuple[int, Optional[float]]],
+    ) -> None:
+        """Add first exposures to the running variant counters.
+
+        Args:
+            db: Database session (the caller commits)
+            exposures: ``(variant_id, covariate)`` pairs for newly inserted
+                assignments
+        """
+        totals: Dict[int, List[float]] = {}
+        for variant_id, covariate in exposures:
+            x = covariate or 0.0
+            entry = totals.setdefault(variant_id, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += x
+            entry[2] += x * x
+
+        for variant_id, (users, x_sum, x_sum_sq) in totals.items():
+            new_total = AbTestVariant.total_users + users
+            await db.execute(
+                update(AbTestVariant)
+                .where(AbTestVariant.id == variant_id)
+                .values(
+                    total_users=new_total,
+                    conversion_rate=cast(AbTestVariant.total_conversions, Float)
+                    / new_total,
+                    covariate_sum=AbTestVariant.covariate_sum + x_sum,
+                    covariate_sum_sq=AbTestVariant.covariate_sum_sq + x_sum_sq,
+                )
+            )
+
+    async def rebuild_variant_statistics(
+        self, db: AsyncSession, *, test_id: int
+    ) -> None:
+        """Recompute the running counters of a test's variants from scratch.
+
+        Reconciliation path for counters that drifted (e.g. after manual data
+        fixes); the hot path only ever increments them.
+        """
+        sufficient = await self._aggregate_variant_stats(db, test_id=test_id)
+        result = await db.execute(
+            select(AbTestVariant.id).where(AbTestVariant.test_id == test_id)
+        )
+        for variant_id in result.scalars().all():
+            stats = sufficient.get(variant_id, VariantSufficientStats())
+            await db.execute(
+                update(AbTestVariant)
+                .where(AbTestVariant.id == variant_id)
+                .values(
+                    total_users=stats.participants,
+                    total_conversions=stats.conversions,
+                    conversion_rate=stats.conversion_rate,
+                    value_sum=stats.value_sum,
+                    value_sum_sq=stats.value_sum_sq,
+                    covariate_sum=stats.covariate_sum,
+                    covariate_sum_sq=stats.covariate_sum_sq,
+                    covariate_conversion_sum=stats.covariate_conversion_sum,
+                )
+            )
+        await db.commit()
+
     async def update_test_status(
         self,
         db: AsyncSession,
@@ -396,8 +537,7 @@ class CRUDAbTest(CRUDBase[AbTest, AbTestCreate, AbTestUpdate]):
         self, user_id: Optional[int], session_id: Optional[str]
     ) -> str:
         """Generate consistent hash for user assignment."""
-        identifier = str(user_id) if user_id else session_id or ""
-        return hashlib.sha256(identifier.encode()).hexdigest()[:16]
+        return compute_user_hash(user_id, session_id)
 
     def _should_include_in_test(
         self, user_hash: str, traffic_allocation: float
@@ -436,59 +576,141 @@ class CRUDAbTest(CRUDBase[AbTest, AbTestCreate, AbTestUpdate]):
         # Fallback to last variant
         return sorted_variants[-1] if sorted_variants else None
 
-    async def _get_existing_assignment(
+    async def get_existing_assignments(
         self,
         db: AsyncSession,
-        test_id: int,
+        *,
+        test_ids: Iterable[int],
         user_id: Optional[int],
         session_id: Optional[str],
         user_hash: str,
-    ) -> Optional[AbTestAssignment]:
-        """Get existing assignment for user."""
+    ) -> Dict[int, AbTestAssignment]:
+        """Persisted assignments of one user, keyed by test id.
+
+        A row matches on the user hash, the user ID or the session ID, so a
+        user who signs in keeps the variant assigned to their session. When
+        several rows match a test, the hash match wins, then the user ID.
+        """
+        test_ids = list(test_ids)
+        if not test_ids:
+            return {}
+
+        identity = [AbTestAssignment.user_hash == user_hash]
+        if user_id:
+            identity.append(AbTestAssignment.user_id == user_id)
+        if session_id:
+            identity.append(AbTestAssignment.session_id == session_id)
         query = (
             select(AbTestAssignment)
             .options(selectinload(AbTestAssignment.variant))
-            .where(
-                and_(
-                    AbTestAssignment.test_id == test_id,
-                    AbTestAssignment.user_hash == user_hash,
-                )
-            )
+            .where(and_(AbTestAssignment.test_id.in_(test_ids), or_(*identity)))
         )
 
-        result = await db.execute(query)
-        return result.scalar_one_or_none()
+        def rank(row: AbTestAssignment) -> int:
+            if row.user_hash == user_hash:
+                return 0
+            return 1 if user_id and row.user_id == user_id else 2
 
-    async def _update_variant_metrics(self, db: AsyncSession, variant_id: int) -> None:
-        """Update cached metrics for a variant."""
-        # Count total assignments and conversions
-        assignments_query = select(
-            func.count(AbTestAssignment.id).label("total_users"),
-            func.sum(func.cast(AbTestAssignment.converted, int)).label(
-                "total_conversions"
-            ),
-        ).where(AbTestAssignment.variant_id == variant_id)
-
-        result = await db.execute(assignments_query)
-        row = result.first()
+        found: Dict[int, AbTestAssignment] = {}
+        result = await db.execute(query)
+        for row in result.scalars():
+            current = found.get(row.test_id)
+            if current is None or rank(row) < rank(current):
+                found[row.test_id] = row
+        return found
 
-        total_users = row.total_users or 0
-        total_conversions = row.total_conversions or 0
-        conversion_rate = total_conversions / total_users if total_users > 0 else 0.0
+    async def _get_existing_assignment(
+        self,
+        db: AsyncSession,
+        test_id: int,
+        user_id: Optional[int],
+        session_id: Optional[str],
+        user_hash: str,
+    ) -> Optional[AbTestAssignment]:
+        """Get existing assignment for user."""
+        found = await self.get_existing_assignments(
+            db,
+            test_ids=[test_id],
+            user_id=user_id,
+            session_id=session_id,
+            user_hash=user_hash,
+        )
+        return found.get(test_id)
 
-        # Update variant
-        update_query = (
+    async def _increment_variant_conversion(
+        self,
+        db: AsyncSession,
+        variant_id: int,
+        *,
+        value: Optional[float],
+        covariate: Optional[float],
+    ) -> None:
+        """Add one conversion to the running variant counters."""
+        v = value or 0.0
+        x = covariate or 0.0
+        new_conversions = AbTestVariant.total_conversions + 1
+        await db.execute(
             update(AbTestVariant)
             .where(AbTestVariant.id == variant_id)
             .values(
-                total_users=total_users,
-                total_conversions=total_conversions,
-                conversion_rate=conversion_rate,
+                total_conversions=new_conversions,
+                conversion_rate=cast(new_conversions, Float)
+                / func.greatest(AbTestVariant.total_users, 1),
+                value_sum=AbTestVariant.value_sum + v,
+                value_sum_sq=AbTestVariant.value_sum_sq + v * v,
+                covariate_conversion_sum=AbTestVariant.covariate_conversion_sum + x,
             )
         )
 
-        await db.execute(update_query)
-        await db.commit()
+    async def _aggregate_variant_stats(
+        self,
+        db: AsyncSession,
+        *,
+        test_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Dict[int, VariantSufficientStats]:
+        """Compute per-variant sufficient statistics with one GROUP BY."""
+        converted = cast(AbTestAssignment.converted, Integer)
+        value = func.coalesce(AbTestAssignment.conversion_value, 0.0)
+        covariate = func.coalesce(AbTestAssignment.covariate, 0.0)
+
+        query = (
+            select(
+                AbTestAssignment.variant_id,
+                func.count(AbTestAssignment.id).label("participants"),
+                func.coalesce(func.sum(converted), 0).label("conversions"),
+                func.coalesce(func.sum(value), 0.0).label("value_sum"),
+                func.coalesce(func.sum(value * value), 0.0).label("value_sum_sq"),
+                func.coalesce(func.sum(covariate), 0.0).label("covariate_sum"),
+                func.coalesce(func.sum(covariate * covariate), 0.0).label(
+                    "covariate_sum_sq"
+                ),
+                func.coalesce(func.sum(covariate * converted), 0.0).label(
+                    "covariate_conversion_sum"
+                ),
+            )
+            .where(AbTestAssignment.test_id == test_id)
+            .group_by(AbTestAssignment.variant_id)
+        )
+        if start_date:
+            query = query.where(AbTestAssignment.assigned_at >= start_date)
+        if end_date:
+            query = query.where(AbTestAssignment.assigned_at <= end_date)
+
+        result = await db.execute(query)
+        return {
+            row.variant_id: VariantSufficientStats(
+                participants=row.participants,
+                conversions=row.conversions,
+                value_sum=row.value_sum,
+                value_sum_sq=row.value_sum_sq,
+                covariate_sum=row.covariate_sum,
+                covariate_sum_sq=row.covariate_sum_sq,
+                covariate_conversion_sum=row.covariate_conversion_sum,
+            )
+            for row in result.all()
+        }
 
     def _calculate_significance(
         self,
@@ -536,6 +758,48 @@ class CRUDAbTest(CRUDBase[AbTest, AbTestCreate, AbTestUpdate]):
         except (ZeroDivisionError, ValueError, OverflowError):
             return None, None
 
+    def _calculate_adjusted_significance(
+        self,
+        control: VariantSufficientStats,
+        treatment: VariantSufficientStats,
+        theta: float,
+        covariate_mean: float,
+        confidence_level: float,
+    ) -> Tuple[Optional[float], Optional[Tuple[float, float]]]:
+        """Two-sample z-test on CUPED-adjusted conversion rates."""
+        if control.participants < 100 or treatment.participants < 100:
+            return None, None
+
+        try:
+            control_rate, control_var = cuped_adjusted(control, theta, covariate_mean)
+            treatment_rate, treatment_var = cuped_adjusted(
+                treatment, theta, covariate_mean
+            )
+            return two_sample_z_test(
+                control_rate,
+                control_var,
+                control.participants,
+                treatment_rate,
+                treatment_var,
+                treatment.participants,
+                self._inverse_normal_cdf((1 + confidence_level) / 2),
+            )
+        except (ZeroDivisionError, ValueError, OverflowError):
+            return None, None
+
+    def _calculate_sequential_p_value(
+        self,
+        test: AbTest,
+        control: VariantSufficientStats,
+        treatment: VariantSufficientStats,
+    ) -> Optional[float]:
+        """Always-valid p-value, safe to monitor continuously."""
+        # Mixing variance centred on the minimum effect the test cares about
+        expected_effect = test.minimum_detectable_effect * max(
+            control.conversion_rate, 0.01
+        )
+        return msprt_p_value(control, treatment, expected_effect**2)
+
     def _normal_cdf(self, x: float) -> float:
         """Cumulative distribution function for standard normal distribution."""
         return (1.0 + math.erf(x / math.sqrt(2.0))) / 2.0
@@ -22,7 +22,19 @@ from app.schemas.content_suggestion import (
     ContentSuggestionFeedbackCreate,
     ContentSuggestionUpdate,
 )
-from sqlalchemy import and_, desc, func, or_, select, text, update
+from sqlalchemy import (
+    String,
+    and_,
+    cast,
+    desc,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    text,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -41,6 +53,17 @@ class CRUDContentItem(CRUDBase[ContentItem, ContentItemCreate, ContentItemUpdate
         )
         return result.scalar_one_or_none()
 
+    async def get_by_content_ids(
+        self, db: AsyncSession, *, content_ids: List[str]
+    ) -> Dict[str, ContentItem]:
+        """Get content items keyed by content_id in one query."""
+        if not content_ids:
+            return {}
+        result = await db.execute(
+            select(ContentItem).where(ContentItem.content_id.in_(set(content_ids)))
+        )
+        return {item.content_id: item for item in result.scalars().all()}
+
     async def get_multi_by_category(
         self,
         db: AsyncSession,
@@ -695,8 +718,13 @@ class CRUDContentAnalysisJob(
         processing_time_seconds: Optional[float] = None,
         tokens_used: Optional[int] = None,
         cost_usd: Optional[float] = None,
+        refresh: bool = True,
     ) -> Optional[ContentAnalysisJob]:
-        """Update analysis job status and results."""
+        """Update analysis job status and results.
+
+        Pass ``refresh=False`` to skip re-loading the job, e.g. from workers
+        that checkpoint many jobs and never read the row back.
+        """
         update_data = {"status": status}
 
         if status == "running" and not await self._job_has_started(db, job_id):
@@ -727,6 +755,8 @@ class CRUDContentAnalysisJob(
         )
         await db.commit()
 
+        if not refresh:
+            return None
         return await self.get_by_job_id(db, job_id=job_id)
 
     async def _job_has_started(self, db: AsyncSession, job_id: str) -> bool:
@@ -761,6 +791,140 @@ class CRUDContentAnalysisJob(
         result = await db.execute(query)
         return result.scalars().all()
 
+    async def claim_pending_jobs(
+        self,
+        db: AsyncSession,
+        *,
+        limit: int = 100,
+        job_type: Optional[str] = None,
+    ) -> List[ContentAnalysisJob]:
+        """Atomically claim up to ``limit`` pending jobs for one worker.
+
+        Candidate rows are locked with ``FOR UPDATE SKIP LOCKED`` and flipped
+        to ``running`` in the same statement, so concurrent workers never
+        claim the same job and never wait on each other's locks. Oldest jobs
+        are claimed first.
+        """
+        candidates = (
+            select(ContentAnalysisJob.id)
+            .where(ContentAnalysisJob.status == "pending")
+            .order_by(ContentAnalysisJob.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if job_type:
+            candidates = candidates.where(ContentAnalysisJob.job_type == job_type)
+
+        result = await db.execute(
+            update(ContentAnalysisJob)
+            .where(ContentAnalysisJob.id.in_(candidates.scalar_subquery()))
+            .values(status="running", started_at=datetime.utcnow(), progress=0.0)
+            .returning(ContentAnalysisJob)
+            .execution_options(synchronize_session=False)
+        )
+        jobs = list(result.scalars().all())
+        await db.commit()
+        jobs.sort(key=lambda job: job.created_at)
+        return jobs
+
+    async def requeue_stale_jobs(
+        self,
+        db: AsyncSession,
+        *,
+        stale_after_seconds: int = 900,
+    ) -> int:
+        """Return ``running`` jobs whose worker went away to the queue."""
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+        result = await db.execute(
+            update(ContentAnalysisJob)
+            .where(
+                and_(
+                    ContentAnalysisJob.status == "running",
+                    ContentAnalysisJob.started_at < cutoff,
+                )
+            )
+            .values(status="pending", started_at=None, progress=0.0)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount or 0
+
+    async def enqueue_content_needing_analysis(
+        self,
+        db: AsyncSession,
+        *,
+        job_type: str = "full_analysis",
+        analysis_age_hours: int = 24,
+        limit: int = 10000,
+    ) -> int:
+        """Create pending jobs for content that needs analysis, in one statement.
+
+        Content that already has a pending or running job of ``job_type`` is
+        skipped, so a backfill can be re-run safely.
+        """
+        cutoff_time = datetime.utcnow() - timedelta(hours=analysis_age_hours)
+        open_job = (
+            select(ContentAnalysisJob.id)
+            .where(
+                and_(
+                    ContentAnalysisJob.content_id == ContentItem.content_id,
+                    ContentAnalysisJob.job_type == job_type,
+                    ContentAnalysisJob.status.in_(["pending", "running"]),
+                )
+            )
+            .exists()
+        )
+        source = (
+            select(
+                cast(func.gen_random_uuid(), String),
+                ContentItem.content_id,
+                literal(job_type),
+                literal("pending"),
+                literal(0.0),
+                func.now(),
+            )
+            .where(
+                and_(
+                    ContentItem.is_active == True,
+                    or_(
+                        ContentItem.analyzed_at.is_(None),
+                        ContentItem.analyzed_at < cutoff_time,
+                    ),
+                    ~open_job,
+                )
+            )
+            .order_by(ContentItem.id)
+            .limit(limit)
+        )
+        result = await db.execute(
+            insert(ContentAnalysisJob).from_select(
+                [
+                    "job_id",
+                    "content_id",
+                    "job_type",
+                    "status",
+                    "progress",
+                    "created_at",
+                ],
+                source,
+            )
+        )
+        await db.commit()
+        return result.rowcount or 0
+
+    async def count_pending_jobs(
+        self, db: AsyncSession
+    ) -> Tuple[int, Optional[datetime]]:
+        """Number of pending jobs and the creation time of the oldest one."""
+        result = await db.execute(
+            select(
+                func.count(ContentAnalysisJob.id),
+                func.min(ContentAnalysisJob.created_at),
+            ).where(ContentAnalysisJob.status == "pending")
+        )
+        count, oldest = result.one()
+        return count or 0, oldest
+
 
 # Create CRUD instances
 content_item = CRUDContentItem(ContentItem)
@@ -1,16 +1,36 @@
 """Email tracking CRUD operations."""
 import logging
-from datetime import UTC, datetime
-from typing import Dict, List, Optional, Union
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from datetime import UTC, date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 
 from app.crud.base import CRUDBase
-from app.models.email_tracking import EmailEvent, EmailStatus, EmailTracking
+from app.models.email_tracking import (
+    EmailEvent,
+    EmailLatencyRollup,
+    EmailStatus,
+    EmailStatusRollup,
+    EmailTracking,
+)
 from app.schemas.email_tracking import (
     EmailEventCreate,
     EmailTrackingCreate,
     EmailTrackingStats,
 )
-from sqlalchemy import func, select
+from sqlalchemy import (
+    Numeric,
+    and_,
+    cast,
+    delete,
+    func,
+    literal_column,
+    or_,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
@@ -47,6 +67,92 @@ STATUS_PRIORITY = {
     EmailStatus.SPAM: 8,
 }
 
+# Tracking column stamped the first time an email reaches each status
+STATUS_TIMESTAMP_FIELDS = {
+    EmailStatus.SENT: "sent_at",
+    EmailStatus.DELIVERED: "delivered_at",
+    EmailStatus.OPENED: "opened_at",
+    EmailStatus.CLICKED: "clicked_at",
+    EmailStatus.FAILED: "failed_at",
+    EmailStatus.BOUNCED: "failed_at",
+    EmailStatus.SPAM: "failed_at",
+}
+
+FAILURE_STATUSES = [EmailStatus.FAILED, EmailStatus.BOUNCED, EmailStatus.SPAM]
+
+# Lower bounds, in seconds, of the open/click latency histogram buckets
+LATENCY_BUCKET_BOUNDS = [
+    0,
+    60,
+    300,
+    900,
+    1800,
+    3600,
+    10800,
+    21600,
+    43200,
+    86400,
+    172800,
+    604800,
+]
+
+# Latency rollup metric -> tracking column measured from sent_at
+LATENCY_METRICS = {"open": "opened_at", "click": "clicked_at"}
+
+# Tracking columns the rollups are derived from
+ROLLUP_FIELDS = ("created_at", "template_name", "status", "sent_at") + tuple(
+    LATENCY_METRICS.values()
+)
+
+
+def latency_bucket(seconds: float) -> int:
+    """Histogram bucket for a latency in seconds."""
+    return max(bisect_right(LATENCY_BUCKET_BOUNDS, seconds) - 1, 0)
+
+
+def latency_percentile(histogram: Dict[int, int], percentile: float) -> Optional[float]:
+    """
+    Estimate a latency percentile from histogram bucket counts.
+
+    Interpolates linearly inside the bucket holding the requested rank. The
+    last bucket is open-ended and reports its lower bound.
+
+    Args:
+        histogram: Bucket index -> email count
+        percentile: Percentile between 0 and 100
+
+    Returns:
+        Latency in seconds, or None for an empty histogram
+    """
+    total = sum(histogram.values())
+    if total <= 0:
+        return None
+
+    rank = percentile / 100 * total
+    cumulative = 0
+    for bucket in sorted(histogram):
+        count = histogram[bucket]
+        if count <= 0:
+            continue
+        if cumulative + count >= rank:
+            lower = LATENCY_BUCKET_BOUNDS[bucket]
+            if bucket + 1 >= len(LATENCY_BUCKET_BOUNDS):
+                return float(lower)
+            upper = LATENCY_BUCKET_BOUNDS[bucket + 1]
+            return lower + (upper - lower) * (rank - cumulative) / count
+        cumulative += count
+    return float(LATENCY_BUCKET_BOUNDS[max(histogram)])
+
+
+def _as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is None or moment.tzinfo is not None:
+        return moment
+    return moment.replace(tzinfo=UTC)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=UTC)
+
 
 class CRUDEmailTracking(CRUDBase[EmailTracking, EmailTrackingCreate, None]):
     """CRUD for email tracking."""
@@ -92,6 +198,20 @@ class CRUDEmailTracking(CRUDBase[EmailTracking, EmailTrackingCreate, None]):
         db.add(db_obj)
         await db.flush()
 
+        # Count the new email in its creation day rollup
+        await self._apply_rollup_deltas(
+            db,
+            status_deltas=Counter(
+                {
+                    (
+                        db_obj.created_at.astimezone(UTC).date(),
+                        db_obj.template_name,
+                        db_obj.status,
+                    ): 1
+                }
+            ),
+        )
+
         # Create event
         event = EmailEvent(
             email_id=db_obj.id,
@@ -190,6 +310,10 @@ class CRUDEmailTracking(CRUDBase[EmailTracking, EmailTrackingCreate, None]):
         tracking_metadata: Optional[Dict] = None,
     ) -> EmailTracking:
         """Update email tracking status with validation."""
+        # Lock the row and re-read it so concurrent updates of the same email
+        # apply their rollup deltas one after the other from fresh state
+        await db.refresh(db_obj, with_for_update=True)
+
         # Validate status transition
         current_status = db_obj.status
         if not self._should_update_status(current_status, status):
@@ -207,6 +331,7 @@ class CRUDEmailTracking(CRUDBase[EmailTracking, EmailTrackingCreate, None]):
                 f"Status transition for email {db_obj.id}: "
                 f"{current_status} -> {status}"
             )
+        before = self._rollup_state(db_obj)
 
         # Update status and tracking metadata
         db_obj.status = status
@@ -240,6 +365,23 @@ class CRUDEmailTracking(CRUDBase[EmailTracking, EmailTrackingCreate, None]):
         ]:
             event_metadata = {**event_metadata, "error": error_message}
 
+        # Move the email between rollup rows
+        status_deltas: Counter = Counter()
+        latencies: Counter = Counter()
+        self._collect_rollup_deltas(
+            before,
+            {
+                field: getattr(db_obj, field)
+                for field in ROLLUP_FIELDS
+                if getattr(db_obj, field) != before[field]
+            },
+            status_deltas,
+            latencies,
+        )
+        await self._apply_rollup_deltas(
+            db, status_deltas=status_deltas, latencies=latencies
+        )
+
         # Add event
         event = EmailEvent(
             email_id=db_obj.id,
@@ -324,35 +466,639 @@ class CRUDEmailTracking(CRUDBase[EmailTracking, EmailTrackingCreate, None]):
         )
         return result.unique().scalar_one_or_none()
 
-    async def get_stats(
+    async def resolve_for_events(
+        self,
+        db: AsyncSession,
+        *,
+        events: List[Tuple[Optional[str], str, datetime]],
+        time_window_hours: int = 24,
+    ) -> List[Optional[EmailTracking]]:
+        """
+        Resolve the tracking rows for many provider events in one query.
+
+        Uses the same strategies as find_by_email_and_recipient for events with
+        a timestamp: an exact email_id match, then the most recent email to the
+        recipient created within the time window of the event.
+
+        Args:
+            events: (email_id, recipient, timestamp) for each event
+            time_window_hours: Time window for recipient matching (default 24h)
+
+        Returns:
+            EmailTracking record or None for each event, in input order
+        """
+        if not events:
+            return []
+
+        window = timedelta(hours=time_window_hours)
+        email_ids = {email_id for email_id, _, _ in events if email_id}
+        timestamps = [timestamp for _, _, timestamp in events]
+        conditions = [
+            and_(
+                EmailTracking.recipient.in_({recipient for _, recipient, _ in events}),
+                EmailTracking.created_at >= min(timestamps) - window,
+                EmailTracking.created_at <= max(timestamps) + window,
+            )
+        ]
+        if email_ids:
+            conditions.append(EmailTracking.email_id.in_(email_ids))
+
+        result = await db.execute(
+            select(EmailTracking)
+            .where(or_(*conditions))
+            .order_by(EmailTracking.created_at.desc())  # Most recent first
+        )
+        rows = result.scalars().all()
+
+        by_email_id = {row.email_id: row for row in rows if row.email_id}
+        by_recipient: Dict[str, List[EmailTracking]] = defaultdict(list)
+        for row in rows:
+            by_recipient[row.recipient].append(row)
+
+        resolved = []
+        for email_id, recipient, timestamp in events:
+            tracking = by_email_id.get(email_id) if email_id else None
+            if tracking is None:
+                tracking = next(
+                    (
+                        row
+                        for row in by_recipient.get(recipient, [])
+                        if abs(row.created_at - timestamp) <= window
+                    ),
+                    None,
+                )
+            resolved.append(tracking)
+        return resolved
+
+    async def get_existing_signatures(
+        self, db: AsyncSession, *, signatures: Iterable[str]
+    ) -> Set[str]:
+        """Return which event signatures are already recorded."""
+        signatures = set(signatures)
+        if not signatures:
+            return set()
+        result = await db.execute(
+            select(EmailEvent.event_signature).where(
+                EmailEvent.event_signature.in_(signatures)
+            )
+        )
+        return set(result.scalars().all())
+
+    def plan_bulk_events(
+        self,
+        events: List[Tuple[EmailTracking, EmailEventCreate, Optional[str]]],
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Plan status updates and event rows for a batch of provider events.
+
+        Events are applied per email in occurrence order with the same
+        transition rules as update_status. Status timestamps come from the
+        events themselves, so late webhook deliveries keep accurate times.
+
+        Args:
+            events: (tracking record, event, error message) for each event
+
+        Returns:
+            Tuple of (tracking updates keyed by id, event rows to insert)
+        """
+        updates: Dict[int, Dict] = {}
+        rows = []
+        for tracking, event, error_message in sorted(
+            events, key=lambda item: item[1].occurred_at
+        ):
+            changes = updates.get(tracking.id, {})
+            current_status = changes.get("status", tracking.status)
+            if not self._should_update_status(current_status, event.event_type):
+                logger.warning(
+                    f"Rejected invalid status transition for email {tracking.id}: "
+                    f"{current_status} -> {event.event_type}"
+                )
+                continue
+
+            changes = updates.setdefault(tracking.id, {"id": tracking.id})
+            changes["status"] = event.event_type
+            if event.event_metadata:
+                changes["tracking_metadata"] = event.event_metadata
+            field = STATUS_TIMESTAMP_FIELDS.get(event.event_type)
+            if field and getattr(tracking, field) is None and field not in changes:
+                changes[field] = event.occurred_at
+                if field == "failed_at" and error_message:
+                    changes["error_message"] = error_message
+
+            event_metadata = event.event_metadata or {}
+            if error_message and event.event_type in FAILURE_STATUSES:
+                event_metadata = {**event_metadata, "error": error_message}
+            rows.append(
+                {
+                    "email_id": tracking.id,
+                    "event_type": event.event_type,
+                    "occurred_at": event.occurred_at,
+                    "user_agent": event.user_agent,
+                    "ip_address": event.ip_address,
+                    "location": event.location,
+                    "event_metadata": event_metadata,
+                    "event_signature": event_metadata.get("event_signature"),
+                }
+            )
+        return list(updates.values()), rows
+
+    async def bulk_apply_events(
+        self,
+        db: AsyncSession,
+        *,
+        events: List[Tuple[EmailTracking, EmailEventCreate, Optional[str]]],
+    ) -> int:
+        """
+        Apply a batch of provider events with one UPDATE and one INSERT.
+
+        Event rows whose signature already exists are skipped by the unique
+        index, which covers concurrent deliveries of the same webhook. The
+        tracking rows are locked and re-read first, so concurrent batches for
+        the same email plan against each other's results and never apply the
+        same rollup delta twice. The caller owns the transaction.
+
+        Returns:
+            Number of events accepted by the transition rules
+        """
+        trackings = await self._lock_trackings(
+            db, ids={tracking.id for tracking, _, _ in events}
+        )
+        events = [
+            (trackings[tracking.id], event, error_message)
+            for tracking, event, error_message in events
+            if tracking.id in trackings
+        ]
+        updates, rows = self.plan_bulk_events(events)
+        if updates:
+            now = datetime.now(UTC)
+            await db.execute(
+                update(EmailTracking),
+                [{**changes, "updated_at": now} for changes in updates],
+            )
+
+            status_deltas: Counter = Counter()
+            latencies: Counter = Counter()
+            for changes in updates:
+                self._collect_rollup_deltas(
+                    self._rollup_state(trackings[changes["id"]]),
+                    changes,
+                    status_deltas,
+                    latencies,
+                )
+            await self._apply_rollup_deltas(
+                db, status_deltas=status_deltas, latencies=latencies
+            )
+        if rows:
+            await db.execute(
+                insert(EmailEvent).on_conflict_do_nothing(
+                    index_elements=["event_signature"]
+                ),
+                rows,
+            )
+        return len(rows)
+
+    async def _lock_trackings(
+        self, db: AsyncSession, *, ids: Iterable[int]
+    ) -> Dict[int, EmailTracking]:
+        """Lock tracking rows in id order and reload their current state."""
+        ids = sorted(set(ids))
+        if not ids:
+            return {}
+        result = await db.execute(
+            select(EmailTracking)
+            .where(EmailTracking.id.in_(ids))
+            .order_by(EmailTracking.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return {tracking.id: tracking for tracking in result.scalars().all()}
+
+    def _rollup_state(self, tracking: EmailTracking) -> Dict[str, Any]:
+        """Snapshot of the tracking columns the rollups depend on."""
+        return {field: getattr(tracking, field) for field in ROLLUP_FIELDS}
+
+    def _collect_rollup_deltas(
+        self,
+        before: Dict[str, Any],
+        changes: Dict[str, Any],
+        status_deltas: Counter,
+        latencies: Counter,
+    ) -> None:
+        """
+        Add the rollup changes caused by one tracking update.
+
+        Args:
+            before: Rollup state of the email before the update
+            changes: Tracking columns set by the update
+            status_deltas: (day, template, status) -> count delta, updated in place
+            latencies: (day, template, metric, bucket) -> count, updated in place
+        """
+        day = before["created_at"].astimezone(UTC).date()
+        template = before["template_name"]
+
+        new_status = changes.get("status", before["status"])
+        if new_status != before["status"]:
+            status_deltas[(day, template, before["status"])] -= 1
+            status_deltas[(day, template, new_status)] += 1
+
+        sent_at = before["sent_at"] or changes.get("sent_at")
+        for metric, field in LATENCY_METRICS.items():
+            reached_at = changes.get(field)
+            if reached_at and before[field] is None and sent_at:
+                seconds = (reached_at - sent_at).total_seconds()
+                latencies[(day, template, metric, latency_bucket(seconds))] += 1
+
+    async def _apply_rollup_deltas(
+        self,
+        db: AsyncSession,
+        *,
+        status_deltas: Optional[Counter] = None,
+        latencies: Optional[Counter] = None,
+    ) -> None:
+        """Upsert rollup count changes, one statement per rollup table."""
+        now = datetime.now(UTC)
+        status_rows = [
+            {
+                "day": day,
+                "template_name": template,
+                "status": status,
+                "email_count": delta,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (day, template, status), delta in (status_deltas or {}).items()
+            if delta
+        ]
+        if status_rows:
+            stmt = insert(EmailStatusRollup).values(status_rows)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    constraint="uq_email_status_rollups_day_template_status",
+                    set_={
+                        "email_count": EmailStatusRollup.email_count
+                        + stmt.excluded.email_count,
+                        "updated_at": now,
+                    },
+                )
+            )
+
+        latency_rows = [
+            {
+                "day": day,
+                "template_name": template,
+                "metric": metric,
+                "bucket": bucket,
+                "email_count": count,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (day, template, metric, bucket), count in (latencies or {}).items()
+            if count
+        ]
+        if latency_rows:
+            stmt = insert(EmailLatencyRollup).values(latency_rows)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    constraint="uq_email_latency_rollups_day_template_metric_bucket",
+                    set_={
+                        "email_count": EmailLatencyRollup.email_count
+                        + stmt.excluded.email_count,
+                        "updated_at": now,
+                    },
+                )
+            )
+
+    async def _count_by_status(
+        self,
+        db: AsyncSession,
+        *,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        end_inclusive: bool,
+        template_name: Optional[str] = None,
+    ) -> Counter:
+        """Count tracking rows by status for a (partial day) time range."""
+        query = select(EmailTracking.status, func.count()).group_by(
+            EmailTracking.status
+        )
+        if start is not None:
+            query = query.where(EmailTracking.created_at >= start)
+        if end is not None:
+            query = query.where(
+                EmailTracking.created_at <= end
+                if end_inclusive
+                else EmailTracking.created_at < end
+            )
+        if template_name:
+            query = query.where(EmailTracking.template_name == template_name)
+        result = await db.execute(query)
+        return Counter(dict(result.all()))
+
+    async def get_status_counts(
         self,
         db: AsyncSession,
         *,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-    ) -> EmailTrackingStats:
-        """Get email tracking statistics."""
-        # Base query
-        query = select(EmailTracking)
+        template_name: Optional[str] = None,
+    ) -> Counter:
+        """
+        Count emails created in a date range by their current status.
+
+        Whole days come from the daily rollups, so the cost grows with the
+        number of days rather than the number of emails. Only partial days at
+        the edges of the range are counted from tracking rows.
 
-        # Add date range filter if provided
-        if start_date:
-            query = query.where(EmailTracking.created_at >= start_date)
-        if end_date:
-            query = query.where(EmailTracking.created_at <= end_date)
+        Args:
+            start_date: Inclusive lower bound on created_at
+            end_date: Inclusive upper bound on created_at
+            template_name: Restrict to one template
+
+        Returns:
+            EmailStatus -> email count
+        """
+        start, end = _as_utc(start_date), _as_utc(end_date)
+        first_day = None
+        if start is not None:
+            first_day = start.date()
+            if start != _day_start(first_day):
+                first_day += timedelta(days=1)
+        last_day = None
+        if end is not None:
+            # An end on a day's last microsecond covers that whole day
+            after_end = end + timedelta(microseconds=1)
+            last_day = after_end.date() - timedelta(days=1)
+
+        if first_day is not None and last_day is not None and first_day > last_day:
+            # Less than one whole day; count the rows directly
+            return await self._count_by_status(
+                db,
+                start=start,
+                end=end,
+                end_inclusive=True,
+                template_name=template_name,
+            )
+
+        query = select(
+            EmailStatusRollup.status, func.sum(EmailStatusRollup.email_count)
+        ).group_by(EmailStatusRollup.status)
+        if first_day is not None:
+            query = query.where(EmailStatusRollup.day >= first_day)
+        if last_day is not None:
+            query = query.where(EmailStatusRollup.day <= last_day)
+        if template_name:
+            query = query.where(EmailStatusRollup.template_name == template_name)
+        result = await db.execute(query)
+        counts = Counter({status: int(total or 0) for status, total in result.all()})
+
+        if start is not None and start != _day_start(first_day):
+            counts.update(
+                await self._count_by_status(
+                    db,
+                    start=start,
+                    end=_day_start(first_day),
+                    end_inclusive=False,
+                    template_name=template_name,
+                )
+            )
+        if end is not None and after_end != _day_start(after_end.date()):
+            counts.update(
+                await self._count_by_status(
+                    db,
+                    start=_day_start(after_end.date()),
+                    end=end,
+                    end_inclusive=True,
+                    template_name=template_name,
+                )
+            )
+        return counts
+
+    async def get_daily_rollups(
+        self,
+        db: AsyncSession,
+        *,
+        start_day: date,
+        end_day: date,
+        template_name: Optional[str] = None,
+    ) -> List[EmailStatusRollup]:
+        """Per day, template and status email counts for a day range."""
+        query = (
+            select(EmailStatusRollup)
+            .where(
+                EmailStatusRollup.day >= start_day,
+                EmailStatusRollup.day <= end_day,
+                EmailStatusRollup.email_count != 0,
+            )
+            .order_by(
+                EmailStatusRollup.day,
+                EmailStatusRollup.template_name,
+                EmailStatusRollup.status,
+            )
+        )
+        if template_name:
+            query = query.where(EmailStatusRollup.template_name == template_name)
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    async def get_latency_percentiles(
+        self,
+        db: AsyncSession,
+        *,
+        start_day: date,
+        end_day: date,
+        template_name: Optional[str] = None,
+        percentiles: Sequence[float] = (50, 90, 99),
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Send-to-open and send-to-click latency percentiles for a day range.
 
-        # Execute query
+        Returns:
+            Metric -> {"count": emails, "p50": seconds, ...}
+        """
+        query = (
+            select(
+                EmailLatencyRollup.metric,
+                EmailLatencyRollup.bucket,
+                func.sum(EmailLatencyRollup.email_count),
+            )
+            .where(
+                EmailLatencyRollup.day >= start_day,
+                EmailLatencyRollup.day <= end_day,
+            )
+            .group_by(EmailLatencyRollup.metric, EmailLatencyRollup.bucket)
+        )
+        if template_name:
+            query = query.where(EmailLatencyRollup.template_name == template_name)
         result = await db.execute(query)
-        records = result.scalars().all()
+
+        histograms: Dict[str, Dict[int, int]] = {
+            metric: {} for metric in LATENCY_METRICS
+        }
+        for metric, bucket, count in result.all():
+            histograms.setdefault(metric, {})[bucket] = int(count or 0)
+
+        return {
+            metric: {
+                "count": sum(histogram.values()),
+                **{f"p{int(p)}": latency_percentile(histogram, p) for p in percentiles},
+            }
+            for metric, histogram in histograms.items()
+        }
+
+    async def rebuild_rollups(
+        self, db: AsyncSession, *, start_day: date, end_day: date
+    ) -> Dict[str, int]:
+        """
+        Recompute the rollups for a day range from tracking rows.
+
+        This is the compaction job. It backfills days and repairs any drift.
+        Each day is rebuilt and committed in its own transaction, so the
+        rollup tables are only locked against concurrent increments for one
+        day's rescan at a time.
+
+        Returns:
+            Number of rollup rows written per table
+        """
+        written = {"status_rows": 0, "latency_rows": 0}
+        rollup_day = start_day
+        while rollup_day <= end_day:
+            try:
+                day_written = await self._rebuild_rollup_day(db, rollup_day)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+            for table, rows in day_written.items():
+                written[table] += rows
+            rollup_day += timedelta(days=1)
+
+        logger.info(f"Rebuilt email rollups for {start_day}..{end_day}")
+        return written
+
+    async def _rebuild_rollup_day(
+        self, db: AsyncSession, rollup_day: date
+    ) -> Dict[str, int]:
+        """
+        Replace one day's rollup rows, leaving the transaction open.
+
+        The rollup tables are locked against concurrent increments until the
+        caller commits, so transitions that land during the rebuild are
+        applied after it instead of being lost.
+        """
+        await db.execute(
+            text(
+                "LOCK TABLE email_status_rollups, email_latency_rollups "
+                "IN SHARE ROW EXCLUSIVE MODE"
+            )
+        )
+        await db.execute(
+            delete(EmailStatusRollup).where(EmailStatusRollup.day == rollup_day)
+        )
+        await db.execute(
+            delete(EmailLatencyRollup).where(EmailLatencyRollup.day == rollup_day)
+        )
+
+        day = func.date(func.timezone("UTC", EmailTracking.created_at))
+        in_range = and_(
+            EmailTracking.created_at >= _day_start(rollup_day),
+            EmailTracking.created_at < _day_start(rollup_day + timedelta(days=1)),
+        )
+        status_result = await db.execute(
+            insert(EmailStatusRollup).from_select(
+                [
+                    "day",
+                    "template_name",
+                    "status",
+                    "email_count",
+                    "created_at",
+                    "updated_at",
+                ],
+                select(
+                    day,
+                    EmailTracking.template_name,
+                    EmailTracking.status,
+                    func.count(),
+                    literal_column("now()"),
+                    literal_column("now()"),
+                )
+                .where(in_range)
+                .group_by(day, EmailTracking.template_name, EmailTracking.status),
+            )
+        )
+
+        bounds = literal_column(
+            f"ARRAY[{','.join(str(b) for b in LATENCY_BUCKET_BOUNDS)}]::numeric[]"
+        )
+        latency_rows = 0
+        for metric, field in LATENCY_METRICS.items():
+            reached_at = getattr(EmailTracking, field)
+            bucket = func.greatest(
+                func.width_bucket(
+                    cast(
+                        func.extract("epoch", reached_at - EmailTracking.sent_at),
+                        Numeric,
+                    ),
+                    bounds,
+                )
+                - 1,
+                0,
+            )
+            latency_result = await db.execute(
+                insert(EmailLatencyRollup).from_select(
+                    [
+                        "day",
+                        "template_name",
+                        "metric",
+                        "bucket",
+                        "email_count",
+                        "created_at",
+                        "updated_at",
+                    ],
+                    select(
+                        day,
+                        EmailTracking.template_name,
+                        literal_column(f"'{metric}'"),
+                        bucket,
+                        func.count(),
+                        literal_column("now()"),
+                        literal_column("now()"),
+                    )
+                    .where(
+                        in_range,
+                        reached_at.is_not(None),
+                        EmailTracking.sent_at.is_not(None),
+                    )
+                    .group_by(day, EmailTracking.template_name, bucket),
+                )
+            )
+            latency_rows += latency_result.rowcount or 0
+
+        return {
+            "status_rows": status_result.rowcount or 0,
+            "latency_rows": latency_rows,
+        }
+
+    async def get_stats(
+        self,
+        db: AsyncSession,
+        *,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        template_name: Optional[str] = None,
+    ) -> EmailTrackingStats:
+        """Get email tracking statistics from the daily rollups."""
+        counts = await self.get_status_counts(
+            db, start_date=start_date, end_date=end_date, template_name=template_name
+        )
 
         # Calculate totals
-        total_sent = sum(1 for r in records if r.status == EmailStatus.SENT)
-        total_delivered = sum(1 for r in records if r.status == EmailStatus.DELIVERED)
-        total_opened = sum(1 for r in records if r.status == EmailStatus.OPENED)
-        total_clicked = sum(1 for r in records if r.status == EmailStatus.CLICKED)
-        total_failed = sum(1 for r in records if r.status == EmailStatus.FAILED)
-        total_bounced = sum(1 for r in records if r.status == EmailStatus.BOUNCED)
-        total_spam = sum(1 for r in records if r.status == EmailStatus.SPAM)
+        total_sent = counts[EmailStatus.SENT]
+        total_delivered = counts[EmailStatus.DELIVERED]
+        total_opened = counts[EmailStatus.OPENED]
+        total_clicked = counts[EmailStatus.CLICKED]
+        total_failed = counts[EmailStatus.FAILED]
+        total_bounced = counts[EmailStatus.BOUNCED]
+        total_spam = counts[EmailStatus.SPAM]
 
         # Calculate rates (avoid division by zero)
         delivery_rate = total_delivered / total_sent if total_sent > 0 else 0.0
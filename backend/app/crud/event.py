@@ -1,10 +1,30 @@
 """CRUD operations for event tracking with analytics and privacy controls."""
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 from uuid import uuid4
 
 from app.crud.base import CRUDBase
-from app.models.event import Event
+from app.db.partitions import PartitionManager, RetentionReport
+from app.models.event import (
+    PII_PROPERTY_FIELDS,
+    Event,
+    EventAnonymizationJob,
+    EventRollup,
+    EventRollupState,
+)
 from app.schemas.event import (
     EventAnalyticsQuery,
     EventAnonymizationRequest,
@@ -14,10 +34,111 @@ from app.schemas.event import (
     EventSource,
     EventType,
 )
-from sqlalchemy import and_, desc, func, select, text, update
+from sqlalchemy import (
+    BigInteger,
+    Text,
+    and_,
+    cast,
+    desc,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload
 from sqlalchemy.sql import Select
 
+logger = logging.getLogger(__name__)
+
+# Event columns the rollups are grouped by
+ROLLUP_DIMENSIONS = ("event_type", "event_name", "source")
+# Rollup granularities, coarsest first; values are PostgreSQL date_trunc units
+ROLLUP_GRANULARITIES = ("day", "hour")
+ROLLUP_STATE_NAME = "events"
+ROLLUP_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Convert to the naive UTC form event timestamps are stored in."""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _is_aligned(moment: datetime, granularity: str) -> bool:
+    """Whether a moment falls exactly on a bucket boundary."""
+    truncated = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        truncated = truncated.replace(hour=0)
+    return moment == truncated
+
+
+class RollupPlan(NamedTuple):
+    """Rollup granularity and naive UTC bounds answering an analytics query."""
+
+    granularity: str
+    start: Optional[datetime]
+    # Exclusive end of the rollup buckets read
+    end: Optional[datetime]
+    # Also count raw events stamped exactly at ``end``
+    include_end: bool = False
+
+
+def plan_analytics_query(
+    query_params: EventAnalyticsQuery,
+    horizon: Optional[datetime] = None,
+) -> Optional[RollupPlan]:
+    """
+    Pick the coarsest rollup that can answer an analytics query.
+
+    Rollups only keep event type, name and source, so queries filtering by
+    user or grouping by any other column need raw events, as do time ranges
+    that do not start and end on hour boundaries.
+
+    end_date is inclusive, as on raw events. An end_date on the last
+    microsecond of a bucket covers that bucket; an end_date exactly on a
+    boundary reads the buckets before it and counts the events stamped at that
+    instant from raw events.
+
+    Rollups keep counting events purged by retention. Unless the query sets
+    include_purged, a range starting before ``horizon`` (the oldest timestamp
+    whose events are all still retained) runs on raw events, so both paths
+    return the same results.
+
+    Returns:
+        Rollup plan with naive UTC bounds, or None when the query must run
+        against raw events
+    """
+    if query_params.user_ids:
+        return None
+    group_by = [field for field in query_params.group_by or [] if hasattr(Event, field)]
+    if any(field not in ROLLUP_DIMENSIONS for field in group_by):
+        return None
+
+    start = _naive_utc(query_params.start_date)
+    end = _naive_utc(query_params.end_date)
+    if horizon is not None and not query_params.include_purged:
+        if start is None or start < _naive_utc(horizon):
+            return None
+    for granularity in ROLLUP_GRANULARITIES:
+        if start is not None and not _is_aligned(start, granularity):
+            continue
+        if end is None:
+            return RollupPlan(granularity, start, None)
+        if _is_aligned(end + timedelta(microseconds=1), granularity):
+            return RollupPlan(granularity, start, end + timedelta(microseconds=1))
+        if _is_aligned(end, granularity):
+            return RollupPlan(granularity, start, end, include_end=True)
+    return None
+
 
 class CRUDEvent(CRUDBase[Event, EventCreate, Dict[str, Any]]):
     """CRUD operations for Event model with advanced analytics and privacy features."""
@@ -101,14 +222,12 @@ class CRUDEvent(CRUDBase[Event, EventCreate, Dict[str, Any]]):
             db_obj = Event(**event_data)
             events.append(db_obj)
 
-        # Bulk insert for performance
+        # Bulk insert for performance; the flush batches all rows into a single
+        # INSERT .. RETURNING, so primary keys are populated without a
+        # per-event refresh round trip.
         db.add_all(events)
         await db.commit()
 
-        # Refresh objects to get auto-generated fields
-        for event in events:
-            await db.refresh(event)
-
         return events
 
     async def get_by_event_id(
@@ -174,7 +293,23 @@ class CRUDEvent(CRUDBase[Event, EventCreate, Dict[str, Any]]):
         *,
         query_params: EventAnalyticsQuery,
     ) -> List[Dict[str, Any]]:
-        """Execute analytics queries with aggregation and grouping."""
+        """
+        Execute analytics queries with aggregation and grouping.
+
+        Queries that line up with the hourly or daily rollups are answered
+        from them; see plan_analytics_query. Fine drill-downs run on raw events.
+        Ranges reaching past the retention horizon of the queried event types
+        also run on raw events, unless include_purged asks for the rollups'
+        counts of purged events.
+        """
+        plan = plan_analytics_query(
+            query_params, horizon=self.retention_horizon(query_params.event_types)
+        )
+        if plan is not None:
+            return await self._rollup_analytics_query(
+                db, query_params=query_params, plan=plan
+            )
+
         # Build base query
         base_query = select(Event)
 
@@ -253,6 +388,284 @@ class CRUDEvent(CRUDBase[Event, EventCreate, Dict[str, Any]]):
 
         return results
 
+    async def _rollup_analytics_query(
+        self,
+        db: AsyncSession,
+        *,
+        query_params: EventAnalyticsQuery,
+        plan: RollupPlan,
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer an analytics query from rollup buckets.
+
+        Events inserted after the rollup watermark are not materialized yet;
+        they are aggregated from the events table in the same statement, so
+        results are as fresh as a raw query. So are events stamped exactly at
+        an inclusive end on a bucket boundary, whose bucket is not read.
+        """
+        granularity, start, end, include_end = plan
+        group_by = [f for f in query_params.group_by or [] if hasattr(Event, f)]
+
+        rollup_filters = [EventRollup.granularity == granularity]
+        watermark = func.coalesce(
+            select(EventRollupState.watermark)
+            .where(EventRollupState.name == ROLLUP_STATE_NAME)
+            .scalar_subquery(),
+            ROLLUP_EPOCH,
+        )
+        raw_events = Event.created_at > watermark
+        if end is not None and include_end:
+            raw_events = or_(raw_events, Event.timestamp == end)
+        tail_filters = [raw_events]
+        for field, values in (
+            ("event_type", query_params.event_types),
+            ("event_name", query_params.event_names),
+            ("source", query_params.sources),
+        ):
+            if values:
+                rollup_filters.append(getattr(EventRollup, field).in_(values))
+                tail_filters.append(getattr(Event, field).in_(values))
+        if start is not None:
+            rollup_filters.append(EventRollup.bucket_start >= start)
+            tail_filters.append(Event.timestamp >= start)
+        if end is not None:
+            rollup_filters.append(EventRollup.bucket_start < end)
+            tail_filters.append(
+                Event.timestamp <= end if include_end else Event.timestamp < end
+            )
+
+        materialized = select(
+            *[getattr(EventRollup, field).label(field) for field in group_by],
+            EventRollup.event_count,
+            EventRollup.value_count,
+            EventRollup.value_sum,
+            EventRollup.value_min,
+            EventRollup.value_max,
+        ).where(*rollup_filters)
+        tail = (
+            select(
+                *[getattr(Event, field).label(field) for field in group_by],
+                func.count(Event.id).label("event_count"),
+                func.count(Event.value).label("value_count"),
+                func.sum(Event.value).label("value_sum"),
+                func.min(Event.value).label("value_min"),
+                func.max(Event.value).label("value_max"),
+            )
+            .where(*tail_filters)
+            .group_by(*[getattr(Event, field) for field in group_by])
+        )
+        buckets = union_all(materialized, tail).subquery("buckets")
+
+        aggregates = {
+            "count": func.coalesce(
+                cast(func.sum(buckets.c.event_count), BigInteger), 0
+            ).label("count"),
+            "sum": func.sum(buckets.c.value_sum).label("sum_value"),
+            "avg": (
+                func.sum(buckets.c.value_sum)
+                / func.nullif(func.sum(buckets.c.value_count), 0)
+            ).label("avg_value"),
+            "min": func.min(buckets.c.value_min).label("min_value"),
+            "max": func.max(buckets.c.value_max).label("max_value"),
+        }
+        group_columns = [buckets.c[field] for field in group_by]
+        analytics_query = select(
+            *group_columns,
+            *[
+                aggregates[name]
+                for name in query_params.aggregate_functions
+                if name in aggregates
+            ],
+        )
+        if group_columns:
+            analytics_query = analytics_query.group_by(*group_columns)
+        analytics_query = analytics_query.offset(query_params.offset).limit(
+            query_params.limit
+        )
+
+        result = await db.execute(analytics_query)
+        return [dict(row._mapping) for row in result.all()]
+
+    async def refresh_rollups(
+        self, db: AsyncSession, *, lag_seconds: int = 30
+    ) -> Dict[str, int]:
+        """
+        Fold events inserted since the watermark into the hourly and daily rollups.
+
+        Events are selected by created_at rather than timestamp, so late events
+        with old timestamps are still counted, whatever path inserted them.
+        Events created in the last ``lag_seconds`` are left for the next run to
+        give in-flight transactions time to commit. A transaction that commits
+        later than that is past the watermark and its events are skipped here;
+        refold_rollups recounts recent buckets to pick them up. The state row
+        is locked, so concurrent refreshes run one after the other.
+
+        Returns:
+            Granularity -> number of rollup buckets inserted or updated
+        """
+        await db.execute(
+            pg_insert(EventRollupState)
+            .values(name=ROLLUP_STATE_NAME, watermark=ROLLUP_EPOCH)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        result = await db.execute(
+            select(EventRollupState)
+            .where(EventRollupState.name == ROLLUP_STATE_NAME)
+            .with_for_update()
+        )
+        state = result.scalar_one()
+
+        upper = datetime.now(timezone.utc) - timedelta(seconds=lag_seconds)
+        if upper <= state.watermark:
+            await db.commit()
+            return {granularity: 0 for granularity in ROLLUP_GRANULARITIES}
+
+        new_events = and_(Event.created_at > state.watermark, Event.created_at <= upper)
+        written = {}
+        for granularity in ROLLUP_GRANULARITIES:
+            stmt = self._rollup_insert(granularity, new_events)
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_event_rollups_bucket",
+                set_={
+                    "event_count": EventRollup.event_count + stmt.excluded.event_count,
+                    "value_count": EventRollup.value_count + stmt.excluded.value_count,
+                    "value_sum": func.coalesce(
+                        EventRollup.value_sum + stmt.excluded.value_sum,
+                        EventRollup.value_sum,
+                        stmt.excluded.value_sum,
+                    ),
+                    "value_min": func.least(
+                        EventRollup.value_min, stmt.excluded.value_min
+                    ),
+                    "value_max": func.greatest(
+                        EventRollup.value_max, stmt.excluded.value_max
+                    ),
+                    "updated_at": func.now(),
+                },
+            )
+            result = await db.execute(stmt)
+            written[granularity] = result.rowcount or 0
+
+        state.watermark = upper
+        await db.commit()
+        logger.info(f"Folded events created up to {upper} into rollups: {written}")
+        return written
+
+    async def refold_rollups(
+        self, db: AsyncSession, *, since: datetime
+    ) -> Dict[str, int]:
+        """
+        Recount the rollup buckets of events created since ``since``.
+
+        refresh_rollups only folds events created after the watermark, so an
+        event whose transaction commits more than its ``lag_seconds`` after
+        created_at is never counted. Every bucket holding an event created
+        between ``since`` and the watermark is recounted from all events
+        created at or before the watermark, replacing its stored values. The
+        buckets are picked by created_at, so late events with old timestamps
+        are recounted too. Buckets older than their event type's retention
+        are skipped: their purged events can no longer be counted.
+
+        Returns:
+            Granularity -> number of rollup buckets recounted
+        """
+        result = await db.execute(
+            select(EventRollupState)
+            .where(EventRollupState.name == ROLLUP_STATE_NAME)
+            .with_for_update()
+        )
+        state = result.scalar_one_or_none()
+        if state is None:
+            await db.commit()
+            return {granularity: 0 for granularity in ROLLUP_GRANULARITIES}
+
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        cutoffs = self.retention_cutoffs()
+        written = {}
+        for granularity in ROLLUP_GRANULARITIES:
+            bucket = func.date_trunc(
+                literal_column(f"'{granularity}'"), Event.timestamp
+            )
+            key = tuple_(bucket, Event.event_type, Event.event_name, Event.source)
+            retained = or_(
+                Event.event_type.notin_(list(cutoffs)),
+                *[
+                    and_(Event.event_type == event_type, bucket >= cutoff)
+                    for event_type, cutoff in cutoffs.items()
+                ],
+            )
+            touched = (
+                select(bucket, Event.event_type, Event.event_name, Event.source)
+                .where(
+                    Event.created_at >= since,
+                    Event.created_at <= state.watermark,
+                    retained,
+                )
+                .distinct()
+            )
+            stmt = self._rollup_insert(
+                granularity,
+                and_(Event.created_at <= state.watermark, key.in_(touched)),
+            )
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_event_rollups_bucket",
+                set_={
+                    "event_count": stmt.excluded.event_count,
+                    "value_count": stmt.excluded.value_count,
+                    "value_sum": stmt.excluded.value_sum,
+                    "value_min": stmt.excluded.value_min,
+                    "value_max": stmt.excluded.value_max,
+                    "updated_at": func.now(),
+                },
+            )
+            result = await db.execute(stmt)
+            written[granularity] = result.rowcount or 0
+
+        await db.commit()
+        logger.info(
+            f"Recounted rollup buckets of events created since {since}: {written}"
+        )
+        return written
+
+    @staticmethod
+    def _rollup_insert(granularity: str, where: Any):
+        """INSERT ... SELECT aggregating the events matching ``where`` into buckets."""
+        unit = literal_column(f"'{granularity}'")
+        bucket = func.date_trunc(unit, Event.timestamp)
+        return pg_insert(EventRollup).from_select(
+            [
+                "granularity",
+                "bucket_start",
+                "event_type",
+                "event_name",
+                "source",
+                "event_count",
+                "value_count",
+                "value_sum",
+                "value_min",
+                "value_max",
+                "created_at",
+                "updated_at",
+            ],
+            select(
+                unit,
+                bucket,
+                Event.event_type,
+                Event.event_name,
+                Event.source,
+                func.count(Event.id),
+                func.count(Event.value),
+                func.sum(Event.value),
+                func.min(Event.value),
+                func.max(Event.value),
+                func.now(),
+                func.now(),
+            )
+            .where(where)
+            .group_by(bucket, Event.event_type, Event.event_name, Event.source),
+        )
+
     async def get_event_counts_by_type(
         self,
         db: AsyncSession,
@@ -303,98 +716,313 @@ class CRUDEvent(CRUDBase[Event, EventCreate, Dict[str, Any]]):
 
     # Privacy and data management methods
 
+    def _anonymization_filters(
+        self,
+        *,
+        user_ids: Optional[List[int]],
+        event_types: Optional[List[str]],
+        before_date: Optional[datetime],
+    ) -> List[Any]:
+        filters = [Event.anonymized == False]
+        if user_ids:
+            filters.append(Event.user_id.in_(user_ids))
+        if event_types:
+            filters.append(Event.event_type.in_(event_types))
+        if before_date:
+            filters.append(Event.timestamp <= _naive_utc(before_date))
+        return filters
+
     async def anonymize_user_events(
         self,
         db: AsyncSession,
         *,
         request: EventAnonymizationRequest,
+        chunk_size: int = 1000,
+        pause_ms: int = 0,
     ) -> int:
-        """Anonymize events based on criteria (GDPR compliance)."""
-        filters = []
+        """
+        Anonymize events based on criteria (GDPR compliance).
 
-        if request.user_ids:
-            filters.append(Event.user_id.in_(request.user_ids))
+        A dry run only counts matching events. Otherwise an anonymization job
+        is created and run to completion in this session; use
+        create_anonymization_job to hand large requests to the event worker.
+        """
+        if request.dry_run:
+            filters = self._anonymization_filters(
+                user_ids=request.user_ids,
+                event_types=request.event_types,
+                before_date=request.before_date,
+            )
+            result = await db.execute(select(func.count(Event.id)).where(*filters))
+            return result.scalar() or 0
 
-        if request.event_types:
-            filters.append(Event.event_type.in_(request.event_types))
+        job = await self.create_anonymization_job(
+            db,
+            request=request,
+            chunk_size=request.chunk_size or chunk_size,
+            pause_ms=request.pause_ms if request.pause_ms is not None else pause_ms,
+        )
+        job = await self.run_anonymization_job(db, job=job)
+        return job.events_anonymized
 
-        if request.before_date:
-            filters.append(Event.timestamp <= request.before_date)
+    async def create_anonymization_job(
+        self,
+        db: AsyncSession,
+        *,
+        request: EventAnonymizationRequest,
+        chunk_size: int = 1000,
+        pause_ms: int = 0,
+    ) -> EventAnonymizationJob:
+        """Record a pending job covering the matching events that exist now."""
+        result = await db.execute(select(func.max(Event.id)))
+        job = EventAnonymizationJob(
+            user_ids=request.user_ids,
+            event_types=(
+                [EventType(event_type).value for event_type in request.event_types]
+                if request.event_types
+                else None
+            ),
+            before_date=_naive_utc(request.before_date),
+            chunk_size=chunk_size,
+            pause_ms=pause_ms,
+            max_event_id=result.scalar() or 0,
+            last_event_id=0,
+            events_anonymized=0,
+            chunks_processed=0,
+            processing_time_seconds=0.0,
+            status="pending",
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        logger.info(
+            f"Created event anonymization job {job.job_id} "
+            f"(events up to id {job.max_event_id}, chunk size {chunk_size})"
+        )
+        return job
+
+    async def get_anonymization_job(
+        self, db: AsyncSession, *, job_id: str
+    ) -> Optional[EventAnonymizationJob]:
+        """Get an anonymization job by its public job id."""
+        result = await db.execute(
+            select(EventAnonymizationJob).where(EventAnonymizationJob.job_id == job_id)
+        )
+        return result.scalar_one_or_none()
 
-        # Only process non-anonymized events
-        filters.append(Event.anonymized == False)
+    async def claim_anonymization_job(
+        self, db: AsyncSession, *, stale_after_seconds: int = 300
+    ) -> Optional[EventAnonymizationJob]:
+        """
+        Mark the oldest runnable anonymization job as running and return it.
+
+        Runnable jobs are pending ones and running ones that have not committed
+        a chunk for ``stale_after_seconds`` (their runner stopped), which then
+        resume from their cursor. Concurrent workers never claim the same job:
+        rows locked by a running chunk are skipped, and each claim issues a new
+        ``claim_token`` so a previous runner that wakes up stops.
+        """
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=stale_after_seconds)
+        result = await db.execute(
+            select(EventAnonymizationJob)
+            .where(
+                or_(
+                    EventAnonymizationJob.status == "pending",
+                    and_(
+                        EventAnonymizationJob.status == "running",
+                        EventAnonymizationJob.updated_at < stale,
+                    ),
+                )
+            )
+            .order_by(EventAnonymizationJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalar_one_or_none()
+        if job is None:
+            await db.commit()
+            return None
+        job.status = "running"
+        job.started_at = job.started_at or now
+        job.updated_at = now
+        job.claim_token = str(uuid4())
+        await db.commit()
+        return job
+
+    async def anonymize_event_chunk(
+        self, db: AsyncSession, *, job: EventAnonymizationJob
+    ) -> List[int]:
+        """
+        Anonymize the next chunk of a job's events; the caller commits.
+
+        The chunk is the first ``chunk_size`` matching events after the job's
+        cursor in id order, so each chunk is an index range scan however far
+        the job has got; jobs for given users scan the (user_id, id) index. Identifying columns are cleared and PII keys are
+        removed from properties by the same UPDATE.
+
+        Returns:
+            Ids of the events anonymized, in ascending order
+        """
+        filters = self._anonymization_filters(
+            user_ids=job.user_ids,
+            event_types=job.event_types,
+            before_date=job.before_date,
+        )
+        chunk = (
+            select(Event.id)
+            .where(Event.id > job.last_event_id, Event.id <= job.max_event_id, *filters)
+            .order_by(Event.id)
+            .limit(job.chunk_size)
+        )
+        result = await db.execute(
+            update(Event)
+            .where(Event.id.in_(chunk), Event.anonymized == False)
+            .values(
+                user_id=None,
+                ip_address=None,
+                user_agent=None,
+                session_id=None,
+                anonymized=True,
+                properties=Event.properties.op("-")(
+                    literal(list(PII_PROPERTY_FIELDS), ARRAY(Text))
+                ),
+            )
+            .returning(Event.id)
+            .execution_options(synchronize_session="fetch")
+        )
+        return sorted(result.scalars().all())
 
-        if request.dry_run:
-            # Count events that would be anonymized
-            count_query = select(func.count(Event.id)).where(and_(*filters))
-            result = await db.execute(count_query)
-            return result.scalar() or 0
-        else:
-            # Actually anonymize events
-            update_query = (
-                update(Event)
-                .where(and_(*filters))
-                .values(
-                    user_id=None,
-                    ip_address=None,
-                    user_agent=None,
-                    session_id=None,
-                    anonymized=True,
-                    # Clear PII from properties - done in application layer
+    async def run_anonymization_job(
+        self,
+        db: AsyncSession,
+        *,
+        job: EventAnonymizationJob,
+        max_chunks: Optional[int] = None,
+    ) -> EventAnonymizationJob:
+        """
+        Run an anonymization job chunk by chunk from its cursor.
+
+        Each chunk commits together with the job's cursor and counters, so an
+        interrupted job loses no work and resumes after its last chunk. The
+        job sleeps ``pause_ms`` between chunks to give replication and
+        autovacuum room on the primary. The job completes when no matching
+        events are left below its id bound; with ``max_chunks`` it may return
+        while still running.
+
+        Every chunk first locks the job row and reloads it, so the cursor and
+        counters it advances are the committed ones and a concurrent claim
+        skips the job until the chunk commits. If the job was claimed by
+        another runner in the meantime, this one returns without touching it.
+        """
+        job_id = job.job_id
+        if job.status != "running":
+            job.status = "running"
+            job.started_at = job.started_at or datetime.now(timezone.utc)
+            job.error_message = None
+            job.claim_token = str(uuid4())
+            await db.commit()
+        claim_token = job.claim_token
+
+        chunks = 0
+        try:
+            while max_chunks is None or chunks < max_chunks:
+                await db.refresh(job, with_for_update=True)
+                if job.status != "running" or job.claim_token != claim_token:
+                    await db.commit()
+                    logger.warning(
+                        f"Event anonymization job {job_id} was taken over, stopping"
+                    )
+                    return job
+                started = time.perf_counter()
+                ids = await self.anonymize_event_chunk(db, job=job)
+                if ids:
+                    job.last_event_id = ids[-1]
+                    job.events_anonymized += len(ids)
+                    job.chunks_processed += 1
+                else:
+                    job.last_event_id = job.max_event_id
+                    job.status = "completed"
+                    job.completed_at = datetime.now(timezone.utc)
+                job.processing_time_seconds += time.perf_counter() - started
+                await db.commit()
+                chunks += 1
+                if job.status == "completed":
+                    break
+                if job.pause_ms:
+                    await asyncio.sleep(job.pause_ms / 1000)
+        except Exception as e:
+            await db.rollback()
+            await db.execute(
+                update(EventAnonymizationJob)
+                .where(
+                    EventAnonymizationJob.job_id == job_id,
+                    EventAnonymizationJob.claim_token == claim_token,
                 )
+                .values(status="failed", error_message=str(e))
             )
-            result = await db.execute(update_query)
             await db.commit()
-            return result.rowcount
+            logger.error(f"Event anonymization job {job_id} failed: {e}")
+            raise
+
+        if job.status == "completed":
+            logger.info(
+                f"Event anonymization job {job_id} completed: "
+                f"{job.events_anonymized} events in {job.chunks_processed} chunks, "
+                f"{job.events_per_second:.0f} events/s"
+            )
+        return job
+
+    async def purge_expired_events(
+        self,
+        db: AsyncSession,
+        *,
+        batch_size: int = 1000,
+        max_batches: Optional[int] = None,
+        detach_partitions: bool = False,
+    ) -> RetentionReport:
+        """
+        Remove events past their retention date.
+
+        When events is range-partitioned, past partitions whose events have all
+        expired are dropped (or detached) whole; remaining expired events are
+        deleted in batches. See app.db.partitions.
+        """
+        return await self.partition_manager().apply_retention(
+            db,
+            batch_size=batch_size,
+            max_batches=max_batches,
+            detach=detach_partitions,
+        )
 
     async def delete_expired_events(
         self,
         db: AsyncSession,
         *,
         batch_size: int = 1000,
+        max_batches: Optional[int] = None,
     ) -> int:
-        """Delete events past their retention date."""
-        current_time = datetime.utcnow()
-
-        # Find expired events
-        expired_query = (
-            select(Event.id)
-            .where(
-                and_(
-                    Event.retention_date.isnot(None),
-                    Event.retention_date <= current_time,
-                )
-            )
-            .limit(batch_size)
+        """Delete events past their retention date; returns the number removed."""
+        report = await self.purge_expired_events(
+            db, batch_size=batch_size, max_batches=max_batches
         )
+        return report.rows_removed
 
-        result = await db.execute(expired_query)
-        expired_ids = [row.id for row in result.all()]
-
-        if not expired_ids:
-            return 0
-
-        # Delete expired events
-        delete_query = select(Event).where(Event.id.in_(expired_ids))
-        events_to_delete = await db.execute(delete_query)
-
-        for event in events_to_delete.scalars().all():
-            await db.delete(event)
-
-        await db.commit()
-        return len(expired_ids)
+    def partition_manager(self, interval: str = "month") -> PartitionManager:
+        """Partition manager for the events table."""
+        return PartitionManager(
+            Event.__tablename__, retention_column="retention_date", interval=interval
+        )
 
-    async def export_user_events(
+    def _export_query(
         self,
-        db: AsyncSession,
         *,
         user_id: int,
         event_types: Optional[List[EventType]] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         include_anonymized: bool = False,
-    ) -> List[Event]:
-        """Export user events for GDPR compliance."""
+    ) -> Select:
         query = select(Event).where(Event.user_id == user_id)
 
         if not include_anonymized:
@@ -409,11 +1037,95 @@ class CRUDEvent(CRUDBase[Event, EventCreate, Dict[str, Any]]):
         if end_date:
             query = query.where(Event.timestamp <= end_date)
 
-        query = query.order_by(Event.timestamp)
+        return query
+
+    async def export_user_events(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        event_types: Optional[List[EventType]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        include_anonymized: bool = False,
+    ) -> List[Event]:
+        """Export user events for GDPR compliance."""
+        query = self._export_query(
+            user_id=user_id,
+            event_types=event_types,
+            start_date=start_date,
+            end_date=end_date,
+            include_anonymized=include_anonymized,
+        ).order_by(Event.timestamp)
 
         result = await db.execute(query)
         return list(result.scalars().all())
 
+    async def stream_user_events(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        event_types: Optional[List[EventType]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        include_anonymized: bool = False,
+        after: Optional[Tuple[datetime, int]] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[Event]:
+        """
+        Stream user events in (timestamp, id) order from a server-side cursor.
+
+        Rows are fetched ``chunk_size`` at a time, so memory does not grow with
+        the number of events exported.
+
+        Args:
+            after: (timestamp, id) of the last event already exported; the
+                stream resumes with the event following it
+        """
+        query = self._export_query(
+            user_id=user_id,
+            event_types=event_types,
+            start_date=start_date,
+            end_date=end_date,
+            include_anonymized=include_anonymized,
+        )
+        if after is not None:
+            after_timestamp, after_id = after
+            query = query.where(
+                tuple_(Event.timestamp, Event.id)
+                > tuple_(literal(after_timestamp), literal(after_id))
+            )
+        query = (
+            query.options(lazyload(Event.user))
+            .order_by(Event.timestamp, Event.id)
+            .execution_options(yield_per=chunk_size)
+        )
+
+        result = await db.stream_scalars(query)
+        async for event in result:
+            yield event
+
+    def retention_cutoffs(
+        self, event_types: Optional[Iterable[EventType]] = None
+    ) -> Dict[str, datetime]:
+        """Event type -> naive UTC timestamp before which its events may be purged."""
+        now = datetime.utcnow()
+        cutoffs = {}
+        for event_type in event_types or EventType:
+            retention_days = self._get_retention_days(EventType(event_type))
+            if retention_days:
+                cutoffs[EventType(event_type).value] = now - timedelta(
+                    days=retention_days
+                )
+        return cutoffs
+
+    def retention_horizon(
+        self, event_types: Optional[Iterable[EventType]] = None
+    ) -> Optional[datetime]:
+        """Oldest timestamp from which events of these types are all retained."""
+        return max(self.retention_cutoffs(event_types).values(), default=None)
+
     def _get_retention_days(self, event_type: EventType) -> Optional[int]:
         """Get retention days for event type based on default policies."""
         # Default retention policies by event type
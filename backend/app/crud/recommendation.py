@@ -1,6 +1,6 @@
 """CRUD operations for recommendation system with ML integration and performance optimization."""
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 from uuid import uuid4
 
 from app.crud.base import CRUDBase
@@ -8,6 +8,7 @@ from app.models.recommendation import (
     Recommendation,
     RecommendationFeedback,
     SimilarUsers,
+    UserBehaviorSummary,
     UserPreferences,
 )
 from app.schemas.recommendation import (
@@ -21,7 +22,8 @@ from app.schemas.recommendation import (
     UserPreferencesCreate,
     UserPreferencesUpdate,
 )
-from sqlalchemy import and_, delete, desc, func, or_, select, text, update
+from sqlalchemy import and_, delete, desc, func, insert, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import Select
 
@@ -85,6 +87,82 @@ class CRUDRecommendation(
 
         return recommendations
 
+    async def insert_many(
+        self,
+        db: AsyncSession,
+        *,
+        recommendations: List[RecommendationCreate],
+    ) -> int:
+        """Insert recommendations in one statement without loading them back."""
+        if not recommendations:
+            return 0
+
+        current_time = datetime.utcnow()
+        rows = []
+        for rec_create in recommendations:
+            rec_data = rec_create.model_dump(exclude_unset=True)
+            rec_data["recommendation_id"] = str(uuid4())
+            rec_data["created_at"] = current_time
+            rec_data["status"] = rec_data.get("status", RecommendationStatus.ACTIVE)
+            rows.append(rec_data)
+
+        await db.execute(insert(Recommendation), rows)
+        await db.commit()
+        return len(rows)
+
+    async def get_users_with_recommendations_since(
+        self,
+        db: AsyncSession,
+        *,
+        user_ids: List[int],
+        since: datetime,
+    ) -> Set[int]:
+        """IDs among ``user_ids`` that already have recommendations since ``since``."""
+        if not user_ids:
+            return set()
+        result = await db.execute(
+            select(Recommendation.user_id)
+            .where(
+                Recommendation.user_id.in_(user_ids),
+                Recommendation.created_at >= since,
+            )
+            .distinct()
+        )
+        return set(result.scalars().all())
+
+    async def get_active_for_users(
+        self,
+        db: AsyncSession,
+        *,
+        user_ids: List[int],
+        limit_per_user: int = 100,
+    ) -> Dict[int, List[Recommendation]]:
+        """Each user's active, unexpired recommendations in serving order."""
+        if not user_ids:
+            return {}
+        result = await db.execute(
+            select(Recommendation)
+            .where(
+                Recommendation.user_id.in_(user_ids),
+                Recommendation.status == RecommendationStatus.ACTIVE,
+                or_(
+                    Recommendation.expires_at.is_(None),
+                    Recommendation.expires_at > datetime.utcnow(),
+                ),
+            )
+            .order_by(
+                Recommendation.user_id,
+                desc(Recommendation.priority_score),
+                desc(Recommendation.confidence_score),
+                desc(Recommendation.created_at),
+            )
+        )
+        by_user: Dict[int, List[Recommendation]] = {uid: [] for uid in user_ids}
+        for rec in result.scalars().all():
+            if len(by_user[rec.user_id]) < limit_per_user:
+                by_user[rec.user_id].append(rec)
+        return by_user
+
     async def get_by_recommendation_id(
         self, db: AsyncSession, *, recommendation_id: str
     ) -> Optional[Recommendation]:
@@ -415,6 +493,17 @@ class CRUDUserPreferences(
         )
         return result.scalar_one_or_none()
 
+    async def get_by_user_ids(
+        self, db: AsyncSession, *, user_ids: List[int]
+    ) -> Dict[int, UserPreferences]:
+        """User preferences keyed by user ID."""
+        if not user_ids:
+            return {}
+        result = await db.execute(
+            select(UserPreferences).where(UserPreferences.user_id.in_(user_ids))
+        )
+        return {row.user_id: row for row in result.scalars().all()}
+
     async def create_or_update(
         self,
         db: AsyncSession,
@@ -602,8 +691,61 @@ class CRUDSimilarUsers(CRUDBase[SimilarUsers, SimilarUsersCreate, Dict[str, Any]
         return result.rowcount
 
 
+class CRUDUserBehaviorSummary(
+    CRUDBase[UserBehaviorSummary, Dict[str, Any], Dict[str, Any]]
+):
+    """CRUD operations for UserBehaviorSummary model."""
+
+    async def get_by_user_ids(
+        self, db: AsyncSession, *, user_ids: List[int]
+    ) -> Dict[int, UserBehaviorSummary]:
+        """Stored summaries keyed by user ID."""
+        if not user_ids:
+            return {}
+        result = await db.execute(
+            select(UserBehaviorSummary).where(UserBehaviorSummary.user_id.in_(user_ids))
+        )
+        return {row.user_id: row for row in result.scalars().all()}
+
+    async def upsert_many(
+        self,
+        db: AsyncSession,
+        *,
+        summaries: Dict[int, Tuple[Dict[str, Any], int]],
+    ) -> None:
+        """Insert or replace ``user_id -> (summary, last_event_id)`` rows."""
+        if not summaries:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "summary": summary,
+                "last_event_id": last_event_id,
+                "refreshed_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for user_id, (summary, last_event_id) in summaries.items()
+        ]
+        stmt = pg_insert(UserBehaviorSummary).values(rows)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={
+                    "summary": stmt.excluded.summary,
+                    "last_event_id": stmt.excluded.last_event_id,
+                    "refreshed_at": stmt.excluded.refreshed_at,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+        await db.commit()
+
+
 # Create instances
 recommendation = CRUDRecommendation(Recommendation)
 user_preferences = CRUDUserPreferences(UserPreferences)
 recommendation_feedback = CRUDRecommendationFeedback(RecommendationFeedback)
 similar_users = CRUDSimilarUsers(SimilarUsers)
+user_behavior_summary = CRUDUserBehaviorSummary(UserBehaviorSummary)
@@ -0,0 +1,345 @@
+"""Time-range partitions and retention for append-mostly tables.
+
+``PartitionManager`` handles a table range-partitioned on a timestamp column:
+
+- Partitions are named ``<table>_pYYYYMMDD`` after their lower bound and
+  cover one day or one calendar month. ``partition_ddl`` and
+  ``partition_range_ddl`` only build SQL, so migrations can create
+  partitions with ``op.execute``; ``ensure_partitions`` keeps a few intervals
+  ahead at runtime, plus a DEFAULT partition for out-of-range timestamps.
+- Retention drops (or detaches) partitions whose rows have all passed their
+  retention date. The partition is locked ACCESS EXCLUSIVE and checked again
+  in the dropping transaction, so rows written after the first check are
+  never dropped with it. Rows that are expired but share a partition with live
+  rows, or live in an unpartitioned table, are deleted in small batches
+  addressed by ``(tableoid, ctid)`` so every batch is a short transaction.
+
+Reported bytes are the on-disk size of dropped partitions plus the tuple size
+of deleted rows; space freed by batched deletes is reusable after VACUUM.
+"""
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger()
+
+PARTITION_INTERVALS = ("day", "month")
+
+_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def partition_bounds(moment: datetime, interval: str) -> Tuple[datetime, datetime]:
+    """Return the [start, end) bounds of the partition containing ``moment``."""
+    if interval == "day":
+        start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        return start, start + timedelta(days=1)
+    if interval == "month":
+        start = moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end = (start + timedelta(days=32)).replace(day=1)
+        return start, end
+    raise ValueError(f"Unsupported partition interval: {interval}")
+
+
+def partition_name(table: str, start: datetime) -> str:
+    """Name of the partition of ``table`` starting at ``start``."""
+    return f"{table}_p{start:%Y%m%d}"
+
+
+def partition_ddl(table: str, moment: datetime, interval: str = "month") -> str:
+    """CREATE statement for the partition of ``table`` containing ``moment``."""
+    start, end = partition_bounds(moment, interval)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {_quote(partition_name(table, start))} "
+        f"PARTITION OF {_quote(table)} "
+        f"FOR VALUES FROM ('{start:%Y-%m-%d %H:%M:%S}') "
+        f"TO ('{end:%Y-%m-%d %H:%M:%S}')"
+    )
+
+
+def partition_range_ddl(
+    table: str, start: datetime, count: int, interval: str = "month"
+) -> List[str]:
+    """CREATE statements for ``count`` consecutive partitions from ``start``."""
+    statements = []
+    moment = start
+    for _ in range(count):
+        statements.append(partition_ddl(table, moment, interval))
+        moment = partition_bounds(moment, interval)[1]
+    return statements
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_partition_bound(bound: str) -> Optional[Tuple[datetime, datetime]]:
+    """Parse ``pg_get_expr(relpartbound)`` output; None for DEFAULT partitions.
+
+    Bounds of tables partitioned on a timestamptz column carry an offset;
+    they are returned as naive UTC like every other time in this module.
+    """
+    match = _BOUND.search(bound)
+    if not match:
+        return None
+    return (
+        _naive_utc(datetime.fromisoformat(match.group(1))),
+        _naive_utc(datetime.fromisoformat(match.group(2))),
+    )
+
+
+@dataclass
+class RetentionReport:
+    """Outcome of one retention run."""
+
+    partitioned: bool = False
+    partitions_created: List[str] = field(default_factory=list)
+    partitions_dropped: List[str] = field(default_factory=list)
+    partitions_detached: List[str] = field(default_factory=list)
+    partition_rows: int = 0  # Planner estimate for dropped/detached partitions
+    rows_deleted: int = 0
+    batches: int = 0
+    bytes_reclaimed: int = 0
+    duration_seconds: float = 0.0
+
+    @property
+    def rows_removed(self) -> int:
+        return self.partition_rows + self.rows_deleted
+
+
+class PartitionManager:
+    """Create partitions ahead of time and apply row retention to a table."""
+
+    def __init__(
+        self,
+        table: str,
+        *,
+        retention_column: str = "retention_date",
+        interval: str = "month",
+    ) -> None:
+        if interval not in PARTITION_INTERVALS:
+            raise ValueError(f"Unsupported partition interval: {interval}")
+        self.table = table
+        self.retention_column = retention_column
+        self.interval = interval
+
+    @property
+    def default_partition(self) -> str:
+        return f"{self.table}_default"
+
+    async def is_partitioned(self, db: AsyncSession) -> bool:
+        result = await db.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table))"
+            ),
+            {"table": self.table},
+        )
+        return bool(result.scalar())
+
+    async def list_partitions(
+        self, db: AsyncSession
+    ) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+        """Partitions as (name, start, end); bounds are None for DEFAULT."""
+        result = await db.execute(
+            text(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+                "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+            ),
+            {"table": self.table},
+        )
+        partitions = []
+        for name, bound in result.all():
+            bounds = parse_partition_bound(bound or "")
+            start, end = bounds if bounds else (None, None)
+            partitions.append((name, start, end))
+        return partitions
+
+    async def ensure_partitions(
+        self, db: AsyncSession, *, ahead: int = 3, now: Optional[datetime] = None
+    ) -> List[str]:
+        """Create the current and the next ``ahead`` partitions if missing."""
+        now = _naive_utc(now or datetime.utcnow())
+        existing = {name for name, _, _ in await self.list_partitions(db)}
+        created = []
+        if self.default_partition not in existing:
+            await db.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {_quote(self.default_partition)} "
+                    f"PARTITION OF {_quote(self.table)} DEFAULT"
+                )
+            )
+            created.append(self.default_partition)
+        moment = now
+        for _ in range(ahead + 1):
+            start, end = partition_bounds(moment, self.interval)
+            name = partition_name(self.table, start)
+            if name not in existing:
+                await db.execute(text(partition_ddl(self.table, start, self.interval)))
+                created.append(name)
+            moment = end
+        await db.commit()
+        if created:
+            logger.info("partitions_created", table=self.table, partitions=created)
+        return created
+
+    async def _fully_expired(
+        self, db: AsyncSession, partition: str, now: datetime
+    ) -> bool:
+        result = await db.execute(
+            text(
+                f"SELECT NOT EXISTS (SELECT 1 FROM {_quote(partition)} "
+                f"WHERE {self.retention_column} IS NULL "
+                f"OR {self.retention_column} > :now)"
+            ),
+            {"now": now},
+        )
+        return bool(result.scalar())
+
+    async def drop_expired_partitions(
+        self,
+        db: AsyncSession,
+        report: RetentionReport,
+        *,
+        now: Optional[datetime] = None,
+        detach: bool = False,
+    ) -> None:
+        """Drop or detach past partitions in which every row has expired.
+
+        The first check runs without a lock so partitions with live rows are
+        skipped cheaply. A candidate is then locked, which waits for writers
+        already in it and blocks new ones, and checked again before it goes.
+        """
+        now = _naive_utc(now or datetime.utcnow())
+        for name, _start, end in await self.list_partitions(db):
+            if end is None or end > now:
+                continue
+            if not await self._fully_expired(db, name, now):
+                continue
+            await db.execute(
+                text(f"LOCK TABLE {_quote(name)} IN ACCESS EXCLUSIVE MODE")
+            )
+            if not await self._fully_expired(db, name, now):
+                await db.rollback()
+                continue
+            stats = await db.execute(
+                text(
+                    "SELECT pg_total_relation_size(c.oid), "
+                    "greatest(c.reltuples, 0)::bigint "
+                    "FROM pg_class c WHERE c.oid = to_regclass(:name)"
+                ),
+                {"name": name},
+            )
+            size, rows = stats.one()
+            if detach:
+                await db.execute(
+                    text(
+                        f"ALTER TABLE {_quote(self.table)} "
+                        f"DETACH PARTITION {_quote(name)}"
+                    )
+                )
+                report.partitions_detached.append(name)
+            else:
+                await db.execute(text(f"DROP TABLE {_quote(name)}"))
+                report.partitions_dropped.append(name)
+                report.bytes_reclaimed += int(size or 0)
+            await db.commit()
+            report.partition_rows += int(rows or 0)
+            logger.info(
+                "partition_retired",
+                table=self.table,
+                partition=name,
+                detached=detach,
+                bytes=size,
+            )
+
+    async def delete_expired_rows(
+        self,
+        db: AsyncSession,
+        report: RetentionReport,
+        *,
+        now: Optional[datetime] = None,
+        batch_size: int = 1000,
+        max_batches: Optional[int] = None,
+        pause_seconds: float = 0.0,
+    ) -> None:
+        """Delete expired rows in batches, committing after each batch."""
+        now = _naive_utc(now or datetime.utcnow())
+        table = _quote(self.table)
+        statement = text(
+            f"WITH deleted AS ("
+            f"DELETE FROM {table} WHERE (tableoid, ctid) IN ("
+            f"SELECT tableoid, ctid FROM {table} "
+            f"WHERE {self.retention_column} IS NOT NULL "
+            f"AND {self.retention_column} <= :now LIMIT :batch_size) "
+            f"RETURNING pg_column_size({table}.*) AS size) "
+            f"SELECT count(*), coalesce(sum(size), 0) FROM deleted"
+        )
+        while max_batches is None or report.batches < max_batches:
+            result = await db.execute(statement, {"now": now, "batch_size": batch_size})
+            rows, size = result.one()
+            await db.commit()
+            if not rows:
+                break
+            report.batches += 1
+            report.rows_deleted += int(rows)
+            report.bytes_reclaimed += int(size)
+            if rows < batch_size:
+                break
+            if pause_seconds:
+                await asyncio.sleep(pause_seconds)
+
+    async def apply_retention(
+        self,
+        db: AsyncSession,
+        *,
+        batch_size: int = 1000,
+        max_batches: Optional[int] = None,
+        detach: bool = False,
+        ensure_ahead: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ) -> RetentionReport:
+        """
+        Remove expired rows, by partition where possible and by batch otherwise.
+
+        Args:
+            batch_size: Rows per batched DELETE
+            max_batches: Cap on batched DELETEs per run (None for no cap)
+            detach: Detach fully expired partitions instead of dropping them
+            ensure_ahead: Also create this many future partitions
+        """
+        started = time.perf_counter()
+        now = _naive_utc(now or datetime.utcnow())
+        report = RetentionReport(partitioned=await self.is_partitioned(db))
+        if report.partitioned:
+            if ensure_ahead is not None:
+                report.partitions_created = await self.ensure_partitions(
+                    db, ahead=ensure_ahead, now=now
+                )
+            await self.drop_expired_partitions(db, report, now=now, detach=detach)
+        await self.delete_expired_rows(
+            db, report, now=now, batch_size=batch_size, max_batches=max_batches
+        )
+        report.duration_seconds = time.perf_counter() - started
+        logger.info(
+            "retention_applied",
+            table=self.table,
+            rows_removed=report.rows_removed,
+            bytes_reclaimed=report.bytes_reclaimed,
+            partitions_dropped=len(report.partitions_dropped),
+            batches=report.batches,
+        )
+        return report
@@ -1,7 +1,9 @@
 """SQL query monitoring module."""
 import time
-from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator, Dict, Optional
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional, Tuple
 
 import structlog
 from app.db.session import engine
@@ -11,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.metrics import get_metrics
+from app.db.query_stats import fingerprint_statement, get_query_stats
 
 logger = structlog.get_logger()
 
@@ -50,8 +53,19 @@ def get_query_type(query: str) -> str:
         return "other"
 
 
-def record_query_metrics(query: str, duration: float) -> None:
-    """Record query metrics."""
+def record_query_metrics(
+    query: str,
+    duration: float,
+    parameters: Any = None,
+    track_statement: bool = True,
+) -> None:
+    """Record query metrics.
+
+    Besides the Prometheus series, the statement is accounted in the shared
+    ``QueryStatsRegistry`` (fingerprint heavy hitters, latency histograms,
+    slow-query registry). ``track_statement=False`` skips the registry for
+    pseudo-statements such as ORM flush timings.
+    """
     logger.debug(
         f"[Metrics] Recording metrics for query: {query[:100]}... Duration: {duration:.4f}s"
     )
@@ -64,6 +78,9 @@ def record_query_metrics(query: str, duration: float) -> None:
         query_type=query_type, table=table
     ).observe(duration)
 
+    if track_statement:
+        get_query_stats().record(query, duration, parameters)
+
     # Log slow queries (>100ms)
     if duration > 0.1:
         metrics["db_slow_queries"].labels(query_type=query_type, table=table).inc()
@@ -72,6 +89,120 @@ def record_query_metrics(query: str, duration: float) -> None:
         )
 
 
+# --- Per-request query accounting ---
+
+
+class RequestQueryStats:
+    """Statements executed within one request (or any tracked scope)."""
+
+    def __init__(self, n_plus_one_threshold: int = 10):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.query_count = 0
+        self.total_duration = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        """Account for one executed statement."""
+        self.query_count += 1
+        self.total_duration += duration
+        self.fingerprints[fingerprint_statement(statement)] += 1
+
+    def merge(self, other: "RequestQueryStats") -> None:
+        """Fold the statements of a nested scope into this one."""
+        self.query_count += other.query_count
+        self.total_duration += other.total_duration
+        self.fingerprints.update(other.fingerprints)
+
+    @property
+    def repeated_statements(self) -> List[Tuple[str, int]]:
+        """Fingerprints executed at least ``n_plus_one_threshold`` times."""
+        return [
+            (fingerprint, count)
+            for fingerprint, count in self.fingerprints.most_common()
+            if count >= self.n_plus_one_threshold
+        ]
+
+    @property
+    def has_n_plus_one(self) -> bool:
+        """Whether any statement shape repeated often enough to look like N+1."""
+        return bool(self.repeated_statements)
+
+    def server_timing(self) -> str:
+        """Render the stats as a ``Server-Timing`` header value."""
+        return (
+            f'db;dur={self.total_duration * 1000:.2f};desc="{self.query_count} queries"'
+        )
+
+
+_request_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "request_query_stats", default=None
+)
+
+
+def get_request_query_stats() -> Optional[RequestQueryStats]:
+    """Return the collector for the current request, if one is active."""
+    return _request_query_stats.get()
+
+
+@contextmanager
+def track_request_queries(n_plus_one_threshold: int = 10) -> Iterator[RequestQueryStats]:
+    """Collect every statement executed in the current context.
+
+    Nested scopes get their own collector and are merged into the enclosing
+    one on exit, so a request total always includes inner scopes.
+
+    Example:
+        with track_request_queries() as stats:
+            await crud.item.get_multi(db)
+        assert stats.query_count == 1
+    """
+    parent = _request_query_stats.get()
+    stats = RequestQueryStats(n_plus_one_threshold=n_plus_one_threshold)
+    token = _request_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_query_stats.reset(token)
+        if parent is not None:
+            parent.merge(stats)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a scope runs more statements than its query budget allows."""
+
+    def __init__(self, stats: RequestQueryStats, max_queries: int, scope: str = ""):
+        self.stats = stats
+        self.max_queries = max_queries
+        repeated = ", ".join(
+            f"{count}x {fingerprint[:80]}"
+            for fingerprint, count in stats.repeated_statements[:3]
+        )
+        message = (
+            f"{scope or 'Query budget'} exceeded: {stats.query_count} queries "
+            f"(budget {max_queries})"
+        )
+        if repeated:
+            message += f"; repeated: {repeated}"
+        super().__init__(message)
+
+
+@contextmanager
+def query_budget(
+    max_queries: int, n_plus_one_threshold: int = 10
+) -> Iterator[RequestQueryStats]:
+    """Fail with ``QueryBudgetExceeded`` when a block runs too many statements.
+
+    Intended for tests guarding against N+1 regressions:
+
+        with query_budget(3):
+            await client.get("/api/v1/items/")
+    """
+    with track_request_queries(n_plus_one_threshold) as stats:
+        yield stats
+    if stats.query_count > max_queries:
+        raise QueryBudgetExceeded(stats, max_queries)
+
+
 def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
     """Event listener for query execution start."""
     context._query_start_time = time.time()
@@ -81,7 +212,11 @@ def after_cursor_execute(conn, cursor, statement, parameters, context, executema
     """Event listener for query execution end."""
     start_time = context._query_start_time
     total_time = time.time() - start_time
-    record_query_metrics(statement, total_time)
+    record_query_metrics(statement, total_time, parameters)
+
+    stats = _request_query_stats.get()
+    if stats is not None:
+        stats.record(statement, total_time)
 
 
 # --- ORM Event Listeners ---
@@ -102,7 +237,7 @@ def after_flush(session, flush_context):
         # This captures the time spent in the flush operation itself.
         # Individual statements within the flush might still be captured by cursor events.
         logger.debug(f"[Metrics] Recording ORM flush duration: {duration:.4f}s")
-        record_query_metrics("ORM Flush", duration)  # Use a generic label
+        record_query_metrics("ORM Flush", duration, track_statement=False)
 
 
 # --- Register Listeners ---
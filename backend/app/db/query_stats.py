@@ -0,0 +1,538 @@
+"""Bounded-memory query statistics keyed by normalized SQL fingerprint.
+
+All statement-level accounting (the cursor listeners in ``query_monitor`` and
+the ``performance_tracker`` report in ``app.utils.db_optimization``) goes
+through a single ``QueryStatsRegistry``:
+
+- ``fingerprint_statement`` normalizes SQL so executions that differ only in
+  literal values, bind parameters or IN/VALUES list length group together.
+- ``SpaceSavingCounter`` keeps the ``top_k`` most frequent fingerprints
+  (Metwally et al. space-saving), so memory does not grow with query
+  diversity; counts of evicted-and-readmitted fingerprints are
+  overestimated by at most their recorded ``error``.
+- ``LatencyHistogram`` is an HDR-style log-linear histogram with ~6%
+  relative error and a fixed number of buckets per fingerprint.
+- The slowest individual executions are kept in a fixed-size heap, and a
+  sample of slow SELECTs is queued for ``EXPLAIN (FORMAT JSON)`` capture by a
+  background task.
+"""
+import asyncio
+import hashlib
+import heapq
+import random
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+import structlog
+
+logger = structlog.get_logger()
+
+K = TypeVar("K", bound=Hashable)
+
+# --- Fingerprinting ---
+
+_TOKEN = re.compile(
+    r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+    |(?P<dollar>\$(?P<tag>[A-Za-z_]\w*|)\$.*?\$(?P=tag)\$)
+    |(?P<string>[EeBbXxNn]?'(?:[^'\\]|''|\\.)*')
+    |(?P<qident>"(?:[^"]|"")*")
+    |(?P<param>\$\d+|%\(\w+\)s|%s|\?|(?<![:\w]):\w+)
+    |(?P<number>(?<![\w.])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b)
+    |(?P<ws>\s+)
+    """,
+    re.S | re.X,
+)
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_TUPLE = r"\(\s*\?(?:\s*,\s*\?)*\s*\)"
+_VALUES_ROWS = re.compile(rf"({_TUPLE})(?:\s*,\s*{_TUPLE})+")
+
+
+def _normalize_token(match: "re.Match[str]") -> str:
+    kind = match.lastgroup
+    if kind == "comment":
+        return " "
+    if kind == "ws":
+        return " "
+    if kind == "qident":
+        return match.group(0)
+    return "?"
+
+
+@lru_cache(maxsize=4096)
+def fingerprint_statement(statement: str) -> str:
+    """Reduce a SQL statement to its shape.
+
+    Comments are dropped, string/numeric/dollar-quoted literals and bind
+    parameters (``$1``, ``%(name)s``, ``%s``, ``:name``, ``?``) become ``?``,
+    IN lists collapse to ``IN (?)`` and multi-row VALUES collapse to their
+    first row. Quoted identifiers and ``::type`` casts are preserved.
+    """
+    fingerprint = _TOKEN.sub(_normalize_token, statement)
+    fingerprint = _IN_LIST.sub("IN (?)", fingerprint)
+    fingerprint = _VALUES_ROWS.sub(r"\1, ...", fingerprint)
+    return " ".join(fingerprint.split())
+
+
+def fingerprint_id(fingerprint: str) -> str:
+    """Short stable identifier for a fingerprint, safe to use as a label."""
+    return hashlib.blake2b(fingerprint.encode(), digest_size=8).hexdigest()
+
+
+# --- Latency histogram ---
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram over microseconds.
+
+    Values below 32µs are recorded exactly; above that each power of two is
+    split into 16 linear sub-buckets, bounding the relative error of any
+    reported percentile to 1/16. Values are clamped at ~35 minutes, giving a
+    fixed 448 buckets.
+    """
+
+    SUB_BUCKET_BITS = 4
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    MAX_EXPONENT = 30
+    BUCKETS = (MAX_EXPONENT - SUB_BUCKET_BITS + 2) * SUB_BUCKETS
+
+    __slots__ = ("_counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self._counts = array("Q", bytes(8 * self.BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def _index(cls, micros: int) -> int:
+        if micros < 2 * cls.SUB_BUCKETS:
+            return micros
+        micros = min(micros, (1 << (cls.MAX_EXPONENT + 1)) - 1)
+        exponent = micros.bit_length() - 1
+        sub_bucket = (micros >> (exponent - cls.SUB_BUCKET_BITS)) & (
+            cls.SUB_BUCKETS - 1
+        )
+        return (exponent - cls.SUB_BUCKET_BITS + 1) * cls.SUB_BUCKETS + sub_bucket
+
+    @classmethod
+    def _value(cls, index: int) -> float:
+        """Midpoint (in microseconds) of the bucket at ``index``."""
+        if index < 2 * cls.SUB_BUCKETS:
+            return float(index)
+        exponent = index // cls.SUB_BUCKETS + cls.SUB_BUCKET_BITS - 1
+        sub_bucket = index % cls.SUB_BUCKETS
+        shift = exponent - cls.SUB_BUCKET_BITS
+        lower = (cls.SUB_BUCKETS + sub_bucket) << shift
+        return lower + (1 << shift) / 2
+
+    def record(self, seconds: float) -> None:
+        """Record one duration in seconds."""
+        self._counts[self._index(max(int(seconds * 1_000_000), 0))] += 1
+        if not self.count or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, q: float) -> float:
+        """Approximate ``q``-quantile (0-100) in seconds."""
+        if not self.count:
+            return 0.0
+        target = max(1, int(round(self.count * q / 100.0)))
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            if seen >= target:
+                value = self._value(index) / 1_000_000
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        """Mean duration in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, extremes and common percentiles."""
+        return {
+            "count": self.count,
+            "total_time": self.total,
+            "avg_time": self.mean,
+            "min_time": self.min,
+            "max_time": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+# --- Heavy hitters ---
+
+
+class SpaceSavingCounter(Generic[K]):
+    """Space-saving top-k counter with O(1) updates.
+
+    Keys are grouped by count ("stream summary") so the minimum-count key can
+    be evicted without scanning. ``offer`` returns the evicted key, if any, so
+    callers can drop state attached to it.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._counts: Dict[K, int] = {}
+        self._errors: Dict[K, int] = {}
+        self._by_count: Dict[int, Dict[K, None]] = {}
+        self._min_count = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._counts
+
+    def _move(self, key: K, old: int, new: int) -> None:
+        if old:
+            bucket = self._by_count[old]
+            del bucket[key]
+            if not bucket:
+                del self._by_count[old]
+                if self._min_count == old:
+                    self._min_count = new
+        self._by_count.setdefault(new, {})[key] = None
+        if not self._min_count or new < self._min_count:
+            self._min_count = new
+
+    def offer(self, key: K) -> Optional[K]:
+        """Count one occurrence of ``key``; return the key evicted to make room."""
+        count = self._counts.get(key)
+        if count is not None:
+            self._counts[key] = count + 1
+            self._move(key, count, count + 1)
+            return None
+
+        if len(self._counts) < self.capacity:
+            self._counts[key] = 1
+            self._errors[key] = 0
+            self._move(key, 0, 1)
+            return None
+
+        floor = self._min_count
+        evicted = next(iter(self._by_count[floor]))
+        del self._by_count[floor][evicted]
+        if not self._by_count[floor]:
+            del self._by_count[floor]
+        del self._counts[evicted]
+        del self._errors[evicted]
+
+        self._counts[key] = floor + 1
+        self._errors[key] = floor
+        self._by_count.setdefault(floor + 1, {})[key] = None
+        if floor not in self._by_count:
+            self._min_count = floor + 1
+        return evicted
+
+    def count(self, key: K) -> int:
+        """Estimated count (upper bound) for ``key``."""
+        return self._counts.get(key, 0)
+
+    def error(self, key: K) -> int:
+        """Maximum overestimation of ``count(key)``."""
+        return self._errors.get(key, 0)
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[K, int, int]]:
+        """``(key, count, error)`` for the ``n`` most frequent keys."""
+        items = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)
+        if n is not None:
+            items = items[:n]
+        return [(key, count, self._errors[key]) for key, count in items]
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._errors.clear()
+        self._by_count.clear()
+        self._min_count = 0
+
+
+# --- Registry ---
+
+
+@dataclass
+class FingerprintStats:
+    """Latency and plan information for one tracked fingerprint."""
+
+    fingerprint: str
+    sample: str
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    first_seen: datetime = field(default_factory=datetime.utcnow)
+    last_seen: datetime = field(default_factory=datetime.utcnow)
+    plan: Optional[Any] = None
+    plan_captured_at: Optional[datetime] = None
+
+    @property
+    def id(self) -> str:
+        return fingerprint_id(self.fingerprint)
+
+
+@dataclass
+class SlowQuery:
+    """One slow statement execution."""
+
+    duration: float
+    fingerprint: str
+    statement: str
+    timestamp: datetime
+    result_count: int = 0
+
+
+class QueryStatsRegistry:
+    """Process-wide, bounded statistics for executed SQL statements."""
+
+    def __init__(
+        self,
+        top_k: int = 100,
+        slow_threshold: float = 0.1,
+        slow_capacity: int = 50,
+        explain_sample_rate: float = 0.1,
+        explain_ttl: float = 3600.0,
+        max_pending_explains: int = 20,
+        max_statement_length: int = 2000,
+    ):
+        self.slow_threshold = slow_threshold
+        self.slow_capacity = slow_capacity
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_ttl = explain_ttl
+        self.max_pending_explains = max_pending_explains
+        self.max_statement_length = max_statement_length
+
+        self._lock = threading.Lock()
+        self._heavy_hitters: SpaceSavingCounter[str] = SpaceSavingCounter(top_k)
+        self._stats: Dict[str, FingerprintStats] = {}
+        self._slow: List[Tuple[float, int, SlowQuery]] = []
+        self._slow_seq = 0
+        self._pending_explains: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self.total_queries = 0
+        self.total_time = 0.0
+        self.slow_query_count = 0
+
+        self._explain_task: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        statement: str,
+        duration: float,
+        parameters: Any = None,
+        result_count: int = 0,
+    ) -> str:
+        """Account for one execution and return its fingerprint."""
+        fingerprint = fingerprint_statement(statement)[: self.max_statement_length]
+        now = datetime.utcnow()
+
+        with self._lock:
+            self.total_queries += 1
+            self.total_time += duration
+
+            evicted = self._heavy_hitters.offer(fingerprint)
+            if evicted is not None:
+                self._stats.pop(evicted, None)
+                self._pending_explains.pop(evicted, None)
+
+            stats = self._stats.get(fingerprint)
+            if stats is None:
+                stats = FingerprintStats(
+                    fingerprint=fingerprint,
+                    sample=statement[: self.max_statement_length],
+                    first_seen=now,
+                )
+                self._stats[fingerprint] = stats
+            stats.histogram.record(duration)
+            stats.last_seen = now
+
+            if duration >= self.slow_threshold:
+                self.slow_query_count += 1
+                self._remember_slow(
+                    SlowQuery(
+                        duration=duration,
+                        fingerprint=fingerprint,
+                        statement=statement[: self.max_statement_length],
+                        timestamp=now,
+                        result_count=result_count,
+                    )
+                )
+                self._maybe_queue_explain(stats, statement, parameters, now)
+
+        return fingerprint
+
+    def _remember_slow(self, slow: SlowQuery) -> None:
+        self._slow_seq += 1
+        entry = (slow.duration, self._slow_seq, slow)
+        if len(self._slow) < self.slow_capacity:
+            heapq.heappush(self._slow, entry)
+        elif slow.duration > self._slow[0][0]:
+            heapq.heapreplace(self._slow, entry)
+
+    def _maybe_queue_explain(
+        self, stats: FingerprintStats, statement: str, parameters: Any, now: datetime
+    ) -> None:
+        if not statement.lstrip()[:6].lower() == "select":
+            return
+        if stats.fingerprint in self._pending_explains:
+            return
+        if (
+            stats.plan_captured_at is not None
+            and (now - stats.plan_captured_at).total_seconds() < self.explain_ttl
+        ):
+            return
+        if random.random() >= self.explain_sample_rate:
+            return
+        if len(self._pending_explains) >= self.max_pending_explains:
+            self._pending_explains.popitem(last=False)
+        self._pending_explains[stats.fingerprint] = (statement, parameters)
+
+    async def capture_explain_plans(self, engine, limit: int = 5) -> int:
+        """Run ``EXPLAIN (FORMAT JSON)`` for queued slow statements.
+
+        Plans are attached to the fingerprint's stats; statements whose
+        fingerprint was evicted in the meantime are skipped. Returns the
+        number of plans captured.
+        """
+        with self._lock:
+            batch = []
+            while self._pending_explains and len(batch) < limit:
+                batch.append(self._pending_explains.popitem(last=False))
+
+        captured = 0
+        for fingerprint, (statement, parameters) in batch:
+            try:
+                async with engine.connect() as conn:
+                    result = await conn.exec_driver_sql(
+                        f"EXPLAIN (FORMAT JSON) {statement}", parameters or ()
+                    )
+                    plan = result.scalar()
+            except Exception as e:
+                logger.debug(
+                    "explain_capture_failed",
+                    fingerprint_id=fingerprint_id(fingerprint),
+                    error=str(e),
+                )
+                continue
+
+            with self._lock:
+                stats = self._stats.get(fingerprint)
+                if stats is not None:
+                    stats.plan = plan
+                    stats.plan_captured_at = datetime.utcnow()
+                    captured += 1
+        return captured
+
+    async def _explain_loop(self, engine, interval: float) -> None:
+        while True:
+            try:
+                await asyncio.sleep(interval)
+                await self.capture_explain_plans(engine)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("explain_capture_loop_error", error=str(e))
+
+    def start(self, engine, interval: float = 30.0) -> None:
+        """Start capturing sampled EXPLAIN plans in the background."""
+        if self._explain_task is None or self._explain_task.done():
+            self._explain_task = asyncio.create_task(
+                self._explain_loop(engine, interval)
+            )
+
+    async def stop(self) -> None:
+        """Stop the background EXPLAIN capture task."""
+        task, self._explain_task = self._explain_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _entry(self, fingerprint: str, count: int, error: int) -> Dict[str, Any]:
+        stats = self._stats[fingerprint]
+        return {
+            "id": stats.id,
+            "query": fingerprint,
+            "sample": stats.sample,
+            "count": count,
+            "count_error": error,
+            **stats.histogram.summary(),
+            "first_seen": stats.first_seen,
+            "last_seen": stats.last_seen,
+            "plan": stats.plan,
+        }
+
+    def top_by_count(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Most frequently executed fingerprints."""
+        with self._lock:
+            return [
+                self._entry(fingerprint, count, error)
+                for fingerprint, count, error in self._heavy_hitters.top(n)
+            ]
+
+    def top_by(self, key: str, n: int = 10) -> List[Dict[str, Any]]:
+        """Tracked fingerprints ordered by a summary field, e.g. ``total_time``."""
+        with self._lock:
+            entries = [
+                self._entry(fingerprint, count, error)
+                for fingerprint, count, error in self._heavy_hitters.top()
+            ]
+        entries.sort(key=lambda entry: entry[key], reverse=True)
+        return entries[:n]
+
+    def slow_queries(self, n: Optional[int] = None) -> List[SlowQuery]:
+        """Slowest retained executions, slowest first."""
+        with self._lock:
+            ordered = [entry[2] for entry in sorted(self._slow, reverse=True)]
+        return ordered[:n] if n is not None else ordered
+
+    def summary(self) -> Dict[str, Any]:
+        """Process-wide totals."""
+        with self._lock:
+            return {
+                "total_queries": self.total_queries,
+                "tracked_fingerprints": len(self._heavy_hitters),
+                "slow_queries": self.slow_query_count,
+                "avg_query_time": (
+                    self.total_time / self.total_queries if self.total_queries else 0
+                ),
+                "pending_explains": len(self._pending_explains),
+            }
+
+    def reset(self) -> None:
+        """Drop all collected statistics."""
+        with self._lock:
+            self._heavy_hitters.clear()
+            self._stats.clear()
+            self._slow.clear()
+            self._pending_explains.clear()
+            self.total_queries = 0
+            self.total_time = 0.0
+            self.slow_query_count = 0
+
+
+_query_stats: Optional[QueryStatsRegistry] = None
+
+
+def get_query_stats() -> QueryStatsRegistry:
+    """Return the process-wide query statistics registry."""
+    global _query_stats
+    if _query_stats is None:
+        _query_stats = QueryStatsRegistry()
+    return _query_stats
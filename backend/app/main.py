@@ -29,6 +29,7 @@ from app.api import deps
 # Import specific middleware setup functions
 from app.api.middleware import (
     setup_http_metrics_middleware,
+    setup_query_accounting_middleware,
     setup_security_middleware,
     setup_validation_middleware,
 )
@@ -171,8 +172,28 @@ async def lifespan(app: FastAPI):
 
     app.state._idem_cleanup_task = asyncio.create_task(_cleanup_loop())
 
+    # Start buffered A/B exposure logging
+    from app.services.ab_assignment import get_ab_assignment_service
+
+    get_ab_assignment_service().exposures.start()
+
+    # Capture sampled EXPLAIN plans for slow statements
+    from app.db.query_stats import get_query_stats
+    from app.db.session import engine as db_engine
+
+    get_query_stats().start(db_engine)
+
     yield
 
+    # Persist any buffered A/B exposures before shutting down
+    await get_ab_assignment_service().exposures.stop()
+    await get_query_stats().stop()
+
+    # Release the pooled AI provider HTTP session
+    from app.services.ai_analysis_pipeline import close_ai_pipeline
+
+    await close_ai_pipeline()
+
     # Celery workers are managed separately - no cleanup needed in FastAPI app
     logger.info("celery_integration_shutdown_complete")
 
@@ -248,6 +269,9 @@ if get_settings().cors_origins:
 # Set up HTTP metrics middleware (should be early to capture all requests)
 setup_http_metrics_middleware(app)
 
+# Set up per-request query accounting (Server-Timing, N+1 detection, budgets)
+setup_query_accounting_middleware(app)
+
 # Set up security and validation middleware
 setup_security_middleware(app)
 setup_validation_middleware(app)
@@ -273,6 +297,12 @@ setup_caching_middleware(
     enable_middleware=True,
 )
 
+# Compress outside the response cache so cached bodies stay uncompressed JSON
+# and precompressed cache hits pass straight through
+from app.core.performance import setup_compression_middleware
+
+setup_compression_middleware(app)
+
 # Set up memory optimization middleware
 from app.utils.memory_optimization import setup_memory_optimization
 
@@ -0,0 +1,406 @@
+"""Compact per-user behaviour summaries for recommendation candidate generation.
+
+A ``BehaviorSummary`` folds a user's events into a few small maps instead of
+keeping the events themselves. Counters decay exponentially with a
+``HALF_LIFE_DAYS`` half-life, which approximates the 30-day window the raw
+event analysis used. Set-like facts, such as features used and workflow steps
+seen, keep a last-seen time and drop out after ``WINDOW_DAYS``. Folding new
+events is O(new events), and ``analysis`` produces the same dictionary shape
+that ``RecommendationEngine`` consumes.
+
+New events are found by ``created_at`` rather than by id. Ids are handed out
+before commit, so an event whose transaction commits after a higher id was
+folded would fall behind an id watermark for good. Each refresh instead
+re-reads ``COMMIT_LAG_SECONDS`` before the newest ``created_at`` folded, and
+the ids folded inside that lookback are kept to skip events already counted.
+"""
+import copy
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models.event import Event
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+WINDOW_DAYS = 30
+HALF_LIFE_DAYS = 10.0
+SUMMARY_VERSION = 2
+COMMIT_LAG_SECONDS = 300
+
+_DAY = 86400.0
+_MAX_ACTIONS = 64
+_MAX_OPEN_SESSIONS = 32
+_RECENT_ACTIONS = 10
+_MIN_WEIGHT = 0.01
+
+WORKFLOWS = {
+    "user_registration": ["register", "verify_email", "complete_profile"],
+    "project_creation": [
+        "create_project",
+        "add_team_members",
+        "configure_settings",
+    ],
+    "data_import": ["start_import", "map_fields", "complete_import"],
+}
+
+FEATURE_CATEGORIES = {
+    "dashboard": ["view_dashboard", "customize_dashboard"],
+    "analytics": ["view_analytics", "create_report", "export_data"],
+    "user_management": ["manage_users", "set_permissions"],
+    "api": ["api_call", "webhook_setup", "integration"],
+}
+
+_WORKFLOW_STEPS = {step for steps in WORKFLOWS.values() for step in steps}
+_CATEGORY_BY_ACTION = {
+    action: category
+    for category, actions in FEATURE_CATEGORIES.items()
+    for action in actions
+}
+
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _event_type(value: Any) -> str:
+    return getattr(value, "value", value)
+
+
+class BehaviorSummary:
+    """Incrementally maintained behaviour profile for one user."""
+
+    __slots__ = (
+        "as_of",
+        "last_event_id",
+        "created_through",
+        "folded_ids",
+        "features",
+        "workflow_steps",
+        "recent",
+        "content",
+        "actions",
+        "categories",
+        "hours",
+        "sessions",
+        "session_events",
+        "reading_events",
+        "reading_sessions",
+        "open_sessions",
+    )
+
+    def __init__(self) -> None:
+        self.as_of = 0.0
+        self.last_event_id = 0
+        self.created_through = 0.0
+        # event id -> created_at of events inside the commit lookback
+        self.folded_ids: Dict[int, float] = {}
+        self.features: Dict[str, float] = {}
+        self.workflow_steps: Dict[str, float] = {}
+        self.recent: List[Tuple[float, str]] = []
+        self.content: Dict[str, float] = {}
+        self.actions: Dict[str, float] = {}
+        self.categories: Dict[str, float] = {}
+        self.hours: List[float] = [0.0] * 24
+        self.sessions = 0.0
+        self.session_events = 0.0
+        self.reading_events = 0.0
+        self.reading_sessions = 0.0
+        # session id -> [last seen, has reading event]
+        self.open_sessions: Dict[str, List[Any]] = {}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "BehaviorSummary":
+        summary = cls()
+        if not data or data.get("v") != SUMMARY_VERSION:
+            return summary
+        summary.as_of = data.get("as_of", 0.0)
+        summary.last_event_id = data.get("last_event_id", 0)
+        summary.created_through = data.get("created_through", 0.0)
+        summary.folded_ids = {
+            event_id: created for event_id, created in data.get("folded_ids", [])
+        }
+        summary.features = data.get("features", {})
+        summary.workflow_steps = data.get("workflow_steps", {})
+        summary.recent = [tuple(item) for item in data.get("recent", [])]
+        summary.content = data.get("content", {})
+        summary.actions = data.get("actions", {})
+        summary.categories = data.get("categories", {})
+        summary.hours = data.get("hours", [0.0] * 24)
+        summary.sessions = data.get("sessions", 0.0)
+        summary.session_events = data.get("session_events", 0.0)
+        summary.reading_events = data.get("reading_events", 0.0)
+        summary.reading_sessions = data.get("reading_sessions", 0.0)
+        summary.open_sessions = data.get("open_sessions", {})
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "v": SUMMARY_VERSION,
+            "as_of": self.as_of,
+            "last_event_id": self.last_event_id,
+            "created_through": self.created_through,
+            "folded_ids": [list(item) for item in self.folded_ids.items()],
+            "features": self.features,
+            "workflow_steps": self.workflow_steps,
+            "recent": [list(item) for item in self.recent],
+            "content": self.content,
+            "actions": self.actions,
+            "categories": self.categories,
+            "hours": [round(h, 4) for h in self.hours],
+            "sessions": round(self.sessions, 4),
+            "session_events": round(self.session_events, 4),
+            "reading_events": round(self.reading_events, 4),
+            "reading_sessions": round(self.reading_sessions, 4),
+            "open_sessions": self.open_sessions,
+        }
+
+    # Folding
+
+    def _decay_to(self, now: float) -> None:
+        """Age every counter from ``as_of`` to ``now`` and prune expired facts."""
+        if now <= self.as_of:
+            return
+        if self.as_of:
+            factor = 0.5 ** ((now - self.as_of) / (HALF_LIFE_DAYS * _DAY))
+            for counts in (self.content, self.actions, self.categories):
+                for key in list(counts):
+                    value = counts[key] * factor
+                    if value < _MIN_WEIGHT:
+                        del counts[key]
+                    else:
+                        counts[key] = round(value, 4)
+            self.hours = [h * factor for h in self.hours]
+            self.sessions *= factor
+            self.session_events *= factor
+            self.reading_events *= factor
+            self.reading_sessions *= factor
+        self.as_of = now
+
+        cutoff = now - WINDOW_DAYS * _DAY
+        for seen in (self.features, self.workflow_steps):
+            for key in [k for k, t in seen.items() if t < cutoff]:
+                del seen[key]
+        self.recent = [item for item in self.recent if item[0] >= cutoff]
+        for key in [k for k, v in self.open_sessions.items() if v[0] < cutoff]:
+            del self.open_sessions[key]
+
+    def add_event(
+        self,
+        *,
+        event_id: int,
+        event_type: Any,
+        event_name: str,
+        timestamp: datetime,
+        session_id: Optional[str] = None,
+        content_type: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+    ) -> None:
+        """Fold one event into the summary; events already folded are skipped."""
+        if event_id in self.folded_ids:
+            return
+        created = _epoch(created_at or timestamp)
+        self.folded_ids[event_id] = created
+        self.created_through = max(self.created_through, created)
+        self.last_event_id = max(self.last_event_id, event_id)
+        ts = _epoch(timestamp)
+        self._decay_to(ts)
+        if ts < self.as_of - WINDOW_DAYS * _DAY:
+            return
+        weight = 0.5 ** ((self.as_of - ts) / (HALF_LIFE_DAYS * _DAY))
+        interaction = _event_type(event_type) == "interaction"
+
+        self.recent.append((ts, event_name))
+        self.recent.sort(key=lambda item: item[0], reverse=True)
+        del self.recent[_RECENT_ACTIONS:]
+
+        self.hours[timestamp.hour] += weight
+        if event_name in _WORKFLOW_STEPS:
+            self.workflow_steps[event_name] = max(
+                self.workflow_steps.get(event_name, 0.0), ts
+            )
+        category = _CATEGORY_BY_ACTION.get(event_name)
+        if category:
+            self.categories[category] = self.categories.get(category, 0.0) + weight
+
+        reading = False
+        if interaction:
+            if "feature_" in event_name:
+                self.features[event_name] = max(self.features.get(event_name, 0.0), ts)
+            if content_type:
+                self.content[content_type] = (
+                    self.content.get(content_type, 0.0) + weight
+                )
+            self.actions[event_name] = self.actions.get(event_name, 0.0) + weight
+            if len(self.actions) > _MAX_ACTIONS:
+                del self.actions[min(self.actions, key=self.actions.get)]
+            reading = "read" in event_name
+            if reading:
+                self.reading_events += weight
+
+        if session_id:
+            self.session_events += weight
+            state = self.open_sessions.get(session_id)
+            if state is None:
+                self.sessions += weight
+                state = self.open_sessions[session_id] = [ts, False]
+                if len(self.open_sessions) > _MAX_OPEN_SESSIONS:
+                    oldest = min(
+                        self.open_sessions, key=lambda k: self.open_sessions[k][0]
+                    )
+                    del self.open_sessions[oldest]
+            state[0] = max(state[0], ts)
+            if reading and not state[1]:
+                state[1] = True
+                self.reading_sessions += weight
+
+    def add_events(self, events: Iterable[Any]) -> None:
+        """Fold event rows (``id``, ``event_type``, ``event_name``, ...)."""
+        for event in events:
+            self.add_event(
+                event_id=event.id,
+                event_type=event.event_type,
+                event_name=event.event_name,
+                timestamp=event.timestamp,
+                session_id=event.session_id,
+                content_type=getattr(event, "content_type", None),
+                created_at=getattr(event, "created_at", None),
+            )
+        self._prune_folded()
+
+    def _prune_folded(self) -> None:
+        """Forget folded ids that a refresh can no longer read back."""
+        cutoff = self.created_through - COMMIT_LAG_SECONDS
+        for event_id in [k for k, t in self.folded_ids.items() if t <= cutoff]:
+            del self.folded_ids[event_id]
+
+    def lookback_start(self) -> Optional[datetime]:
+        """Earliest ``created_at`` a refresh has to read, None to rebuild."""
+        if not self.created_through:
+            return None
+        return datetime.fromtimestamp(
+            self.created_through - COMMIT_LAG_SECONDS, timezone.utc
+        )
+
+    # Reading
+
+    def analysis(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Behaviour analysis in the shape the recommendation engine expects."""
+        view = BehaviorSummary.from_dict(copy.deepcopy(self.to_dict()))
+        view._decay_to(_epoch(now or datetime.utcnow()))
+
+        max_interest = max(view.content.values(), default=0.0) or 1.0
+        frequent = sorted(view.actions.items(), key=lambda x: x[1], reverse=True)[:5]
+        completed = set(view.workflow_steps)
+        incomplete = [
+            workflow
+            for workflow, steps in WORKFLOWS.items()
+            if 0 < sum(1 for step in steps if step in completed) < len(steps)
+        ]
+
+        reading_patterns: Dict[str, Any] = {}
+        if view.reading_events >= _MIN_WEIGHT:
+            reading_patterns = {
+                "avg_reading_session": view.reading_events
+                / max(view.reading_sessions, 1.0),
+                "preferred_content_length": "medium",
+                "reading_frequency": view.reading_events / WINDOW_DAYS,
+            }
+
+        return {
+            "features_used": list(view.features),
+            "recent_actions": [name for _, name in view.recent],
+            "content_interests": {k: v / max_interest for k, v in view.content.items()},
+            "session_patterns": {
+                "avg_session_length": (
+                    view.session_events / view.sessions
+                    if view.sessions >= _MIN_WEIGHT
+                    else 0
+                ),
+                "total_sessions": round(view.sessions, 2),
+                "session_frequency": view.sessions / WINDOW_DAYS,
+            },
+            "usage_patterns": {
+                "frequent_actions": [action for action, _ in frequent],
+                "action_diversity": len(view.actions),
+                "total_actions": round(sum(view.actions.values()), 2),
+            },
+            "incomplete_workflows": incomplete,
+            "feature_categories": {k: round(v, 2) for k, v in view.categories.items()},
+            "hour_histogram": view.hours,
+            "reading_patterns": reading_patterns,
+        }
+
+
+def _new_events(user_id: int, since: Optional[datetime]) -> Any:
+    if since is None:
+        return Event.user_id == user_id
+    return and_(Event.user_id == user_id, Event.created_at > since)
+
+
+async def load_behavior_summaries(
+    db: AsyncSession, user_ids: List[int], max_age_seconds: float = 300
+) -> Dict[int, BehaviorSummary]:
+    """Summaries for ``user_ids``, brought up to date with new events.
+
+    Summaries refreshed within ``max_age_seconds`` are used as stored. The rest
+    fold in events created since their ``lookback_start``, fetched in a single
+    query; ids already folded are skipped. Users without a summary get one
+    built from their last ``WINDOW_DAYS`` of events.
+    """
+    from app.crud.recommendation import user_behavior_summary
+
+    user_ids = list(dict.fromkeys(user_ids))
+    rows = await user_behavior_summary.get_by_user_ids(db, user_ids=user_ids)
+    now = datetime.utcnow()
+    fresh_after = now - timedelta(seconds=max_age_seconds)
+
+    summaries: Dict[int, BehaviorSummary] = {}
+    stale: Dict[int, BehaviorSummary] = {}
+    for user_id in user_ids:
+        row = rows.get(user_id)
+        summary = BehaviorSummary.from_dict(row.summary if row else None)
+        summaries[user_id] = summary
+        if row is None or row.refreshed_at < fresh_after:
+            stale[user_id] = summary
+
+    if not stale:
+        return summaries
+
+    result = await db.execute(
+        select(
+            Event.id,
+            Event.user_id,
+            Event.event_type,
+            Event.event_name,
+            Event.session_id,
+            Event.timestamp,
+            Event.created_at,
+            Event.properties["content_type"].astext.label("content_type"),
+        )
+        .where(
+            Event.timestamp >= now - timedelta(days=WINDOW_DAYS),
+            or_(
+                *(
+                    _new_events(user_id, summary.lookback_start())
+                    for user_id, summary in stale.items()
+                )
+            ),
+        )
+        .order_by(Event.timestamp)
+    )
+    events: Dict[int, List[Any]] = {}
+    for event in result.all():
+        events.setdefault(event.user_id, []).append(event)
+    for user_id, user_events in events.items():
+        stale[user_id].add_events(user_events)
+
+    await user_behavior_summary.upsert_many(
+        db,
+        summaries={
+            user_id: (summary.to_dict(), summary.last_event_id)
+            for user_id, summary in stale.items()
+        },
+    )
+    return summaries
@@ -7,6 +7,7 @@ from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 
 import numpy as np
+from app.ml.behavior_summary import load_behavior_summaries
 from app.models.event import Event
 from app.models.recommendation import Recommendation, SimilarUsers, UserPreferences
 from app.models.user import User
@@ -17,7 +18,7 @@ from app.schemas.recommendation import (
     SimilarUsersCreate,
     UserPreferencesUpdate,
 )
-from sqlalchemy import and_, desc, func, select
+from sqlalchemy import and_, desc, func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.cache import get_cache
@@ -28,10 +29,15 @@ logger = logging.getLogger(__name__)
 class RecommendationEngine:
     """Main recommendation engine with multiple algorithms."""
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, summary_max_age_seconds: float = 300):
         self.db = db
         self.cache = get_cache()
         self.model_version = "v1.0.0"
+        self.summary_max_age_seconds = summary_max_age_seconds
+        # Per-call memo of behaviour analyses and similar users, reset by
+        # generate_recommendations so every algorithm/type pass shares them
+        self._behavior: Dict[int, Dict[str, Any]] = {}
+        self._similar: Dict[int, List[SimilarUsers]] = {}
 
     async def generate_recommendations(
         self,
@@ -42,9 +48,18 @@ class RecommendationEngine:
     ) -> List[RecommendationCreate]:
         """Generate recommendations for a user using specified algorithm."""
 
+        self._behavior.clear()
+        self._similar.clear()
+
         # Get user preferences
         user_prefs = await self._get_user_preferences(user_id)
 
+        # Load the user's and similar users' behaviour summaries in one pass
+        similar_users = await self._get_similar_users(user_id)
+        await self._get_user_events_analysis(
+            [user_id] + [su.similar_user_id for su in similar_users[:10]]
+        )
+
         # Determine which types to generate
         if not recommendation_types:
             recommendation_types = [
@@ -565,12 +580,13 @@ class RecommendationEngine:
 
         # Analyze usage patterns for personalization opportunities
         usage_patterns = user_behavior.get("usage_patterns", {})
-        session_times = user_behavior.get("session_times", [])
+        hour_histogram = user_behavior.get("hour_histogram", [])
+        total_usage = sum(hour_histogram)
 
         # Theme recommendations based on usage times
-        if session_times:
-            evening_usage = sum(1 for hour in session_times if 18 <= hour <= 23)
-            if evening_usage / len(session_times) > 0.4:
+        if total_usage > 0:
+            evening_ratio = sum(hour_histogram[18:24]) / total_usage
+            if evening_ratio > 0.4:
                 recommendations.append(
                     RecommendationCreate(
                         user_id=user_id,
@@ -580,9 +596,7 @@ class RecommendationEngine:
                         confidence_score=0.7,
                         priority_score=0.3,
                         relevance_score=0.7,
-                        context={
-                            "evening_usage_ratio": evening_usage / len(session_times)
-                        },
+                        context={"evening_usage_ratio": evening_ratio},
                         model_version=self.model_version,
                         algorithm="content_based",
                     )
@@ -651,6 +665,9 @@ class RecommendationEngine:
         self, user_id: int, limit: int = 10
     ) -> List[SimilarUsers]:
         """Get similar users from database."""
+        if user_id in self._similar:
+            return self._similar[user_id][:limit]
+
         current_time = datetime.utcnow()
 
         result = await self.db.execute(
@@ -665,159 +682,24 @@ class RecommendationEngine:
             .order_by(desc(SimilarUsers.similarity_score))
             .limit(limit)
         )
-        return list(result.scalars().all())
+        similar_users = list(result.scalars().all())
+        self._similar[user_id] = similar_users
+        return similar_users
 
     async def _get_user_events_analysis(
         self, user_ids: List[int]
     ) -> Dict[int, Dict[str, Any]]:
-        """Analyze user events to extract behavior patterns."""
-        # Get recent events for users
-        cutoff_date = datetime.utcnow() - timedelta(days=30)
-
-        result = await self.db.execute(
-            select(Event)
-            .where(and_(Event.user_id.in_(user_ids), Event.timestamp >= cutoff_date))
-            .order_by(desc(Event.timestamp))
-        )
-        events = result.scalars().all()
-
-        # Analyze events by user
-        user_analysis = {}
-
-        for user_id in user_ids:
-            user_events = [e for e in events if e.user_id == user_id]
-
-            analysis = {
-                "features_used": list(
-                    set(
-                        e.event_name
-                        for e in user_events
-                        if e.event_type == "interaction" and "feature_" in e.event_name
-                    )
-                ),
-                "recent_actions": [e.event_name for e in user_events[:10]],
-                "content_interests": self._extract_content_interests(user_events),
-                "session_patterns": self._extract_session_patterns(user_events),
-                "usage_patterns": self._extract_usage_patterns(user_events),
-                "incomplete_workflows": self._extract_incomplete_workflows(user_events),
-                "feature_categories": self._extract_feature_categories(user_events),
-                "session_times": [e.timestamp.hour for e in user_events],
-                "reading_patterns": self._extract_reading_patterns(user_events),
-            }
-
-            user_analysis[user_id] = analysis
-
-        return user_analysis
-
-    def _extract_content_interests(self, events: List[Event]) -> Dict[str, float]:
-        """Extract content interests from user events."""
-        interests = defaultdict(float)
-
-        for event in events:
-            if event.event_type == "interaction" and event.properties:
-                content_type = event.properties.get("content_type")
-                if content_type:
-                    interests[content_type] += 1.0
-
-        # Normalize scores
-        max_score = max(interests.values()) if interests else 1.0
-        return {k: v / max_score for k, v in interests.items()}
-
-    def _extract_session_patterns(self, events: List[Event]) -> Dict[str, Any]:
-        """Extract session patterns from events."""
-        sessions = defaultdict(list)
-
-        for event in events:
-            if event.session_id:
-                sessions[event.session_id].append(event)
-
-        avg_session_length = (
-            np.mean([len(session) for session in sessions.values()]) if sessions else 0
-        )
-
-        return {
-            "avg_session_length": avg_session_length,
-            "total_sessions": len(sessions),
-            "session_frequency": len(sessions) / 30
-            if sessions
-            else 0,  # sessions per day over 30 days
-        }
-
-    def _extract_usage_patterns(self, events: List[Event]) -> Dict[str, Any]:
-        """Extract usage patterns from events."""
-        action_counts = defaultdict(int)
-
-        for event in events:
-            if event.event_type == "interaction":
-                action_counts[event.event_name] += 1
-
-        frequent_actions = sorted(
-            action_counts.items(), key=lambda x: x[1], reverse=True
-        )[:5]
-
-        return {
-            "frequent_actions": [action for action, _ in frequent_actions],
-            "action_diversity": len(action_counts),
-            "total_actions": sum(action_counts.values()),
-        }
-
-    def _extract_incomplete_workflows(self, events: List[Event]) -> List[str]:
-        """Extract incomplete workflows from events."""
-        workflows = {
-            "user_registration": ["register", "verify_email", "complete_profile"],
-            "project_creation": [
-                "create_project",
-                "add_team_members",
-                "configure_settings",
-            ],
-            "data_import": ["start_import", "map_fields", "complete_import"],
-        }
-
-        incomplete = []
-        event_names = [e.event_name for e in events]
-
-        for workflow, steps in workflows.items():
-            completed_steps = sum(1 for step in steps if step in event_names)
-            if 0 < completed_steps < len(steps):
-                incomplete.append(workflow)
-
-        return incomplete
-
-    def _extract_feature_categories(self, events: List[Event]) -> Dict[str, int]:
-        """Extract feature category usage from events."""
-        categories = defaultdict(int)
-
-        feature_mappings = {
-            "dashboard": ["view_dashboard", "customize_dashboard"],
-            "analytics": ["view_analytics", "create_report", "export_data"],
-            "user_management": ["manage_users", "set_permissions"],
-            "api": ["api_call", "webhook_setup", "integration"],
-        }
+        """Behaviour patterns for users, read from their behaviour summaries."""
+        missing = [uid for uid in user_ids if uid not in self._behavior]
+        if missing:
+            summaries = await load_behavior_summaries(
+                self.db, missing, max_age_seconds=self.summary_max_age_seconds
+            )
+            now = datetime.utcnow()
+            for uid, summary in summaries.items():
+                self._behavior[uid] = summary.analysis(now)
 
-        for event in events:
-            for category, actions in feature_mappings.items():
-                if event.event_name in actions:
-                    categories[category] += 1
-
-        return dict(categories)
-
-    def _extract_reading_patterns(self, events: List[Event]) -> Dict[str, Any]:
-        """Extract content reading patterns."""
-        reading_events = [
-            e
-            for e in events
-            if e.event_type == "interaction" and "read" in e.event_name
-        ]
-
-        if not reading_events:
-            return {}
-
-        return {
-            "avg_reading_session": len(reading_events)
-            / len(set(e.session_id for e in reading_events if e.session_id)),
-            "preferred_content_length": "medium",  # Could be derived from event properties
-            "reading_frequency": len(reading_events) / 30,  # per day over 30 days
-        }
+        return {uid: self._behavior[uid] for uid in user_ids}
 
     async def _get_popular_features(self) -> List[Tuple[str, float]]:
         """Get popular features based on recent usage."""
@@ -39,6 +39,7 @@ from .recommendation import (
     Recommendation,
     RecommendationFeedback,
     SimilarUsers,
+    UserBehaviorSummary,
     UserPreferences,
 )
 from .support_ticket import SupportTicket
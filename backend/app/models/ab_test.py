@@ -266,6 +266,43 @@ class AbTestVariant(Base):
         comment="Calculated conversion rate (conversions/users)",
     )
 
+    # Running sufficient statistics (maintained incrementally)
+    value_sum: Mapped[float] = mapped_column(
+        Float,
+        default=0.0,
+        server_default=text("0"),
+        nullable=False,
+        comment="Sum of conversion values across participants",
+    )
+    value_sum_sq: Mapped[float] = mapped_column(
+        Float,
+        default=0.0,
+        server_default=text("0"),
+        nullable=False,
+        comment="Sum of squared conversion values across participants",
+    )
+    covariate_sum: Mapped[float] = mapped_column(
+        Float,
+        default=0.0,
+        server_default=text("0"),
+        nullable=False,
+        comment="Sum of pre-experiment covariates (CUPED)",
+    )
+    covariate_sum_sq: Mapped[float] = mapped_column(
+        Float,
+        default=0.0,
+        server_default=text("0"),
+        nullable=False,
+        comment="Sum of squared pre-experiment covariates (CUPED)",
+    )
+    covariate_conversion_sum: Mapped[float] = mapped_column(
+        Float,
+        default=0.0,
+        server_default=text("0"),
+        nullable=False,
+        comment="Sum of covariates over converted participants (CUPED)",
+    )
+
     # Statistical metrics
     confidence_interval_lower: Mapped[Optional[float]] = mapped_column(
         Float, nullable=True, comment="Lower bound of confidence interval"
@@ -382,6 +419,11 @@ class AbTestAssignment(Base):
     context: Mapped[Optional[Dict[str, Any]]] = mapped_column(
         JSON, nullable=True, comment="Assignment context (user agent, location, etc.)"
     )
+    covariate: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+        comment="Pre-experiment metric value used for CUPED variance reduction",
+    )
 
     # Relationships
     test: Mapped["AbTest"] = relationship(
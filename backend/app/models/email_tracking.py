@@ -4,9 +4,9 @@ from enum import Enum
 from typing import Optional
 
 from app.db.base_class import Base
-from sqlalchemy import JSON, Column, DateTime
+from sqlalchemy import JSON, Column, Date, DateTime
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 
@@ -72,6 +72,8 @@ class EmailEvent(Base):
     ip_address = Column(String, nullable=True)
     location = Column(String, nullable=True)
     event_metadata = Column(JSON, nullable=True)  # Additional event data
+    # Provider event fingerprint; unique so webhook redeliveries are dropped
+    event_signature = Column(String(64), nullable=True, unique=True, index=True)
     created_at = Column(
         DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False
     )
@@ -84,3 +86,70 @@ class EmailEvent(Base):
 
     # Relationships
     email = relationship("EmailTracking", back_populates="events")
+
+
+class EmailStatusRollup(Base):
+    """Daily email counts per template and current status.
+
+    Rows are keyed by the day an email was created. A status transition moves
+    the email from its old status row to its new one, so summing a date range
+    gives the same totals as counting tracking rows by status.
+    """
+
+    __tablename__ = "email_status_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    template_name = Column(String, nullable=False)
+    status = Column(SQLEnum(EmailStatus), nullable=False)
+    email_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "day",
+            "template_name",
+            "status",
+            name="uq_email_status_rollups_day_template_status",
+        ),
+    )
+
+
+class EmailLatencyRollup(Base):
+    """Daily histogram of send-to-open and send-to-click latency per template."""
+
+    __tablename__ = "email_latency_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    template_name = Column(String, nullable=False)
+    metric = Column(String(16), nullable=False)  # open or click
+    bucket = Column(Integer, nullable=False)  # Latency histogram bucket index
+    email_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "day",
+            "template_name",
+            "metric",
+            "bucket",
+            name="uq_email_latency_rollups_day_template_metric_bucket",
+        ),
+    )
@@ -1,16 +1,20 @@
 """Event tracking model for analytics and UX optimization."""
 from datetime import datetime
-from typing import TYPE_CHECKING, Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from uuid import UUID, uuid4
 
 from app.db.base_class import Base
-from sqlalchemy import JSON, Index, String, text
+from app.db.types import TZDateTime
+from sqlalchemy import JSON, Index, String, Text, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 if TYPE_CHECKING:
     from .user import User
 
+# Keys removed from event properties when an event is anonymized
+PII_PROPERTY_FIELDS = ("email", "name", "phone", "address", "user_id")
+
 
 class Event(Base):
     """Event tracking model for comprehensive user analytics.
@@ -136,6 +140,10 @@ class Event(Base):
         Index("idx_events_performance", "event_type", "value", "timestamp"),
         # Privacy and data management
         Index("idx_events_retention", "retention_date", "anonymized"),
+        # Rollup materialization reads events inserted past its watermark
+        Index("idx_events_created_at", "created_at"),
+        # Anonymization jobs walk a user's events in id order
+        Index("idx_events_user_id_id", "user_id", "id"),
         # JSONB indexing for properties (PostgreSQL specific)
         # Index("idx_events_properties_gin", "properties", postgresql_using="gin"),  # Temporarily disabled
     )
@@ -167,6 +175,140 @@ class Event(Base):
 
         # Remove PII from properties if present
         if self.properties:
-            pii_fields = ["email", "name", "phone", "address", "user_id"]
-            for field in pii_fields:
+            for field in PII_PROPERTY_FIELDS:
                 self.properties.pop(field, None)
+
+
+class EventRollup(Base):
+    """Pre-aggregated event counts and value statistics per hour or day.
+
+    Buckets are keyed by the event timestamp truncated to the granularity.
+    Rollups are materialized incrementally from events inserted since the
+    watermark in EventRollupState and are not reduced when expired events are
+    purged, so they keep analytics history past the events retention window.
+    Summing the buckets in a range matches aggregating the raw events in it
+    only while those events are retained.
+    """
+
+    __tablename__ = "event_rollups"
+
+    granularity: Mapped[str] = mapped_column(
+        String(8), nullable=False, comment="Bucket size: hour or day"
+    )
+    bucket_start: Mapped[datetime] = mapped_column(
+        nullable=False, comment="Start of the bucket (UTC, same type as timestamp)"
+    )
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    event_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    source: Mapped[str] = mapped_column(String(50), nullable=False)
+
+    event_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    value_count: Mapped[int] = mapped_column(
+        default=0, nullable=False, comment="Events in the bucket with a value"
+    )
+    value_sum: Mapped[Optional[float]] = mapped_column(nullable=True)
+    value_min: Mapped[Optional[float]] = mapped_column(nullable=True)
+    value_max: Mapped[Optional[float]] = mapped_column(nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity",
+            "bucket_start",
+            "event_type",
+            "event_name",
+            "source",
+            name="uq_event_rollups_bucket",
+        ),
+        Index("idx_event_rollups_granularity_bucket", "granularity", "bucket_start"),
+    )
+
+
+class EventRollupState(Base):
+    """Materialization progress of the event rollups.
+
+    Every event created at or before ``watermark`` is counted in
+    EventRollup; newer events are still only in the events table.
+    """
+
+    __tablename__ = "event_rollup_state"
+
+    name: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    watermark: Mapped[datetime] = mapped_column(TZDateTime, nullable=False)
+
+
+class EventAnonymizationJob(Base):
+    """Chunked anonymization of the events matching a privacy request.
+
+    Matching events are processed in ascending id order, one chunk per
+    transaction. ``last_event_id`` is committed with each chunk, so an
+    interrupted job resumes after the last anonymized chunk. Only events that
+    existed when the job was created (id up to ``max_event_id``) are included.
+    Each claim sets a new ``claim_token``; a runner whose token was replaced
+    has lost the job and stops.
+    """
+
+    __tablename__ = "event_anonymization_jobs"
+
+    job_id: Mapped[str] = mapped_column(
+        String(36),
+        default=lambda: str(uuid4()),
+        unique=True,
+        index=True,
+        nullable=False,
+        comment="Unique job identifier",
+    )
+    status: Mapped[str] = mapped_column(
+        String(20),
+        default="pending",
+        index=True,
+        nullable=False,
+        comment="Job status: pending, running, completed, failed",
+    )
+    claim_token: Mapped[Optional[str]] = mapped_column(
+        String(36), nullable=True, comment="Token of the runner holding the job"
+    )
+
+    # Selection criteria, as in EventAnonymizationRequest
+    user_ids: Mapped[Optional[List[int]]] = mapped_column(JSON, nullable=True)
+    event_types: Mapped[Optional[List[str]]] = mapped_column(JSON, nullable=True)
+    before_date: Mapped[Optional[datetime]] = mapped_column(
+        nullable=True, comment="Only events at or before this time (UTC)"
+    )
+
+    # Pacing
+    chunk_size: Mapped[int] = mapped_column(nullable=False)
+    pause_ms: Mapped[int] = mapped_column(
+        default=0, nullable=False, comment="Pause between chunks in milliseconds"
+    )
+
+    # Progress
+    max_event_id: Mapped[int] = mapped_column(
+        default=0, nullable=False, comment="Highest event id when the job was created"
+    )
+    last_event_id: Mapped[int] = mapped_column(
+        default=0, nullable=False, comment="Keyset cursor: last event id processed"
+    )
+    events_anonymized: Mapped[int] = mapped_column(default=0, nullable=False)
+    chunks_processed: Mapped[int] = mapped_column(default=0, nullable=False)
+    processing_time_seconds: Mapped[float] = mapped_column(
+        default=0.0, nullable=False, comment="Time spent in chunks, excluding pauses"
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(TZDateTime, nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(TZDateTime, nullable=True)
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    @property
+    def progress(self) -> float:
+        """Share of the job's id range processed (0.0-1.0)."""
+        if self.status == "completed":
+            return 1.0
+        if not self.max_event_id:
+            return 0.0
+        return min(self.last_event_id / self.max_event_id, 1.0)
+
+    @property
+    def events_per_second(self) -> float:
+        """Anonymization throughput while chunks were running."""
+        if not self.processing_time_seconds:
+            return 0.0
+        return self.events_anonymized / self.processing_time_seconds
@@ -455,3 +455,35 @@ class SimilarUsers(Base):
         #     "idx_similar_users_features_gin", "common_features", postgresql_using="gin"
         # ),
     )
+
+
+class UserBehaviorSummary(Base):
+    """Incrementally maintained behaviour summary used for candidate generation."""
+
+    __tablename__ = "user_behavior_summaries"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        unique=True,
+        index=True,
+        nullable=False,
+        comment="User this summary describes",
+    )
+    summary: Mapped[Dict[str, Any]] = mapped_column(
+        JSONB, nullable=False, comment="Serialized BehaviorSummary (decayed counters)"
+    )
+    last_event_id: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default=text("0"),
+        nullable=False,
+        comment="Highest events.id folded into the summary",
+    )
+    refreshed_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.utcnow(),
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+        comment="When new events were last folded in",
+    )
+
+    __table_args__ = (Index("idx_user_behavior_summaries_refreshed", "refreshed_at"),)
@@ -5,6 +5,7 @@ from typing import Any, Dict, List, Optional
 
 from app.models.personalization import PersonalizationProfile, PersonalizationRule
 from app.schemas.personalization import PersonalizationRequest
+from app.services.ab_assignment import stable_bucket
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
@@ -225,9 +226,8 @@ class RuleEvaluator:
         if not rule.ab_test_id:
             return True
 
-        # Simple hash-based assignment
-        # In production, integrate with proper A/B testing framework
-        user_hash = hash(f"{rule.ab_test_id}_{profile.user_id}") % 100
+        # Stable hash so every worker process buckets the user identically
+        user_hash = stable_bucket(f"{rule.ab_test_id}_{profile.user_id}")
 
         # Get assignment percentage from rule configuration
         assignment_pct = rule.configuration.get("ab_test_percentage", 50)
@@ -3,6 +3,8 @@ from .ab_test import (
     AbTestAnalyticsResponse,
     AbTestAssignmentRequest,
     AbTestAssignmentResponse,
+    AbTestBatchAssignmentRequest,
+    AbTestBatchAssignmentResponse,
     AbTestConversionRequest,
     AbTestCreate,
     AbTestListResponse,
@@ -77,6 +79,8 @@ __all__ = [
     "AbTestResponse",
     "AbTestAssignmentRequest",
     "AbTestAssignmentResponse",
+    "AbTestBatchAssignmentRequest",
+    "AbTestBatchAssignmentResponse",
     "AbTestConversionRequest",
     "AbTestAnalyticsQuery",
     "AbTestAnalyticsResponse",
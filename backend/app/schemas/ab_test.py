@@ -331,6 +331,33 @@ class AbTestAssignmentResponse(BaseModel):
         from_attributes = True
 
 
+class AbTestBatchAssignmentRequest(BaseModel):
+    """Schema for assigning one user to several A/B tests at once."""
+
+    test_keys: Optional[List[str]] = Field(
+        None, max_length=100, description="Test keys to assign (all active if omitted)"
+    )
+    user_id: Optional[int] = Field(None, description="User ID (if authenticated)")
+    session_id: Optional[str] = Field(
+        None, description="Session ID (for anonymous users)"
+    )
+    context: Optional[Dict[str, Any]] = Field(None, description="Assignment context")
+
+    @model_validator(mode="after")
+    def validate_user_identification(self):
+        """Ensure either user_id or session_id is provided."""
+        if not self.user_id and not self.session_id:
+            raise ValueError("Either user_id or session_id must be provided")
+
+        return self
+
+
+class AbTestBatchAssignmentResponse(BaseModel):
+    """Schema for batch A/B test assignment response."""
+
+    assignments: List[AbTestAssignmentResponse] = Field(default_factory=list)
+
+
 class AbTestConversionRequest(BaseModel):
     """Schema for tracking A/B test conversions."""
 
@@ -438,6 +465,9 @@ class VariantStatistics(BaseModel):
     participants: int
     conversions: int
     conversion_rate: float
+    mean_value: Optional[float] = None
+    value_std_dev: Optional[float] = None
+    adjusted_conversion_rate: Optional[float] = None  # CUPED
     confidence_interval: Optional[tuple[float, float]] = None
     p_value: Optional[float] = None
     statistical_power: Optional[float] = None
@@ -1,5 +1,5 @@
 """Email tracking schemas."""
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any, Dict, List, Optional
 
 from app.models.email_tracking import EmailStatus
@@ -83,3 +83,35 @@ class EmailTrackingStats(BaseModel):
     click_rate: float  # clicked / opened
     bounce_rate: float  # bounced / sent
     spam_rate: float  # spam / sent
+
+
+class EmailDailyStatusCount(BaseModel):
+    """Emails created on one day for one template, by current status."""
+
+    day: date
+    template_name: str
+    status: EmailStatus
+    email_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class EmailLatencyPercentiles(BaseModel):
+    """Seconds from sending to an engagement (open or click)."""
+
+    count: int
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class EmailStatsReport(BaseModel):
+    """Email dashboard data read from the daily rollups."""
+
+    start_day: date
+    end_day: date
+    template_name: Optional[str] = None
+    stats: EmailTrackingStats
+    daily: List[EmailDailyStatusCount]
+    latency: Dict[str, EmailLatencyPercentiles]
@@ -159,6 +159,11 @@ class EventAnalyticsQuery(BaseModel):
         None, description="Start date for query range"
     )
     end_date: Optional[datetime] = Field(None, description="End date for query range")
+    include_purged: bool = Field(
+        False,
+        description="Answer from rollups even where they count events already "
+        "purged by retention",
+    )
 
     # Aggregation options
     group_by: Optional[List[str]] = Field(None, description="Group by fields")
@@ -233,6 +238,40 @@ class EventAnonymizationRequest(BaseModel):
         None, description="Anonymize events before date"
     )
     dry_run: bool = Field(default=True, description="Dry run without actual changes")
+    chunk_size: Optional[int] = Field(
+        None, ge=1, le=50000, description="Events anonymized per transaction"
+    )
+    pause_ms: Optional[int] = Field(
+        None, ge=0, le=60000, description="Pause between chunks in milliseconds"
+    )
+
+
+class EventAnonymizationJobResponse(BaseModel):
+    """Progress and throughput of a chunked anonymization job."""
+
+    job_id: str
+    status: str = Field(..., description="pending, running, completed or failed")
+    user_ids: Optional[List[int]] = None
+    event_types: Optional[List[str]] = None
+    before_date: Optional[datetime] = None
+    chunk_size: int
+    pause_ms: int
+    max_event_id: int = Field(..., description="Highest event id the job covers")
+    last_event_id: int = Field(..., description="Last event id processed")
+    progress: float = Field(..., description="Share of the id range processed")
+    events_anonymized: int
+    chunks_processed: int
+    processing_time_seconds: float
+    events_per_second: float = Field(..., description="Throughput while running")
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        """Schema configuration."""
+
+        from_attributes = True
 
 
 class EventRetentionPolicy(BaseModel):
@@ -259,7 +298,21 @@ class EventDataExportRequest(BaseModel):
     )
     start_date: Optional[datetime] = Field(None, description="Export start date")
     end_date: Optional[datetime] = Field(None, description="Export end date")
-    format: str = Field(default="json", description="Export format")
+    format: str = Field(
+        default="json", description="Export format: json, ndjson or csv"
+    )
     include_anonymized: bool = Field(
         default=False, description="Include anonymized events"
     )
+    compress: bool = Field(default=False, description="Deliver the export gzipped")
+    position: Optional[str] = Field(
+        None,
+        description="Position of the last record received, to resume an export",
+    )
+
+    @validator("format")
+    def validate_format(cls, v):
+        """Validate export format."""
+        if v not in {"json", "ndjson", "csv"}:
+            raise ValueError(f"Export format '{v}' not supported")
+        return v
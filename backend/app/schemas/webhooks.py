@@ -96,6 +96,7 @@ class WebhookProcessingResult(BaseModel):
     successful_events: int
     failed_events: int
     errors: List[str] = []
+    deferred: bool = False  # Queued for a worker instead of processed inline
 
 
 class WebhookSignatureValidator:
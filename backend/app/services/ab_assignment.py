@@ -0,0 +1,584 @@
+"""Stateless A/B test assignment engine backed by an in-memory test catalog.
+
+A new assignment is a pure function of the user identifier and the test
+definition, so every worker process hands out the same variant. Active tests
+are held in a process-local catalog that is refreshed on a short TTL or when a
+test is changed, and first exposures are buffered and written to
+``ab_test_assignments`` in bulk by a background task. Once a user has a
+persisted assignment it is sticky: ``resolve`` returns the stored variant even
+after the test's allocation changes.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from app.models.ab_test import AbTest, AbTestAssignment
+from app.models.event import Event
+from app.schemas.event import EventType
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+_HASH_SPACE = 0xFFFFFFFF
+# Matches the interaction-event retention policy in CRUDEvent
+_ASSIGNMENT_EVENT_RETENTION_DAYS = 365
+
+
+def compute_user_hash(user_id: Optional[int], session_id: Optional[str]) -> str:
+    """Stable 64-bit identifier hash shared by every worker process.
+
+    Uses the same SHA-256 prefix as persisted ``AbTestAssignment.user_hash``
+    values so that stateless assignment agrees with historical rows.
+    """
+    identifier = str(user_id) if user_id else session_id or ""
+    return hashlib.sha256(identifier.encode()).hexdigest()[:16]
+
+
+def stable_bucket(key: str, buckets: int = 100) -> int:
+    """Map an arbitrary string to ``[0, buckets)`` independently of PYTHONHASHSEED."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % buckets
+
+
+def covariate_from_context(context: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Pre-experiment metric supplied with the assignment, used for CUPED."""
+    if not context or context.get("covariate") is None:
+        return None
+    try:
+        return float(context["covariate"])
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class CatalogVariant:
+    """Immutable snapshot of an A/B test variant."""
+
+    id: int
+    variant_key: str
+    is_control: bool
+    upper_bound: float
+    configuration: Optional[Dict[str, Any]] = None
+
+
+@dataclass(frozen=True)
+class CatalogTest:
+    """Immutable snapshot of an active A/B test with precomputed thresholds."""
+
+    id: int
+    test_key: str
+    traffic_threshold: int
+    variants: Tuple[CatalogVariant, ...]
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+    @classmethod
+    def from_model(cls, test: AbTest) -> "CatalogTest":
+        """Build a snapshot from an ORM test with its variants loaded."""
+        cumulative = 0.0
+        variants = []
+        for variant in sorted(test.variants, key=lambda v: v.variant_key):
+            cumulative += variant.traffic_allocation
+            variants.append(
+                CatalogVariant(
+                    id=variant.id,
+                    variant_key=variant.variant_key,
+                    is_control=variant.is_control,
+                    upper_bound=cumulative,
+                    configuration=variant.configuration,
+                )
+            )
+        return cls(
+            id=test.id,
+            test_key=test.test_key,
+            traffic_threshold=int(_HASH_SPACE * test.traffic_allocation),
+            variants=tuple(variants),
+            start_date=test.start_date,
+            end_date=test.end_date,
+        )
+
+    def is_running(self, now: datetime) -> bool:
+        """Check the scheduling window of the test."""
+        if self.start_date and now < self.start_date:
+            return False
+        if self.end_date and now > self.end_date:
+            return False
+        return True
+
+    def assign(self, user_hash: str) -> Optional[CatalogVariant]:
+        """Pick a variant for ``user_hash`` or ``None`` if excluded by traffic."""
+        if not self.variants:
+            return None
+        if int(user_hash[:8], 16) > self.traffic_threshold:
+            return None
+
+        position = int(user_hash[8:16], 16) / _HASH_SPACE
+        for variant in self.variants:
+            if position <= variant.upper_bound:
+                return variant
+        return self.variants[-1]
+
+
+@dataclass(frozen=True)
+class Assignment:
+    """Result of assigning a user to a test."""
+
+    test_id: int
+    test_key: str
+    variant: CatalogVariant
+    user_hash: str
+    user_id: Optional[int] = None
+    session_id: Optional[str] = None
+    context: Optional[Dict[str, Any]] = None
+    assigned_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class AbTestCatalog:
+    """Process-local catalog of active tests, swapped atomically on refresh."""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_tests: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_tests = max_tests
+        self.version = 0
+        self._tests: Dict[str, CatalogTest] = {}
+        self._loaded_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the snapshot has expired or was invalidated."""
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.ttl_seconds
+        )
+
+    def load(self, tests: Iterable[AbTest]) -> None:
+        """Replace the snapshot with the given active tests."""
+        self._tests = {
+            snapshot.test_key: snapshot
+            for snapshot in (CatalogTest.from_model(t) for t in tests)
+        }
+        self._loaded_at = time.monotonic()
+        self.version += 1
+
+    def invalidate(self) -> None:
+        """Force a reload on the next ``ensure_fresh`` call."""
+        self._loaded_at = None
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """Reload active tests from the database if the snapshot is stale."""
+        if not self.is_stale:
+            return
+        async with self._refresh_lock:
+            if not self.is_stale:
+                return
+            from app.crud.ab_test import ab_test
+
+            tests = await ab_test.get_active_tests(db, limit=self.max_tests)
+            self.load(tests)
+            logger.debug(
+                f"Loaded {len(tests)} active A/B tests (catalog v{self.version})"
+            )
+
+    def get(self, test_key: str) -> Optional[CatalogTest]:
+        """Look up a test snapshot by key."""
+        return self._tests.get(test_key)
+
+    def keys(self) -> List[str]:
+        """Keys of all tests in the current snapshot."""
+        return list(self._tests)
+
+
+class ExposureBuffer:
+    """Buffers first exposures and persists them with bulk inserts.
+
+    ``record`` never blocks or awaits; rows are written by ``flush``, which the
+    background loop calls every ``flush_interval`` seconds or sooner once
+    ``batch_size`` exposures are pending. Duplicate exposures collapse in the
+    buffer and are ignored by the unique assignment indexes; only rows that
+    were actually inserted bump the variant counters and get an
+    ``ab_test_assignment`` event. A batch that fails to write goes back into
+    the buffer for the next flush.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        *,
+        max_pending: int = 50_000,
+        batch_size: int = 1000,
+        flush_interval: float = 1.0,
+    ):
+        self._session_factory = session_factory
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[int, str], Assignment] = {}
+        self._writing: Dict[Tuple[int, str], Assignment] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"recorded": 0, "dropped": 0, "written": 0, "flush_errors": 0}
+
+    @property
+    def pending(self) -> int:
+        """Number of exposures waiting to be written."""
+        return len(self._pending)
+
+    def get(self, test_id: int, user_hash: str) -> Optional[Assignment]:
+        """Exposure buffered or being written for a user, if any."""
+        key = (test_id, user_hash)
+        return self._pending.get(key) or self._writing.get(key)
+
+    def record(self, assignment: Assignment) -> bool:
+        """Queue an exposure; returns ``False`` if it had to be dropped."""
+        key = (assignment.test_id, assignment.user_hash)
+        if key in self._pending:
+            return True
+        if len(self._pending) >= self.max_pending:
+            self.stats["dropped"] += 1
+            return False
+
+        self._pending[key] = assignment
+        self.stats["recorded"] += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def drain(self, limit: Optional[int] = None) -> List[Assignment]:
+        """Remove and return up to ``limit`` pending exposures."""
+        limit = len(self._pending) if limit is None else limit
+        batch = []
+        for key in list(self._pending)[:limit]:
+            batch.append(self._pending.pop(key))
+        return batch
+
+    async def flush(self) -> int:
+        """Write all pending exposures, returning the number of rows sent."""
+        written = 0
+        while self._pending:
+            batch = self.drain(self.batch_size)
+            keys = [(a.test_id, a.user_hash) for a in batch]
+            self._writing.update(zip(keys, batch))
+            try:
+                await self._write(batch)
+            except Exception as e:
+                self.stats["flush_errors"] += 1
+                logger.error(f"Failed to persist {len(batch)} A/B exposures: {e}")
+                self._requeue(batch)
+                break
+            finally:
+                for key in keys:
+                    self._writing.pop(key, None)
+            written += len(batch)
+        self.stats["written"] += written
+        return written
+
+    def _requeue(self, batch: List[Assignment]) -> None:
+        """Put a failed batch back, ahead of exposures recorded since."""
+        pending = self._pending
+        self._pending = {}
+        for assignment in batch:
+            if len(self._pending) >= self.max_pending:
+                self.stats["dropped"] += 1
+                continue
+            self._pending[(assignment.test_id, assignment.user_hash)] = assignment
+        for key, assignment in pending.items():
+            if key in self._pending:
+                continue
+            if len(self._pending) >= self.max_pending:
+                self.stats["dropped"] += 1
+                continue
+            self._pending[key] = assignment
+
+    async def persist(self, assignment: Assignment) -> None:
+        """
+        Write one user's exposure for a test now.
+
+        Used before reading the assignment back (e.g. to record a conversion)
+        without flushing the whole buffer on the request path. The exposure
+        buffered in this process is preferred since it carries the assignment
+        context. Writing an exposure that is already stored, or that the
+        background loop is writing at the same moment, is a no-op.
+        """
+        key = (assignment.test_id, assignment.user_hash)
+        buffered = self._pending.pop(key, None) or self._writing.get(key)
+        assignment = buffered or assignment
+        try:
+            await self._write([assignment])
+        except Exception:
+            if buffered is not None:
+                self._requeue([assignment])
+            raise
+        self.stats["written"] += 1
+
+    async def _write(self, batch: List[Assignment]) -> None:
+        if self._session_factory is None:
+            from app.db.session import AsyncSessionLocal
+
+            self._session_factory = AsyncSessionLocal
+
+        rows = [
+            {
+                "test_id": a.test_id,
+                "variant_id": a.variant.id,
+                "user_id": a.user_id,
+                "session_id": a.session_id,
+                "user_hash": a.user_hash,
+                "context": a.context,
+                "covariate": covariate_from_context(a.context),
+                "assigned_at": a.assigned_at,
+                "first_exposure_at": a.assigned_at,
+                "last_seen_at": a.assigned_at,
+            }
+            for a in batch
+        ]
+        stmt = (
+            pg_insert(AbTestAssignment)
+            .values(rows)
+            # No conflict target: the user and session partial unique indexes
+            # must be ignored as well as (test_id, user_hash)
+            .on_conflict_do_nothing()
+            .returning(AbTestAssignment.test_id, AbTestAssignment.user_hash)
+        )
+        by_key = {(a.test_id, a.user_hash): a for a in batch}
+        async with self._session_factory() as session:
+            result = await session.execute(stmt)
+            first_exposures = [by_key[tuple(row)] for row in result.all()]
+            if first_exposures:
+                from app.crud.ab_test import ab_test
+
+                await ab_test.increment_variant_exposures(
+                    session,
+                    exposures=[
+                        (a.variant.id, covariate_from_context(a.context))
+                        for a in first_exposures
+                    ],
+                )
+                await session.execute(
+                    insert(Event).values(
+                        [_assignment_event_row(a) for a in first_exposures]
+                    )
+                )
+            await session.commit()
+
+    def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still pending."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"A/B exposure flush loop error: {e}")
+
+
+def _assignment_event_row(assignment: Assignment) -> Dict[str, Any]:
+    """Analytics event recorded alongside a first exposure."""
+    return {
+        "event_id": str(uuid4()),
+        "event_type": EventType.INTERACTION.value,
+        "event_name": "ab_test_assignment",
+        "user_id": assignment.user_id,
+        "session_id": assignment.session_id,
+        "properties": {
+            "test_id": assignment.test_id,
+            "test_key": assignment.test_key,
+            "variant_id": assignment.variant.id,
+            "variant_key": assignment.variant.variant_key,
+            "is_control": assignment.variant.is_control,
+        },
+        "timestamp": assignment.assigned_at,
+        "retention_date": assignment.assigned_at
+        + timedelta(days=_ASSIGNMENT_EVENT_RETENTION_DAYS),
+    }
+
+
+class AbAssignmentService:
+    """CPU-only assignment on top of the catalog with buffered exposure logging."""
+
+    def __init__(
+        self,
+        catalog: Optional[AbTestCatalog] = None,
+        exposures: Optional[ExposureBuffer] = None,
+    ):
+        self.catalog = catalog or AbTestCatalog()
+        self.exposures = exposures or ExposureBuffer()
+
+    def assign(
+        self,
+        test_key: str,
+        *,
+        user_id: Optional[int] = None,
+        session_id: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None,
+        log_exposure: bool = True,
+    ) -> Optional[Assignment]:
+        """Assign one user to one test from the in-memory catalog."""
+        result = self.assign_many(
+            user_id=user_id,
+            session_id=session_id,
+            test_keys=[test_key],
+            context=context,
+            log_exposure=log_exposure,
+        )
+        return result.get(test_key)
+
+    def assign_many(
+        self,
+        *,
+        user_id: Optional[int] = None,
+        session_id: Optional[str] = None,
+        test_keys: Optional[Iterable[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        log_exposure: bool = True,
+    ) -> Dict[str, Assignment]:
+        """Assign a user to several tests at once.
+
+        Args:
+            user_id: Authenticated user ID
+            session_id: Session ID for anonymous users
+            test_keys: Tests to evaluate; all catalog tests when omitted
+            context: Assignment context stored with the exposure
+            log_exposure: Queue the exposures for persistence
+
+        Returns:
+            Mapping of test key to assignment for tests the user is eligible for
+        """
+        if not user_id and not session_id:
+            return {}
+
+        user_hash = compute_user_hash(user_id, session_id)
+        now = datetime.utcnow()
+        keys = self.catalog.keys() if test_keys is None else test_keys
+
+        assignments: Dict[str, Assignment] = {}
+        for key in keys:
+            test = self.catalog.get(key)
+            if test is None or not test.is_running(now):
+                continue
+            variant = test.assign(user_hash)
+            if variant is None:
+                continue
+
+            assignment = Assignment(
+                test_id=test.id,
+                test_key=test.test_key,
+                variant=variant,
+                user_hash=user_hash,
+                user_id=user_id,
+                session_id=session_id,
+                context=context,
+                assigned_at=now,
+            )
+            assignments[key] = assignment
+            if log_exposure:
+                self.exposures.record(assignment)
+
+        return assignments
+
+    async def resolve(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: Optional[int] = None,
+        session_id: Optional[str] = None,
+        test_keys: Optional[Iterable[str]] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Assignment]:
+        """Assign like ``assign_many`` but keep variants users already have.
+
+        A persisted assignment row, then an exposure still buffered in this
+        process, wins over the catalog hash. Changing a test's allocation or
+        traffic, or a session signing in as a user, therefore never moves the
+        user to another variant than the one conversions are recorded against.
+        Only assignments without either are queued as new exposures.
+        """
+        assignments = self.assign_many(
+            user_id=user_id,
+            session_id=session_id,
+            test_keys=test_keys,
+            context=context,
+            log_exposure=False,
+        )
+        if not assignments:
+            return assignments
+
+        from app.crud.ab_test import ab_test
+
+        persisted = await ab_test.get_existing_assignments(
+            db,
+            test_ids=[a.test_id for a in assignments.values()],
+            user_id=user_id,
+            session_id=session_id,
+            user_hash=compute_user_hash(user_id, session_id),
+        )
+        for key, assignment in assignments.items():
+            row = persisted.get(assignment.test_id)
+            if row is not None:
+                assignments[key] = replace(
+                    assignment,
+                    variant=self._stored_variant(key, row),
+                    assigned_at=row.assigned_at,
+                )
+                continue
+            buffered = self.exposures.get(assignment.test_id, assignment.user_hash)
+            if buffered is not None:
+                assignments[key] = buffered
+            else:
+                self.exposures.record(assignment)
+        return assignments
+
+    def _stored_variant(self, test_key: str, row: AbTestAssignment) -> CatalogVariant:
+        """Catalog snapshot of a persisted assignment's variant."""
+        test = self.catalog.get(test_key)
+        for variant in test.variants if test else ():
+            if variant.id == row.variant_id:
+                return variant
+        return CatalogVariant(
+            id=row.variant.id,
+            variant_key=row.variant.variant_key,
+            is_control=row.variant.is_control,
+            upper_bound=0.0,
+            configuration=row.variant.configuration,
+        )
+
+
+# Global assignment service instance
+_assignment_service: Optional[AbAssignmentService] = None
+
+
+def get_ab_assignment_service() -> AbAssignmentService:
+    """Get the global A/B assignment service instance."""
+    global _assignment_service
+    if _assignment_service is None:
+        _assignment_service = AbAssignmentService()
+    return _assignment_service
@@ -0,0 +1,164 @@
+"""Sufficient-statistics based analysis for A/B test variants.
+
+Every estimate here is computed from per-variant running sums (participants,
+conversions, value sums and pre-experiment covariate sums), so analysis cost
+is O(variants) no matter how many users took part in a test.
+"""
+import math
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+
+@dataclass
+class VariantSufficientStats:
+    """Running sums for one variant.
+
+    ``covariate`` is a pre-experiment measurement of the same user (CUPED);
+    users without one contribute ``0``, which keeps the adjustment unbiased.
+    """
+
+    participants: int = 0
+    conversions: int = 0
+    value_sum: float = 0.0
+    value_sum_sq: float = 0.0
+    covariate_sum: float = 0.0
+    covariate_sum_sq: float = 0.0
+    covariate_conversion_sum: float = 0.0
+
+    @classmethod
+    def from_variant(cls, variant) -> "VariantSufficientStats":
+        """Read the counters maintained on an ``AbTestVariant`` row."""
+        return cls(
+            participants=variant.total_users or 0,
+            conversions=variant.total_conversions or 0,
+            value_sum=variant.value_sum or 0.0,
+            value_sum_sq=variant.value_sum_sq or 0.0,
+            covariate_sum=variant.covariate_sum or 0.0,
+            covariate_sum_sq=variant.covariate_sum_sq or 0.0,
+            covariate_conversion_sum=variant.covariate_conversion_sum or 0.0,
+        )
+
+    @property
+    def conversion_rate(self) -> float:
+        """Share of participants that converted."""
+        if not self.participants:
+            return 0.0
+        return self.conversions / self.participants
+
+    @property
+    def mean_value(self) -> float:
+        """Average conversion value per participant."""
+        if not self.participants:
+            return 0.0
+        return self.value_sum / self.participants
+
+    @property
+    def value_variance(self) -> float:
+        """Sample variance of the per-participant conversion value."""
+        return _variance(self.participants, self.value_sum, self.value_sum_sq)
+
+    @property
+    def covariate_variance(self) -> float:
+        """Sample variance of the pre-experiment covariate."""
+        return _variance(self.participants, self.covariate_sum, self.covariate_sum_sq)
+
+    @property
+    def covariance(self) -> float:
+        """Sample covariance between covariate and conversion indicator."""
+        n = self.participants
+        if n < 2:
+            return 0.0
+        return (
+            self.covariate_conversion_sum - self.covariate_sum * self.conversions / n
+        ) / (n - 1)
+
+
+def _variance(n: int, total: float, total_sq: float) -> float:
+    if n < 2:
+        return 0.0
+    return max(0.0, (total_sq - total * total / n) / (n - 1))
+
+
+def normal_cdf(x: float) -> float:
+    """Cumulative distribution function for standard normal distribution."""
+    return (1.0 + math.erf(x / math.sqrt(2.0))) / 2.0
+
+
+def cuped_theta(variants: Iterable[VariantSufficientStats]) -> float:
+    """Pooled regression coefficient of the conversion indicator on the covariate."""
+    pooled = VariantSufficientStats()
+    for v in variants:
+        pooled.participants += v.participants
+        pooled.conversions += v.conversions
+        pooled.covariate_sum += v.covariate_sum
+        pooled.covariate_sum_sq += v.covariate_sum_sq
+        pooled.covariate_conversion_sum += v.covariate_conversion_sum
+
+    variance = pooled.covariate_variance
+    if variance == 0:
+        return 0.0
+    return pooled.covariance / variance
+
+
+def cuped_adjusted(
+    stats: VariantSufficientStats, theta: float, covariate_mean: float
+) -> Tuple[float, float]:
+    """CUPED-adjusted conversion rate and per-participant variance."""
+    n = stats.participants
+    if not n:
+        return 0.0, 0.0
+    rate = stats.conversion_rate
+    adjusted = rate - theta * (stats.covariate_sum / n - covariate_mean)
+    variance = (
+        rate * (1 - rate)
+        - 2 * theta * stats.covariance
+        + theta * theta * stats.covariate_variance
+    )
+    return adjusted, max(variance, 0.0)
+
+
+def two_sample_z_test(
+    mean_a: float,
+    var_a: float,
+    n_a: int,
+    mean_b: float,
+    var_b: float,
+    n_b: int,
+    z_critical: float,
+) -> Tuple[Optional[float], Optional[Tuple[float, float]]]:
+    """Two-sided z-test on ``mean_b - mean_a`` with its confidence interval."""
+    if not n_a or not n_b:
+        return None, None
+    se = math.sqrt(var_a / n_a + var_b / n_b)
+    if se == 0:
+        return None, None
+    diff = mean_b - mean_a
+    p_value = 2 * (1 - normal_cdf(abs(diff / se)))
+    margin = z_critical * se
+    return p_value, (diff - margin, diff + margin)
+
+
+def msprt_p_value(
+    control: VariantSufficientStats,
+    treatment: VariantSufficientStats,
+    tau_sq: float,
+) -> Optional[float]:
+    """Always-valid p-value from a mixture sequential probability ratio test.
+
+    Uses a normal mixing distribution ``N(0, tau_sq)`` over the difference in
+    conversion rates, so results may be checked after every conversion without
+    inflating the false-positive rate.
+    """
+    if not control.participants or not treatment.participants or tau_sq <= 0:
+        return None
+    p1, p2 = control.conversion_rate, treatment.conversion_rate
+    v = p1 * (1 - p1) / control.participants + p2 * (1 - p2) / treatment.participants
+    if v <= 0:
+        return None
+    diff = p2 - p1
+    exponent = diff * diff * tau_sq / (2 * v * (v + tau_sq))
+    try:
+        likelihood_ratio = math.sqrt(v / (v + tau_sq)) * math.exp(exponent)
+    except OverflowError:
+        return 0.0
+    return min(1.0, 1.0 / likelihood_ratio)
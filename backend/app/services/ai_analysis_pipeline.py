@@ -0,0 +1,652 @@
+"""Provider-agnostic request pipeline for AI content analysis.
+
+Every analysis prompt goes through ``AIAnalysisPipeline``, which
+
+- reuses one pooled ``aiohttp`` session per event loop instead of opening a
+  connection per request
+- caches parsed results by a hash of provider, analysis type and prompt, so
+  re-analysing unchanged content is free, and collapses identical in-flight
+  requests into one provider call
+- packs several prompts of the same analysis type into one provider call
+  when the provider supports it, falling back to single calls if the batched
+  response cannot be split back up
+- throttles each provider with a token bucket sized from its tokens-per-minute
+  quota
+
+``StubProvider`` answers locally with canned responses (and optional
+simulated latency), which keeps development and offline benchmarks free of
+network calls.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import aiohttp
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Rough prompt size estimate; providers bill ~4 characters per token
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for rate budgeting."""
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def _parse_json_response(content: str) -> Dict[str, Any]:
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError:
+        return {"raw_response": content}
+    return parsed if isinstance(parsed, dict) else {"raw_response": content}
+
+
+@dataclass
+class AIRequest:
+    """One provider call: a single prompt or a batch of ``batch_size`` prompts."""
+
+    prompt: str
+    analysis_type: str
+    batch_size: int = 1
+
+
+class TokenBucket:
+    """Token bucket that reserves capacity up front.
+
+    ``acquire`` deducts immediately and sleeps off any deficit, so concurrent
+    callers queue behind each other without a lock: there is no await between
+    reading and updating the balance.
+    """
+
+    def __init__(self, tokens_per_minute: int, capacity: Optional[int] = None):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = capacity or tokens_per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, tokens: int) -> float:
+        """Reserve ``tokens``; returns the number of seconds spent waiting."""
+        self._refill()
+        self._tokens -= min(tokens, self.capacity)
+        if self._tokens >= 0:
+            return 0.0
+        wait = -self._tokens / self.rate
+        await asyncio.sleep(wait)
+        return wait
+
+
+class AnalysisResultCache:
+    """Bounded LRU of parsed analysis results with a TTL."""
+
+    def __init__(self, max_entries: int = 5000, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class AIProvider:
+    """Base class for analysis providers."""
+
+    name = "base"
+    supports_batching = True
+
+    def __init__(self, tokens_per_minute: Optional[int] = None):
+        self.tokens_per_minute = tokens_per_minute
+
+    def system_prompt(self, request: AIRequest) -> str:
+        instructions = (
+            f"You are an expert content analyst. Provide detailed "
+            f"{request.analysis_type} in JSON format."
+        )
+        if request.batch_size > 1:
+            instructions += (
+                f' Respond with a JSON object {{"results": [...]}} holding exactly '
+                f"{request.batch_size} analysis objects, one per item, in order."
+            )
+        return instructions
+
+    async def complete(
+        self, session: Optional[aiohttp.ClientSession], request: AIRequest
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class OpenAIProvider(AIProvider):
+    """OpenAI chat completions."""
+
+    name = "openai"
+    url = "https://api.openai.com/v1/chat/completions"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4",
+        max_tokens: int = 4000,
+        tokens_per_minute: Optional[int] = None,
+    ):
+        super().__init__(tokens_per_minute)
+        self.api_key = api_key
+        self.model = model
+        self.max_tokens = max_tokens
+
+    async def complete(
+        self, session: Optional[aiohttp.ClientSession], request: AIRequest
+    ) -> Dict[str, Any]:
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt(request)},
+                {"role": "user", "content": request.prompt},
+            ],
+            "max_tokens": self.max_tokens,
+            "temperature": 0.7,
+        }
+        async with session.post(self.url, headers=headers, json=payload) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"OpenAI API error {response.status}: {error_text}")
+            result = await response.json()
+            return _parse_json_response(result["choices"][0]["message"]["content"])
+
+
+class AnthropicProvider(AIProvider):
+    """Anthropic messages API."""
+
+    name = "anthropic"
+    url = "https://api.anthropic.com/v1/messages"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-3-sonnet-20240229",
+        max_tokens: int = 4000,
+        tokens_per_minute: Optional[int] = None,
+    ):
+        super().__init__(tokens_per_minute)
+        self.api_key = api_key
+        self.model = model
+        self.max_tokens = max_tokens
+
+    async def complete(
+        self, session: Optional[aiohttp.ClientSession], request: AIRequest
+    ) -> Dict[str, Any]:
+        headers = {
+            "x-api-key": self.api_key,
+            "Content-Type": "application/json",
+        }
+        payload = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"{self.system_prompt(request)}\n\n{request.prompt}",
+                }
+            ],
+        }
+        async with session.post(self.url, headers=headers, json=payload) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Anthropic API error {response.status}: {error_text}")
+            result = await response.json()
+            return _parse_json_response(result["content"][0]["text"])
+
+
+STUB_RESPONSES: Dict[str, Dict[str, Any]] = {
+    "quality_analysis": {
+        "quality_score": 0.75,
+        "strengths": ["Clear writing", "Good structure"],
+        "weaknesses": ["Could be more engaging"],
+        "improvements": ["Add more examples", "Include call-to-action"],
+        "readability": "good",
+        "completeness": "mostly_complete",
+    },
+    "topic_extraction": {
+        "main_topics": ["technology", "productivity", "automation"],
+        "keywords": ["AI", "efficiency", "tools"],
+        "themes": ["innovation", "workplace transformation"],
+        "classification": "technology",
+        "difficulty_level": "intermediate",
+    },
+    "sentiment_analysis": {
+        "sentiment_score": 0.2,
+        "emotional_tone": "positive",
+        "confidence": 0.8,
+        "emotional_indicators": ["exciting", "beneficial", "promising"],
+    },
+    "optimization": {
+        "seo_improvements": ["Add meta description", "Optimize title"],
+        "engagement_enhancements": ["Add interactive elements"],
+        "structure_improvements": ["Use bullet points"],
+        "cta_optimization": ["Make CTA more prominent"],
+        "targeting_suggestions": ["Focus on professionals"],
+        "improvement_potential": 0.6,
+        "implementation_complexity": "medium",
+    },
+    "engagement_prediction": {
+        "engagement_score": 0.65,
+        "contributing_factors": ["Trending topic", "High quality"],
+        "reach_estimate": "medium",
+        "virality_potential": "medium",
+    },
+    "suggestion_generation": {
+        "title": "Discover This Amazing Content Just for You!",
+        "description": "Based on your interests in technology and productivity, this content is perfect for you.",
+        "call_to_action": "Explore Now",
+        "reasoning": "Matches user's technology interests",
+        "personalization_factors": ["interest_match", "category_preference"],
+        "confidence_factors": ["high_quality", "recent_content"],
+    },
+    "content_optimization": {
+        "structure_improvements": ["Add headings", "Include summary"],
+        "seo_enhancements": ["Optimize keywords", "Add alt text"],
+        "engagement_tactics": ["Add questions", "Include examples"],
+        "cta_optimization": ["Make more specific", "Add urgency"],
+        "targeting_refinements": ["Narrow audience", "Add personas"],
+        "estimated_impact": {"engagement": 0.3, "conversions": 0.2},
+    },
+    "trend_analysis": {
+        "trends": ["Increasing interest in AI", "Video content popularity"],
+        "top_performers": ["technology", "tutorials"],
+        "opportunities": ["AI tutorials", "Interactive content"],
+        "recommendations": ["Focus on video", "Add AI topics"],
+        "audience_insights": [
+            "Prefer short content",
+            "High engagement with tutorials",
+        ],
+    },
+}
+
+
+def stub_response(analysis_type: str) -> Dict[str, Any]:
+    """Canned response for an analysis type."""
+    response = STUB_RESPONSES.get(analysis_type)
+    if response is None:
+        return {"mock": True, "type": analysis_type}
+    return copy.deepcopy(response)
+
+
+class StubProvider(AIProvider):
+    """Local provider returning canned responses, for development and benchmarks.
+
+    ``latency`` simulates a per-call round trip so concurrency, batching and
+    throttling behave as they would against a real provider.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0, tokens_per_minute: Optional[int] = None):
+        super().__init__(tokens_per_minute)
+        self.latency = latency
+        self.calls = 0
+
+    async def complete(
+        self, session: Optional[aiohttp.ClientSession], request: AIRequest
+    ) -> Dict[str, Any]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.batch_size > 1:
+            return {
+                "results": [
+                    stub_response(request.analysis_type)
+                    for _ in range(request.batch_size)
+                ]
+            }
+        return stub_response(request.analysis_type)
+
+
+AnalysisOutcome = Union[Dict[str, Any], BaseException]
+
+
+class AIAnalysisPipeline:
+    """Cached, batched and rate-limited access to one analysis provider."""
+
+    def __init__(
+        self,
+        provider: AIProvider,
+        *,
+        pool_size: int = 20,
+        request_timeout: float = 30,
+        cache: Optional[AnalysisResultCache] = None,
+        batch_size: int = 8,
+        response_tokens_per_item: int = 400,
+    ):
+        self.provider = provider
+        self.pool_size = pool_size
+        self.request_timeout = request_timeout
+        self.cache = cache if cache is not None else AnalysisResultCache()
+        self.batch_size = max(1, batch_size)
+        self.response_tokens_per_item = response_tokens_per_item
+        self.bucket = (
+            TokenBucket(provider.tokens_per_minute)
+            if provider.tokens_per_minute
+            else None
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            "provider_calls": 0,
+            "batched_calls": 0,
+            "batch_fallbacks": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "deduplicated": 0,
+            "errors": 0,
+            "throttled_seconds": 0.0,
+        }
+
+    def cache_key(self, prompt: str, analysis_type: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.provider.name, analysis_type, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    async def get_session(self) -> Optional[aiohttp.ClientSession]:
+        """Shared session for the running loop; ``None`` for the stub provider."""
+        if isinstance(self.provider, StubProvider):
+            return None
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            # A session is bound to the loop that created it; worker processes
+            # that run each task in a fresh loop get a fresh pool.
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session."""
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            try:
+                await session.close()
+            except RuntimeError:
+                # Session belonged to a loop that is already gone
+                pass
+
+    async def _call_provider(self, request: AIRequest) -> Dict[str, Any]:
+        if self.bucket is not None:
+            cost = (
+                estimate_tokens(request.prompt)
+                + self.response_tokens_per_item * request.batch_size
+            )
+            self.stats["throttled_seconds"] += await self.bucket.acquire(cost)
+        self.stats["provider_calls"] += 1
+        try:
+            return await self.provider.complete(await self.get_session(), request)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+
+    def _claim(self, key: str) -> Optional[asyncio.Future]:
+        """Register an in-flight key; returns ``None`` if this caller owns it."""
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self.stats["deduplicated"] += 1
+            return existing
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        return None
+
+    def _settle(self, key: str, outcome: AnalysisOutcome) -> None:
+        future = self._inflight.pop(key, None)
+        if isinstance(outcome, BaseException):
+            if future is not None and not future.done():
+                future.set_exception(outcome)
+                # Waiters re-raise; don't warn when nobody was waiting
+                future.exception()
+            return
+        self.cache.set(key, outcome)
+        if future is not None and not future.done():
+            future.set_result(outcome)
+
+    async def analyze(self, prompt: str, analysis_type: str) -> Dict[str, Any]:
+        """Run one prompt through the cache and the provider."""
+        key = self.cache_key(prompt, analysis_type)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+        self.stats["cache_misses"] += 1
+
+        pending = self._claim(key)
+        if pending is not None:
+            return copy.deepcopy(await asyncio.shield(pending))
+
+        try:
+            result = await self._call_provider(AIRequest(prompt, analysis_type))
+        except BaseException as e:
+            self._settle(key, e)
+            raise
+        self._settle(key, result)
+        return copy.deepcopy(result)
+
+    async def analyze_many(
+        self, prompts: List[str], analysis_type: str
+    ) -> List[AnalysisOutcome]:
+        """Analyze several prompts, batching cache misses into shared calls.
+
+        Returns one entry per prompt, in order: the parsed result, or the
+        exception raised for it (like ``asyncio.gather(return_exceptions=True)``).
+        """
+        keys = [self.cache_key(prompt, analysis_type) for prompt in prompts]
+        outcomes: Dict[str, Any] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        owned: "OrderedDict[str, str]" = OrderedDict()
+
+        for key, prompt in zip(keys, prompts):
+            if key in outcomes or key in waiting or key in owned:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                outcomes[key] = cached
+                continue
+            self.stats["cache_misses"] += 1
+            pending = self._claim(key)
+            if pending is not None:
+                waiting[key] = pending
+            else:
+                owned[key] = prompt
+
+        chunk = self.batch_size if self.provider.supports_batching else 1
+        owned_items = list(owned.items())
+        batches = [
+            owned_items[i : i + chunk] for i in range(0, len(owned_items), chunk)
+        ]
+        try:
+            await asyncio.gather(
+                *(self._run_batch(batch, analysis_type, outcomes) for batch in batches)
+            )
+        except BaseException as e:
+            # A batch cancelled before it started never settled its keys
+            for key in owned:
+                if key not in outcomes:
+                    self._settle(key, e)
+            raise
+
+        for key, future in waiting.items():
+            try:
+                outcomes[key] = await asyncio.shield(future)
+            except Exception as e:
+                outcomes[key] = e
+
+        return [
+            (
+                outcomes[key]
+                if isinstance(outcomes[key], BaseException)
+                else copy.deepcopy(outcomes[key])
+            )
+            for key in keys
+        ]
+
+    async def _run_batch(
+        self,
+        batch: List[Tuple[str, str]],
+        analysis_type: str,
+        outcomes: Dict[str, Any],
+    ) -> None:
+        try:
+            await self._run_batch_calls(batch, analysis_type, outcomes)
+        except BaseException as e:
+            # Waiters on these keys would otherwise hang on their futures
+            for key, _ in batch:
+                if key not in outcomes:
+                    self._settle(key, e)
+            raise
+
+    async def _run_batch_calls(
+        self,
+        batch: List[Tuple[str, str]],
+        analysis_type: str,
+        outcomes: Dict[str, Any],
+    ) -> None:
+        results: Optional[List[Any]] = None
+        if len(batch) > 1:
+            request = AIRequest(
+                self._batch_prompt([prompt for _, prompt in batch]),
+                analysis_type,
+                batch_size=len(batch),
+            )
+            try:
+                response = await self._call_provider(request)
+                self.stats["batched_calls"] += 1
+                candidates = response.get("results")
+                if (
+                    isinstance(candidates, list)
+                    and len(candidates) == len(batch)
+                    and all(isinstance(item, dict) for item in candidates)
+                ):
+                    results = candidates
+            except Exception as e:
+                logger.warning(
+                    f"Batched {analysis_type} call for {len(batch)} items failed: {e}"
+                )
+            if results is None:
+                self.stats["batch_fallbacks"] += 1
+
+        if results is None:
+            singles = await asyncio.gather(
+                *(
+                    self._call_provider(AIRequest(prompt, analysis_type))
+                    for _, prompt in batch
+                ),
+                return_exceptions=True,
+            )
+            results = list(singles)
+
+        for (key, _), outcome in zip(batch, results):
+            self._settle(key, outcome)
+            outcomes[key] = outcome
+
+    @staticmethod
+    def _batch_prompt(prompts: List[str]) -> str:
+        sections = [
+            f"Analyze each of the following {len(prompts)} items independently."
+        ]
+        for index, prompt in enumerate(prompts, start=1):
+            sections.append(f"### Item {index}\n{prompt.strip()}")
+        return "\n\n".join(sections)
+
+
+def build_provider(settings=None) -> AIProvider:
+    """Select the configured provider."""
+    settings = settings or get_settings()
+    choice = getattr(settings, "ai_provider", "auto")
+    openai_key = getattr(settings, "OPENAI_API_KEY", None)
+    anthropic_key = getattr(settings, "ANTHROPIC_API_KEY", None)
+
+    if choice in ("auto", "openai") and openai_key:
+        return OpenAIProvider(
+            openai_key, tokens_per_minute=settings.ai_openai_tokens_per_minute
+        )
+    if choice in ("auto", "anthropic") and anthropic_key:
+        return AnthropicProvider(
+            anthropic_key, tokens_per_minute=settings.ai_anthropic_tokens_per_minute
+        )
+    if choice not in ("auto", "stub"):
+        logger.warning(f"AI provider '{choice}' is not configured; using stub")
+    return StubProvider(latency=settings.ai_stub_latency_ms / 1000.0)
+
+
+# Global pipeline instance
+_pipeline: Optional[AIAnalysisPipeline] = None
+
+
+def get_ai_pipeline() -> AIAnalysisPipeline:
+    """Get the global AI analysis pipeline instance."""
+    global _pipeline
+    if _pipeline is None:
+        settings = get_settings()
+        _pipeline = AIAnalysisPipeline(
+            build_provider(settings),
+            pool_size=settings.ai_http_pool_size,
+            cache=AnalysisResultCache(
+                max_entries=settings.ai_analysis_cache_size,
+                ttl=settings.ai_analysis_cache_ttl,
+            ),
+            batch_size=settings.ai_analysis_batch_size,
+        )
+    return _pipeline
+
+
+async def close_ai_pipeline() -> None:
+    """Release the global pipeline's HTTP pool."""
+    if _pipeline is not None:
+        await _pipeline.close()
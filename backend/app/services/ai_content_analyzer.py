@@ -7,13 +7,16 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
-import aiohttp
 from app.crud import content_suggestion as crud_content
 from app.models.content_suggestion import ContentCategory, ContentItem, ContentType
 from app.schemas.content_suggestion import ContentItemCreate
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import get_settings
+from app.services.ai_analysis_pipeline import (
+    AIAnalysisPipeline,
+    get_ai_pipeline,
+    stub_response,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +24,19 @@ logger = logging.getLogger(__name__)
 class AIContentAnalyzer:
     """AI-powered content analysis and suggestion engine."""
 
-    def __init__(self):
-        settings = get_settings()
-        self.openai_api_key = getattr(settings, "OPENAI_API_KEY", None)
-        self.anthropic_api_key = getattr(settings, "ANTHROPIC_API_KEY", None)
+    DEFAULT_ANALYSIS_TYPES = [
+        "quality",
+        "topics",
+        "sentiment",
+        "optimization",
+        "engagement",
+    ]
+
+    def __init__(self, pipeline: Optional[AIAnalysisPipeline] = None):
+        # Analyzers are created per request; the pipeline (HTTP pool, result
+        # cache, rate limits) is shared process-wide.
+        self.pipeline = pipeline or get_ai_pipeline()
         self.model_version = "v1.0.0"
-        self.max_tokens = 4000
-        self.request_timeout = 30
 
     async def analyze_content_item(
         self,
@@ -44,58 +53,23 @@ class AIContentAnalyzer:
 
             # Determine analysis types
             if not analysis_types:
-                analysis_types = [
-                    "quality",
-                    "topics",
-                    "sentiment",
-                    "optimization",
-                    "engagement",
-                ]
-
-            # Perform AI analysis
-            analysis_results = {}
-
-            if "quality" in analysis_types:
-                analysis_results["quality"] = await self._analyze_quality(
-                    content_text, content_item
+                analysis_types = self.DEFAULT_ANALYSIS_TYPES
+
+            # The analyses are independent, so run them concurrently
+            names = [
+                name for name in self.DEFAULT_ANALYSIS_TYPES if name in analysis_types
+            ]
+            results = await asyncio.gather(
+                *(
+                    self._run_analysis(name, content_text, content_item)
+                    for name in names
                 )
-
-            if "topics" in analysis_types:
-                analysis_results["topics"] = await self._extract_topics(content_text)
-
-            if "sentiment" in analysis_types:
-                analysis_results["sentiment"] = await self._analyze_sentiment(
-                    content_text
-                )
-
-            if "optimization" in analysis_types:
-                analysis_results[
-                    "optimization"
-                ] = await self._generate_optimization_suggestions(
-                    content_text, content_item
-                )
-
-            if "engagement" in analysis_types:
-                analysis_results["engagement"] = await self._predict_engagement(
-                    content_text, content_item
-                )
-
-            # Calculate scores
-            quality_score = analysis_results.get("quality", {}).get("score", 0.5)
-            sentiment_score = analysis_results.get("sentiment", {}).get("score", 0.0)
-            engagement_prediction = analysis_results.get("engagement", {}).get(
-                "prediction", 0.5
             )
+            analysis_results = dict(zip(names, results))
 
             # Update content item with analysis results
-            await crud_content.content_item.update_ai_analysis(
-                db,
-                content_id=content_item.content_id,
-                quality_score=quality_score,
-                sentiment_score=sentiment_score,
-                topics=analysis_results.get("topics", {}),
-                ai_analysis=analysis_results,
-                optimization_suggestions=analysis_results.get("optimization", {}),
+            quality_score, sentiment_score = await self._store_analysis(
+                db, content_item, analysis_results
             )
 
             processing_time = time.time() - start_time
@@ -122,6 +96,86 @@ class AIContentAnalyzer:
                 "processing_time_seconds": time.time() - start_time,
             }
 
+    async def analyze_content_items(
+        self,
+        db: AsyncSession,
+        content_items: List[ContentItem],
+        analysis_types: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Analyze many content items, batching prompts per analysis type.
+
+        Each analysis type is sent to the provider as one call per
+        ``batch_size`` items (cache hits are skipped entirely), and all types
+        run concurrently. Results are returned in input order with the same
+        shape as ``analyze_content_item``.
+        """
+        start_time = time.time()
+        analysis_types = analysis_types or self.DEFAULT_ANALYSIS_TYPES
+        names = [name for name in self.DEFAULT_ANALYSIS_TYPES if name in analysis_types]
+        texts = [self._prepare_content_text(item) for item in content_items]
+
+        per_type = await asyncio.gather(
+            *(self._run_analysis_many(name, texts, content_items) for name in names)
+        )
+        analysis_time = time.time() - start_time
+
+        # The session is not safe for concurrent use, so persist sequentially
+        outcomes = []
+        for index, content_item in enumerate(content_items):
+            analysis_results = {
+                name: results[index] for name, results in zip(names, per_type)
+            }
+            try:
+                await self._store_analysis(db, content_item, analysis_results)
+                outcomes.append(
+                    {
+                        "success": True,
+                        "content_id": content_item.content_id,
+                        "analysis_results": analysis_results,
+                        "processing_time_seconds": analysis_time,
+                        "model_version": self.model_version,
+                    }
+                )
+            except Exception as e:
+                logger.error(
+                    f"Error storing analysis for content {content_item.content_id}: {str(e)}"
+                )
+                outcomes.append(
+                    {
+                        "success": False,
+                        "content_id": content_item.content_id,
+                        "error": str(e),
+                        "processing_time_seconds": analysis_time,
+                    }
+                )
+
+        logger.info(
+            f"Analyzed {len(content_items)} content items in "
+            f"{time.time() - start_time:.2f}s"
+        )
+        return outcomes
+
+    async def _store_analysis(
+        self,
+        db: AsyncSession,
+        content_item: ContentItem,
+        analysis_results: Dict[str, Any],
+    ) -> Tuple[float, float]:
+        """Persist analysis results; returns (quality, sentiment) scores."""
+        quality_score = analysis_results.get("quality", {}).get("score", 0.5)
+        sentiment_score = analysis_results.get("sentiment", {}).get("score", 0.0)
+
+        await crud_content.content_item.update_ai_analysis(
+            db,
+            content_id=content_item.content_id,
+            quality_score=quality_score,
+            sentiment_score=sentiment_score,
+            topics=analysis_results.get("topics", {}),
+            ai_analysis=analysis_results,
+            optimization_suggestions=analysis_results.get("optimization", {}),
+        )
+        return quality_score, sentiment_score
+
     async def generate_content_suggestions(
         self,
         db: AsyncSession,
@@ -169,19 +223,22 @@ class AIContentAnalyzer:
             top_content = scored_content[:max_suggestions]
 
             # Generate suggestion details with AI
-            suggestions = []
-            for item_data in top_content:
-                suggestion_details = await self._generate_suggestion_details(
-                    item_data["content_item"], user_context, item_data
-                )
-                suggestions.append(
-                    {
-                        **item_data,
-                        **suggestion_details,
-                    }
+            details = await asyncio.gather(
+                *(
+                    self._generate_suggestion_details(
+                        item_data["content_item"], user_context, item_data
+                    )
+                    for item_data in top_content
                 )
+            )
 
-            return suggestions
+            return [
+                {
+                    **item_data,
+                    **suggestion_details,
+                }
+                for item_data, suggestion_details in zip(top_content, details)
+            ]
 
         except Exception as e:
             logger.error(f"Error generating suggestions for user {user_id}: {str(e)}")
@@ -341,12 +398,113 @@ class AIContentAnalyzer:
             "engagement_history": user_preferences.get("engagement_history", {}),
         }
 
+    # Analysis name -> (provider analysis type, prompt builder, result parser,
+    # fallback result when parsing fails)
+    def _analysis_spec(self, name: str) -> Tuple[str, Any, Any, Dict[str, Any]]:
+        specs = {
+            "quality": (
+                "quality_analysis",
+                self._quality_prompt,
+                self._parse_quality,
+                {"score": 0.5},
+            ),
+            "topics": (
+                "topic_extraction",
+                self._topics_prompt,
+                self._parse_topics,
+                {"main_topics": [], "keywords": []},
+            ),
+            "sentiment": (
+                "sentiment_analysis",
+                self._sentiment_prompt,
+                self._parse_sentiment,
+                {"score": 0.0, "tone": "neutral"},
+            ),
+            "optimization": (
+                "optimization",
+                self._optimization_prompt,
+                self._parse_optimization,
+                {"improvement_potential": 0.5},
+            ),
+            "engagement": (
+                "engagement_prediction",
+                self._engagement_prompt,
+                self._parse_engagement,
+                {"prediction": 0.5},
+            ),
+        }
+        return specs[name]
+
+    async def _run_analysis(
+        self, name: str, content_text: str, content_item: ContentItem
+    ) -> Dict[str, Any]:
+        """Run one named analysis for one content item."""
+        analysis_type, build_prompt, parse, fallback = self._analysis_spec(name)
+        try:
+            prompt = build_prompt(content_text, content_item)
+            result = await self._call_ai_api(prompt, analysis_type)
+            return parse(result)
+        except Exception as e:
+            logger.error(f"Error in {name} analysis: {str(e)}")
+            return {**fallback, "error": str(e)}
+
+    async def _run_analysis_many(
+        self,
+        name: str,
+        content_texts: List[str],
+        content_items: List[ContentItem],
+    ) -> List[Dict[str, Any]]:
+        """Run one named analysis for many content items in batched calls."""
+        analysis_type, build_prompt, parse, fallback = self._analysis_spec(name)
+        prompts = [
+            build_prompt(text, item) for text, item in zip(content_texts, content_items)
+        ]
+        outcomes = await self.pipeline.analyze_many(prompts, analysis_type)
+
+        results = []
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error in AI API call: {str(outcome)}")
+                outcome = self._get_mock_ai_response(analysis_type)
+            try:
+                results.append(parse(outcome))
+            except Exception as e:
+                logger.error(f"Error in {name} analysis: {str(e)}")
+                results.append({**fallback, "error": str(e)})
+        return results
+
     async def _analyze_quality(
         self, content_text: str, content_item: ContentItem
     ) -> Dict[str, Any]:
         """Analyze content quality using AI."""
-        try:
-            prompt = f"""
+        return await self._run_analysis("quality", content_text, content_item)
+
+    async def _extract_topics(
+        self, content_text: str, content_item: Optional[ContentItem] = None
+    ) -> Dict[str, Any]:
+        """Extract topics and keywords using AI."""
+        return await self._run_analysis("topics", content_text, content_item)
+
+    async def _analyze_sentiment(
+        self, content_text: str, content_item: Optional[ContentItem] = None
+    ) -> Dict[str, Any]:
+        """Analyze content sentiment using AI."""
+        return await self._run_analysis("sentiment", content_text, content_item)
+
+    async def _generate_optimization_suggestions(
+        self, content_text: str, content_item: ContentItem
+    ) -> Dict[str, Any]:
+        """Generate optimization suggestions using AI."""
+        return await self._run_analysis("optimization", content_text, content_item)
+
+    async def _predict_engagement(
+        self, content_text: str, content_item: ContentItem
+    ) -> Dict[str, Any]:
+        """Predict content engagement using AI."""
+        return await self._run_analysis("engagement", content_text, content_item)
+
+    def _quality_prompt(self, content_text: str, content_item: ContentItem) -> str:
+        return f"""
             Analyze the quality of this {content_item.content_type} content:
 
             {content_text}
@@ -362,25 +520,20 @@ class AIContentAnalyzer:
             Return as JSON format.
             """
 
-            result = await self._call_ai_api(prompt, "quality_analysis")
-
-            return {
-                "score": result.get("quality_score", 0.5),
-                "strengths": result.get("strengths", []),
-                "weaknesses": result.get("weaknesses", []),
-                "improvements": result.get("improvements", []),
-                "readability": result.get("readability", "medium"),
-                "completeness": result.get("completeness", "partial"),
-            }
-
-        except Exception as e:
-            logger.error(f"Error in quality analysis: {str(e)}")
-            return {"score": 0.5, "error": str(e)}
+    def _parse_quality(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "score": result.get("quality_score", 0.5),
+            "strengths": result.get("strengths", []),
+            "weaknesses": result.get("weaknesses", []),
+            "improvements": result.get("improvements", []),
+            "readability": result.get("readability", "medium"),
+            "completeness": result.get("completeness", "partial"),
+        }
 
-    async def _extract_topics(self, content_text: str) -> Dict[str, Any]:
-        """Extract topics and keywords using AI."""
-        try:
-            prompt = f"""
+    def _topics_prompt(
+        self, content_text: str, content_item: Optional[ContentItem]
+    ) -> str:
+        return f"""
             Extract topics, keywords, and themes from this content:
 
             {content_text}
@@ -395,24 +548,19 @@ class AIContentAnalyzer:
             Return as JSON format.
             """
 
-            result = await self._call_ai_api(prompt, "topic_extraction")
-
-            return {
-                "main_topics": result.get("main_topics", []),
-                "keywords": result.get("keywords", []),
-                "themes": result.get("themes", []),
-                "classification": result.get("classification", "general"),
-                "difficulty_level": result.get("difficulty_level", "intermediate"),
-            }
-
-        except Exception as e:
-            logger.error(f"Error in topic extraction: {str(e)}")
-            return {"main_topics": [], "keywords": []}
+    def _parse_topics(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "main_topics": result.get("main_topics", []),
+            "keywords": result.get("keywords", []),
+            "themes": result.get("themes", []),
+            "classification": result.get("classification", "general"),
+            "difficulty_level": result.get("difficulty_level", "intermediate"),
+        }
 
-    async def _analyze_sentiment(self, content_text: str) -> Dict[str, Any]:
-        """Analyze content sentiment using AI."""
-        try:
-            prompt = f"""
+    def _sentiment_prompt(
+        self, content_text: str, content_item: Optional[ContentItem]
+    ) -> str:
+        return f"""
             Analyze the sentiment and tone of this content:
 
             {content_text}
@@ -426,25 +574,16 @@ class AIContentAnalyzer:
             Return as JSON format.
             """
 
-            result = await self._call_ai_api(prompt, "sentiment_analysis")
-
-            return {
-                "score": result.get("sentiment_score", 0.0),
-                "tone": result.get("emotional_tone", "neutral"),
-                "confidence": result.get("confidence", 0.5),
-                "indicators": result.get("emotional_indicators", []),
-            }
-
-        except Exception as e:
-            logger.error(f"Error in sentiment analysis: {str(e)}")
-            return {"score": 0.0, "tone": "neutral"}
+    def _parse_sentiment(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "score": result.get("sentiment_score", 0.0),
+            "tone": result.get("emotional_tone", "neutral"),
+            "confidence": result.get("confidence", 0.5),
+            "indicators": result.get("emotional_indicators", []),
+        }
 
-    async def _generate_optimization_suggestions(
-        self, content_text: str, content_item: ContentItem
-    ) -> Dict[str, Any]:
-        """Generate optimization suggestions using AI."""
-        try:
-            prompt = f"""
+    def _optimization_prompt(self, content_text: str, content_item: ContentItem) -> str:
+        return f"""
             Generate optimization suggestions for this {content_item.content_type} content
             in the {content_item.category} category:
 
@@ -465,28 +604,19 @@ class AIContentAnalyzer:
             Return as JSON format with specific, actionable recommendations.
             """
 
-            result = await self._call_ai_api(prompt, "optimization")
-
-            return {
-                "seo_improvements": result.get("seo_improvements", []),
-                "engagement_enhancements": result.get("engagement_enhancements", []),
-                "structure_improvements": result.get("structure_improvements", []),
-                "cta_optimization": result.get("cta_optimization", []),
-                "targeting_suggestions": result.get("targeting_suggestions", []),
-                "improvement_potential": result.get("improvement_potential", 0.5),
-                "complexity": result.get("implementation_complexity", "medium"),
-            }
-
-        except Exception as e:
-            logger.error(f"Error generating optimization suggestions: {str(e)}")
-            return {"improvement_potential": 0.5}
+    def _parse_optimization(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "seo_improvements": result.get("seo_improvements", []),
+            "engagement_enhancements": result.get("engagement_enhancements", []),
+            "structure_improvements": result.get("structure_improvements", []),
+            "cta_optimization": result.get("cta_optimization", []),
+            "targeting_suggestions": result.get("targeting_suggestions", []),
+            "improvement_potential": result.get("improvement_potential", 0.5),
+            "complexity": result.get("implementation_complexity", "medium"),
+        }
 
-    async def _predict_engagement(
-        self, content_text: str, content_item: ContentItem
-    ) -> Dict[str, Any]:
-        """Predict content engagement using AI."""
-        try:
-            prompt = f"""
+    def _engagement_prompt(self, content_text: str, content_item: ContentItem) -> str:
+        return f"""
             Predict the engagement potential of this {content_item.content_type} content:
 
             {content_text}
@@ -507,18 +637,13 @@ class AIContentAnalyzer:
             Return as JSON format.
             """
 
-            result = await self._call_ai_api(prompt, "engagement_prediction")
-
-            return {
-                "prediction": result.get("engagement_score", 0.5),
-                "contributing_factors": result.get("contributing_factors", []),
-                "reach_estimate": result.get("reach_estimate", "medium"),
-                "virality_potential": result.get("virality_potential", "low"),
-            }
-
-        except Exception as e:
-            logger.error(f"Error predicting engagement: {str(e)}")
-            return {"prediction": 0.5}
+    def _parse_engagement(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "prediction": result.get("engagement_score", 0.5),
+            "contributing_factors": result.get("contributing_factors", []),
+            "reach_estimate": result.get("reach_estimate", "medium"),
+            "virality_potential": result.get("virality_potential", "low"),
+        }
 
     async def _calculate_content_relevance(
         self, content_item: ContentItem, user_context: Dict[str, Any]
@@ -785,162 +910,14 @@ class AIContentAnalyzer:
             return {"recommendations": [], "trends": []}
 
     async def _call_ai_api(self, prompt: str, analysis_type: str) -> Dict[str, Any]:
-        """Make API call to AI service (OpenAI or Anthropic)."""
+        """Make an AI call through the shared pipeline (cache, pool, rate limits)."""
         try:
-            # Try OpenAI first, then Anthropic as fallback
-            if self.openai_api_key:
-                return await self._call_openai(prompt, analysis_type)
-            elif self.anthropic_api_key:
-                return await self._call_anthropic(prompt, analysis_type)
-            else:
-                # Fallback to mock responses for development
-                return self._get_mock_ai_response(analysis_type)
+            return await self.pipeline.analyze(prompt, analysis_type)
 
         except Exception as e:
             logger.error(f"Error in AI API call: {str(e)}")
             return self._get_mock_ai_response(analysis_type)
 
-    async def _call_openai(self, prompt: str, analysis_type: str) -> Dict[str, Any]:
-        """Call OpenAI API."""
-        headers = {
-            "Authorization": f"Bearer {self.openai_api_key}",
-            "Content-Type": "application/json",
-        }
-
-        payload = {
-            "model": "gpt-4",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": f"You are an expert content analyst. Provide detailed {analysis_type} in JSON format.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            "max_tokens": self.max_tokens,
-            "temperature": 0.7,
-        }
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    content = result["choices"][0]["message"]["content"]
-                    try:
-                        return json.loads(content)
-                    except json.JSONDecodeError:
-                        return {"raw_response": content}
-                else:
-                    error_text = await response.text()
-                    raise Exception(f"OpenAI API error {response.status}: {error_text}")
-
-    async def _call_anthropic(self, prompt: str, analysis_type: str) -> Dict[str, Any]:
-        """Call Anthropic Claude API."""
-        headers = {
-            "x-api-key": self.anthropic_api_key,
-            "Content-Type": "application/json",
-        }
-
-        payload = {
-            "model": "claude-3-sonnet-20240229",
-            "max_tokens": self.max_tokens,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": f"You are an expert content analyst. Provide detailed {analysis_type} in JSON format.\n\n{prompt}",
-                }
-            ],
-        }
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "https://api.anthropic.com/v1/messages",
-                headers=headers,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    content = result["content"][0]["text"]
-                    try:
-                        return json.loads(content)
-                    except json.JSONDecodeError:
-                        return {"raw_response": content}
-                else:
-                    error_text = await response.text()
-                    raise Exception(
-                        f"Anthropic API error {response.status}: {error_text}"
-                    )
-
     def _get_mock_ai_response(self, analysis_type: str) -> Dict[str, Any]:
         """Get mock AI response for development/testing."""
-        mock_responses = {
-            "quality_analysis": {
-                "quality_score": 0.75,
-                "strengths": ["Clear writing", "Good structure"],
-                "weaknesses": ["Could be more engaging"],
-                "improvements": ["Add more examples", "Include call-to-action"],
-                "readability": "good",
-                "completeness": "mostly_complete",
-            },
-            "topic_extraction": {
-                "main_topics": ["technology", "productivity", "automation"],
-                "keywords": ["AI", "efficiency", "tools"],
-                "themes": ["innovation", "workplace transformation"],
-                "classification": "technology",
-                "difficulty_level": "intermediate",
-            },
-            "sentiment_analysis": {
-                "sentiment_score": 0.2,
-                "emotional_tone": "positive",
-                "confidence": 0.8,
-                "emotional_indicators": ["exciting", "beneficial", "promising"],
-            },
-            "optimization": {
-                "seo_improvements": ["Add meta description", "Optimize title"],
-                "engagement_enhancements": ["Add interactive elements"],
-                "structure_improvements": ["Use bullet points"],
-                "cta_optimization": ["Make CTA more prominent"],
-                "targeting_suggestions": ["Focus on professionals"],
-                "improvement_potential": 0.6,
-                "implementation_complexity": "medium",
-            },
-            "engagement_prediction": {
-                "engagement_score": 0.65,
-                "contributing_factors": ["Trending topic", "High quality"],
-                "reach_estimate": "medium",
-                "virality_potential": "medium",
-            },
-            "suggestion_generation": {
-                "title": "Discover This Amazing Content Just for You!",
-                "description": "Based on your interests in technology and productivity, this content is perfect for you.",
-                "call_to_action": "Explore Now",
-                "reasoning": "Matches user's technology interests",
-                "personalization_factors": ["interest_match", "category_preference"],
-                "confidence_factors": ["high_quality", "recent_content"],
-            },
-            "content_optimization": {
-                "structure_improvements": ["Add headings", "Include summary"],
-                "seo_enhancements": ["Optimize keywords", "Add alt text"],
-                "engagement_tactics": ["Add questions", "Include examples"],
-                "cta_optimization": ["Make more specific", "Add urgency"],
-                "targeting_refinements": ["Narrow audience", "Add personas"],
-                "estimated_impact": {"engagement": 0.3, "conversions": 0.2},
-            },
-            "trend_analysis": {
-                "trends": ["Increasing interest in AI", "Video content popularity"],
-                "top_performers": ["technology", "tutorials"],
-                "opportunities": ["AI tutorials", "Interactive content"],
-                "recommendations": ["Focus on video", "Add AI topics"],
-                "audience_insights": [
-                    "Prefer short content",
-                    "High engagement with tutorials",
-                ],
-            },
-        }
-
-        return mock_responses.get(analysis_type, {"mock": True, "type": analysis_type})
+        return stub_response(analysis_type)
@@ -0,0 +1,133 @@
+"""Streaming user event exports (GDPR data access requests).
+
+Exports are encoded chunk by chunk while events are read from a server-side
+cursor, so memory use does not depend on how many events a user has. The
+body is a JSON array, NDJSON or CSV, optionally gzipped as it is produced.
+
+Every exported record carries an opaque ``position``. A client whose
+download was interrupted sends the position of the last record it received
+and the export resumes with the record after it.
+"""
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from app.core.performance import StreamEncoder
+from app.models.event import Event
+from app.schemas.event import EventResponse
+
+EXPORT_MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+EXPORT_FIELDS = [*EventResponse.model_fields, "position"]
+
+
+def encode_position(timestamp: datetime, event_id: int) -> str:
+    """Opaque resume token for the export position just after an event."""
+    payload = json.dumps([timestamp.isoformat(), event_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_position(token: str) -> Tuple[datetime, int]:
+    """Decode a resume token into (timestamp, id); raises ValueError if invalid."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        timestamp, event_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(event_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid export position") from e
+
+
+def export_record(event: Event) -> Dict[str, Any]:
+    """JSON-ready export record for one event."""
+    record = EventResponse.model_validate(event).model_dump(mode="json")
+    record["position"] = encode_position(event.timestamp, event.id)
+    return record
+
+
+class _ExportFormatter:
+    """Renders records as text for one export format."""
+
+    def __init__(self, export_format: str):
+        if export_format not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        self.export_format = export_format
+        self.written = 0
+
+    def start(self) -> str:
+        if self.export_format == "json":
+            return "["
+        if self.export_format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(EXPORT_FIELDS)
+            return buffer.getvalue()
+        return ""
+
+    def rows(self, records: List[Dict[str, Any]]) -> str:
+        if not records:
+            return ""
+        if self.export_format == "json":
+            text = ",".join(json.dumps(record) for record in records)
+            text = text if self.written == 0 else "," + text
+        elif self.export_format == "ndjson":
+            text = "".join(json.dumps(record) + "\n" for record in records)
+        else:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for record in records:
+                writer.writerow(
+                    [
+                        json.dumps(value) if isinstance(value, dict) else value
+                        for value in (record.get(name) for name in EXPORT_FIELDS)
+                    ]
+                )
+            text = buffer.getvalue()
+        self.written += len(records)
+        return text
+
+    def end(self) -> str:
+        return "]" if self.export_format == "json" else ""
+
+
+async def stream_export(
+    events: AsyncIterator[Event],
+    export_format: str,
+    *,
+    chunk_rows: int = 500,
+    compress: bool = False,
+    compress_level: int = 6,
+) -> AsyncIterator[bytes]:
+    """
+    Encode a stream of events as export body chunks.
+
+    Args:
+        events: Events in export order
+        export_format: json, ndjson or csv
+        chunk_rows: Records per yielded chunk
+        compress: Gzip the body as it is produced
+    """
+    formatter = _ExportFormatter(export_format)
+    encoder = StreamEncoder("gzip", compress_level) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        return encoder.compress(data) if encoder else data
+
+    pending = formatter.start()
+    batch: List[Dict[str, Any]] = []
+    async for event in events:
+        batch.append(export_record(event))
+        if len(batch) >= chunk_rows:
+            yield encode(pending + formatter.rows(batch))
+            pending, batch = "", []
+
+    tail = encode(pending + formatter.rows(batch) + formatter.end())
+    if encoder:
+        tail += encoder.finish()
+    if tail:
+        yield tail
@@ -0,0 +1,262 @@
+"""Precomputed top-N recommendation lists served from Redis.
+
+When recommendations are generated, each user's ranked active recommendations
+are materialized into Redis. The ranking is a sorted set of recommendation ids
+at ``recommendations:top:{user_id}``. Each recommendation's details are a JSON
+document at ``recommendation:detail:{recommendation_id}``. A small meta
+document holds the user's preferences and marks the list as materialized, so
+users with no recommendations are still served from Redis. All of a user's keys
+are written in one MULTI/EXEC, and readers never see a half-built list.
+
+A read costs one pipelined round trip for the meta document and the ranked ids,
+and one MGET for the details. Business filters (status, expiry, type) are
+applied in memory on the hydrated documents. Engagement updates patch the
+detail document and drop recommendations that are no longer active from the
+ranking. Anything the store cannot answer exactly returns ``None``. That covers
+a missing list, an evicted detail document, or a truncated list that cannot
+fill the request. The caller then falls back to Postgres and rematerializes.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.schemas.recommendation import (
+    Recommendation,
+    RecommendationInDB,
+    RecommendationResponse,
+    RecommendationStatus,
+    UserPreferences,
+)
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+from app.core.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationServingStore:
+    """Materialized per-user recommendation rankings in Redis."""
+
+    def __init__(
+        self,
+        redis: Redis,
+        top_n: Optional[int] = None,
+        ttl: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.redis = redis
+        self.top_n = top_n or settings.recommendation_serving_top_n
+        self.ttl = ttl or settings.recommendation_serving_ttl_seconds
+
+    # Keys
+    def _list_key(self, user_id: int) -> str:
+        return f"recommendations:top:{user_id}"
+
+    def _meta_key(self, user_id: int) -> str:
+        return f"recommendations:top:{user_id}:meta"
+
+    def _detail_key(self, recommendation_id: str) -> str:
+        return f"recommendation:detail:{recommendation_id}"
+
+    # Writing
+    async def materialize(
+        self,
+        rankings: Dict[int, List[Any]],
+        preferences: Optional[Dict[int, Any]] = None,
+    ) -> None:
+        """Replace the served lists for every user in ``rankings``.
+
+        ``rankings`` maps user ids to their active recommendations, best first,
+        as ORM rows or schemas. ``preferences`` maps user ids to their
+        preferences, if any. Only the first ``top_n`` of each list is kept.
+        """
+        preferences = preferences or {}
+        materialized_at = datetime.utcnow().isoformat()
+        pipe = self.redis.pipeline(transaction=True)
+        for user_id, recommendations in rankings.items():
+            ranked = recommendations[: self.top_n]
+            list_key = self._list_key(user_id)
+            pipe.delete(list_key)
+            if ranked:
+                pipe.zadd(
+                    list_key,
+                    {
+                        rec.recommendation_id: len(ranked) - position
+                        for position, rec in enumerate(ranked)
+                    },
+                )
+                pipe.expire(list_key, self.ttl)
+            for rec in ranked:
+                pipe.set(
+                    self._detail_key(rec.recommendation_id),
+                    _dump_recommendation(rec),
+                    ex=self.ttl,
+                )
+
+            prefs = preferences.get(user_id)
+            meta = {
+                "materialized_at": materialized_at,
+                "truncated": len(recommendations) > len(ranked),
+                "preferences": (
+                    UserPreferences.model_validate(prefs).model_dump(mode="json")
+                    if prefs is not None
+                    else None
+                ),
+            }
+            pipe.set(self._meta_key(user_id), json.dumps(meta), ex=self.ttl)
+        await pipe.execute()
+
+    async def apply_engagement(self, recommendation: Any) -> None:
+        """Reflect an engagement update in the served list.
+
+        Recommendations that are still active get their details refreshed in
+        place. Any other status removes them from the ranking.
+        """
+        detail_key = self._detail_key(recommendation.recommendation_id)
+        pipe = self.redis.pipeline(transaction=True)
+        if recommendation.status == RecommendationStatus.ACTIVE:
+            pipe.set(
+                detail_key,
+                _dump_recommendation(recommendation),
+                xx=True,
+                keepttl=True,
+            )
+        else:
+            pipe.zrem(
+                self._list_key(recommendation.user_id),
+                recommendation.recommendation_id,
+            )
+            pipe.delete(detail_key)
+        await pipe.execute()
+
+    async def invalidate(self, user_ids: Iterable[int]) -> None:
+        """Drop the served lists of ``user_ids`` so the next read rebuilds them."""
+        keys = []
+        for user_id in set(user_ids):
+            keys.extend([self._list_key(user_id), self._meta_key(user_id)])
+        if keys:
+            await self.redis.delete(*keys)
+
+    # Reading
+    async def get_user_recommendations(
+        self,
+        user_id: int,
+        types: Optional[List[str]] = None,
+        limit: int = 10,
+        include_context: bool = True,
+        exclude_dismissed: bool = True,
+    ) -> Optional[RecommendationResponse]:
+        """Serve ``limit`` recommendations from the materialized list.
+
+        Returns ``None`` when the list is missing or cannot answer the request
+        exactly.
+        """
+        metrics = get_metrics()
+        try:
+            recommendations, meta = await self._read(user_id, types, limit)
+        except Exception as e:
+            logger.error(f"Failed to read served recommendations for {user_id}: {e}")
+            metrics["recommendation_serving_reads"].labels(outcome="error").inc()
+            return None
+
+        if recommendations is None:
+            metrics["recommendation_serving_reads"].labels(outcome="miss").inc()
+            return None
+        metrics["recommendation_serving_reads"].labels(outcome="hit").inc()
+
+        if not include_context:
+            for rec in recommendations:
+                rec.context = None
+                rec.rec_metadata = None
+
+        return RecommendationResponse(
+            recommendations=recommendations,
+            total_count=len(recommendations),
+            user_preferences=meta.get("preferences"),
+            metadata={
+                "generated_at": meta["materialized_at"],
+                "algorithm": "hybrid",
+                "cache_hit": True,
+                "source": "materialized",
+                "filters_applied": {
+                    "types": types,
+                    "exclude_dismissed": exclude_dismissed,
+                },
+            },
+        )
+
+    async def _read(self, user_id: int, types: Optional[List[str]], limit: int):
+        # Over-fetch a little so in-memory filtering rarely needs a second window
+        window = max(limit * 2, 20)
+        list_key = self._list_key(user_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(self._meta_key(user_id))
+        pipe.zrevrange(list_key, 0, window - 1)
+        pipe.zcard(list_key)
+        raw_meta, ids, total = await pipe.execute()
+        if raw_meta is None:
+            return None, None
+        meta = json.loads(raw_meta)
+
+        wanted = set(types) if types else None
+        now = datetime.utcnow()
+        served: List[Recommendation] = []
+        offset = 0
+        while True:
+            if ids:
+                documents = await self.redis.mget(
+                    [self._detail_key(rid) for rid in ids]
+                )
+                if any(doc is None for doc in documents):
+                    # A detail expired or was evicted under the list
+                    return None, None
+                for doc in documents:
+                    rec = _load_recommendation(doc, now)
+                    if not rec.is_active:
+                        continue
+                    if wanted is not None and rec.type not in wanted:
+                        continue
+                    served.append(rec)
+                    if len(served) == limit:
+                        return served, meta
+
+            offset += len(ids)
+            if offset >= total:
+                break
+            ids = await self.redis.zrevrange(list_key, offset, offset + window - 1)
+
+        if meta.get("truncated"):
+            # Postgres may hold matches ranked below the materialized top-N
+            return None, None
+        return served, meta
+
+
+def _dump_recommendation(recommendation: Any) -> str:
+    return RecommendationInDB.model_validate(recommendation).model_dump_json()
+
+
+def _load_recommendation(document: Any, now: datetime) -> Recommendation:
+    data = RecommendationInDB.model_validate_json(document)
+    expired = data.expires_at is not None and now > data.expires_at
+    return Recommendation(
+        **data.model_dump(),
+        click_through_rate=data.clicks / data.impressions if data.impressions else 0.0,
+        is_active=data.status == RecommendationStatus.ACTIVE and not expired,
+        days_since_created=(now - data.created_at).days,
+    )
+
+
+# Global serving store instance
+_serving_store = None
+
+
+def get_recommendation_store() -> RecommendationServingStore:
+    """Get the global recommendation serving store backed by the shared pool."""
+    global _serving_store
+    if _serving_store is None:
+        from app.core.redis import redis_client
+
+        _serving_store = RecommendationServingStore(redis_client)
+    return _serving_store
@@ -5,11 +5,14 @@ pagination for better performance at scale. Supports HMAC-signed cursors to
 prevent tampering and maintain API security.
 
 Key Features:
-- Base64-encoded JSON cursors with HMAC signatures
+- Compact binary cursors with keyed BLAKE2b signatures (legacy JSON cursors
+  are still accepted)
 - Multiple sort fields support (created_at, updated_at, priority, status)
 - Forward and backward pagination
 - Filter preservation across pages
 - Backward compatibility with offset pagination
+- Planner-estimated totals with exact counts refreshed in the background
+- Optional prefetching of the next page
 - Performance optimized for large datasets
 
 Usage:
@@ -23,21 +26,83 @@ Usage:
     decoded = cursor_manager.decode_cursor(cursor)
 """
 
+import asyncio
 import base64
 import hashlib
 import hmac
 import json
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+import logging
+import struct
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from pydantic import BaseModel, Field, validator
-from sqlalchemy import and_, asc, desc, func, or_, select
+from sqlalchemy import and_, asc, desc, func, or_, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.sql import Select
 
 from app.core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+# Binary cursor layout (before base64):
+#   version(1) flags(1) sort_by_len(1) sort_by value_tag(1) value [last_id(8)]
+#   filters_json signature(16)
+_CURSOR_VERSION = 2
+_FLAG_DESC = 0x01
+_FLAG_HAS_ID = 0x02
+_SIGNATURE_SIZE = 16
+
+_TAG_NONE = 0
+_TAG_INT = 1
+_TAG_FLOAT = 2
+_TAG_STR = 3
+_TAG_NAIVE_DATETIME = 4
+_TAG_UTC_DATETIME = 5
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+class TotalMode(str):
+    """How ``include_total`` computes the total count."""
+
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+
+
+class _TTLCache:
+    """Small bounded LRU cache with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Any) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> Any:
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
 
 class SortDirection(str):
     """Valid sort directions for cursor pagination."""
@@ -82,6 +147,9 @@ class PaginationInfo(BaseModel):
     total_count: Optional[int] = Field(
         None, description="Total count (expensive for large datasets)"
     )
+    total_is_estimate: Optional[bool] = Field(
+        None, description="Whether total_count is a planner estimate"
+    )
     current_sort: str = Field(description="Current sort field")
     current_direction: str = Field(description="Current sort direction")
 
@@ -107,10 +175,44 @@ class CursorPaginatedResponse(BaseModel):
 class CursorPaginationManager:
     """Manages cursor-based pagination with security and performance optimization."""
 
-    def __init__(self, secret_key: Optional[str] = None):
-        """Initialize with secret key for cursor signing."""
+    def __init__(
+        self,
+        secret_key: Optional[str] = None,
+        session_factory: Optional[Callable[[], Any]] = None,
+        count_cache_ttl: float = 300.0,
+        prefetch_ttl: float = 30.0,
+    ):
+        """Initialize with secret key for cursor signing.
+
+        Args:
+            secret_key: Secret used to sign cursors
+            session_factory: Session factory for background counts and
+                prefetches (defaults to ``AsyncSessionLocal``)
+            count_cache_ttl: Seconds an exact count is served in estimate mode
+            prefetch_ttl: Seconds a prefetched page stays valid
+        """
         self.secret_key = secret_key or get_settings().secret_key
         self.algorithm = hashlib.sha256
+        self._session_factory = session_factory
+        self._count_cache = _TTLCache(maxsize=2048, ttl=count_cache_ttl)
+        self._prefetch_cache = _TTLCache(maxsize=1024, ttl=prefetch_ttl)
+        self._background_tasks: set = set()
+        self._pending_counts: set = set()
+
+    @property
+    def _secret_bytes(self) -> bytes:
+        return (
+            self.secret_key.get_secret_value().encode()
+            if hasattr(self.secret_key, "get_secret_value")
+            else str(self.secret_key).encode()
+        )
+
+    def _sign(self, payload: bytes) -> bytes:
+        # BLAKE2b keys are limited to 64 bytes, so derive a fixed-size key
+        key = hashlib.sha256(self._secret_bytes).digest()
+        return hashlib.blake2b(
+            payload, key=key, digest_size=_SIGNATURE_SIZE
+        ).digest()
 
     def encode_cursor(
         self,
@@ -120,7 +222,7 @@ class CursorPaginationManager:
         last_id: Optional[int] = None,
         filters: Optional[Dict[str, Any]] = None,
     ) -> str:
-        """Encode cursor data with HMAC signature for tamper prevention.
+        """Encode cursor data into a compact signed binary token.
 
         Args:
             sort_by: Field to sort by
@@ -130,46 +232,37 @@ class CursorPaginationManager:
             filters: Active filters to preserve
 
         Returns:
-            Base64-encoded signed cursor string
+            URL-safe base64 cursor string
         """
-        # Convert datetime to ISO string for JSON serialization
-        if isinstance(last_value, datetime):
-            last_value = last_value.isoformat()
-
-        cursor_data = CursorData(
-            sort_by=sort_by,
-            sort_direction=sort_direction,
-            last_value=last_value,
-            last_id=last_id,
-            filters=filters or {},
-        )
-
-        # Serialize to JSON
-        json_data = cursor_data.model_dump()
-        json_str = json.dumps(json_data, sort_keys=True, separators=(",", ":"))
-
-        # Create HMAC signature
-        secret_bytes = (
-            self.secret_key.get_secret_value().encode()
-            if hasattr(self.secret_key, "get_secret_value")
-            else str(self.secret_key).encode()
-        )
-        signature = hmac.new(
-            secret_bytes, json_str.encode(), self.algorithm
-        ).hexdigest()
+        if sort_direction not in (SortDirection.ASC, SortDirection.DESC):
+            raise ValueError("sort_direction must be 'asc' or 'desc'")
 
-        # Combine data and signature
-        signed_data = {"data": json_data, "signature": signature}
-        signed_json = json.dumps(signed_data, separators=(",", ":"))
+        sort_bytes = sort_by.encode()
+        flags = _FLAG_DESC if sort_direction == SortDirection.DESC else 0
+        if last_id is not None:
+            flags |= _FLAG_HAS_ID
+
+        parts = [
+            struct.pack("!BBB", _CURSOR_VERSION, flags, len(sort_bytes)),
+            sort_bytes,
+            self._pack_value(last_value),
+        ]
+        if last_id is not None:
+            parts.append(struct.pack("!q", last_id))
+        if filters:
+            parts.append(
+                json.dumps(filters, sort_keys=True, separators=(",", ":")).encode()
+            )
 
-        # Base64 encode
-        return base64.urlsafe_b64encode(signed_json.encode()).decode()
+        payload = b"".join(parts)
+        token = payload + self._sign(payload)
+        return base64.urlsafe_b64encode(token).rstrip(b"=").decode()
 
     def decode_cursor(self, cursor: str) -> CursorData:
         """Decode and verify cursor data.
 
         Args:
-            cursor: Base64-encoded signed cursor string
+            cursor: Cursor string produced by ``encode_cursor``
 
         Returns:
             Validated cursor data
@@ -178,33 +271,100 @@ class CursorPaginationManager:
             ValueError: If cursor is invalid or tampered with
         """
         try:
-            # Base64 decode
-            signed_json = base64.urlsafe_b64decode(cursor.encode()).decode()
-            signed_data = json.loads(signed_json)
-
-            # Extract data and signature
-            data = signed_data["data"]
-            received_signature = signed_data["signature"]
-
-            # Verify signature
-            json_str = json.dumps(data, sort_keys=True, separators=(",", ":"))
-            secret_bytes = (
-                self.secret_key.get_secret_value().encode()
-                if hasattr(self.secret_key, "get_secret_value")
-                else str(self.secret_key).encode()
-            )
-            expected_signature = hmac.new(
-                secret_bytes, json_str.encode(), self.algorithm
-            ).hexdigest()
-
-            if not hmac.compare_digest(received_signature, expected_signature):
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            if raw[:1] == b"{":
+                return self._decode_legacy_cursor(raw)
+
+            payload, signature = raw[:-_SIGNATURE_SIZE], raw[-_SIGNATURE_SIZE:]
+            if len(payload) < 4 or payload[0] != _CURSOR_VERSION:
+                raise ValueError("Unsupported cursor version")
+            if not hmac.compare_digest(signature, self._sign(payload)):
                 raise ValueError("Cursor signature verification failed")
 
-            return CursorData(**data)
+            _, flags, sort_len = struct.unpack_from("!BBB", payload, 0)
+            offset = 3
+            sort_by = payload[offset : offset + sort_len].decode()
+            offset += sort_len
+            last_value, offset = self._unpack_value(payload, offset)
+            last_id = None
+            if flags & _FLAG_HAS_ID:
+                (last_id,) = struct.unpack_from("!q", payload, offset)
+                offset += 8
+            filters = json.loads(payload[offset:]) if offset < len(payload) else {}
+
+            # Signature already guarantees the fields were produced by us
+            return CursorData.model_construct(
+                sort_by=sort_by,
+                sort_direction=SortDirection.DESC
+                if flags & _FLAG_DESC
+                else SortDirection.ASC,
+                last_value=last_value,
+                last_id=last_id,
+                filters=filters,
+            )
 
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
+        except (json.JSONDecodeError, KeyError, ValueError, struct.error) as e:
             raise ValueError(f"Invalid cursor format: {e}")
 
+    def _decode_legacy_cursor(self, raw: bytes) -> CursorData:
+        """Decode a base64 JSON cursor issued before the binary format."""
+        signed_data = json.loads(raw.decode())
+        data = signed_data["data"]
+        received_signature = signed_data["signature"]
+
+        json_str = json.dumps(data, sort_keys=True, separators=(",", ":"))
+        expected_signature = hmac.new(
+            self._secret_bytes, json_str.encode(), self.algorithm
+        ).hexdigest()
+
+        if not hmac.compare_digest(received_signature, expected_signature):
+            raise ValueError("Cursor signature verification failed")
+
+        return CursorData(**data)
+
+    @staticmethod
+    def _pack_value(value: Any) -> bytes:
+        if value is None:
+            return struct.pack("!B", _TAG_NONE)
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, int):
+            return struct.pack("!Bq", _TAG_INT, value)
+        if isinstance(value, float):
+            return struct.pack("!Bd", _TAG_FLOAT, value)
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                micros = (value - _EPOCH) // _ONE_MICROSECOND
+                return struct.pack("!Bq", _TAG_NAIVE_DATETIME, micros)
+            utc = value.astimezone(timezone.utc).replace(tzinfo=None)
+            micros = (utc - _EPOCH) // _ONE_MICROSECOND
+            return struct.pack("!Bq", _TAG_UTC_DATETIME, micros)
+        encoded = str(value).encode()
+        return struct.pack("!BH", _TAG_STR, len(encoded)) + encoded
+
+    @staticmethod
+    def _unpack_value(payload: bytes, offset: int) -> Tuple[Any, int]:
+        (tag,) = struct.unpack_from("!B", payload, offset)
+        offset += 1
+        if tag == _TAG_NONE:
+            return None, offset
+        if tag == _TAG_INT:
+            return struct.unpack_from("!q", payload, offset)[0], offset + 8
+        if tag == _TAG_FLOAT:
+            return struct.unpack_from("!d", payload, offset)[0], offset + 8
+        if tag in (_TAG_NAIVE_DATETIME, _TAG_UTC_DATETIME):
+            (micros,) = struct.unpack_from("!q", payload, offset)
+            value = _EPOCH + micros * _ONE_MICROSECOND
+            if tag == _TAG_UTC_DATETIME:
+                value = value.replace(tzinfo=timezone.utc)
+            # Datetimes travel as ISO strings, matching the JSON cursor format
+            return value.isoformat(), offset + 8
+        if tag == _TAG_STR:
+            (length,) = struct.unpack_from("!H", payload, offset)
+            offset += 2
+            return payload[offset : offset + length].decode(), offset + length
+        raise ValueError(f"Unknown cursor value tag {tag}")
+
     def build_cursor_query(
         self,
         base_query: Select,
@@ -348,6 +508,8 @@ class CursorPaginationManager:
         filters: Optional[Dict[str, Any]] = None,
         sort_by: str = "created_at",
         sort_direction: str = "desc",
+        total_mode: str = TotalMode.EXACT,
+        prefetch: bool = False,
     ) -> CursorPaginatedResponse:
         """Execute cursor-based pagination query.
 
@@ -358,10 +520,14 @@ class CursorPaginationManager:
             cursor: Pagination cursor
             limit: Items per page (max 100)
             reverse: Reverse pagination direction
-            include_total: Whether to include expensive total count
+            include_total: Whether to include a total count
             filters: Additional filters to apply
             sort_by: Default sort field
             sort_direction: Default sort direction
+            total_mode: ``"exact"`` runs COUNT(*) inline; ``"estimate"`` returns
+                a recent cached count or a planner estimate and computes the
+                exact count in the background
+            prefetch: Warm the next page into cache after this one is returned
 
         Returns:
             Paginated response with cursor metadata
@@ -382,17 +548,10 @@ class CursorPaginationManager:
             combined_filters = {**(cursor_data.filters or {}), **(filters or {})}
             base_query = self.apply_filters(base_query, model, combined_filters)
 
-        # Build cursor query
-        query = self.build_cursor_query(base_query, model, cursor_data, limit, reverse)
-
-        # Execute query
-        result = await db.execute(query)
-        items = list(result.scalars().all())
-
-        # Check if there are more pages
-        has_more = len(items) > limit
-        if has_more:
-            items = items[:limit]  # Remove the extra item
+        filter_key = self._query_fingerprint(base_query)
+        items, has_more = await self._fetch_page(
+            db, base_query, model, cursor_data, cursor, limit, reverse, filter_key
+        )
 
         # If reversed, we need to reverse the results back
         if reverse:
@@ -433,23 +592,20 @@ class CursorPaginationManager:
                     filters=cursor_data.filters,
                 )
 
-        # Optional total count (expensive for large datasets)
+        # Optional total count
         total_count = None
+        total_is_estimate = None
         if include_total:
-            count_query = select(func.count()).select_from(base_query.subquery())
-            if cursor_data.filters or filters:
-                # Re-apply filters to count query
-                combined_filters = {**(cursor_data.filters or {}), **(filters or {})}
-                count_base_query = select(model)
-                count_base_query = self.apply_filters(
-                    count_base_query, model, combined_filters
-                )
-                count_query = select(func.count()).select_from(
-                    count_base_query.subquery()
-                )
+            total_count, total_is_estimate = await self._get_total(
+                db, base_query, model, filter_key, total_mode
+            )
 
-            count_result = await db.execute(count_query)
-            total_count = count_result.scalar()
+        if prefetch and next_cursor:
+            self._spawn(
+                self._prefetch_page(
+                    base_query, model, next_cursor, limit, filter_key
+                )
+            )
 
         # Build pagination info
         pagination = PaginationInfo(
@@ -458,6 +614,7 @@ class CursorPaginationManager:
             next_cursor=next_cursor,
             previous_cursor=previous_cursor,
             total_count=total_count,
+            total_is_estimate=total_is_estimate,
             current_sort=cursor_data.sort_by,
             current_direction=cursor_data.sort_direction,
             # Backward compatibility
@@ -466,6 +623,162 @@ class CursorPaginationManager:
 
         return CursorPaginatedResponse(data=items, pagination=pagination)
 
+    async def _fetch_page(
+        self,
+        db: AsyncSession,
+        base_query: Select,
+        model: DeclarativeBase,
+        cursor_data: CursorData,
+        cursor: Optional[str],
+        limit: int,
+        reverse: bool,
+        filter_key: str,
+    ) -> Tuple[List[Any], bool]:
+        """Load one page, serving it from the prefetch cache when possible."""
+        prefetched = None
+        if cursor and not reverse:
+            prefetched = self._prefetch_cache.pop((filter_key, cursor, limit))
+
+        if prefetched is not None:
+            ids, has_more = prefetched
+            if not ids:
+                return [], has_more
+            # Primary-key lookup instead of re-running the range scan
+            result = await db.execute(select(model).where(model.id.in_(ids)))
+            by_id = {item.id: item for item in result.scalars().all()}
+            if len(by_id) == len(ids):
+                return [by_id[i] for i in ids], has_more
+
+        query = self.build_cursor_query(base_query, model, cursor_data, limit, reverse)
+        result = await db.execute(query)
+        items = list(result.scalars().all())
+
+        # Check if there are more pages
+        has_more = len(items) > limit
+        if has_more:
+            items = items[:limit]  # Remove the extra item
+        return items, has_more
+
+    async def _prefetch_page(
+        self,
+        base_query: Select,
+        model: DeclarativeBase,
+        cursor: str,
+        limit: int,
+        filter_key: str,
+    ) -> None:
+        """Resolve the next page's ids ahead of the client asking for it."""
+        cursor_data = self.decode_cursor(cursor)
+        query = self.build_cursor_query(
+            base_query.with_only_columns(model.id), model, cursor_data, limit
+        )
+        async with self._get_session_factory()() as session:
+            result = await session.execute(query)
+            ids = list(result.scalars().all())
+
+        has_more = len(ids) > limit
+        self._prefetch_cache.set((filter_key, cursor, limit), (ids[:limit], has_more))
+
+    async def _get_total(
+        self,
+        db: AsyncSession,
+        base_query: Select,
+        model: DeclarativeBase,
+        filter_key: str,
+        total_mode: str,
+    ) -> Tuple[Optional[int], bool]:
+        """Return ``(total, is_estimate)`` according to ``total_mode``.
+
+        Exact mode always counts. Estimate mode serves the last exact count
+        computed for the same filters while it is cached (up to
+        ``count_cache_ttl`` old), then a planner estimate.
+        """
+        count_query = select(func.count()).select_from(base_query.subquery())
+
+        if total_mode == TotalMode.ESTIMATE:
+            cached = self._count_cache.get(filter_key)
+            if cached is not None:
+                return cached, True
+            estimate = await self._estimate_total(db, base_query, model)
+            if estimate is not None:
+                if filter_key not in self._pending_counts:
+                    self._pending_counts.add(filter_key)
+                    self._spawn(self._refresh_exact_count(count_query, filter_key))
+                return estimate, True
+
+        count_result = await db.execute(count_query)
+        total = count_result.scalar()
+        self._count_cache.set(filter_key, total)
+        return total, False
+
+    async def _estimate_total(
+        self, db: AsyncSession, base_query: Select, model: DeclarativeBase
+    ) -> Optional[int]:
+        """Row estimate from table statistics or the query planner."""
+        try:
+            if base_query.whereclause is None:
+                result = await db.execute(
+                    text(
+                        "SELECT reltuples::bigint FROM pg_class "
+                        "WHERE oid = to_regclass(:table)"
+                    ),
+                    {"table": model.__tablename__},
+                )
+                estimate = result.scalar()
+            else:
+                compiled = base_query.compile(
+                    dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}
+                )
+                result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+                plan = result.scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                estimate = plan[0]["Plan"]["Plan Rows"]
+        except Exception as e:
+            logger.debug(f"Row estimate unavailable, falling back to COUNT: {e}")
+            return None
+
+        # reltuples is -1 (or 0) until the table has been analyzed
+        if estimate is None or estimate < 0:
+            return None
+        return int(estimate)
+
+    async def _refresh_exact_count(self, count_query: Select, filter_key: str) -> None:
+        """Compute an exact count off the request path and cache it."""
+        try:
+            async with self._get_session_factory()() as session:
+                result = await session.execute(count_query)
+                self._count_cache.set(filter_key, result.scalar())
+        finally:
+            self._pending_counts.discard(filter_key)
+
+    def _get_session_factory(self) -> Callable[[], Any]:
+        if self._session_factory is None:
+            from app.db.session import AsyncSessionLocal
+
+            self._session_factory = AsyncSessionLocal
+        return self._session_factory
+
+    def _spawn(self, coro) -> None:
+        """Run a background coroutine, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_done)
+
+    def _on_background_done(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background pagination task failed: {task.exception()}")
+
+    @staticmethod
+    def _query_fingerprint(query: Select) -> str:
+        """Stable hash of a query's SQL and bound parameters."""
+        compiled = query.compile()
+        params = json.dumps(compiled.params, sort_keys=True, default=str)
+        return hashlib.blake2b(
+            f"{compiled}|{params}".encode(), digest_size=16
+        ).hexdigest()
+
 
 # Global cursor manager instance
 cursor_manager = CursorPaginationManager()
@@ -14,10 +14,10 @@ Features:
 import asyncio
 import time
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Union
 
 import structlog
+from app.db.query_stats import QueryStatsRegistry, get_query_stats
 from app.db.session import engine
 from sqlalchemy import Index, MetaData, Table, text
 from sqlalchemy.engine import Result
@@ -31,122 +31,102 @@ logger = structlog.get_logger()
 
 
 class QueryPerformanceTracker:
-    """Track and analyze database query performance."""
+    """Query performance report backed by the shared ``QueryStatsRegistry``.
 
-    def __init__(self):
-        self.slow_queries = []
-        self.query_counts = {}
-        self.query_times = {}
-        self.connection_pool_stats = {}
-
-    def record_query(self, query: str, execution_time: float, result_count: int = 0):
-        """Record query execution for performance analysis."""
-        # Normalize query for grouping
-        normalized_query = self._normalize_query(query)
-
-        # Track query counts
-        self.query_counts[normalized_query] = (
-            self.query_counts.get(normalized_query, 0) + 1
-        )
-
-        # Track query times
-        if normalized_query not in self.query_times:
-            self.query_times[normalized_query] = []
-        self.query_times[normalized_query].append(execution_time)
+    Statements executed through the engine are already recorded by the cursor
+    listeners in ``app.db.query_monitor``; ``record_query`` is only needed for
+    work that bypasses them.
+    """
 
-        # Record slow queries (>100ms)
-        if execution_time > 0.1:
-            self.slow_queries.append(
-                {
-                    "query": query,
-                    "execution_time": execution_time,
-                    "result_count": result_count,
-                    "timestamp": datetime.utcnow(),
-                    "normalized": normalized_query,
-                }
-            )
+    def __init__(self, registry: Optional[QueryStatsRegistry] = None):
+        self._registry = registry
 
-            # Keep only last 100 slow queries
-            if len(self.slow_queries) > 100:
-                self.slow_queries.pop(0)
+    @property
+    def registry(self) -> QueryStatsRegistry:
+        return self._registry or get_query_stats()
 
-    def _normalize_query(self, query: str) -> str:
-        """Normalize query for grouping similar queries."""
-        # Remove specific values and normalize spacing
-        import re
+    @property
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """Slowest retained executions, slowest first."""
+        return [
+            {
+                "query": slow.statement,
+                "execution_time": slow.duration,
+                "result_count": slow.result_count,
+                "timestamp": slow.timestamp,
+                "normalized": slow.fingerprint,
+            }
+            for slow in self.registry.slow_queries()
+        ]
 
-        normalized = re.sub(r"\b\d+\b", "?", query)  # Replace numbers
-        normalized = re.sub(r"'[^']*'", "?", normalized)  # Replace string literals
-        normalized = re.sub(r"\s+", " ", normalized).strip()  # Normalize whitespace
-        return normalized.lower()
+    def record_query(self, query: str, execution_time: float, result_count: int = 0):
+        """Record query execution for performance analysis."""
+        self.registry.record(query, execution_time, result_count=result_count)
 
     def get_performance_report(self) -> Dict[str, Any]:
         """Generate comprehensive performance report."""
+        registry = self.registry
+        summary = registry.summary()
+        top_by_count = registry.top_by_count(10)
+
         report = {
             "summary": {
-                "total_queries": sum(self.query_counts.values()),
-                "unique_queries": len(self.query_counts),
-                "slow_queries": len(self.slow_queries),
-                "avg_query_time": 0,
+                "total_queries": summary["total_queries"],
+                "unique_queries": summary["tracked_fingerprints"],
+                "slow_queries": summary["slow_queries"],
+                "avg_query_time": summary["avg_query_time"],
             },
-            "top_queries_by_count": [],
-            "top_queries_by_time": [],
-            "slow_queries": self.slow_queries[-10:],  # Last 10 slow queries
+            "top_queries_by_count": [
+                {
+                    "query": entry["query"],
+                    "count": entry["count"],
+                    "count_error": entry["count_error"],
+                }
+                for entry in top_by_count
+            ],
+            "top_queries_by_time": [
+                {
+                    "query": entry["query"],
+                    "avg_time": entry["avg_time"],
+                    "p95": entry["p95"],
+                    "p99": entry["p99"],
+                    "total_time": entry["total_time"],
+                    "plan": entry["plan"],
+                }
+                for entry in registry.top_by("avg_time", 10)
+            ],
+            "slow_queries": self.slow_queries[:10],
             "recommendations": [],
         }
 
-        # Calculate average query times
-        all_times = []
-        for times in self.query_times.values():
-            all_times.extend(times)
-
-        if all_times:
-            report["summary"]["avg_query_time"] = sum(all_times) / len(all_times)
-
-        # Top queries by count
-        sorted_by_count = sorted(
-            self.query_counts.items(), key=lambda x: x[1], reverse=True
+        report["recommendations"] = self._generate_recommendations(
+            summary, top_by_count
         )
-        report["top_queries_by_count"] = [
-            {"query": query, "count": count} for query, count in sorted_by_count[:10]
-        ]
-
-        # Top queries by average time
-        avg_times = {}
-        for query, times in self.query_times.items():
-            avg_times[query] = sum(times) / len(times)
-
-        sorted_by_time = sorted(avg_times.items(), key=lambda x: x[1], reverse=True)
-        report["top_queries_by_time"] = [
-            {"query": query, "avg_time": avg_time}
-            for query, avg_time in sorted_by_time[:10]
-        ]
-
-        # Generate recommendations
-        report["recommendations"] = self._generate_recommendations()
 
         return report
 
-    def _generate_recommendations(self) -> List[str]:
+    def _generate_recommendations(
+        self, summary: Dict[str, Any], top_by_count: List[Dict[str, Any]]
+    ) -> List[str]:
         """Generate optimization recommendations based on query patterns."""
         recommendations = []
 
         # Check for slow queries
-        if len(self.slow_queries) > 10:
+        if summary["slow_queries"] > 10:
             recommendations.append(
                 "Consider adding indexes for frequently slow queries"
             )
 
         # Check for frequent queries
-        max_count = max(self.query_counts.values()) if self.query_counts else 0
+        max_count = top_by_count[0]["count"] if top_by_count else 0
         if max_count > 100:
             recommendations.append("Consider caching results for most frequent queries")
 
         # Check for N+1 query patterns
         select_counts = sum(
-            1 for query in self.query_counts.keys() if "select" in query
+            1 for entry in top_by_count if entry["query"].lower().startswith("select")
         )
-        if select_counts > len(self.query_counts) * 0.8:
+        if top_by_count and select_counts > len(top_by_count) * 0.8:
             recommendations.append(
                 "High number of SELECT queries detected - check for N+1 query problems"
             )
@@ -171,8 +151,9 @@ async def track_query_performance(session: AsyncSession, query: Union[str, Selec
         logger.error("query_execution_error", query=query_str, error=str(e))
         raise
     finally:
+        # The statement itself is recorded by the cursor listeners; only the
+        # end-to-end timing is logged here.
         execution_time = time.time() - start_time
-        performance_tracker.record_query(query_str, execution_time, result_count)
 
         if execution_time > 0.1:  # Log slow queries
             logger.warning(
@@ -0,0 +1,348 @@
+"""
+Content Analysis Worker
+
+Runs AI content analysis jobs outside the API process. Jobs are created as
+``pending`` rows in ``content_analysis_jobs`` (by the analyze endpoint or by
+a backfill) and claimed here in batches.
+
+Features:
+- Batch claiming with ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of
+  workers can drain the same queue without double-processing or lock waits
+- Bounded concurrency: claimed jobs are analyzed in provider-sized chunks,
+  at most ``concurrency`` chunks at a time, each with its own DB session
+- Job status checkpoints through ``update_job_status``; jobs orphaned by a
+  crashed worker are requeued after ``stale_after`` seconds
+- Prometheus metrics for throughput, queue depth/lag and per-stage latency
+
+Usage:
+    python -m app.worker.content_analysis_worker
+
+    # Queue jobs for everything that needs (re-)analysis, then exit:
+    python -m app.worker.content_analysis_worker --backfill --limit 1000000
+"""
+import argparse
+import asyncio
+import signal
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+
+from app.core.config import get_settings
+from app.core.metrics import get_metrics
+from app.crud import content_suggestion as crud_content
+from app.models.content_suggestion import ContentAnalysisJob, ContentItem
+from app.services.ai_content_analyzer import AIContentAnalyzer
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+
+def analysis_types_for_job(job_type: str) -> Optional[List[str]]:
+    """Analysis types encoded in a job's ``job_type`` (``None`` means all)."""
+    if not job_type or job_type == "full_analysis":
+        return None
+    return [name for name in job_type.split(",") if name]
+
+
+class ContentAnalysisWorker:
+    """Claims pending content analysis jobs and runs them in bounded batches."""
+
+    def __init__(
+        self,
+        *,
+        claim_size: int = 64,
+        concurrency: int = 8,
+        poll_interval: float = 2.0,
+        stale_after: int = 900,
+        job_type: Optional[str] = None,
+        session_factory: Optional[Callable[[], Any]] = None,
+        analyzer: Optional[AIContentAnalyzer] = None,
+    ):
+        self.claim_size = claim_size
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.job_type = job_type
+        self._session_factory = session_factory
+        self.analyzer = analyzer or AIContentAnalyzer()
+        self.metrics = get_metrics()
+        self.running = False
+        self._stop = asyncio.Event()
+        self._last_maintenance = 0.0
+        self.stats = {"claimed": 0, "completed": 0, "failed": 0, "batches": 0}
+
+    def _session(self):
+        if self._session_factory is None:
+            from app.db.session import AsyncSessionLocal
+
+            self._session_factory = AsyncSessionLocal
+        return self._session_factory()
+
+    def _observe_stage(self, stage: str, seconds: float) -> None:
+        self.metrics["content_analysis_stage_seconds"].labels(stage=stage).observe(
+            seconds
+        )
+
+    async def run(self) -> None:
+        """Process jobs until ``stop`` is called."""
+        self.running = True
+        self._stop.clear()
+        logger.info(
+            "content_analysis_worker_started",
+            claim_size=self.claim_size,
+            concurrency=self.concurrency,
+            job_type=self.job_type,
+        )
+        while self.running:
+            try:
+                await self._maintenance()
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error("content_analysis_worker_error", error=str(e))
+                processed = 0
+            if not processed and self.running:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        logger.info("content_analysis_worker_stopped", **self.stats)
+
+    def stop(self) -> None:
+        """Finish the current batch, then exit ``run``."""
+        self.running = False
+        self._stop.set()
+
+    async def _maintenance(self) -> None:
+        """Requeue orphaned jobs and refresh queue gauges, at most every 30s."""
+        now = time.monotonic()
+        if now - self._last_maintenance < 30:
+            return
+        self._last_maintenance = now
+
+        async with self._session() as db:
+            requeued = await crud_content.content_analysis_job.requeue_stale_jobs(
+                db, stale_after_seconds=self.stale_after
+            )
+            depth, oldest = await crud_content.content_analysis_job.count_pending_jobs(
+                db
+            )
+        if requeued:
+            logger.warning("content_analysis_jobs_requeued", count=requeued)
+        self.metrics["content_analysis_queue_depth"].set(depth)
+        self.metrics["content_analysis_oldest_pending_seconds"].set(
+            (datetime.utcnow() - oldest).total_seconds() if oldest else 0
+        )
+
+    async def run_once(self) -> int:
+        """Claim and process one batch; returns the number of jobs claimed."""
+        started = time.perf_counter()
+        async with self._session() as db:
+            jobs = await crud_content.content_analysis_job.claim_pending_jobs(
+                db, limit=self.claim_size, job_type=self.job_type
+            )
+            items = await crud_content.content_item.get_by_content_ids(
+                db, content_ids=[job.content_id for job in jobs]
+            )
+        self._observe_stage("claim", time.perf_counter() - started)
+        if not jobs:
+            return 0
+
+        claimed_at = datetime.utcnow()
+        for job in jobs:
+            self.metrics["content_analysis_queue_lag_seconds"].observe(
+                max((claimed_at - job.created_at).total_seconds(), 0)
+            )
+        self.stats["claimed"] += len(jobs)
+        self.stats["batches"] += 1
+
+        # Jobs with the same analysis types share provider batches
+        groups: Dict[str, List[ContentAnalysisJob]] = {}
+        missing = []
+        for job in jobs:
+            if job.content_id in items:
+                groups.setdefault(job.job_type, []).append(job)
+            else:
+                missing.append(job)
+
+        chunk_size = self.analyzer.pipeline.batch_size
+        chunks = [
+            group[i : i + chunk_size]
+            for group in groups.values()
+            for i in range(0, len(group), chunk_size)
+        ]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(chunk: List[ContentAnalysisJob]) -> None:
+            async with semaphore:
+                await self._process_chunk(chunk, items)
+
+        await asyncio.gather(*(bounded(chunk) for chunk in chunks))
+        if missing:
+            await self._fail_jobs(missing, "Content item not found")
+
+        logger.info(
+            "content_analysis_batch_processed",
+            jobs=len(jobs),
+            seconds=round(time.perf_counter() - started, 3),
+        )
+        return len(jobs)
+
+    async def _process_chunk(
+        self, jobs: List[ContentAnalysisJob], items: Dict[str, ContentItem]
+    ) -> None:
+        content_items = [items[job.content_id] for job in jobs]
+        checkpointed = set()
+        started = time.perf_counter()
+        try:
+            async with self._session() as db:
+                outcomes = await self.analyzer.analyze_content_items(
+                    db, content_items, analysis_types_for_job(jobs[0].job_type)
+                )
+                elapsed = time.perf_counter() - started
+                analysis_time = max(
+                    (o["processing_time_seconds"] for o in outcomes), default=elapsed
+                )
+                self._observe_stage("analyze", analysis_time)
+                self._observe_stage("persist", max(elapsed - analysis_time, 0))
+
+                checkpoint_started = time.perf_counter()
+                for job, outcome in zip(jobs, outcomes):
+                    await self._checkpoint(db, job, outcome)
+                    checkpointed.add(job.job_id)
+                self._observe_stage(
+                    "checkpoint", time.perf_counter() - checkpoint_started
+                )
+        except Exception as e:
+            logger.error("content_analysis_chunk_failed", jobs=len(jobs), error=str(e))
+            await self._fail_jobs(
+                [job for job in jobs if job.job_id not in checkpointed], str(e)
+            )
+
+    async def _checkpoint(
+        self, db, job: ContentAnalysisJob, outcome: Dict[str, Any]
+    ) -> None:
+        if outcome["success"]:
+            await crud_content.content_analysis_job.update_job_status(
+                db,
+                job_id=job.job_id,
+                status="completed",
+                progress=1.0,
+                results=outcome["analysis_results"],
+                ai_model_used=outcome["model_version"],
+                processing_time_seconds=outcome["processing_time_seconds"],
+                refresh=False,
+            )
+            self.stats["completed"] += 1
+            self.metrics["content_analysis_jobs"].labels(status="completed").inc()
+        else:
+            await crud_content.content_analysis_job.update_job_status(
+                db,
+                job_id=job.job_id,
+                status="failed",
+                error_message=outcome.get("error", "Unknown error"),
+                refresh=False,
+            )
+            self.stats["failed"] += 1
+            self.metrics["content_analysis_jobs"].labels(status="failed").inc()
+
+    async def _fail_jobs(self, jobs: List[ContentAnalysisJob], error: str) -> None:
+        try:
+            async with self._session() as db:
+                for job in jobs:
+                    await crud_content.content_analysis_job.update_job_status(
+                        db,
+                        job_id=job.job_id,
+                        status="failed",
+                        error_message=error,
+                        refresh=False,
+                    )
+        except Exception as e:
+            # Left as running; requeue_stale_jobs picks them up again
+            logger.error("content_analysis_fail_update_error", error=str(e))
+            return
+        self.stats["failed"] += len(jobs)
+        self.metrics["content_analysis_jobs"].labels(status="failed").inc(len(jobs))
+
+    async def backfill(
+        self,
+        *,
+        limit: int = 1_000_000,
+        analysis_age_hours: int = 24,
+        chunk: int = 10_000,
+    ) -> int:
+        """Queue jobs for content needing analysis; returns jobs created."""
+        created = 0
+        while created < limit:
+            async with self._session() as db:
+                inserted = await crud_content.content_analysis_job.enqueue_content_needing_analysis(
+                    db,
+                    job_type=self.job_type or "full_analysis",
+                    analysis_age_hours=analysis_age_hours,
+                    limit=min(chunk, limit - created),
+                )
+            created += inserted
+            if inserted == 0:
+                break
+        logger.info("content_analysis_backfill_queued", jobs=created)
+        return created
+
+
+def build_worker(job_type: Optional[str] = None) -> ContentAnalysisWorker:
+    """Worker configured from settings."""
+    return ContentAnalysisWorker(
+        claim_size=settings.content_analysis_claim_size,
+        concurrency=settings.content_analysis_concurrency,
+        poll_interval=settings.content_analysis_poll_interval,
+        stale_after=settings.content_analysis_stale_after,
+        job_type=job_type,
+    )
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    """Main entry point for the content analysis worker."""
+    from app.core.logging import setup_logging
+    from app.services.ai_analysis_pipeline import close_ai_pipeline
+
+    parser = argparse.ArgumentParser(description="Content analysis worker")
+    parser.add_argument("--job-type", default=None, help="Only claim this job type")
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Queue jobs for content needing analysis, then exit",
+    )
+    parser.add_argument("--limit", type=int, default=1_000_000)
+    parser.add_argument("--analysis-age-hours", type=int, default=24)
+    args = parser.parse_args(argv)
+
+    setup_logging(settings.model_dump())
+    worker = build_worker(args.job_type)
+
+    if args.backfill:
+        await worker.backfill(
+            limit=args.limit, analysis_age_hours=args.analysis_age_hours
+        )
+        return
+
+    if settings.content_analysis_metrics_port:
+        from prometheus_client import start_http_server
+
+        start_http_server(settings.content_analysis_metrics_port)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    logger.info(
+        "content_analysis_worker_starting", environment=settings.environment.value
+    )
+    try:
+        await worker.run()
+    finally:
+        await close_ai_pipeline()
+        logger.info("content_analysis_worker_shutdown")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
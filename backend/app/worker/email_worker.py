@@ -1,6 +1,7 @@
 import asyncio
 import logging
-from typing import TYPE_CHECKING, Any, Dict, Optional
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from app.db.session import AsyncSessionLocal
 from celery import Task
@@ -173,6 +174,57 @@ def send_password_reset_email_task(
         raise self.retry(exc=e, countdown=countdown)
 
 
+@celery_app.task(
+    name="process_email_webhook_events_task",
+    bind=True,
+    max_retries=3,
+    default_retry_delay=60,
+)
+def process_email_webhook_events_task(
+    self, events: List[Dict[str, Any]], provider: Optional[str] = None
+) -> dict:
+    """Celery task to apply a deferred batch of email webhook events.
+
+    Database errors propagate so the batch is retried; retries are safe
+    because events already recorded are dropped by their signature.
+    """
+    try:
+        return asyncio.run(_process_webhook_events_async(events, provider))
+    except Exception as e:
+        logger.error(f"Error processing deferred {provider} webhook batch: {e}")
+        countdown = 2**self.request.retries * 60
+        raise self.retry(exc=e, countdown=countdown)
+
+
+@celery_app.task(
+    name="compact_email_rollups_task",
+    bind=True,
+    max_retries=3,
+    default_retry_delay=60,
+)
+def compact_email_rollups_task(self, days: Optional[int] = None) -> dict:
+    """Celery task to rebuild the recent email rollups from tracking rows."""
+    try:
+        return asyncio.run(_compact_email_rollups_async(days))
+    except Exception as e:
+        logger.error(f"Error compacting email rollups: {e}")
+        countdown = 2**self.request.retries * 60
+        raise self.retry(exc=e, countdown=countdown)
+
+
+@celery_app.on_after_configure.connect
+def setup_email_periodic_tasks(sender, **kwargs):
+    """Set up periodic tasks for email tracking."""
+    from celery.schedules import crontab
+
+    # Repair drift in the email rollups daily at 3:30 AM UTC
+    sender.add_periodic_task(
+        crontab(hour=3, minute=30),
+        compact_email_rollups_task.s(),
+        name="compact email rollups",
+    )
+
+
 # Async helper functions that the tasks call
 async def _send_welcome_email_async(
     user_email: str, user_name: str, verification_token: str
@@ -265,6 +317,45 @@ async def _send_password_reset_email_async(
     return {"status": "success", "email": user_email, "type": "password_reset"}
 
 
+async def _process_webhook_events_async(
+    events: List[Dict[str, Any]], provider: Optional[str]
+) -> dict:
+    """Apply deferred webhook events with the endpoint's batch processor."""
+    from app.api.v1.endpoints.webhooks import process_webhook_events_batch
+    from app.schemas.webhooks import WebhookEventMapping
+
+    event_mappings = [WebhookEventMapping.model_validate(event) for event in events]
+    async with AsyncSessionLocal() as db:
+        result = await process_webhook_events_batch(
+            db, event_mappings, provider=provider, raise_errors=True
+        )
+    return result.model_dump()
+
+
+async def _compact_email_rollups_async(days: Optional[int]) -> dict:
+    """Rebuild the email rollups for the last ``days`` days."""
+    from app.crud.email_tracking import email_tracking
+
+    settings = get_settings()
+    if days is None:
+        days = settings.email_rollup_compaction_days
+    end_day = datetime.now(UTC).date()
+    # The last ``days`` days, today included
+    start_day = end_day - timedelta(days=days - 1)
+
+    async with AsyncSessionLocal() as db:
+        written = await email_tracking.rebuild_rollups(
+            db, start_day=start_day, end_day=end_day
+        )
+
+    logger.info(f"Compacted email rollups for {start_day}..{end_day}: {written}")
+    return {
+        "start_day": start_day.isoformat(),
+        "end_day": end_day.isoformat(),
+        **written,
+    }
+
+
 class EmailWorker:
     """Email worker that processes emails from a queue."""
 
@@ -372,8 +372,10 @@ async def main():
         # Initialize processor
         await event_processor.initialize()
 
-        # Create background task for cleanup
+        # Create background tasks for cleanup, analytics rollups and anonymization
         cleanup_task = asyncio.create_task(periodic_cleanup())
+        rollup_task = asyncio.create_task(periodic_rollup())
+        anonymization_task = asyncio.create_task(periodic_anonymization())
 
         # Start processing
         await event_processor.process_event_queue()
@@ -396,9 +398,93 @@ async def periodic_cleanup():
             # Run cleanup every hour
             await asyncio.sleep(3600)
             await event_processor.cleanup_old_metrics()
+            await maintain_event_storage()
         except Exception as e:
             logger.error("periodic_cleanup_error", error=str(e))
 
 
+async def maintain_event_storage():
+    """Create upcoming event partitions and remove expired events."""
+    async with AsyncSessionLocal() as db:
+        manager = crud.event.partition_manager(settings.event_partition_interval)
+        if await manager.is_partitioned(db):
+            await manager.ensure_partitions(db, ahead=settings.event_partitions_ahead)
+        report = await crud.event.purge_expired_events(
+            db,
+            batch_size=settings.event_retention_batch_size,
+            max_batches=settings.event_retention_max_batches,
+            detach_partitions=settings.event_retention_detach_partitions,
+        )
+    logger.info(
+        "event_retention_completed",
+        rows_removed=report.rows_removed,
+        bytes_reclaimed=report.bytes_reclaimed,
+        partitions_dropped=report.partitions_dropped,
+        partitions_detached=report.partitions_detached,
+        duration_seconds=round(report.duration_seconds, 3),
+    )
+
+
+async def periodic_rollup():
+    """Periodically fold newly inserted events into the analytics rollups.
+
+    Recent buckets are also recounted every
+    ``event_rollup_refold_interval_seconds`` to pick up events whose
+    transaction committed after the rollup lag had passed.
+    """
+    last_refold = datetime.utcnow()
+    while event_processor.running:
+        try:
+            await asyncio.sleep(settings.event_rollup_interval_seconds)
+            async with AsyncSessionLocal() as db:
+                written = await crud.event.refresh_rollups(
+                    db, lag_seconds=settings.event_rollup_lag_seconds
+                )
+            logger.info("event_rollups_refreshed", **written)
+
+            now = datetime.utcnow()
+            refold_interval = timedelta(
+                seconds=settings.event_rollup_refold_interval_seconds
+            )
+            if now - last_refold >= refold_interval:
+                last_refold = now
+                since = now - timedelta(hours=settings.event_rollup_refold_hours)
+                async with AsyncSessionLocal() as db:
+                    recounted = await crud.event.refold_rollups(db, since=since)
+                logger.info("event_rollups_refolded", **recounted)
+        except Exception as e:
+            logger.error("periodic_rollup_error", error=str(e))
+
+
+async def periodic_anonymization():
+    """Run queued and interrupted event anonymization jobs one at a time."""
+    while event_processor.running:
+        try:
+            await asyncio.sleep(settings.event_anonymization_poll_seconds)
+            async with AsyncSessionLocal() as db:
+                job = await crud.event.claim_anonymization_job(
+                    db, stale_after_seconds=settings.event_anonymization_stale_seconds
+                )
+                if job is None:
+                    continue
+                logger.info(
+                    "event_anonymization_started",
+                    job_id=job.job_id,
+                    resumed_after=job.last_event_id,
+                    max_event_id=job.max_event_id,
+                )
+                job = await crud.event.run_anonymization_job(db, job=job)
+            logger.info(
+                "event_anonymization_completed",
+                job_id=job.job_id,
+                events_anonymized=job.events_anonymized,
+                chunks=job.chunks_processed,
+                events_per_second=round(job.events_per_second, 1),
+                processing_time_seconds=round(job.processing_time_seconds, 3),
+            )
+        except Exception as e:
+            logger.error("periodic_anonymization_error", error=str(e))
+
+
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,106 +1,319 @@
 """Background worker for recommendation system processing."""
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from app.crud import event as crud_event
 from app.crud import recommendation as crud_recommendation
 from app.db.session import AsyncSessionLocal
+from app.ml.behavior_summary import load_behavior_summaries
 from app.ml.recommendations import RecommendationEngine, SimilarityEngine
 from app.models.event import Event
 from app.models.user import User
 from app.schemas.recommendation import RecommendationType, UserPreferencesUpdate
+from app.services.recommendation_serving import RecommendationServingStore
 from celery import Celery
+from redis.asyncio import Redis
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.celery import celery_app
+from app.core.config import get_settings
+from app.core.metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
 
-@celery_app.task(name="recommendation.generate_daily_recommendations")
-def generate_daily_recommendations_task(user_ids: Optional[List[int]] = None) -> dict:
-    """Generate daily recommendations for users."""
+_RUN_TTL_SECONDS = 3 * 86400
+_DAILY_RECOMMENDATION_TYPES = [
+    RecommendationType.FEATURE,
+    RecommendationType.CONTENT,
+    RecommendationType.ACTION,
+]
 
-    async def _generate_daily_recommendations():
-        async with AsyncSessionLocal() as db:
-            engine = RecommendationEngine(db)
 
-            # Get active users if no specific user IDs provided
-            if not user_ids:
-                from sqlalchemy import select
+def _run_async(coro):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
 
-                result = await db.execute(
-                    select(User.id)
-                    .where(User.is_active == True)
-                    .limit(1000)  # Process in batches
-                )
-                target_user_ids = [row.id for row in result.all()]
-            else:
-                target_user_ids = user_ids
 
-            recommendations_created = 0
-            errors = 0
+def _shard_key(run_id: str, start_id: int) -> str:
+    return f"recommendation_run:{run_id}:shard:{start_id}"
 
-            for user_id in target_user_ids:
-                try:
-                    # Check if user already has recent recommendations
-                    existing_recs = await crud_recommendation.recommendation.get_user_recommendations(
-                        db,
-                        user_id=user_id,
-                        skip=0,
-                        limit=1,
-                    )
 
-                    # Skip if user has recommendations from today
-                    if existing_recs:
-                        latest_rec = existing_recs[0]
-                        if latest_rec.created_at.date() == datetime.utcnow().date():
-                            continue
+def plan_shards(min_id: int, max_id: int, shard_size: int) -> List[Tuple[int, int]]:
+    """Split ``[min_id, max_id]`` into half-open ``(start, end)`` id ranges."""
+    shard_size = max(1, shard_size)
+    return [
+        (start, min(start + shard_size, max_id + 1))
+        for start in range(min_id, max_id + 1, shard_size)
+    ]
 
-                    # Generate new recommendations
-                    new_recommendations = await engine.generate_recommendations(
-                        user_id=user_id,
-                        recommendation_types=[
-                            RecommendationType.FEATURE,
-                            RecommendationType.CONTENT,
-                            RecommendationType.ACTION,
-                        ],
-                        max_recommendations=5,
-                        algorithm="hybrid",
-                    )
 
-                    # Create recommendations
-                    for rec_create in new_recommendations:
-                        await crud_recommendation.recommendation.create(
-                            db, obj_in=rec_create
-                        )
-                        recommendations_created += 1
+async def _generate_for_users(
+    db: AsyncSession,
+    user_ids: List[int],
+    store: Optional[RecommendationServingStore] = None,
+) -> Dict[str, int]:
+    """Generate and bulk-insert today's recommendations for a batch of users.
 
-                except Exception as e:
-                    logger.error(
-                        f"Error generating recommendations for user {user_id}: {str(e)}"
-                    )
-                    errors += 1
-                    continue
+    With a ``store``, the generated users' ranked lists are materialized for
+    the serving path right after the insert.
+    """
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    already_done = (
+        await crud_recommendation.recommendation.get_users_with_recommendations_since(
+            db, user_ids=user_ids, since=today
+        )
+    )
+    pending = [uid for uid in user_ids if uid not in already_done]
+
+    # One event query refreshes every summary the batch will read
+    await load_behavior_summaries(db, pending)
+
+    engine = RecommendationEngine(db)
+    new_recommendations = []
+    errors = 0
+    for user_id in pending:
+        try:
+            new_recommendations.extend(
+                await engine.generate_recommendations(
+                    user_id=user_id,
+                    recommendation_types=_DAILY_RECOMMENDATION_TYPES,
+                    max_recommendations=5,
+                    algorithm="hybrid",
+                )
+            )
+        except Exception as e:
+            logger.error(
+                f"Error generating recommendations for user {user_id}: {str(e)}"
+            )
+            await db.rollback()
+            errors += 1
 
-            return {
-                "users_processed": len(target_user_ids),
-                "recommendations_created": recommendations_created,
-                "errors": errors,
-                "completed_at": datetime.utcnow().isoformat(),
-            }
+    created = await crud_recommendation.recommendation.insert_many(
+        db, recommendations=new_recommendations
+    )
+    if store is not None and pending:
+        await _materialize_for_users(db, store, pending)
+    return {
+        "users": len(user_ids),
+        "skipped": len(already_done),
+        "errors": errors,
+        "recommendations": created,
+    }
 
-    # Run the async function
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+
+async def _materialize_for_users(
+    db: AsyncSession, store: RecommendationServingStore, user_ids: List[int]
+) -> None:
+    """Publish the users' ranked recommendations to the serving store."""
     try:
-        result = loop.run_until_complete(_generate_daily_recommendations())
+        rankings = await crud_recommendation.recommendation.get_active_for_users(
+            db, user_ids=user_ids, limit_per_user=store.top_n + 1
+        )
+        preferences = await crud_recommendation.user_preferences.get_by_user_ids(
+            db, user_ids=user_ids
+        )
+        await store.materialize(rankings, preferences)
+    except Exception as e:
+        # Readers fall back to Postgres and rematerialize on their own
+        logger.warning(
+            f"Failed to materialize recommendations for {len(user_ids)} users: {e}"
+        )
+
+
+async def _active_user_id_bounds(
+    db: AsyncSession,
+) -> Tuple[Optional[int], Optional[int]]:
+    result = await db.execute(
+        select(func.min(User.id), func.max(User.id)).where(User.is_active == True)
+    )
+    return tuple(result.one())
+
+
+async def _next_user_batch(
+    db: AsyncSession, after_id: int, end_id: int, limit: int
+) -> List[int]:
+    result = await db.execute(
+        select(User.id)
+        .where(User.is_active == True, User.id > after_id, User.id < end_id)
+        .order_by(User.id)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+@celery_app.task(name="recommendation.generate_daily_recommendations")
+def generate_daily_recommendations_task(
+    user_ids: Optional[List[int]] = None, run_id: Optional[str] = None
+) -> dict:
+    """Generate daily recommendations for users.
+
+    With explicit ``user_ids`` the users are processed inline. Otherwise the
+    active user-id space is split into ``recommendation_shard_size`` ranges,
+    and each range is dispatched as a ``generate_recommendation_shard`` task.
+    ``run_id`` defaults to today's date. Re-running the same run resumes
+    unfinished shards from their checkpoints and skips finished ones.
+    """
+    settings = get_settings()
+
+    async def _generate_for_user_ids():
+        totals = {"users": 0, "skipped": 0, "errors": 0, "recommendations": 0}
+        redis = Redis.from_url(str(settings.redis_url), decode_responses=True)
+        store = RecommendationServingStore(redis)
+        try:
+            async with AsyncSessionLocal() as db:
+                for i in range(0, len(user_ids), settings.recommendation_batch_size):
+                    batch = user_ids[i : i + settings.recommendation_batch_size]
+                    batch_totals = await _generate_for_users(db, batch, store)
+                    for key, value in batch_totals.items():
+                        totals[key] += value
+        finally:
+            await redis.close()
+        return {
+            "users_processed": totals["users"],
+            "recommendations_created": totals["recommendations"],
+            "errors": totals["errors"],
+            "completed_at": datetime.utcnow().isoformat(),
+        }
+
+    async def _dispatch_shards():
+        async with AsyncSessionLocal() as db:
+            min_id, max_id = await _active_user_id_bounds(db)
+        if min_id is None:
+            return []
+        return plan_shards(min_id, max_id, settings.recommendation_shard_size)
+
+    if user_ids:
+        result = _run_async(_generate_for_user_ids())
         logger.info(f"Daily recommendation generation completed: {result}")
         return result
+
+    run_id = run_id or datetime.utcnow().strftime("%Y-%m-%d")
+    shards = _run_async(_dispatch_shards())
+    for start_id, end_id in shards:
+        generate_recommendation_shard_task.delay(run_id, start_id, end_id)
+
+    result = {
+        "run_id": run_id,
+        "shards_dispatched": len(shards),
+        "dispatched_at": datetime.utcnow().isoformat(),
+    }
+    logger.info(f"Daily recommendation shards dispatched: {result}")
+    return result
+
+
+async def _process_recommendation_shard(
+    run_id: str, start_id: int, end_id: int
+) -> dict:
+    """Process one id range, checkpointing the cursor in Redis after each batch."""
+    settings = get_settings()
+    metrics = get_metrics()
+    key = _shard_key(run_id, start_id)
+    redis = Redis.from_url(str(settings.redis_url), decode_responses=True)
+    store = RecommendationServingStore(redis)
+    try:
+        state = await redis.hgetall(key)
+        if state.get("status") == "done":
+            return {"run_id": run_id, "start_id": start_id, "already_done": True}
+
+        cursor = int(state.get("cursor", start_id - 1))
+        totals = {
+            name: int(state.get(name, 0))
+            for name in ("users", "skipped", "errors", "recommendations")
+        }
+        started = time.perf_counter()
+        processed = 0
+
+        async with AsyncSessionLocal() as db:
+            while True:
+                batch = await _next_user_batch(
+                    db, cursor, end_id, settings.recommendation_batch_size
+                )
+                if not batch:
+                    break
+                batch_totals = await _generate_for_users(db, batch, store)
+                for name, value in batch_totals.items():
+                    totals[name] += value
+                processed += len(batch)
+                cursor = batch[-1]
+
+                await redis.hset(
+                    key, mapping={"status": "running", "cursor": cursor, **totals}
+                )
+                await redis.expire(key, _RUN_TTL_SECONDS)
+
+                generated = (
+                    batch_totals["users"]
+                    - batch_totals["skipped"]
+                    - batch_totals["errors"]
+                )
+                shard_users = metrics["recommendation_shard_users"]
+                shard_users.labels(outcome="generated").inc(generated)
+                shard_users.labels(outcome="skipped").inc(batch_totals["skipped"])
+                shard_users.labels(outcome="error").inc(batch_totals["errors"])
+                metrics["recommendation_shard_recommendations"].inc(
+                    batch_totals["recommendations"]
+                )
+
+        elapsed = time.perf_counter() - started
+        users_per_second = processed / elapsed if elapsed > 0 else 0.0
+        await redis.hset(
+            key,
+            mapping={
+                "status": "done",
+                "cursor": cursor,
+                **totals,
+                "seconds": round(elapsed, 3),
+                "users_per_second": round(users_per_second, 2),
+            },
+        )
+        await redis.expire(key, _RUN_TTL_SECONDS)
+        metrics["recommendation_shard_seconds"].observe(elapsed)
+        if processed:
+            metrics["recommendation_shard_throughput"].observe(users_per_second)
+
+        return {
+            "run_id": run_id,
+            "start_id": start_id,
+            "end_id": end_id,
+            **totals,
+            "users_per_second": round(users_per_second, 2),
+            "completed_at": datetime.utcnow().isoformat(),
+        }
     finally:
-        loop.close()
+        await redis.close()
+
+
+@celery_app.task(
+    bind=True,
+    name="recommendation.generate_recommendation_shard",
+    max_retries=5,
+)
+def generate_recommendation_shard_task(
+    self, run_id: str, start_id: int, end_id: int
+) -> dict:
+    """Generate daily recommendations for active user ids in ``[start_id, end_id)``.
+
+    Progress is checkpointed per batch, so a retried or re-dispatched shard
+    resumes after the last committed batch.
+    """
+    try:
+        result = _run_async(_process_recommendation_shard(run_id, start_id, end_id))
+    except Exception as e:
+        logger.error(
+            f"Recommendation shard {run_id}:{start_id}-{end_id} failed: {str(e)}"
+        )
+        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+    logger.info(f"Recommendation shard completed: {result}")
+    return result
 
 
 @celery_app.task(name="recommendation.update_user_preferences")
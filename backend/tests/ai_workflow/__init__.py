@@ -0,0 +1 @@
+"""Tests for the AI workflow foundation."""
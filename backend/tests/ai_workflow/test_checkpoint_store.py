@@ -0,0 +1,189 @@
+"""Tests for indexed, delta-compressed workflow checkpoint storage."""
+import json
+
+import pytest
+
+from app.ai_workflow import checkpoint_store
+from app.ai_workflow.checkpoint_store import (
+    CheckpointStore,
+    apply_delta,
+    compute_delta,
+    decode_payload,
+    encode_payload,
+)
+from app.ai_workflow.state_manager import WorkflowStateManager
+
+
+def _save(store, checkpoint_id, context_data, session_id="s1", agent_id="a1"):
+    return store.save(
+        checkpoint_id,
+        session_id,
+        agent_id,
+        context_data,
+        {"session_id": session_id, "agent_id": agent_id},
+        {"created_at": f"2025-01-01T00:00:{int(checkpoint_id[1:]):02d}"},
+    )
+
+
+def test_payload_round_trip():
+    payload = {"context": {"agent_id": "a1"}, "context_data": {"step": 3}}
+
+    assert decode_payload(encode_payload(payload)) == payload
+    with pytest.raises(ValueError):
+        decode_payload(b"JUNKxxxxxxxx")
+
+
+def test_delta_round_trip_handles_added_changed_and_removed_keys():
+    base = {"keep": 1, "change": [1, 2], "drop": "x"}
+    current = {"keep": 1, "change": [1, 2, 3], "add": {"nested": True}}
+
+    delta = compute_delta(base, current)
+
+    assert "keep" not in delta
+    assert apply_delta(base, delta) == current
+
+
+def test_deltas_are_taken_against_periodic_full_snapshots(tmp_path):
+    store = CheckpointStore(tmp_path, full_snapshot_interval=3)
+
+    kinds = [_save(store, f"c{i}", {"step": i})["kind"] for i in range(7)]
+
+    assert kinds == ["full", "delta", "delta", "full", "delta", "delta", "full"]
+    assert store.load_manifest("s1")["entries"]["c5"]["base_id"] == "c3"
+    for i in range(7):
+        assert store.load("s1", f"c{i}")[0] == {"step": i}
+
+
+def test_caller_mutations_do_not_leak_into_delta_base(tmp_path):
+    store = CheckpointStore(tmp_path)
+    context_data = {"items": [1]}
+    _save(store, "c0", context_data)
+
+    context_data["items"].append(2)
+    _save(store, "c1", context_data)
+
+    assert store.load("s1", "c0")[0] == {"items": [1]}
+    assert store.load("s1", "c1")[0] == {"items": [1, 2]}
+
+
+def test_reopened_store_finds_checkpoints_through_the_index(tmp_path):
+    store = CheckpointStore(tmp_path)
+    _save(store, "c0", {"step": 0})
+    _save(store, "c1", {"step": 1}, session_id="s2", agent_id="a2")
+
+    reopened = CheckpointStore(tmp_path)
+
+    assert reopened.checkpoint_count() == 2
+    assert reopened.session_for("c1") == "s2"
+    assert reopened.latest_id("s2", "a2") == "c1"
+    assert reopened.load("s2", "c1")[0] == {"step": 1}
+
+
+def test_delete_promotes_dependent_deltas(tmp_path):
+    store = CheckpointStore(tmp_path)
+    for i in range(3):
+        _save(store, f"c{i}", {"step": i})
+
+    assert store.delete("s1", "c0") is True
+
+    entries = store.load_manifest("s1")["entries"]
+    assert entries["c1"]["kind"] == "full"
+    assert entries["c2"]["kind"] == "full"
+    assert store.load("s1", "c2")[0] == {"step": 2}
+    assert store.session_for("c0") is None
+    assert store.delete("s1", "c0") is False
+    # The next save deltas against a snapshot that still exists
+    assert _save(store, "c3", {"step": 3})["base_id"] == "c2"
+
+
+def test_prune_keeps_newest_checkpoints(tmp_path):
+    store = CheckpointStore(tmp_path, full_snapshot_interval=2)
+    for i in range(5):
+        _save(store, f"c{i}", {"step": i})
+
+    removed = store.prune("s1", "a1", keep=2)
+
+    assert removed == ["c0", "c1", "c2"]
+    assert [cid for cid, _ in store.entries("s1")] == ["c4", "c3"]
+    assert store.load("s1", "c4")[0] == {"step": 4}
+
+
+def test_manifest_changes_are_appended_and_replayed(tmp_path):
+    store = CheckpointStore(tmp_path, full_snapshot_interval=2)
+    for i in range(5):
+        _save(store, f"c{i}", {"step": i})
+    store.prune("s1", "a1", keep=2)
+
+    assert not (tmp_path / "s1" / "manifest.json").exists()
+    log = (tmp_path / "s1" / "manifest.log").read_text().splitlines()
+    # Five saves, then the prune in one append: c1 is not promoted since it is
+    # dropped too, c3 is promoted before its base c2 goes
+    ops = [(record["op"], record["id"]) for record in map(json.loads, log[5:])]
+    assert ops == [("del", "c0"), ("del", "c1"), ("put", "c3"), ("del", "c2")]
+
+    reopened = CheckpointStore(tmp_path)
+    assert reopened.load_manifest("s1") == store.load_manifest("s1")
+    assert reopened.load("s1", "c3")[0] == {"step": 3}
+
+
+def test_manifest_log_is_compacted_into_the_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint_store, "_MANIFEST_LOG_SLACK", 2)
+    store = CheckpointStore(tmp_path)
+    for i in range(4):
+        _save(store, f"c{i}", {"step": i})
+    store.prune("s1", "a1", keep=1)
+
+    log_path = tmp_path / "s1" / "manifest.log"
+    assert log_path.read_text() == ""
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write('{"op":"del","id":"c3"')
+
+    reopened = CheckpointStore(tmp_path)
+    # The torn record is ignored and the log rewritten for later appends
+    assert reopened.latest_id("s1", "a1") == "c3"
+    assert log_path.read_text() == ""
+
+
+def test_legacy_json_checkpoints_are_imported(tmp_path):
+    checkpoints = tmp_path / "s1" / "checkpoints"
+    checkpoints.mkdir(parents=True)
+    (checkpoints / "old.json").write_text(
+        json.dumps(
+            {
+                "id": "old",
+                "agent_id": "a1",
+                "created_at": "2024-01-01T00:00:00",
+                "context": {"agent_id": "a1", "context_data": {"legacy": True}},
+            }
+        )
+    )
+
+    store = CheckpointStore(tmp_path)
+
+    assert store.session_for("old") == "s1"
+    assert store.load("s1", "old")[0] == {"legacy": True}
+
+
+def test_release_evicts_cached_session_state(tmp_path):
+    store = CheckpointStore(tmp_path)
+    _save(store, "c0", {"step": 0})
+    _save(store, "c1", {"step": 1}, session_id="s2")
+
+    store.release("s1")
+
+    assert store.cached_sessions() == 1
+    assert all(key[0] != "s1" for key in store._base_cache)
+    # Released sessions are re-read from disk on demand
+    assert _save(store, "c2", {"step": 2})["base_id"] == "c0"
+    assert store.load("s1", "c2")[0] == {"step": 2}
+
+
+async def test_state_manager_releases_completed_sessions(tmp_path):
+    manager = WorkflowStateManager(base_path=tmp_path)
+    checkpoint_id = await manager.save_checkpoint("s1", "a1", {"step": 1})
+    assert (await manager.get_statistics())["cached_sessions"] == 1
+
+    await manager.release_session("s1")
+
+    assert (await manager.get_statistics())["cached_sessions"] == 0
+    assert await manager.restore_checkpoint(checkpoint_id) == {"step": 1}
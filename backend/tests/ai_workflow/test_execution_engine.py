@@ -0,0 +1,246 @@
+"""Tests for the task execution engine."""
+import asyncio
+
+from app.ai_workflow.execution_engine import (
+    ExecutionContext,
+    Task,
+    TaskBatch,
+    TaskDependency,
+    TaskExecutionEngine,
+    TaskPriority,
+    TaskResult,
+    TaskStatus,
+)
+from app.ai_workflow.state_manager import WorkflowStateManager
+
+
+def _engine(tmp_path, **kwargs):
+    return TaskExecutionEngine(
+        message_bus=None, state_manager=None, base_path=tmp_path, **kwargs
+    )
+
+
+def _context(batch_id="batch", rollback_enabled=True):
+    return ExecutionContext(
+        batch_id=batch_id,
+        session_id="session",
+        agent_id="local",
+        rollback_enabled=rollback_enabled,
+    )
+
+
+def _task(task_id, *depends_on, task_type="work", priority=TaskPriority.NORMAL):
+    return Task(
+        id=task_id,
+        name=task_id,
+        task_type=task_type,
+        agent_id="local",
+        priority=priority,
+        dependencies=[TaskDependency(task_id=dep) for dep in depends_on],
+    )
+
+
+class Recorder:
+    """Task handler that logs start/finish order and tracks concurrency."""
+
+    def __init__(self, fail=(), delay=0.01):
+        self.fail = set(fail)
+        self.delay = delay
+        self.events = []
+        self.running = {}
+        self.peak = 0
+        self.peak_by_type = {}
+
+    async def __call__(self, task, context):
+        self.events.append(("start", task.id))
+        self.running[task.id] = task.task_type
+        self.peak = max(self.peak, len(self.running))
+        same_type = sum(1 for t in self.running.values() if t == task.task_type)
+        self.peak_by_type[task.task_type] = max(
+            self.peak_by_type.get(task.task_type, 0), same_type
+        )
+        await asyncio.sleep(self.delay)
+        del self.running[task.id]
+        self.events.append(("finish", task.id))
+        status = TaskStatus.FAILED if task.id in self.fail else TaskStatus.COMPLETED
+        return TaskResult(task_id=task.id, status=status)
+
+    def started(self):
+        return [task_id for kind, task_id in self.events if kind == "start"]
+
+    def index(self, kind, task_id):
+        return self.events.index((kind, task_id))
+
+
+async def _run_dag(engine, tasks, batch_id="batch", rollback_enabled=True):
+    batch = TaskBatch(id=batch_id, name=batch_id, tasks=tasks, execution_strategy="dag")
+    results = await engine.execute_batch(
+        batch, _context(batch_id, rollback_enabled=rollback_enabled)
+    )
+    return {result.task_id: result for result in results}
+
+
+async def test_runs_of_the_same_batch_are_serialized(tmp_path):
+    engine = _engine(tmp_path)
+    running = 0
+    peak = 0
+
+    async def handler(task, context):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return TaskResult(task_id=task.id, status=TaskStatus.COMPLETED)
+
+    engine.register_task_handler("work", handler)
+    batch = TaskBatch(
+        id="batch",
+        name="batch",
+        tasks=[Task(name="t", task_type="work", agent_id="local")],
+    )
+
+    await asyncio.gather(
+        engine.execute_batch(batch, _context()),
+        engine.execute_batch(batch, _context()),
+    )
+
+    assert peak == 1
+    stats = (await engine.get_statistics())["locks"]
+    assert stats["acquisitions"] == 2
+    assert stats["contended"] == 1
+    assert stats["active_keys"] == 0
+
+
+async def test_dag_starts_tasks_once_their_dependencies_complete(tmp_path):
+    engine = _engine(tmp_path)
+    recorder = Recorder()
+    engine.register_task_handler("work", recorder)
+
+    results = await _run_dag(
+        engine,
+        [_task("d", "b", "c"), _task("b", "a"), _task("c", "a"), _task("a")],
+    )
+
+    assert all(r.status == TaskStatus.COMPLETED for r in results.values())
+    assert recorder.index("start", "b") > recorder.index("finish", "a")
+    assert recorder.index("start", "c") > recorder.index("finish", "a")
+    assert recorder.index("start", "d") > recorder.index("finish", "b")
+    assert recorder.index("start", "d") > recorder.index("finish", "c")
+    # b and c are independent, so they overlap
+    assert recorder.peak == 2
+
+    timing = (await engine.get_execution_status("batch"))["dag_timing"]
+    assert timing["critical_path"][0] == "a"
+    assert timing["critical_path"][-1] == "d"
+    assert timing["max_parallelism"] == 2
+
+
+async def test_dag_dispatches_ready_tasks_by_priority(tmp_path):
+    engine = _engine(tmp_path, max_concurrency=1)
+    recorder = Recorder(delay=0)
+    engine.register_task_handler("work", recorder)
+
+    await _run_dag(
+        engine,
+        [
+            _task("low", priority=TaskPriority.LOW),
+            _task("normal"),
+            _task("critical", priority=TaskPriority.CRITICAL),
+            _task("high", priority=TaskPriority.HIGH),
+        ],
+    )
+
+    assert recorder.started() == ["critical", "high", "normal", "low"]
+
+
+async def test_dag_honours_global_and_task_type_caps(tmp_path):
+    engine = _engine(tmp_path, max_concurrency=3, task_type_concurrency={"slow": 1})
+    recorder = Recorder()
+    engine.register_task_handler("work", recorder)
+    engine.register_task_handler("slow", recorder)
+
+    tasks = [_task(f"w{i}") for i in range(4)]
+    tasks += [_task(f"s{i}", task_type="slow") for i in range(3)]
+    results = await _run_dag(engine, tasks)
+
+    assert len(results) == 7
+    assert all(r.status == TaskStatus.COMPLETED for r in results.values())
+    assert recorder.peak == 3
+    assert recorder.peak_by_type["slow"] == 1
+
+
+async def test_dag_failure_stops_dispatch_when_rollback_enabled(tmp_path):
+    engine = _engine(tmp_path, max_concurrency=1)
+    recorder = Recorder(fail={"a"})
+    engine.register_task_handler("work", recorder)
+
+    results = await _run_dag(engine, [_task("a"), _task("b"), _task("c", "a")])
+
+    assert recorder.started() == ["a"]
+    assert results["a"].status == TaskStatus.FAILED
+    assert set(results) == {"a"}
+
+
+async def test_dag_failure_skips_only_dependents_without_rollback(tmp_path):
+    engine = _engine(tmp_path)
+    recorder = Recorder(fail={"a"})
+    engine.register_task_handler("work", recorder)
+
+    results = await _run_dag(
+        engine,
+        [_task("a"), _task("b"), _task("c", "a"), _task("d", "c")],
+        rollback_enabled=False,
+    )
+
+    assert sorted(recorder.started()) == ["a", "b"]
+    assert results["b"].status == TaskStatus.COMPLETED
+    for task_id in ("c", "d"):
+        assert results[task_id].status == TaskStatus.FAILED
+        assert "unmet dependencies" in results[task_id].error
+
+
+async def test_dag_reports_cycles_and_missing_dependencies(tmp_path):
+    engine = _engine(tmp_path)
+    recorder = Recorder()
+    engine.register_task_handler("work", recorder)
+
+    results = await _run_dag(
+        engine,
+        [_task("ok"), _task("x", "y"), _task("y", "x"), _task("orphan", "missing")],
+        rollback_enabled=False,
+    )
+
+    assert recorder.started() == ["ok"]
+    assert results["ok"].status == TaskStatus.COMPLETED
+    for task_id in ("x", "y", "orphan"):
+        assert results[task_id].status == TaskStatus.FAILED
+
+
+async def test_dag_timings_keep_only_recent_batches(tmp_path):
+    engine = _engine(tmp_path, max_dag_timings=2)
+    engine.register_task_handler("work", Recorder(delay=0))
+
+    for i in range(4):
+        await _run_dag(engine, [_task("a")], batch_id=f"batch_{i}")
+
+    assert list(engine._dag_timings) == ["batch_2", "batch_3"]
+    assert (await engine.get_execution_status("batch_0"))["dag_timing"] is None
+    assert (await engine.get_execution_status("batch_3"))["dag_timing"] is not None
+
+
+async def test_batch_completion_releases_checkpoint_cache(tmp_path):
+    state_manager = WorkflowStateManager(base_path=tmp_path / "state")
+    engine = TaskExecutionEngine(
+        message_bus=None, state_manager=state_manager, base_path=tmp_path
+    )
+    engine.register_task_handler("work", Recorder(delay=0))
+    batch = TaskBatch(
+        id="batch", name="batch", tasks=[_task(f"t{i}") for i in range(6)]
+    )
+
+    await engine.execute_batch(batch, _context())
+
+    assert (await state_manager.get_statistics())["cached_sessions"] == 0
+    # Checkpoints written during the batch are still on disk
+    assert len(await state_manager.list_checkpoints("session")) == 1
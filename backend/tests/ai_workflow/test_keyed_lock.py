@@ -0,0 +1,109 @@
+"""Tests for refcounted keyed asyncio locks."""
+import asyncio
+
+import pytest
+
+from app.ai_workflow.keyed_lock import KeyedLock
+
+
+async def test_same_key_is_mutually_exclusive():
+    locks = KeyedLock("test", sample_rate=0)
+    active = 0
+    peak = 0
+
+    async def worker():
+        nonlocal active, peak
+        async with locks.hold("session"):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(worker() for _ in range(5)))
+
+    assert peak == 1
+    stats = locks.stats()
+    assert stats["acquisitions"] == 5
+    assert stats["contended"] == 4
+
+
+async def test_different_keys_do_not_block_each_other():
+    locks = KeyedLock("test", sample_rate=0)
+    entered = asyncio.Event()
+
+    async with locks.hold("a"):
+        async with locks.hold("b"):
+            entered.set()
+        assert locks.locked("a")
+        assert not locks.locked("b")
+
+    assert entered.is_set()
+    assert locks.stats()["contended"] == 0
+
+
+async def test_idle_keys_are_evicted():
+    locks = KeyedLock("test", sample_rate=0)
+
+    for i in range(100):
+        async with locks.hold(f"key_{i}"):
+            assert len(locks) == 1
+
+    assert len(locks) == 0
+    assert locks.stats()["peak_keys"] == 1
+
+
+async def test_entry_kept_while_waiters_remain():
+    locks = KeyedLock("test", sample_rate=0)
+    order = []
+
+    async def waiter(name):
+        async with locks.hold("key"):
+            order.append(name)
+
+    async with locks.hold("key"):
+        tasks = [asyncio.create_task(waiter(n)) for n in ("first", "second")]
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+    assert order == ["first", "second"]
+    assert len(locks) == 0
+
+
+async def test_cancelled_waiter_releases_its_reference():
+    locks = KeyedLock("test", sample_rate=0)
+
+    async def waiter():
+        async with locks.hold("key"):
+            pass
+
+    async with locks.hold("key"):
+        task = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert locks.locked("key")
+
+    assert len(locks) == 0
+    assert locks.stats()["acquisitions"] == 1
+
+
+async def test_cancelled_holder_releases_the_lock():
+    locks = KeyedLock("test", sample_rate=0)
+    held = asyncio.Event()
+
+    async def holder():
+        async with locks.hold("key"):
+            held.set()
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(holder())
+    await held.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert not locks.locked("key")
+    assert len(locks) == 0
+    async with locks.hold("key"):
+        pass
@@ -0,0 +1,208 @@
+"""Tests for the message bus storage primitives."""
+from datetime import datetime, timedelta, timezone
+
+from app.ai_workflow.message_log import AckTracker, PriorityIndex, SegmentLog
+from app.ai_workflow.messaging import AgentMessageBus
+
+
+class TestSegmentLog:
+    def test_recover_returns_records_in_offset_order(self, tmp_path):
+        log = SegmentLog(tmp_path, max_segment_bytes=64)
+        offsets = [log.append({"n": i}) for i in range(10)]
+
+        recovered = SegmentLog(tmp_path, max_segment_bytes=64)
+
+        assert offsets == list(range(10))
+        assert list(recovered.recover()) == [(i, {"n": i}) for i in range(10)]
+        assert recovered.append({"n": 10}) == 10
+
+    def test_released_segments_are_deleted_except_the_tail(self, tmp_path):
+        log = SegmentLog(tmp_path, max_segment_bytes=64)
+        for i in range(10):
+            log.append({"n": i})
+        segments = log.segment_count
+        assert segments > 2
+
+        for offset in range(10):
+            log.release(offset)
+
+        assert log.segment_count == 1
+        assert len(list(tmp_path.glob("*.log"))) == 1
+        # Releasing twice is a no-op
+        log.release(0)
+
+    def test_torn_trailing_record_is_truncated(self, tmp_path):
+        log = SegmentLog(tmp_path)
+        log.append({"n": 0})
+        log.append({"n": 1})
+        segment = next(tmp_path.glob("*.log"))
+        with open(segment, "ab") as f:
+            f.write(b'{"o":2,"m":{"n"')
+
+        recovered = SegmentLog(tmp_path)
+        records = list(recovered.recover())
+
+        assert [offset for offset, _ in records] == [0, 1]
+        assert recovered.append({"n": 2}) == 2
+        assert [o for o, _ in SegmentLog(tmp_path).recover()] == [0, 1, 2]
+
+
+class TestAckTracker:
+    def test_out_of_order_acks_advance_the_watermark(self, tmp_path):
+        acks = AckTracker(tmp_path / "acks")
+
+        assert acks.ack(2) is True
+        assert acks.ack(0) is True
+        assert acks.watermark == 1
+        assert acks.is_acked(2) and not acks.is_acked(1)
+
+        acks.ack(1)
+
+        assert acks.watermark == 3
+        assert acks.pending_count == 0
+        assert acks.ack(1) is False
+
+    def test_state_survives_reload(self, tmp_path):
+        acks = AckTracker(tmp_path / "acks")
+        for offset in (0, 1, 5):
+            acks.ack(offset)
+
+        reloaded = AckTracker(tmp_path / "acks")
+
+        assert reloaded.watermark == 2
+        assert reloaded.is_acked(5)
+        assert not reloaded.is_acked(3)
+
+    def test_advance_skips_offsets_that_were_never_acked(self, tmp_path):
+        acks = AckTracker(tmp_path / "acks")
+        for offset in (1, 3, 6):
+            acks.ack(offset)
+
+        assert acks.advance(6) is True
+        assert acks.advance(4) is False
+
+        # 6 was acked, so the watermark runs on past it
+        assert acks.watermark == 7
+        assert acks.pending_count == 0
+        assert AckTracker(tmp_path / "acks").watermark == 7
+
+    def test_log_is_compacted(self, tmp_path):
+        path = tmp_path / "acks"
+        acks = AckTracker(path)
+        for offset in range(3000):
+            acks.ack(offset)
+
+        assert acks.watermark == 3000
+        assert len(path.read_text().splitlines()) < 1100
+        assert AckTracker(path).watermark == 3000
+
+
+class TestPriorityIndex:
+    def test_orders_by_priority_then_timestamp_then_offset(self):
+        index = PriorityIndex()
+        index.add(0, 5, 2.0, "normal-late")
+        index.add(1, 1, 3.0, "urgent")
+        index.add(2, 5, 1.0, "normal-early")
+        index.add(3, 5, 1.0, "normal-early-2")
+
+        assert [m for _, m in index.iter_ordered()] == [
+            "urgent",
+            "normal-early",
+            "normal-early-2",
+            "normal-late",
+        ]
+        assert list(index.iter_by_offset(1)) == [
+            (2, "normal-early"),
+            (3, "normal-early-2"),
+        ]
+
+    def test_remove_and_first_offset(self):
+        index = PriorityIndex()
+        for offset in range(4):
+            index.add(offset, 5, float(offset), f"m{offset}")
+
+        assert index.first_offset() == 0
+        assert index.remove(0) == "m0"
+        assert index.remove(0) is None
+        assert index.first_offset() == 1
+        assert index.remove_where(lambda m: m in ("m1", "m3")) == [1, 3]
+        assert 2 in index and len(index) == 1
+        assert [m for _, m in index.iter_ordered()] == ["m2"]
+
+        index.remove(2)
+        assert index.first_offset() is None
+
+    def test_iteration_tolerates_removal(self):
+        index = PriorityIndex()
+        for offset in range(3):
+            index.add(offset, 5, float(offset), offset)
+
+        seen = []
+        for key, message in index.iter_ordered():
+            seen.append(message)
+            index.remove(key[2] + 1)
+
+        assert seen == [0, 2]
+
+    def test_removed_keys_are_compacted_away(self):
+        index = PriorityIndex()
+        for offset in range(200):
+            index.add(offset, 10 - offset % 10, float(offset), offset)
+        for offset in range(0, 200, 2):
+            index.remove(offset)
+        index.remove_where(lambda m: m < 150)
+
+        assert len(index._heap) < 100
+        assert [m for _, m in index.iter_ordered()][:3] == [159, 169, 179]
+        assert [o for o, _ in index.iter_by_offset(190)] == [191, 193, 195, 197, 199]
+
+
+async def test_released_broadcasts_advance_every_agents_watermark(tmp_path):
+    bus = AgentMessageBus(base_path=tmp_path)
+    for agent_id in ("sender", "reader"):
+        await bus.register_agent(agent_id)
+
+    # The sender never acknowledges its own broadcasts
+    ids = [await bus.broadcast("sender", "note", {"n": i}) for i in range(3)]
+    for message_id in reversed(ids):
+        assert await bus.acknowledge_message("reader", message_id)
+
+    for agent_id in ("sender", "reader"):
+        acks = bus._broadcast_acks[agent_id]
+        assert acks.watermark == 3
+        assert acks.pending_count == 0
+
+
+async def test_expired_inbox_messages_do_not_hold_back_acks(tmp_path):
+    bus = AgentMessageBus(base_path=tmp_path)
+    for agent_id in ("agent", "other"):
+        await bus.register_agent(agent_id)
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    await bus.send_message("other", "agent", "stale", {}, expires_at=past)
+    kept = await bus.send_message("other", "agent", "fresh", {})
+
+    # Recovery drops the expired message without acknowledging it
+    reopened = AgentMessageBus(base_path=tmp_path)
+    await reopened.register_agent("agent")
+    assert reopened._inbox_acks["agent"].watermark == 1
+
+    assert await reopened.acknowledge_message("agent", kept)
+    assert reopened._inbox_acks["agent"].watermark == 2
+    assert reopened._inbox_acks["agent"].pending_count == 0
+
+
+async def test_released_broadcasts_are_not_redelivered_after_restart(tmp_path):
+    bus = AgentMessageBus(base_path=tmp_path)
+    for agent_id in ("sender", "reader"):
+        await bus.register_agent(agent_id)
+    done = await bus.broadcast("sender", "note", {"n": 0})
+    kept = await bus.broadcast("sender", "note", {"n": 1})
+    assert await bus.acknowledge_message("reader", done)
+
+    reopened = AgentMessageBus(base_path=tmp_path)
+    for agent_id in ("sender", "reader", "late"):
+        await reopened.register_agent(agent_id)
+
+    assert [m.id for m in await reopened.get_messages("late")] == [kept]
+    assert [m.id for m in await reopened.get_messages("reader")] == [kept]
+    assert len(reopened._broadcast_index) == 1
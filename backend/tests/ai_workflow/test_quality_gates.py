@@ -0,0 +1,111 @@
+"""Tests for the quality gate result cache and command execution."""
+import asyncio
+import os
+
+from app.ai_workflow.quality_gates import (
+    AutomatedQualityGates,
+    QualityGateConfig,
+    QualityGateStatus,
+    QualityGateType,
+)
+
+GATE = QualityGateType.BUILD_VALIDATION
+
+
+def _gates(tmp_path, command, timeout_seconds=30):
+    project = tmp_path / "project"
+    (project / "src").mkdir(parents=True, exist_ok=True)
+    gates = AutomatedQualityGates(
+        project_root=project, state_path=tmp_path / "state", max_parallel=2
+    )
+    gates.configure_gate(
+        QualityGateConfig(
+            gate_type=GATE,
+            command=command,
+            timeout_seconds=timeout_seconds,
+            inputs=["src/**/*.py"],
+        )
+    )
+    return gates, project
+
+
+def _runs(path):
+    return path.read_text().count("run") if path.exists() else 0
+
+
+async def test_unchanged_inputs_are_served_from_cache(tmp_path):
+    counter = tmp_path / "runs.txt"
+    gates, project = _gates(tmp_path, f"echo run >> {counter}")
+    (project / "src" / "app.py").write_text("x = 1\n")
+
+    first = await gates._run_single_gate(GATE)
+    second = await gates._run_single_gate(GATE)
+
+    assert first.status == QualityGateStatus.PASSED
+    assert "cached" not in first.details
+    assert second.status == QualityGateStatus.PASSED
+    assert second.details["cached"] is True
+    assert _runs(counter) == 1
+
+    history = gates.store.history(gate=GATE.value)
+    assert [record["cached"] for record in history] == [True, False]
+    assert (await gates.get_statistics())["cache_hits"] == 1
+
+
+async def test_changed_inputs_rerun_the_gate(tmp_path):
+    counter = tmp_path / "runs.txt"
+    gates, project = _gates(tmp_path, f"echo run >> {counter}")
+    source = project / "src" / "app.py"
+    source.write_text("x = 1\n")
+
+    await gates._run_single_gate(GATE)
+    source.write_text("x = 22\n")
+    changed = await gates._run_single_gate(GATE)
+    (project / "src" / "new.py").write_text("y = 1\n")
+    added = await gates._run_single_gate(GATE)
+
+    assert "cached" not in changed.details
+    assert "cached" not in added.details
+    assert _runs(counter) == 3
+
+
+async def test_changed_config_reruns_the_gate(tmp_path):
+    counter = tmp_path / "runs.txt"
+    gates, project = _gates(tmp_path, f"echo run >> {counter}")
+    (project / "src" / "app.py").write_text("x = 1\n")
+
+    await gates._run_single_gate(GATE)
+    gates.gate_configs[GATE].environment_variables = {"STRICT": "1"}
+    rerun = await gates._run_single_gate(GATE)
+
+    assert "cached" not in rerun.details
+    assert _runs(counter) == 2
+
+
+def _alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # A zombie has exited but was not reaped by its new parent
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+async def test_timeout_kills_process_group_and_is_not_cached(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    gates, project = _gates(
+        tmp_path, f"sleep 300 & echo $! > {pid_file}; wait", timeout_seconds=1
+    )
+    (project / "src" / "app.py").write_text("x = 1\n")
+
+    # A surviving grandchild would hold the output pipes open past the timeout
+    result = await asyncio.wait_for(gates._run_single_gate(GATE), timeout=10)
+
+    assert result.status == QualityGateStatus.FAILED
+    assert "timed out" in result.error_message
+    # The backgrounded grandchild shared the gate's process group
+    assert not _alive(int(pid_file.read_text()))
+    assert os.listdir(gates.store.results_path) == []
+
+    retry = await gates._run_single_gate(GATE)
+    assert "cached" not in retry.details
@@ -1,11 +1,18 @@
 """Test event tracking API endpoints."""
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 from typing import Dict, List
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
-from app.models.event import Event
+from app.crud.event import plan_analytics_query
+from app.models.event import (
+    Event,
+    EventAnonymizationJob,
+    EventRollup,
+    EventRollupState,
+)
 from app.schemas.event import (
     EventAnalyticsQuery,
     EventAnonymizationRequest,
@@ -15,6 +22,7 @@ from app.schemas.event import (
     EventType,
 )
 from httpx import AsyncClient
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud
@@ -521,6 +529,21 @@ class TestEventPrivacy:
 
         assert response.status_code == 403  # Forbidden
 
+    async def test_cleanup_rejects_non_positive_batch_size(
+        self,
+        client: AsyncClient,
+        superuser_token_headers: Dict,
+        test_settings: Settings,
+    ):
+        """Test that cleanup validates the batch size instead of failing."""
+        response = await client.delete(
+            f"{test_settings.api_v1_str}/events/cleanup",
+            params={"batch_size": -1},
+            headers=superuser_token_headers,
+        )
+
+        assert response.status_code == 422
+
 
 class TestEventCRUD:
     """Test CRUD operations directly."""
@@ -636,3 +659,303 @@ class TestEventCRUD:
         # Verify event was deleted
         deleted_event = await crud.event.get(db, id=event.id)
         assert deleted_event is None
+
+
+class TestEventRollupPlanner:
+    """Test routing of analytics queries to event rollups."""
+
+    def test_aligned_day_range_uses_daily_rollups(self):
+        query = EventAnalyticsQuery(
+            group_by=["event_type", "source"],
+            start_date=datetime(2025, 8, 1),
+            end_date=datetime(2025, 8, 8) - timedelta(microseconds=1),
+        )
+
+        assert plan_analytics_query(query) == (
+            "day",
+            datetime(2025, 8, 1),
+            datetime(2025, 8, 8),
+            False,
+        )
+
+    def test_boundary_end_stays_inclusive(self):
+        query = EventAnalyticsQuery(
+            start_date=datetime(2025, 8, 1, 6),
+            end_date=datetime(2025, 8, 1, 18),
+        )
+
+        # Buckets before 18:00 plus raw events stamped exactly at 18:00
+        assert plan_analytics_query(query) == (
+            "hour",
+            datetime(2025, 8, 1, 6),
+            datetime(2025, 8, 1, 18),
+            True,
+        )
+
+    def test_fine_drill_downs_fall_back_to_raw_events(self):
+        unaligned = EventAnalyticsQuery(start_date=datetime(2025, 8, 1, 6, 30))
+        by_user = EventAnalyticsQuery(user_ids=[1])
+        by_session = EventAnalyticsQuery(group_by=["session_id"])
+
+        assert plan_analytics_query(unaligned) is None
+        assert plan_analytics_query(by_user) is None
+        assert plan_analytics_query(by_session) is None
+        assert plan_analytics_query(EventAnalyticsQuery()) == (
+            "day",
+            None,
+            None,
+            False,
+        )
+
+    def test_ranges_past_the_retention_horizon_use_raw_events(self):
+        horizon = datetime(2025, 8, 1)
+        before = EventAnalyticsQuery(start_date=datetime(2025, 7, 1))
+        unbounded = EventAnalyticsQuery()
+        purged = EventAnalyticsQuery(
+            start_date=datetime(2025, 7, 1), include_purged=True
+        )
+
+        assert plan_analytics_query(before, horizon) is None
+        assert plan_analytics_query(unbounded, horizon) is None
+        assert plan_analytics_query(purged, horizon) == (
+            "day",
+            datetime(2025, 7, 1),
+            None,
+            False,
+        )
+        assert crud.event.retention_horizon([EventType.BUSINESS]) < (
+            crud.event.retention_horizon()
+        )
+
+
+def _rollup_event(timestamp, created_at, value=None, name="page_view"):
+    return Event(
+        event_type=EventType.PERFORMANCE.value,
+        event_name=name,
+        source=EventSource.WEB.value,
+        timestamp=timestamp,
+        created_at=created_at,
+        value=value,
+    )
+
+
+async def _rollup_count(db, granularity, bucket_start, name="page_view"):
+    result = await db.execute(
+        select(EventRollup.event_count).where(
+            EventRollup.granularity == granularity,
+            EventRollup.bucket_start == bucket_start,
+            EventRollup.event_name == name,
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+class TestEventRollups:
+    """Test rollup materialization and rollup-backed analytics."""
+
+    async def test_refresh_folds_events_up_to_the_lagged_watermark(
+        self, db: AsyncSession
+    ):
+        now = datetime.now(timezone.utc)
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        db.add_all(
+            [
+                _rollup_event(hour, now - timedelta(minutes=10), value=2.0),
+                _rollup_event(hour, now - timedelta(minutes=5), value=4.0),
+                # Still inside the lag, left for the next run
+                _rollup_event(hour, now),
+            ]
+        )
+        await db.flush()
+
+        await crud.event.refresh_rollups(db, lag_seconds=60)
+        assert await _rollup_count(db, "hour", hour) == 2
+        assert await _rollup_count(db, "day", hour.replace(hour=0)) == 2
+        state = await db.scalar(select(EventRollupState))
+        assert now - timedelta(seconds=90) < state.watermark < now
+
+        await crud.event.refresh_rollups(db, lag_seconds=0)
+        assert await _rollup_count(db, "hour", hour) == 3
+
+    async def test_rollup_query_adds_unfolded_and_boundary_events(
+        self, db: AsyncSession
+    ):
+        now = datetime.now(timezone.utc)
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        start, end = hour - timedelta(hours=3), hour - timedelta(hours=1)
+        folded = now - timedelta(minutes=10)
+        db.add_all(
+            [
+                _rollup_event(start, folded),
+                _rollup_event(start + timedelta(minutes=30), folded),
+                # Stamped exactly at the inclusive end, in a bucket not read
+                _rollup_event(end, folded),
+                _rollup_event(end + timedelta(seconds=1), folded),
+            ]
+        )
+        await db.flush()
+        await crud.event.refresh_rollups(db, lag_seconds=60)
+
+        # Inserted after the watermark, so only the raw tail sees it
+        db.add(_rollup_event(start + timedelta(hours=1), now))
+        await db.flush()
+
+        query = EventAnalyticsQuery(
+            event_names=["page_view"], start_date=start, end_date=end
+        )
+        assert plan_analytics_query(query).include_end
+        [row] = await crud.event.analytics_query(db, query_params=query)
+        assert row["count"] == 4
+
+    async def test_refold_recounts_buckets_of_late_committed_events(
+        self, db: AsyncSession
+    ):
+        now = datetime.now(timezone.utc)
+        day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        late_hour = day - timedelta(days=2) + timedelta(hours=5)
+        other_hour = day - timedelta(days=3)
+        db.add_all(
+            [
+                _rollup_event(late_hour, now - timedelta(hours=5)),
+                _rollup_event(other_hour, now - timedelta(hours=5), name="signup"),
+            ]
+        )
+        await db.flush()
+        await crud.event.refresh_rollups(db, lag_seconds=60)
+
+        # Created before the watermark but committed after it: never folded
+        db.add(_rollup_event(late_hour, now - timedelta(minutes=10)))
+        await db.flush()
+        await crud.event.refresh_rollups(db, lag_seconds=60)
+        assert await _rollup_count(db, "hour", late_hour) == 1
+
+        # A bucket without recently created events is left alone
+        await db.execute(
+            update(EventRollup)
+            .where(EventRollup.event_name == "signup")
+            .values(event_count=99)
+        )
+
+        await crud.event.refold_rollups(db, since=now - timedelta(hours=2))
+        assert await _rollup_count(db, "hour", late_hour) == 2
+        assert await _rollup_count(db, "day", late_hour.replace(hour=0)) == 2
+        assert await _rollup_count(db, "hour", other_hour, name="signup") == 99
+
+
+class FakeJob(SimpleNamespace):
+    events_per_second = EventAnonymizationJob.events_per_second
+
+
+class FakeJobSession:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+        self.statements = []
+        self.locks = 0
+        self.stored = {}
+
+    async def refresh(self, job, with_for_update=False):
+        self.locks += with_for_update
+        for name, value in self.stored.items():
+            setattr(job, name, value)
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def _anonymization_job(**overrides):
+    fields = dict(
+        job_id="job-1",
+        status="pending",
+        claim_token=None,
+        chunk_size=2,
+        pause_ms=50,
+        max_event_id=10,
+        last_event_id=0,
+        events_anonymized=0,
+        chunks_processed=0,
+        processing_time_seconds=0.0,
+        started_at=None,
+        completed_at=None,
+        error_message=None,
+    )
+    fields.update(overrides)
+    return FakeJob(**fields)
+
+
+class TestEventAnonymizationJobs:
+    """Test the chunked, resumable anonymization job runner."""
+
+    async def test_job_runs_paced_chunks_until_no_events_remain(self):
+        db = FakeJobSession()
+        job = _anonymization_job()
+        chunks = AsyncMock(side_effect=[[3, 4], [7, 9], []])
+
+        sleep = AsyncMock()
+        with patch.object(crud.event, "anonymize_event_chunk", chunks):
+            with patch("app.crud.event.asyncio.sleep", sleep):
+                job = await crud.event.run_anonymization_job(db, job=job)
+
+        assert job.status == "completed"
+        assert job.completed_at is not None
+        assert job.last_event_id == job.max_event_id
+        assert job.events_anonymized == 4
+        assert job.chunks_processed == 2
+        assert job.events_per_second > 0
+        # One commit to mark the job running, then one per chunk
+        assert db.commits == 4
+        assert db.locks == 3
+        assert [call.args for call in sleep.await_args_list] == [(0.05,), (0.05,)]
+
+    async def test_interrupted_job_resumes_after_its_cursor(self):
+        db = FakeJobSession()
+        job = _anonymization_job(pause_ms=0)
+        cursors = []
+
+        async def anonymize_chunk(db, *, job):
+            cursors.append(job.last_event_id)
+            return {0: [2, 4], 4: [6]}.get(job.last_event_id, [])
+
+        with patch.object(crud.event, "anonymize_event_chunk", anonymize_chunk):
+            await crud.event.run_anonymization_job(db, job=job, max_chunks=1)
+            assert job.status == "running"
+            assert job.last_event_id == 4
+
+            await crud.event.run_anonymization_job(db, job=job)
+
+        assert cursors == [0, 4, 6]
+        assert job.status == "completed"
+        assert job.events_anonymized == 3
+
+    async def test_job_taken_over_by_another_runner_stops(self):
+        db = FakeJobSession()
+        job = _anonymization_job(status="running", claim_token="mine")
+        db.stored = {"claim_token": "theirs", "last_event_id": 6}
+        chunks = AsyncMock(return_value=[8])
+
+        with patch.object(crud.event, "anonymize_event_chunk", chunks):
+            job = await crud.event.run_anonymization_job(db, job=job)
+
+        chunks.assert_not_awaited()
+        assert job.last_event_id == 6
+        assert job.status == "running"
+
+    async def test_failed_chunk_marks_job_failed(self):
+        db = FakeJobSession()
+        job = _anonymization_job(status="running", last_event_id=4)
+        chunks = AsyncMock(side_effect=RuntimeError("lock timeout"))
+
+        with patch.object(crud.event, "anonymize_event_chunk", chunks):
+            with pytest.raises(RuntimeError):
+                await crud.event.run_anonymization_job(db, job=job)
+
+        assert db.rollbacks == 1
+        params = db.statements[-1].compile().params
+        assert params["status"] == "failed"
+        assert params["error_message"] == "lock timeout"
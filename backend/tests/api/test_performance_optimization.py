@@ -15,15 +15,20 @@ from app.models.project import Project
 from app.schemas.project import ProjectCreate
 from app.utils.cursor_pagination import CursorPaginationManager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.middleware.caching import ResponseCachingMiddleware
 from app.core.cache import Cache, cached
 from app.core.performance import (
+    CompressionMiddleware,
     RequestDeduplicator,
     ResponseCompressor,
+    StreamEncoder,
+    compress_bytes,
     get_performance_stats,
+    negotiate_encoding,
     optimize_for_cost,
 )
 from tests.factories import ProjectFactory
@@ -313,6 +318,138 @@ class TestResponseCompression:
         assert stats["bytes_saved"] == 6000
         assert stats["average_compression_ratio"] == 0.4
 
+    def test_encoding_negotiation(self):
+        """Test Accept-Encoding negotiation honours q-values and wildcards."""
+        offered = ["zstd", "br", "gzip"]
+
+        assert negotiate_encoding("gzip, deflate, br", offered) == "br"
+        assert negotiate_encoding("gzip;q=1.0, br;q=0.5", offered) == "gzip"
+        assert negotiate_encoding("*;q=0.1, zstd;q=0", offered) == "br"
+        assert negotiate_encoding("identity", offered) is None
+        assert negotiate_encoding("br, gzip", ["gzip"]) == "gzip"
+
+    async def test_compression_middleware_streams_chunks(self):
+        """Test streamed bodies are compressed incrementally."""
+        chunks = [
+            json.dumps({"row": i, "payload": "x" * 200}).encode() for i in range(50)
+        ]
+
+        async def app(scope, receive, send):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")],
+                }
+            )
+            for chunk in chunks:
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b""})
+
+        compressor = ResponseCompressor(offload_size=1000)
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "headers": [(b"accept-encoding", b"gzip;q=1, br;q=0.1, zstd;q=0.1")],
+        }
+        await CompressionMiddleware(app, compressor=compressor)(scope, None, send)
+
+        headers = dict(messages[0]["headers"])
+        assert headers[b"content-encoding"] == b"gzip"
+        assert b"content-length" not in headers
+        # One compressed body message per streamed chunk, plus the trailer
+        assert len(messages) == len(chunks) + 2
+        body = b"".join(m.get("body", b"") for m in messages[1:])
+        assert gzip.decompress(body) == b"".join(chunks)
+
+        stats = compressor.get_compression_stats()
+        assert stats["encodings"] == {"gzip": 1}
+        assert stats["bytes_saved"] > 0
+
+    async def test_compression_middleware_passthrough(self):
+        """Test small and already-encoded bodies are left alone."""
+
+        def app_for(body, headers):
+            async def app(scope, receive, send):
+                await send(
+                    {"type": "http.response.start", "status": 200, "headers": headers}
+                )
+                await send({"type": "http.response.body", "body": body})
+
+            return app
+
+        scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+        json_type = (b"content-type", b"application/json")
+        for body, headers in [
+            (b"{}", [json_type]),
+            (b"x" * 5000, [json_type, (b"content-encoding", b"br")]),
+            (b"x" * 5000, [(b"content-type", b"image/png")]),
+        ]:
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            middleware = CompressionMiddleware(
+                app_for(body, headers), compressor=ResponseCompressor()
+            )
+            await middleware(scope, None, send)
+            assert messages[0]["headers"] == headers
+            assert messages[1]["body"] == body
+
+    @staticmethod
+    def _decompressor(encoding):
+        """Return a one-shot decoder for ``encoding``, skipping if unavailable."""
+        if encoding == "br":
+            return pytest.importorskip("brotli").decompress
+        if encoding == "zstd":
+            zstandard = pytest.importorskip("zstandard")
+
+            def decompress(data):
+                # Streamed frames carry no content size, so decode incrementally
+                return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+            return decompress
+        return gzip.decompress
+
+    @pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+    def test_stream_encoder_round_trip(self, encoding):
+        """Test each encoder's flushed chunks decode back to the input."""
+        decompress = self._decompressor(encoding)
+        chunks = [json.dumps({"row": i}).encode() * 20 for i in range(10)]
+
+        encoder = StreamEncoder(encoding, level=3)
+        encoded = [encoder.compress(chunk) for chunk in chunks]
+        body = b"".join(encoded) + encoder.finish()
+
+        # Every chunk is flushed to a block boundary rather than buffered
+        assert all(encoded)
+        assert decompress(body) == b"".join(chunks)
+
+    @pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+    def test_compress_bytes_round_trip(self, encoding):
+        """Test one-shot compression decodes back to the input."""
+        decompress = self._decompressor(encoding)
+        data = b'{"payload": "' + b"x" * 5000 + b'"}'
+
+        compressed = compress_bytes(data, encoding, level=3)
+
+        assert len(compressed) < len(data)
+        assert decompress(compressed) == data
+
+    def test_unsupported_encoding_rejected(self):
+        """Test unknown encodings raise instead of passing data through."""
+        with pytest.raises(ValueError):
+            StreamEncoder("deflate", level=3)
+        with pytest.raises(ValueError):
+            compress_bytes(b"data", "deflate", level=3)
+
 
 class TestRequestDeduplication:
     """Test request deduplication optimizations."""
@@ -374,6 +511,179 @@ class TestRequestDeduplication:
         assert stats["requests_saved"] == 25
         assert len(stats["top_duplicate_requests"]) > 0
 
+    async def test_request_counts_are_bounded(self):
+        """Test duplicate bookkeeping keeps only the most recent keys."""
+        deduplicator = RequestDeduplicator(max_tracked_keys=3)
+
+        async def handler():
+            return {"ok": True}
+
+        for i in range(10):
+            request = MagicMock()
+            request.method = "GET"
+            request.url.path = f"/api/items/{i}"
+            request.query_params.items.return_value = []
+            request.state.user_id = "u"
+            await deduplicator.deduplicate_request(request, handler)
+
+        assert deduplicator.get_deduplication_stats()["tracked_keys"] == 3
+
+    async def test_distributed_coalescing_across_workers(self):
+        """Test identical requests on different workers share one computation."""
+
+        class FakeRedis:
+            def __init__(self):
+                self.data = {}
+
+            async def get(self, key):
+                return self.data.get(key)
+
+            async def set(self, key, value, nx=False, px=None):
+                if nx and key in self.data:
+                    return None
+                self.data[key] = value
+                return True
+
+            async def eval(self, script, numkeys, key, token):
+                if self.data.get(key) == token:
+                    del self.data[key]
+                    return 1
+                return 0
+
+            def pipeline(self, transaction=True):
+                redis, calls = self, []
+
+                class Pipeline:
+                    def __getattr__(self, name):
+                        return lambda *a, **k: calls.append((name, a, k))
+
+                    async def execute(self):
+                        return [await getattr(redis, n)(*a, **k) for n, a, k in calls]
+
+                return Pipeline()
+
+        redis = FakeRedis()
+        workers = [RequestDeduplicator(distributed=True, redis=redis) for _ in range(3)]
+        call_count = 0
+
+        async def slow_handler():
+            nonlocal call_count
+            call_count += 1
+            await asyncio.sleep(0.05)
+            return JSONResponse({"result": call_count})
+
+        request = MagicMock()
+        request.method = "GET"
+        request.url.path = "/api/dashboard"
+        request.query_params.items.return_value = []
+        request.state.user_id = "test_user"
+
+        results = await asyncio.gather(
+            *(w.deduplicate_request(request, slow_handler) for w in workers)
+        )
+
+        assert call_count == 1
+        assert all(r.body == results[0].body for r in results)
+        assert sum(w.stats["distributed_leader"] for w in workers) == 1
+        assert sum(w.stats["distributed_coalesced"] for w in workers) == 2
+        # The lock is released and only the short-lived result remains
+        assert [k for k in redis.data if k.endswith(":lock")] == []
+
+    async def test_requests_with_different_credentials_do_not_share_keys(self):
+        """Test one user's result is never keyed for another user's request."""
+        from starlette.requests import Request
+
+        def request(headers):
+            return Request(
+                {
+                    "type": "http",
+                    "method": "GET",
+                    "path": "/api/v1/me",
+                    "query_string": b"",
+                    "headers": [(k.encode(), v.encode()) for k, v in headers],
+                }
+            )
+
+        deduplicator = RequestDeduplicator()
+        keys = {
+            deduplicator._generate_request_key(request(headers))
+            for headers in (
+                [],
+                [("authorization", "Bearer alice")],
+                [("authorization", "Bearer bob")],
+                [("cookie", "session=alice")],
+            )
+        }
+        assert len(keys) == 4
+        assert deduplicator._generate_request_key(
+            request([("authorization", "Bearer alice")])
+        ) == deduplicator._generate_request_key(
+            request([("authorization", "Bearer alice")])
+        )
+
+    async def test_distributed_leader_and_followers_get_the_same_type(self):
+        """Test the leader returns the same JSON value followers decode."""
+        from pydantic import BaseModel
+
+        class Payload(BaseModel):
+            value: int
+
+        class FakeRedis:
+            def __init__(self):
+                self.data = {}
+
+            async def get(self, key):
+                return self.data.get(key)
+
+            async def set(self, key, value, nx=False, px=None):
+                if nx and key in self.data:
+                    return None
+                self.data[key] = value
+                return True
+
+            def pipeline(self, transaction=True):
+                redis = self
+
+                class Pipeline:
+                    def set(self, key, value, px=None):
+                        redis.data[key] = value
+
+                    def eval(self, script, numkeys, key, token):
+                        redis.data.pop(key, None)
+
+                    async def execute(self):
+                        return []
+
+                return Pipeline()
+
+        redis = FakeRedis()
+        leader, follower = (
+            RequestDeduplicator(distributed=True, redis=redis) for _ in range(2)
+        )
+
+        async def handler():
+            return Payload(value=1)
+
+        leader_result = await leader._single_flight(redis, "key", handler)
+        follower_result = await follower._single_flight(redis, "key", handler)
+
+        assert leader_result == follower_result == {"value": 1}
+
+    async def test_unshareable_results_are_not_replayed(self):
+        """Test responses setting cookies are recomputed per worker."""
+        from app.core.performance import (
+            _decode_shared_result,
+            _encode_shared_result,
+        )
+
+        response = JSONResponse({"a": 1})
+        shared = json.loads(_encode_shared_result(response))
+        assert _decode_shared_result(shared).body == response.body
+
+        response.set_cookie("session", "secret")
+        assert json.loads(_encode_shared_result(response))["kind"] == "unshareable"
+        assert json.loads(_encode_shared_result(object()))["kind"] == "unshareable"
+
 
 class TestCachingMiddleware:
     """Test caching middleware functionality."""
@@ -433,6 +743,38 @@ class TestCachingMiddleware:
         request.url.path = "/api/v1/auth/login"
         assert middleware._should_cache_request(request) is False
 
+    async def test_middleware_serves_precompressed_variant(self):
+        """Test cache hits serve stored encodings instead of recompressing."""
+        from fastapi import Response
+
+        from app.api.middleware.caching import ResponseCachingMiddleware
+
+        middleware = ResponseCachingMiddleware(FastAPI())
+        body = json.dumps({"items": [{"id": i, "name": "x" * 40} for i in range(100)]})
+        response = Response(content=body, media_type="application/json")
+
+        variants = await middleware._precompress(response)
+        assert "gzip" in variants
+
+        mock_cache = AsyncMock()
+        mock_cache.get.return_value = {
+            "content": json.loads(body),
+            "status_code": 200,
+            "headers": {"content-type": "application/json", "content-length": "1"},
+            "encoded": variants,
+        }
+        request = MagicMock()
+        request.headers = {"accept-encoding": "gzip"}
+
+        with patch(
+            "app.api.middleware.caching.get_cache", AsyncMock(return_value=mock_cache)
+        ):
+            cached = await middleware._get_cached_response("key", request)
+
+        assert cached.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(cached.body) == body.encode()
+        assert cached.headers["content-length"] == str(len(cached.body))
+
 
 class TestPerformanceEndpoint:
     """Test performance monitoring endpoint."""
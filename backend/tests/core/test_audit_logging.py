@@ -0,0 +1,166 @@
+"""Tests for the queued audit logging pipeline and its sinks."""
+import json
+import os
+
+import pytest
+
+from app.core.audit_logging import (
+    AuditEvent,
+    AuditEventSeverity,
+    AuditEventType,
+    AuditLogConfig,
+    AuditLogger,
+)
+from app.core.audit_sinks import AuditFileSink
+
+
+class RecordingSink:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def write(self, records):
+        if self.fail:
+            raise RuntimeError("sink unavailable")
+        self.batches.append([record["description"] for record in records])
+
+
+def _logger(tmp_path, **overrides):
+    config = AuditLogConfig(
+        log_to_file=False,
+        log_to_database=False,
+        log_to_segments=False,
+        spill_path=str(tmp_path / "audit.spill"),
+        **overrides,
+    )
+    audit = AuditLogger(config)
+    audit.event_filter.filters = []
+    audit.sinks = {"memory": RecordingSink().write}
+    return audit
+
+
+def _event(description, severity=AuditEventSeverity.LOW):
+    return AuditEvent(
+        event_type=AuditEventType.API_CALL,
+        description=description,
+        severity=severity,
+    )
+
+
+async def test_log_event_queues_without_touching_sinks(tmp_path):
+    audit = _logger(tmp_path, batch_size=2)
+    sink = audit.sinks["memory"].__self__
+
+    await audit.log_event(_event("a"))
+    assert sink.batches == []
+    assert len(audit.pending_events) == 1
+
+    await audit.log_event(_event("b"))
+    await audit.log_event(_event("c"))
+    await audit.flush()
+    assert sink.batches == [["a", "b"], ["c"]]
+    assert audit.get_audit_statistics()["events_written"] == 3
+    await audit.stop()
+
+
+@pytest.mark.parametrize(
+    "policy,expected",
+    [("drop_oldest", ["b", "c"]), ("drop_newest", ["a", "b"])],
+)
+async def test_overflow_drop_policies(tmp_path, policy, expected):
+    audit = _logger(tmp_path, queue_max_events=2, overflow_policy=policy)
+    sink = audit.sinks["memory"].__self__
+
+    for description in "abc":
+        await audit.log_event(_event(description))
+    await audit.stop()
+
+    assert sink.batches == [expected]
+    assert audit.stats["dropped"] == 1
+
+
+async def test_overflow_spills_to_disk_and_replays(tmp_path):
+    audit = _logger(tmp_path, queue_max_events=2, overflow_policy="spill")
+    sink = audit.sinks["memory"].__self__
+
+    for description in "abcd":
+        await audit.log_event(_event(description))
+    assert audit.stats["spilled"] == 2
+    assert os.path.exists(tmp_path / "audit.spill")
+
+    await audit.stop()
+    assert sink.batches == [["a", "b"], ["c", "d"]]
+    assert not os.path.exists(tmp_path / "audit.spill")
+
+
+async def test_failed_sink_is_retried_alone(tmp_path):
+    audit = _logger(tmp_path)
+    healthy = RecordingSink()
+    broken = RecordingSink(fail=True)
+    audit.sinks = {"healthy": healthy.write, "broken": broken.write}
+
+    await audit.log_event(_event("a", severity=AuditEventSeverity.HIGH))
+    await audit.flush()
+    assert healthy.batches == [["a"]]
+    assert not audit.pending_events
+    assert [item.sinks for item in audit._sink_backlog["broken"]] == [("broken",)]
+
+    broken.fail = False
+    await audit.stop()
+    assert broken.batches == [["a"]]
+    assert healthy.batches == [["a"]]
+    assert audit.stats["sink_errors"] == 1
+
+
+async def test_broken_sink_does_not_hold_back_healthy_sinks(tmp_path):
+    audit = _logger(tmp_path, batch_size=100, queue_max_events=1000)
+    healthy = RecordingSink()
+    broken = RecordingSink(fail=True)
+    audit.sinks = {"healthy": healthy.write, "broken": broken.write}
+
+    for index in range(3000):
+        await audit.log_event(_event(str(index)))
+        if index % 500 == 499:
+            await audit.flush()
+    await audit.flush()
+
+    assert sum(len(batch) for batch in healthy.batches) == 3000
+    assert audit.stats["spilled"] == 0
+    assert not audit.pending_events
+    # The broken sink keeps a capped backlog of its own
+    assert len(audit._sink_backlog["broken"]) == 1000
+    assert audit.stats["sink_dropped"] == 2000
+    await audit.stop()
+
+
+async def test_sink_retries_are_capped(tmp_path):
+    audit = _logger(tmp_path, sink_max_retries=2)
+    healthy = RecordingSink()
+    broken = RecordingSink(fail=True)
+    audit.sinks = {"healthy": healthy.write, "broken": broken.write}
+
+    await audit.log_event(_event("a"))
+    for _ in range(3):
+        await audit.flush()
+
+    assert not audit._sink_backlog["broken"]
+    assert audit.stats["sink_errors"] == 3
+    assert audit.stats["sink_dropped"] == 1
+    assert audit.stats["written"] == 0
+    await audit.stop()
+
+
+async def test_file_sink_appends_and_rotates(tmp_path):
+    path = tmp_path / "audit.log"
+    sink = AuditFileSink(str(path), max_bytes=200, backup_count=2, fsync_interval=0)
+
+    for index in range(6):
+        await sink.write([{"index": index, "padding": "x" * 50}])
+    await sink.close()
+
+    assert os.path.exists(f"{path}.1")
+    assert os.path.exists(f"{path}.2")
+    assert not os.path.exists(f"{path}.3")
+    with open(f"{path}.1") as handle:
+        first = json.loads(handle.readline())
+    assert first["index"] > 0
@@ -0,0 +1,149 @@
+"""Tests for hash-chained audit segment storage."""
+import json
+import multiprocessing
+import struct
+import zlib
+from datetime import datetime, timedelta
+
+import pytest
+from app.core.audit_logging import (
+    AuditEvent,
+    AuditEventType,
+    AuditLogConfig,
+    AuditLogger,
+)
+from app.core.audit_segments import AuditSegmentStore
+
+
+def _record(index, actor_id, event_type=AuditEventType.API_CALL, hours_ago=0):
+    return AuditEvent(
+        event_type=event_type,
+        description=f"event {index}",
+        actor_id=actor_id,
+        timestamp=datetime.utcnow() - timedelta(hours=hours_ago),
+    ).to_dict()
+
+
+def test_range_query_reads_only_candidate_blocks(tmp_path):
+    store = AuditSegmentStore(str(tmp_path), block_records=2)
+    store.append([_record(0, 1, hours_ago=30), _record(1, 1, hours_ago=29)])
+    store.append(
+        [
+            _record(2, 2, AuditEventType.LOGIN_FAILURE),
+            _record(3, 3),
+            _record(4, 3),
+        ]
+    )
+    assert len(store.load_index(store.segments()[0][1])) == 3
+
+    found = store.search(actor_id=2)
+    assert [r["description"] for r in found] == ["event 2"]
+    assert store.blocks_read == 1
+
+    found = store.search(start=datetime.utcnow() - timedelta(hours=1))
+    assert [r["description"] for r in found] == ["event 4", "event 3", "event 2"]
+
+    found = store.search(event_type="login_failure", actor_id=3)
+    assert found == []
+
+
+def test_verification_detects_tampering(tmp_path):
+    store = AuditSegmentStore(str(tmp_path))
+    store.append([_record(i, i) for i in range(3)])
+    path = store.segments()[0][1]
+
+    [result] = store.verify()
+    assert result.ok and result.records == 3
+
+    # Rewrite the block with an edited record, keeping the index consistent
+    with open(path, "rb") as handle:
+        payload = handle.read()[4:]
+    lines = zlib.decompress(payload).decode().splitlines()
+    edited = json.loads(lines[1])
+    edited["description"] = "nothing happened"
+    lines[1] = json.dumps(edited, sort_keys=True, separators=(",", ":"))
+    payload = zlib.compress(("\n".join(lines) + "\n").encode())
+    with open(path, "wb") as handle:
+        handle.write(struct.pack(">I", len(payload)) + payload)
+    index_path = path[: -len(".seg")] + ".idx"
+    with open(index_path) as handle:
+        entry = json.loads(handle.readline())
+    entry["length"] = len(payload)
+    with open(index_path, "w") as handle:
+        handle.write(json.dumps(entry) + "\n")
+
+    [result] = AuditSegmentStore(str(tmp_path)).verify()
+    assert not result.ok
+    assert "hash mismatch" in result.error
+
+
+def test_chain_continues_after_restart(tmp_path):
+    AuditSegmentStore(str(tmp_path)).append([_record(0, 1)])
+    AuditSegmentStore(str(tmp_path)).append([_record(1, 1)])
+
+    [result] = AuditSegmentStore(str(tmp_path)).verify()
+    assert result.ok and result.blocks == 2
+
+
+def _append_in_process(directory, worker, appends):
+    store = AuditSegmentStore(directory)
+    for index in range(appends):
+        store.append([_record(index, worker), _record(index, worker)])
+
+
+def test_processes_sharing_a_directory_extend_one_chain(tmp_path):
+    # Each store re-reads the head, so interleaved writers never fork the chain
+    first, second = AuditSegmentStore(str(tmp_path)), AuditSegmentStore(str(tmp_path))
+    first.append([_record(0, 1)])
+    second.append([_record(1, 2)])
+    first.append([_record(2, 1)])
+
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_append_in_process, args=(str(tmp_path), worker, 25))
+        for worker in range(4)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(30)
+    assert all(process.exitcode == 0 for process in workers)
+
+    [result] = AuditSegmentStore(str(tmp_path)).verify()
+    assert result.ok, result.error
+    assert result.records == 3 + 4 * 25 * 2
+
+
+async def test_logger_searches_segments(tmp_path):
+    config = AuditLogConfig(
+        log_to_file=False,
+        log_to_database=False,
+        log_to_segments=True,
+        segment_directory=str(tmp_path),
+        spill_path=str(tmp_path / "audit.spill"),
+    )
+    audit = AuditLogger(config)
+    audit.event_filter.filters = []
+
+    await audit.log_data_access_event("export", "project", "42", actor_id=7)
+    await audit.log_data_access_event("read", "project", "43", actor_id=8)
+    await audit.stop()
+
+    [event] = await audit.search_events(actor_id=7)
+    assert event.event_type == AuditEventType.DATA_EXPORTED
+    assert event.target_id == "42"
+    assert all(result.ok for result in await audit.verify_integrity())
+
+
+def test_segments_are_opt_in_and_need_an_absolute_directory(tmp_path):
+    config = AuditLogConfig(
+        log_to_file=False,
+        log_to_database=False,
+        spill_path=str(tmp_path / "audit.spill"),
+    )
+    assert AuditLogger(config).segments is None
+
+    config.log_to_segments = True
+    config.segment_directory = "logs/audit/segments"
+    with pytest.raises(ValueError):
+        AuditLogger(config)
@@ -1,11 +1,16 @@
 """Test email tracking functionality."""
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, date, datetime, timedelta
 from typing import AsyncGenerator
-from unittest.mock import MagicMock, patch
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import pytest_asyncio
-from app.crud.email_tracking import email_tracking
+from app.crud.email_tracking import (
+    email_tracking,
+    latency_bucket,
+    latency_percentile,
+)
 from app.models.email_tracking import EmailStatus, EmailTracking
 from app.schemas.email_tracking import (
     EmailEventCreate,
@@ -206,3 +211,311 @@ async def test_failed_email_tracking(db: AsyncSession):
     assert len(obj.events) == 1
     assert obj.events[0].event_type == EmailStatus.FAILED
     assert obj.events[0].event_metadata == {"error": "Test error"}
+
+
+def _tracking(tracking_id, status, **timestamps):
+    fields = {
+        "sent_at": None,
+        "delivered_at": None,
+        "opened_at": None,
+        "clicked_at": None,
+        "failed_at": None,
+        **timestamps,
+    }
+    return MagicMock(id=tracking_id, status=status, **fields)
+
+
+def _event(status, minutes, signature):
+    return EmailEventCreate(
+        event_type=status,
+        occurred_at=datetime(2025, 8, 18, 12, tzinfo=UTC) + timedelta(minutes=minutes),
+        event_metadata={"provider": "sendgrid", "event_signature": signature},
+    )
+
+
+def test_plan_bulk_events_applies_transitions_in_order():
+    """Out-of-order webhook events are applied by occurrence time."""
+    sent = datetime(2025, 8, 18, 11, tzinfo=UTC)
+    tracking = _tracking(1, EmailStatus.SENT, sent_at=sent)
+    events = [
+        (tracking, _event(EmailStatus.OPENED, 5, "b"), None),
+        (tracking, _event(EmailStatus.DELIVERED, 1, "a"), None),
+        (tracking, _event(EmailStatus.QUEUED, 6, "c"), None),
+    ]
+
+    updates, rows = email_tracking.plan_bulk_events(events)
+
+    assert [row["event_signature"] for row in rows] == ["a", "b"]
+    assert updates == [
+        {
+            "id": 1,
+            "status": EmailStatus.OPENED,
+            "tracking_metadata": {"provider": "sendgrid", "event_signature": "b"},
+            "delivered_at": events[1][1].occurred_at,
+            "opened_at": events[0][1].occurred_at,
+        }
+    ]
+
+
+def test_plan_bulk_events_records_failure_details():
+    """Bounces stamp failed_at once and carry the error into the event."""
+    tracking = _tracking(2, EmailStatus.SENT)
+    events = [
+        (tracking, _event(EmailStatus.BOUNCED, 0, "x"), "mailbox full"),
+        (tracking, _event(EmailStatus.BOUNCED, 1, "y"), "still full"),
+    ]
+
+    [changes], rows = email_tracking.plan_bulk_events(events)
+
+    assert changes["failed_at"] == events[0][1].occurred_at
+    assert changes["error_message"] == "mailbox full"
+    assert [row["event_metadata"]["error"] for row in rows] == [
+        "mailbox full",
+        "still full",
+    ]
+
+
+def test_latency_histogram_percentiles():
+    assert latency_bucket(0) == 0
+    assert latency_bucket(59) == 0
+    assert latency_bucket(60) == 1
+    assert latency_bucket(10**7) == 11
+
+    # 10 emails opened within a minute, 10 between 1 and 5 minutes
+    histogram = {0: 10, 1: 10}
+    assert latency_percentile(histogram, 50) == 60.0
+    assert latency_percentile(histogram, 75) == 180.0
+    assert latency_percentile({}, 50) is None
+
+
+def test_rollup_deltas_move_email_between_statuses():
+    sent_at = datetime(2025, 8, 1, 9, 0, tzinfo=UTC)
+    before = {
+        "created_at": datetime(2025, 8, 1, 8, 0, tzinfo=UTC),
+        "template_name": "welcome",
+        "status": EmailStatus.SENT,
+        "sent_at": sent_at,
+        "opened_at": None,
+        "clicked_at": None,
+    }
+    changes = {
+        "status": EmailStatus.OPENED,
+        "opened_at": sent_at + timedelta(minutes=2),
+    }
+    status_deltas, latencies = Counter(), Counter()
+
+    email_tracking._collect_rollup_deltas(before, changes, status_deltas, latencies)
+
+    day = datetime(2025, 8, 1).date()
+    assert status_deltas == {
+        (day, "welcome", EmailStatus.SENT): -1,
+        (day, "welcome", EmailStatus.OPENED): 1,
+    }
+    assert latencies == {(day, "welcome", "open", 1): 1}
+
+
+async def test_bulk_apply_plans_against_the_locked_row():
+    """A batch that raced another one takes its rollup delta from fresh state."""
+    created_at = datetime(2025, 8, 18, 8, tzinfo=UTC)
+    stale = _tracking(1, EmailStatus.SENT)
+    # The concurrent batch already moved the email to delivered
+    locked = _tracking(
+        1,
+        EmailStatus.DELIVERED,
+        sent_at=created_at,
+        delivered_at=created_at + timedelta(minutes=1),
+    )
+    for tracking in (stale, locked):
+        tracking.created_at = created_at
+        tracking.template_name = "welcome"
+    db = AsyncMock()
+    db.execute.return_value = _ScalarResult([locked])
+    apply_deltas = AsyncMock()
+
+    with patch.object(email_tracking, "_apply_rollup_deltas", apply_deltas):
+        applied = await email_tracking.bulk_apply_events(
+            db,
+            events=[
+                (stale, _event(EmailStatus.DELIVERED, 1, "s-1"), None),
+                (stale, _event(EmailStatus.OPENED, 2, "s-2"), None),
+            ],
+        )
+
+    lock_query = db.execute.await_args_list[0].args[0]
+    assert lock_query._for_update_arg is not None
+    assert applied == 2
+    day = created_at.date()
+    assert apply_deltas.await_args.kwargs["status_deltas"] == {
+        (day, "welcome", EmailStatus.DELIVERED): -1,
+        (day, "welcome", EmailStatus.OPENED): 1,
+    }
+
+
+async def test_status_counts_read_whole_days_from_rollups():
+    result = MagicMock()
+    result.all.return_value = [(EmailStatus.SENT, 10)]
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+    start = datetime(2025, 8, 1, 12, 0, tzinfo=UTC)
+    end = datetime(2025, 8, 11, tzinfo=UTC) - timedelta(microseconds=1)
+
+    with patch.object(
+        email_tracking,
+        "_count_by_status",
+        AsyncMock(return_value=Counter({EmailStatus.SENT: 1})),
+    ) as raw_counts:
+        counts = await email_tracking.get_status_counts(
+            db, start_date=start, end_date=end
+        )
+
+    assert counts[EmailStatus.SENT] == 11
+    # Only the partial first day is counted from tracking rows
+    [call] = raw_counts.await_args_list
+    assert call.kwargs["start"] == start
+    assert call.kwargs["end"] == datetime(2025, 8, 2, tzinfo=UTC)
+    assert db.execute.await_count == 1
+
+
+class _ScalarResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+async def test_resolve_for_events_matches_email_id_then_recent_recipient():
+    """Events resolve by email_id first, else the newest email in the window."""
+    base = datetime(2025, 8, 18, 12, tzinfo=UTC)
+    newer = MagicMock(email_id="m-2", recipient="a@example.com")
+    newer.created_at = base - timedelta(hours=1)
+    older = MagicMock(email_id="m-1", recipient="a@example.com")
+    older.created_at = base - timedelta(hours=5)
+    db = AsyncMock()
+    db.execute.return_value = _ScalarResult([newer, older])
+
+    resolved = await email_tracking.resolve_for_events(
+        db,
+        events=[
+            ("m-1", "a@example.com", base),
+            (None, "a@example.com", base),
+            (None, "a@example.com", base + timedelta(hours=30)),
+            ("unknown", "b@example.com", base),
+        ],
+    )
+
+    assert resolved == [older, newer, None, None]
+    db.execute.assert_awaited_once()
+
+
+async def test_webhook_batch_drops_duplicate_signatures():
+    """Repeated and already recorded events are acknowledged but not applied."""
+    from app.api.v1.endpoints.webhooks import (
+        _generate_event_signature,
+        process_webhook_events_batch,
+    )
+    from app.schemas.webhooks import WebhookEventMapping
+
+    def mapping(status, minutes):
+        return WebhookEventMapping(
+            email_id="m-1",
+            recipient="a@example.com",
+            status=status,
+            timestamp=datetime(2025, 8, 18, 12, tzinfo=UTC)
+            + timedelta(minutes=minutes),
+        )
+
+    delivered = mapping(EmailStatus.DELIVERED, 1)
+    opened = mapping(EmailStatus.OPENED, 2)
+    recorded = mapping(EmailStatus.CLICKED, 3)
+    tracking = _tracking(1, EmailStatus.SENT)
+    db = AsyncMock()
+
+    resolve = AsyncMock(return_value=[tracking] * 4)
+    existing = AsyncMock(return_value={_generate_event_signature(recorded)})
+    bulk_apply = AsyncMock(return_value=2)
+    with patch.object(email_tracking, "resolve_for_events", resolve):
+        with patch.object(email_tracking, "get_existing_signatures", existing):
+            with patch.object(email_tracking, "bulk_apply_events", bulk_apply):
+                result = await process_webhook_events_batch(
+                    db, [delivered, opened, delivered, recorded]
+                )
+
+    assert result.successful_events == 4
+    assert result.failed_events == 0
+    accepted = bulk_apply.await_args.kwargs["events"]
+    assert [event.event_type for _, event, _ in accepted] == [
+        EmailStatus.DELIVERED,
+        EmailStatus.OPENED,
+    ]
+    db.commit.assert_awaited_once()
+
+
+async def test_webhook_batch_reraises_database_errors_for_the_worker():
+    """Deferred batches re-raise so the Celery task retries them."""
+    from app.api.v1.endpoints.webhooks import process_webhook_events_batch
+    from app.schemas.webhooks import WebhookEventMapping
+
+    event = WebhookEventMapping(
+        email_id="m-1",
+        recipient="a@example.com",
+        status=EmailStatus.DELIVERED,
+        timestamp=datetime(2025, 8, 18, 12, tzinfo=UTC),
+    )
+    db = AsyncMock()
+    failing = AsyncMock(side_effect=RuntimeError("connection reset"))
+
+    with patch.object(email_tracking, "resolve_for_events", failing):
+        result = await process_webhook_events_batch(db, [event])
+        assert result.failed_events == 1
+
+        with pytest.raises(RuntimeError):
+            await process_webhook_events_batch(db, [event], raise_errors=True)
+    assert db.rollback.await_count == 2
+
+
+async def test_rollup_rebuild_commits_one_day_at_a_time():
+    """Each day is rebuilt and committed before the next one is locked."""
+    calls = []
+    db = AsyncMock()
+    db.commit.side_effect = lambda: calls.append("commit")
+
+    async def rebuild_day(session, day):
+        calls.append(day)
+        return {"status_rows": 2, "latency_rows": 3}
+
+    with patch.object(email_tracking, "_rebuild_rollup_day", rebuild_day):
+        written = await email_tracking.rebuild_rollups(
+            db, start_day=date(2025, 8, 1), end_day=date(2025, 8, 3)
+        )
+
+    assert calls == [
+        date(2025, 8, 1),
+        "commit",
+        date(2025, 8, 2),
+        "commit",
+        date(2025, 8, 3),
+        "commit",
+    ]
+    assert written == {"status_rows": 6, "latency_rows": 9}
+
+
+async def test_rollup_compaction_rebuilds_exactly_the_configured_days():
+    """The compaction task covers ``days`` days ending today."""
+    from app.worker import email_worker
+
+    rebuild = AsyncMock(return_value={"status_rows": 0, "latency_rows": 0})
+    session = MagicMock()
+    session.return_value.__aenter__ = AsyncMock(return_value=AsyncMock())
+    session.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with patch.object(email_tracking, "rebuild_rollups", rebuild):
+        with patch.object(email_worker, "AsyncSessionLocal", session):
+            result = await email_worker._compact_email_rollups_async(7)
+
+    kwargs = rebuild.await_args.kwargs
+    assert (kwargs["end_day"] - kwargs["start_day"]).days == 6
+    assert result["end_day"] == kwargs["end_day"].isoformat()
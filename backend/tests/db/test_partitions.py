@@ -0,0 +1,182 @@
+"""Tests for time-range partition management and batched retention."""
+from datetime import datetime
+
+from app.db.partitions import (
+    PartitionManager,
+    parse_partition_bound,
+    partition_bounds,
+    partition_range_ddl,
+)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows[0][0]
+
+    def one(self):
+        return self.rows[0]
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Answers catalog queries from fixed data and records executed SQL."""
+
+    def __init__(self, partitions, expired, delete_batches, revived=()):
+        self.partitions = partitions
+        self.expired = expired
+        # Partitions that get a live row once they are locked
+        self.revived = set(revived)
+        self.delete_batches = list(delete_batches)
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "pg_partitioned_table" in sql:
+            return FakeResult([(True,)])
+        if "pg_inherits" in sql:
+            return FakeResult(self.partitions)
+        if sql.startswith("LOCK TABLE"):
+            self.expired -= {name for name in self.revived if f'"{name}"' in sql}
+        if sql.startswith("SELECT NOT EXISTS"):
+            return FakeResult([(any(f'"{name}"' in sql for name in self.expired),)])
+        if "pg_total_relation_size" in sql:
+            return FakeResult([(8192, 40)])
+        if sql.startswith("WITH deleted"):
+            return FakeResult([self.delete_batches.pop(0)])
+        return FakeResult([])
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def test_partition_bounds_and_ddl():
+    assert partition_bounds(datetime(2025, 12, 15, 8), "month") == (
+        datetime(2025, 12, 1),
+        datetime(2026, 1, 1),
+    )
+    assert partition_bounds(datetime(2025, 8, 1, 23), "day") == (
+        datetime(2025, 8, 1),
+        datetime(2025, 8, 2),
+    )
+
+    statements = partition_range_ddl("events", datetime(2025, 11, 20), 2)
+    assert statements == [
+        'CREATE TABLE IF NOT EXISTS "events_p20251101" PARTITION OF "events" '
+        "FOR VALUES FROM ('2025-11-01 00:00:00') TO ('2025-12-01 00:00:00')",
+        'CREATE TABLE IF NOT EXISTS "events_p20251201" PARTITION OF "events" '
+        "FOR VALUES FROM ('2025-12-01 00:00:00') TO ('2026-01-01 00:00:00')",
+    ]
+
+    assert parse_partition_bound(
+        "FOR VALUES FROM ('2025-11-01 00:00:00') TO ('2025-12-01 00:00:00')"
+    ) == (datetime(2025, 11, 1), datetime(2025, 12, 1))
+    assert parse_partition_bound("DEFAULT") is None
+    # timestamptz partition keys report bounds with an offset
+    assert parse_partition_bound(
+        "FOR VALUES FROM ('2025-11-01 01:00:00+01') TO ('2025-12-01 00:00:00+00')"
+    ) == (datetime(2025, 11, 1), datetime(2025, 12, 1))
+
+
+async def test_retention_drops_expired_partitions_and_deletes_in_batches():
+    session = FakeSession(
+        partitions=[
+            ("events_default", "DEFAULT"),
+            (
+                "events_p20250601",
+                "FOR VALUES FROM ('2025-06-01 00:00:00') TO ('2025-07-01 00:00:00')",
+            ),
+            (
+                "events_p20250701",
+                "FOR VALUES FROM ('2025-07-01 00:00:00') TO ('2025-08-01 00:00:00')",
+            ),
+            (
+                "events_p20250801",
+                "FOR VALUES FROM ('2025-08-01 00:00:00') TO ('2025-09-01 00:00:00')",
+            ),
+        ],
+        expired={"events_p20250601"},
+        delete_batches=[(2, 300), (2, 250), (1, 100)],
+    )
+    manager = PartitionManager("events")
+
+    report = await manager.apply_retention(
+        session, batch_size=2, now=datetime(2025, 8, 15)
+    )
+
+    assert report.partitioned
+    assert report.partitions_dropped == ["events_p20250601"]
+    assert 'DROP TABLE "events_p20250601"' in session.statements
+    # The current partition is never considered for dropping
+    assert not any('"events_p20250801"' in sql for sql in session.statements)
+    assert report.rows_deleted == 5
+    assert report.batches == 3
+    assert report.rows_removed == 45
+    assert report.bytes_reclaimed == 8192 + 650
+
+
+async def test_batched_delete_respects_max_batches():
+    session = FakeSession(
+        partitions=[], expired=set(), delete_batches=[(10, 1), (10, 1), (10, 1)]
+    )
+    manager = PartitionManager("events")
+
+    report = await manager.apply_retention(session, batch_size=10, max_batches=2)
+
+    assert report.rows_deleted == 20
+    assert report.batches == 2
+    assert session.commits == 2
+
+
+async def test_retention_handles_timestamptz_partition_bounds():
+    session = FakeSession(
+        partitions=[
+            (
+                "events_p20250601",
+                "FOR VALUES FROM ('2025-06-01 00:00:00+00') "
+                "TO ('2025-07-01 00:00:00+00')",
+            ),
+        ],
+        expired={"events_p20250601"},
+        delete_batches=[(0, 0)],
+    )
+
+    report = await PartitionManager("events").apply_retention(session)
+
+    assert report.partitions_dropped == ["events_p20250601"]
+
+
+async def test_partition_is_locked_and_rechecked_before_dropping():
+    bound = (
+        "FOR VALUES FROM ('2025-{0:02d}-01 00:00:00') TO ('2025-{1:02d}-01 00:00:00')"
+    )
+    session = FakeSession(
+        partitions=[
+            ("events_p20250501", bound.format(5, 6)),
+            ("events_p20250601", bound.format(6, 7)),
+        ],
+        expired={"events_p20250501", "events_p20250601"},
+        delete_batches=[(0, 0)],
+        revived={"events_p20250501"},
+    )
+
+    report = await PartitionManager("events").apply_retention(
+        session, now=datetime(2025, 8, 15)
+    )
+
+    assert report.partitions_dropped == ["events_p20250601"]
+    assert session.rollbacks == 1
+    lock = 'LOCK TABLE "events_p20250601" IN ACCESS EXCLUSIVE MODE'
+    assert session.statements.index(lock) < session.statements.index(
+        'DROP TABLE "events_p20250601"'
+    )
@@ -0,0 +1,54 @@
+"""Tests for per-request query accounting and budgets."""
+import pytest
+
+from app.db.query_monitor import (
+    QueryBudgetExceeded,
+    fingerprint_statement,
+    get_request_query_stats,
+    query_budget,
+    track_request_queries,
+)
+
+
+def test_fingerprint_collapses_literals_and_params():
+    """Statements differing only in values share one fingerprint."""
+    a = fingerprint_statement("SELECT * FROM users WHERE id = $1")
+    b = fingerprint_statement("SELECT *  FROM users WHERE id = 42")
+    c = fingerprint_statement("SELECT * FROM users WHERE email = 'a@b.c'")
+    assert a == b == "SELECT * FROM users WHERE id = ?"
+    assert c == "SELECT * FROM users WHERE email = ?"
+    assert fingerprint_statement("SELECT 1 WHERE id IN ($1, $2, $3)") == (
+        fingerprint_statement("SELECT 1 WHERE id IN (7)")
+    )
+    assert "::text" in fingerprint_statement("SELECT $1::text")
+
+
+def test_nested_scopes_merge_and_detect_n_plus_one():
+    """Inner scopes roll up into the request and repeated shapes are flagged."""
+    with track_request_queries(n_plus_one_threshold=3) as request_stats:
+        request_stats.record("SELECT * FROM items", 0.002)
+        with track_request_queries(n_plus_one_threshold=3) as inner:
+            for item_id in range(5):
+                get_request_query_stats().record(
+                    f"SELECT * FROM tags WHERE item_id = {item_id}", 0.001
+                )
+        assert inner.query_count == 5
+
+    assert get_request_query_stats() is None
+    assert request_stats.query_count == 6
+    assert request_stats.repeated_statements == [
+        ("SELECT * FROM tags WHERE item_id = ?", 5)
+    ]
+    assert request_stats.server_timing().startswith("db;dur=7.00;")
+
+
+def test_query_budget_raises_when_exceeded():
+    """query_budget fails the block once the statement count passes the limit."""
+    with query_budget(2) as stats:
+        stats.record("SELECT 1", 0.0)
+        stats.record("SELECT 2", 0.0)
+
+    with pytest.raises(QueryBudgetExceeded, match="3 queries \\(budget 2\\)"):
+        with query_budget(2) as stats:
+            for _ in range(3):
+                stats.record("SELECT 1", 0.0)
@@ -0,0 +1,65 @@
+"""Tests for the bounded query statistics registry."""
+from app.db.query_stats import (
+    LatencyHistogram,
+    QueryStatsRegistry,
+    SpaceSavingCounter,
+    fingerprint_statement,
+)
+
+
+def test_fingerprint_normalizes_literals_lists_and_comments():
+    """Executions differing only in values share a fingerprint."""
+    assert fingerprint_statement(
+        "SELECT * FROM t WHERE a IN (1, 2, 3) AND b = 'x''y' -- note"
+    ) == fingerprint_statement("SELECT * FROM t WHERE a IN ($1) AND b = $2")
+    assert fingerprint_statement(
+        "INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4), ($5, $6)"
+    ) == "INSERT INTO t (a, b) VALUES (?, ?), ..."
+    assert fingerprint_statement('SELECT "t1".id FROM "t1" WHERE x = $$a b$$') == (
+        'SELECT "t1".id FROM "t1" WHERE x = ?'
+    )
+
+
+def test_space_saving_keeps_heavy_hitters_within_capacity():
+    """Frequent keys survive a long tail of one-off keys."""
+    counter = SpaceSavingCounter(capacity=5)
+    for i in range(1000):
+        counter.offer("hot")
+        if i % 2 == 0:
+            counter.offer("warm")
+        counter.offer(f"tail-{i}")
+
+    assert len(counter) == 5
+    top = counter.top(2)
+    assert [key for key, _, _ in top] == ["hot", "warm"]
+    hot_count, hot_error = top[0][1], top[0][2]
+    assert hot_count - hot_error <= 1000 <= hot_count
+
+
+def test_latency_histogram_percentiles_within_relative_error():
+    """Percentiles stay within the histogram's 1/16 relative error."""
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000)
+
+    assert histogram.count == 1000
+    for q, expected in ((50, 0.5), (95, 0.95), (99, 0.99)):
+        assert abs(histogram.percentile(q) - expected) <= expected / 16
+
+
+def test_registry_bounds_memory_and_tracks_slow_queries():
+    """Fingerprint state and slow-query list stay bounded."""
+    registry = QueryStatsRegistry(top_k=3, slow_capacity=2, explain_sample_rate=1.0)
+    for i in range(50):
+        registry.record("SELECT * FROM users WHERE id = $1", 0.001)
+        registry.record(f"SELECT * FROM table_{i}", 0.2 + i / 1000)
+
+    assert len(registry._stats) <= 3
+    assert registry.top_by_count(1)[0]["query"] == "SELECT * FROM users WHERE id = ?"
+    slow = registry.slow_queries()
+    assert [s.statement for s in slow] == [
+        "SELECT * FROM table_49",
+        "SELECT * FROM table_48",
+    ]
+    assert registry.summary()["total_queries"] == 100
+    assert registry.summary()["pending_explains"] <= registry.max_pending_explains
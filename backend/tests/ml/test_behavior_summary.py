@@ -0,0 +1,110 @@
+"""Tests for incremental user behaviour summaries."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.ml.behavior_summary import (
+    COMMIT_LAG_SECONDS,
+    HALF_LIFE_DAYS,
+    BehaviorSummary,
+)
+
+NOW = datetime(2025, 8, 17, 20, 0, 0)
+
+
+def _event(event_id, name, minutes_ago, *, event_type="interaction", **extra):
+    return SimpleNamespace(
+        id=event_id,
+        event_type=event_type,
+        event_name=name,
+        timestamp=NOW - timedelta(minutes=minutes_ago),
+        session_id=extra.get("session_id", "s1"),
+        content_type=extra.get("content_type"),
+        created_at=extra.get("created_at"),
+    )
+
+
+def test_analysis_matches_raw_event_features():
+    summary = BehaviorSummary()
+    summary.add_events(
+        [
+            _event(1, "register", 50, event_type="business"),
+            _event(2, "feature_export", 40, content_type="tutorials"),
+            _event(3, "view_dashboard", 30, content_type="tutorials"),
+            _event(4, "read_article", 20, content_type="api_documentation"),
+            _event(5, "feature_export", 10, session_id="s2"),
+        ]
+    )
+
+    analysis = summary.analysis(NOW)
+
+    assert summary.last_event_id == 5
+    assert analysis["features_used"] == ["feature_export"]
+    assert analysis["recent_actions"][0] == "feature_export"
+    assert analysis["recent_actions"][-1] == "register"
+    assert analysis["incomplete_workflows"] == ["user_registration"]
+    assert analysis["content_interests"]["tutorials"] == 1.0
+    assert 0.49 < analysis["content_interests"]["api_documentation"] < 0.51
+    assert analysis["feature_categories"] == {"dashboard": 1.0}
+    assert round(analysis["session_patterns"]["total_sessions"]) == 2
+    assert analysis["usage_patterns"]["frequent_actions"][0] == "feature_export"
+    assert sum(analysis["hour_histogram"][18:20]) > 4.9
+    assert analysis["reading_patterns"]["avg_reading_session"] > 0
+
+
+def test_incremental_fold_survives_serialization():
+    summary = BehaviorSummary()
+    summary.add_events([_event(1, "feature_a", 30)])
+    restored = BehaviorSummary.from_dict(summary.to_dict())
+    restored.add_events([_event(2, "feature_b", 10)])
+
+    assert sorted(restored.analysis(NOW)["features_used"]) == [
+        "feature_a",
+        "feature_b",
+    ]
+    assert restored.last_event_id == 2
+    # Reading does not mutate the stored summary
+    restored.analysis(NOW + timedelta(days=60))
+    assert len(restored.features) == 2
+
+
+def test_counters_decay_and_facts_expire():
+    summary = BehaviorSummary()
+    summary.add_events([_event(1, "feature_a", 0, content_type="tutorials")])
+
+    later = summary.analysis(NOW + timedelta(days=HALF_LIFE_DAYS))
+    assert 0.49 < later["usage_patterns"]["total_actions"] < 0.51
+    assert later["features_used"] == ["feature_a"]
+
+    expired = summary.analysis(NOW + timedelta(days=31))
+    assert expired["features_used"] == []
+    assert expired["recent_actions"] == []
+
+
+def test_late_commit_below_folded_id_is_not_lost():
+    summary = BehaviorSummary()
+    summary.add_events([_event(2, "feature_b", 10, created_at=NOW)])
+    restored = BehaviorSummary.from_dict(summary.to_dict())
+
+    # Event 1 committed after event 2 was folded; a refresh re-reads the
+    # lookback, so it is picked up, and event 2 is not counted twice.
+    assert restored.lookback_start() < NOW.replace(tzinfo=timezone.utc)
+    restored.add_events(
+        [
+            _event(1, "feature_a", 11, created_at=NOW - timedelta(seconds=5)),
+            _event(2, "feature_b", 10, created_at=NOW),
+        ]
+    )
+
+    assert sorted(restored.features) == ["feature_a", "feature_b"]
+    assert round(sum(restored.actions.values())) == 2
+    assert restored.last_event_id == 2
+
+
+def test_folded_ids_are_pruned_past_the_lookback():
+    summary = BehaviorSummary()
+    summary.add_events([_event(1, "feature_a", 30, created_at=NOW)])
+    later = NOW + timedelta(seconds=COMMIT_LAG_SECONDS + 1)
+    summary.add_events([_event(2, "feature_b", 0, created_at=later)])
+
+    assert list(summary.folded_ids) == [2]
+    assert summary.lookback_start() > NOW.replace(tzinfo=timezone.utc)
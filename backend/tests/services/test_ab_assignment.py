@@ -0,0 +1,209 @@
+"""Tests for the stateless A/B assignment engine."""
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.crud.ab_test import ab_test
+from app.services.ab_assignment import (
+    AbAssignmentService,
+    AbTestCatalog,
+    ExposureBuffer,
+    compute_user_hash,
+    stable_bucket,
+)
+
+
+def _variant(id, key, allocation, is_control=False):
+    return SimpleNamespace(
+        id=id,
+        variant_key=key,
+        traffic_allocation=allocation,
+        is_control=is_control,
+        configuration={"key": key},
+    )
+
+
+def _test(id=1, key="checkout", traffic=1.0, variants=None):
+    return SimpleNamespace(
+        id=id,
+        test_key=key,
+        traffic_allocation=traffic,
+        start_date=None,
+        end_date=None,
+        variants=variants
+        or [_variant(10, "control", 0.5, True), _variant(11, "variant_a", 0.5)],
+    )
+
+
+@pytest.fixture
+def service():
+    catalog = AbTestCatalog()
+    catalog.load([_test(), _test(id=2, key="pricing", traffic=0.0)])
+    return AbAssignmentService(catalog=catalog, exposures=ExposureBuffer())
+
+
+def test_stable_bucket_is_deterministic():
+    assert stable_bucket("rule_42") == stable_bucket("rule_42")
+    assert 0 <= stable_bucket("rule_42") < 100
+
+
+def test_assignment_matches_crud_hashing(service):
+    """Catalog assignment agrees with the persisted-assignment algorithm."""
+    variants = _test().variants
+    for user_id in range(1, 200):
+        user_hash = compute_user_hash(user_id, None)
+        expected = ab_test._assign_to_variant(variants, user_hash)
+        assignment = service.assign("checkout", user_id=user_id, log_exposure=False)
+        assert assignment.variant.id == expected.id
+
+
+def test_assign_many_skips_unknown_and_excluded_tests(service):
+    result = service.assign_many(
+        user_id=7, test_keys=["checkout", "pricing", "missing"]
+    )
+    assert list(result) == ["checkout"]
+    assert service.exposures.pending == 1
+
+
+def test_assign_many_defaults_to_all_catalog_tests(service):
+    result = service.assign_many(session_id="abc", log_exposure=False)
+    assert set(result) == {"checkout"}
+    assert service.exposures.pending == 0
+
+
+def test_assign_requires_identifier(service):
+    assert service.assign("checkout") is None
+
+
+def test_exposure_buffer_dedupes_and_drops_when_full(service):
+    service.exposures.max_pending = 2
+    for _ in range(3):
+        service.assign("checkout", user_id=1)
+    service.assign("checkout", user_id=2)
+    service.assign("checkout", user_id=3)
+
+    assert service.exposures.pending == 2
+    assert service.exposures.stats["dropped"] == 1
+    assert len(service.exposures.drain()) == 2
+    assert service.exposures.pending == 0
+
+
+def test_catalog_invalidate_marks_stale():
+    catalog = AbTestCatalog(ttl_seconds=60)
+    catalog.load([_test()])
+    assert not catalog.is_stale
+    catalog.invalidate()
+    assert catalog.is_stale
+
+
+class FailingBuffer(ExposureBuffer):
+    def __init__(self, fail=True):
+        super().__init__()
+        self.fail = fail
+        self.batches = []
+
+    async def _write(self, batch):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.batches.append([a.user_hash for a in batch])
+
+
+async def test_failed_flush_requeues_the_batch(service):
+    buffer = FailingBuffer()
+    service.exposures = buffer
+    for user_id in (1, 2):
+        service.assign("checkout", user_id=user_id)
+
+    assert await buffer.flush() == 0
+    assert buffer.pending == 2
+    assert buffer.stats["flush_errors"] == 1
+
+    service.assign("checkout", user_id=3)
+    buffer.fail = False
+    assert await buffer.flush() == 3
+    assert buffer.batches == [[compute_user_hash(u, None) for u in (1, 2, 3)]]
+
+
+async def test_persist_writes_only_the_requested_exposure(service):
+    buffer = FailingBuffer(fail=False)
+    service.exposures = buffer
+    for user_id in (1, 2):
+        service.assign("checkout", user_id=user_id)
+
+    user_hash = compute_user_hash(2, None)
+    await buffer.persist(service.assign("checkout", user_id=2, log_exposure=False))
+    assert buffer.batches == [[user_hash]]
+    assert buffer.pending == 1
+
+
+async def test_persist_writes_an_exposure_buffered_elsewhere(service):
+    # The conversion reached a worker that never saw the assignment
+    buffer = FailingBuffer(fail=False)
+    service.exposures = buffer
+    await buffer.persist(service.assign("checkout", user_id=3, log_exposure=False))
+    assert buffer.batches == [[compute_user_hash(3, None)]]
+    assert buffer.pending == 0
+
+
+def _stored(test_id, variant_id, key, user_hash="stored"):
+    return SimpleNamespace(
+        test_id=test_id,
+        variant_id=variant_id,
+        user_hash=user_hash,
+        assigned_at=datetime(2025, 1, 1),
+        variant=SimpleNamespace(
+            id=variant_id, variant_key=key, is_control=False, configuration=None
+        ),
+    )
+
+
+@pytest.fixture
+def stored_assignments(monkeypatch):
+    rows = {}
+
+    async def get_existing_assignments(db, *, test_ids, **identity):
+        return {test_id: rows[test_id] for test_id in test_ids if test_id in rows}
+
+    monkeypatch.setattr(ab_test, "get_existing_assignments", get_existing_assignments)
+    return rows
+
+
+async def test_resolve_keeps_the_persisted_variant(service, stored_assignments):
+    user_id = 5
+    computed = service.assign("checkout", user_id=user_id, log_exposure=False)
+    other = 10 if computed.variant.id == 11 else 11
+    stored_assignments[1] = _stored(1, other, "stored")
+
+    [assignment] = (await service.resolve(None, user_id=user_id)).values()
+    assert assignment.variant.id == other
+    assert assignment.assigned_at == datetime(2025, 1, 1)
+    assert service.exposures.pending == 0
+
+    # A variant that is no longer in the catalog is rebuilt from the row
+    stored_assignments[1] = _stored(1, 99, "retired")
+    [assignment] = (await service.resolve(None, user_id=user_id)).values()
+    assert assignment.variant.variant_key == "retired"
+
+
+async def test_resolve_prefers_the_buffered_exposure(service, stored_assignments):
+    first = (await service.resolve(None, session_id="s1"))["checkout"]
+    assert service.exposures.pending == 1
+
+    # Reallocating before the flush does not move the buffered user
+    flipped = _test(
+        variants=[
+            _variant(10, "control", 0.0, True),
+            _variant(11, "variant_a", 1.0),
+        ]
+    )
+    if first.variant.id == 11:
+        flipped.variants = [
+            _variant(10, "control", 1.0, True),
+            _variant(11, "variant_a", 0.0),
+        ]
+    service.catalog.load([flipped])
+
+    again = (await service.resolve(None, session_id="s1"))["checkout"]
+    assert again.variant.id == first.variant.id
+    assert service.exposures.pending == 1
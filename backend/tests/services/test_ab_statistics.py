@@ -0,0 +1,69 @@
+"""Tests for sufficient-statistics A/B analysis."""
+import random
+import statistics
+
+import pytest
+
+from app.services.ab_statistics import (
+    VariantSufficientStats,
+    cuped_adjusted,
+    cuped_theta,
+    msprt_p_value,
+)
+
+
+def _accumulate(rows):
+    stats = VariantSufficientStats()
+    for converted, value, covariate in rows:
+        stats.participants += 1
+        stats.conversions += converted
+        stats.value_sum += value
+        stats.value_sum_sq += value * value
+        stats.covariate_sum += covariate
+        stats.covariate_sum_sq += covariate * covariate
+        stats.covariate_conversion_sum += covariate * converted
+    return stats
+
+
+def _rows(n, rate, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        covariate = rng.random()
+        converted = int(rng.random() < rate * (0.5 + covariate))
+        rows.append((converted, 10.0 * converted, covariate))
+    return rows
+
+
+def test_running_sums_match_direct_computation():
+    rows = _rows(500, 0.2, seed=1)
+    stats = _accumulate(rows)
+
+    values = [r[1] for r in rows]
+    assert stats.mean_value == pytest.approx(statistics.fmean(values))
+    assert stats.value_variance == pytest.approx(statistics.variance(values))
+    assert stats.covariance == pytest.approx(
+        statistics.covariance([r[2] for r in rows], [r[0] for r in rows])
+    )
+
+
+def test_cuped_reduces_variance_with_correlated_covariate():
+    control = _accumulate(_rows(2000, 0.2, seed=2))
+    treatment = _accumulate(_rows(2000, 0.25, seed=3))
+    theta = cuped_theta([control, treatment])
+    mean_x = (control.covariate_sum + treatment.covariate_sum) / 4000
+
+    assert theta > 0
+    _, adjusted_var = cuped_adjusted(control, theta, mean_x)
+    rate = control.conversion_rate
+    assert adjusted_var < rate * (1 - rate)
+
+
+def test_msprt_p_value_shrinks_with_evidence():
+    control = VariantSufficientStats(participants=1000, conversions=100)
+    same = VariantSufficientStats(participants=1000, conversions=101)
+    better = VariantSufficientStats(participants=1000, conversions=180)
+
+    assert msprt_p_value(control, same, 0.0004) == pytest.approx(1.0)
+    assert msprt_p_value(control, better, 0.0004) < 0.01
+    assert msprt_p_value(VariantSufficientStats(), better, 0.0004) is None
@@ -0,0 +1,160 @@
+"""Tests for the AI content analysis pipeline."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.ai_analysis_pipeline import (
+    AIAnalysisPipeline,
+    AnalysisResultCache,
+    StubProvider,
+    TokenBucket,
+)
+from app.services.ai_content_analyzer import AIContentAnalyzer
+
+
+class BrokenBatchProvider(StubProvider):
+    """Stub whose batched responses cannot be split per item."""
+
+    async def complete(self, session, request):
+        self.calls += 1
+        if request.batch_size > 1:
+            return {"raw_response": "not json"}
+        return {"quality_score": 0.9}
+
+
+def _item(content_id, title):
+    return SimpleNamespace(
+        content_id=content_id,
+        title=title,
+        description=None,
+        author=None,
+        source=None,
+        content_type="article",
+        category="technology",
+        view_count=0,
+        click_count=0,
+        engagement_rate=0.0,
+    )
+
+
+async def test_cache_and_inflight_dedupe_share_one_call():
+    provider = StubProvider(latency=0.01)
+    pipeline = AIAnalysisPipeline(provider)
+
+    results = await asyncio.gather(
+        *(pipeline.analyze("same prompt", "quality_analysis") for _ in range(5))
+    )
+    assert provider.calls == 1
+    assert pipeline.stats["deduplicated"] == 4
+    assert all(r["quality_score"] == 0.75 for r in results)
+
+    await pipeline.analyze("same prompt", "quality_analysis")
+    assert provider.calls == 1
+    assert pipeline.stats["cache_hits"] == 1
+
+    # Callers get copies, so mutating a result cannot poison the cache
+    results[0]["quality_score"] = 0.0
+    cached = await pipeline.analyze("same prompt", "quality_analysis")
+    assert cached["quality_score"] == 0.75
+
+
+async def test_analyze_many_batches_misses_and_skips_hits():
+    provider = StubProvider()
+    pipeline = AIAnalysisPipeline(provider, batch_size=4)
+    await pipeline.analyze("p0", "sentiment_analysis")
+
+    prompts = [f"p{i}" for i in range(9)] + ["p1"]
+    results = await pipeline.analyze_many(prompts, "sentiment_analysis")
+
+    assert len(results) == 10
+    assert all(r["sentiment_score"] == 0.2 for r in results)
+    # 1 single call, then 8 misses in two batches of 4
+    assert provider.calls == 3
+    assert pipeline.stats["batched_calls"] == 2
+
+
+async def test_unsplittable_batch_falls_back_to_single_calls():
+    provider = BrokenBatchProvider()
+    pipeline = AIAnalysisPipeline(provider, batch_size=3)
+
+    results = await pipeline.analyze_many(["a", "b", "c"], "quality_analysis")
+
+    assert [r["quality_score"] for r in results] == [0.9, 0.9, 0.9]
+    assert provider.calls == 4
+    assert pipeline.stats["batch_fallbacks"] == 1
+
+
+async def test_cancelled_batch_releases_its_keys():
+    provider = StubProvider(latency=10)
+    pipeline = AIAnalysisPipeline(provider, batch_size=2)
+
+    batch = asyncio.create_task(pipeline.analyze_many(["a", "b"], "quality_analysis"))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(pipeline.analyze("a", "quality_analysis"))
+    await asyncio.sleep(0)
+    batch.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await batch
+
+    # The waiter sees the cancellation instead of hanging on the claimed key
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(waiter, timeout=1)
+    assert not pipeline._inflight
+
+    provider.latency = 0
+    result = await asyncio.wait_for(pipeline.analyze("b", "quality_analysis"), 1)
+    assert result["quality_score"] == 0.75
+
+
+async def test_token_bucket_sleeps_off_deficit(monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    bucket = TokenBucket(tokens_per_minute=600)
+
+    assert await bucket.acquire(600) == 0.0
+    waited = await bucket.acquire(100)
+    assert waited == pytest.approx(10.0, rel=0.01)
+    assert slept and slept[0] == pytest.approx(10.0, rel=0.01)
+
+
+def test_result_cache_evicts_least_recently_used_and_expires():
+    cache = AnalysisResultCache(max_entries=2, ttl=60)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+
+    expired = AnalysisResultCache(ttl=-1)
+    expired.set("a", {"v": 1})
+    assert expired.get("a") is None
+
+
+async def test_analyzer_batches_items_with_stub_provider(monkeypatch):
+    from app.crud import content_suggestion as crud_content
+
+    stored = []
+
+    async def fake_update(db, **kwargs):
+        stored.append(kwargs["content_id"])
+
+    monkeypatch.setattr(
+        crud_content.content_item, "update_ai_analysis", fake_update, raising=False
+    )
+    provider = StubProvider()
+    analyzer = AIContentAnalyzer(AIAnalysisPipeline(provider, batch_size=8))
+    items = [_item(f"c{i}", f"Title {i}") for i in range(8)]
+
+    outcomes = await analyzer.analyze_content_items(None, items)
+
+    assert [o["content_id"] for o in outcomes] == stored
+    assert all(o["success"] for o in outcomes)
+    assert outcomes[0]["analysis_results"]["quality"]["score"] == 0.75
+    # One batched call per analysis type
+    assert provider.calls == 5
@@ -0,0 +1,165 @@
+"""Tests for streaming event exports."""
+import csv
+import gzip
+import importlib
+import io
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional
+from unittest.mock import patch
+
+import pytest
+from app.crud.event import event as event_crud
+from app.services.event_export import decode_position, encode_position, stream_export
+from sqlalchemy import ForeignKey, String
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+START = datetime(2025, 8, 1, 12, 0)
+# The module itself; ``app.crud.event`` as an attribute is the CRUD instance
+event_crud_module = importlib.import_module("app.crud.event")
+
+
+def _event(index):
+    timestamp = START + timedelta(minutes=index)
+    return SimpleNamespace(
+        id=index + 1,
+        event_id=f"evt-{index}",
+        event_type="interaction",
+        event_name="page_view",
+        source="web",
+        page_url=None,
+        user_agent=None,
+        ip_address=None,
+        session_id=None,
+        properties={"page": f"/p/{index}"},
+        value=None,
+        user_id=7,
+        timestamp=timestamp,
+        anonymized=False,
+        retention_date=None,
+        created_at=timestamp,
+        updated_at=timestamp,
+    )
+
+
+async def _events(count):
+    for index in range(count):
+        yield _event(index)
+
+
+async def _collect(export_format, count=5, **kwargs):
+    return [
+        chunk
+        async for chunk in stream_export(
+            _events(count), export_format, chunk_rows=2, **kwargs
+        )
+    ]
+
+
+def test_position_round_trip():
+    token = encode_position(START, 42)
+
+    assert decode_position(token) == (START, 42)
+    with pytest.raises(ValueError):
+        decode_position("not-a-position")
+
+
+async def test_json_export_streams_a_valid_array_in_chunks():
+    chunks = await _collect("json")
+
+    assert len(chunks) == 3
+    records = json.loads(b"".join(chunks))
+    assert [record["event_id"] for record in records] == [f"evt-{i}" for i in range(5)]
+    assert decode_position(records[-1]["position"]) == (START + timedelta(minutes=4), 5)
+    assert await _collect("json", count=0) == [b"[]"]
+
+
+async def test_ndjson_and_csv_exports():
+    lines = b"".join(await _collect("ndjson")).decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3, 4, 5]
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(await _collect("csv")).decode())))
+    assert len(rows) == 5
+    assert json.loads(rows[0]["properties"]) == {"page": "/p/0"}
+    assert rows[0]["position"] == encode_position(START, 1)
+
+
+async def test_gzip_export_matches_uncompressed_body():
+    plain = b"".join(await _collect("ndjson"))
+    compressed = b"".join(await _collect("ndjson", compress=True))
+
+    assert gzip.decompress(compressed) == plain
+
+
+class _ExportBase(DeclarativeBase):
+    pass
+
+
+class _ExportUser(_ExportBase):
+    __tablename__ = "users"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+
+class _ExportEvent(_ExportBase):
+    """Columns of app.models.event.Event that the export query touches."""
+
+    __tablename__ = "events"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
+    event_type: Mapped[str] = mapped_column(String(50))
+    timestamp: Mapped[datetime] = mapped_column()
+    anonymized: Mapped[bool] = mapped_column(default=False)
+    user: Mapped[Optional[_ExportUser]] = relationship()
+
+
+async def test_stream_user_events_resumes_after_the_last_exported_record():
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(_ExportBase.metadata.create_all)
+
+        # Events 3 and 4 share a timestamp, so only the id separates them
+        minutes = [0, 1, 2, 2, 3]
+        async with AsyncSession(engine) as db:
+            db.add_all([_ExportUser(id=7), _ExportUser(id=8)])
+            db.add_all(
+                _ExportEvent(
+                    id=index + 1,
+                    user_id=7,
+                    event_type="interaction",
+                    timestamp=START + timedelta(minutes=minute),
+                )
+                for index, minute in enumerate(minutes)
+            )
+            db.add(
+                _ExportEvent(
+                    id=99, user_id=8, event_type="interaction", timestamp=START
+                )
+            )
+            await db.commit()
+
+            async def stream(**kwargs):
+                return [
+                    row.id
+                    async for row in event_crud.stream_user_events(
+                        db, user_id=7, chunk_size=2, **kwargs
+                    )
+                ]
+
+            with patch.object(event_crud_module, "Event", _ExportEvent):
+                everything = await stream()
+                resumed = await stream(after=(START + timedelta(minutes=2), 3))
+                from_start = await stream(after=(START, 1))
+                at_end = await stream(after=(START + timedelta(minutes=3), 5))
+    finally:
+        await engine.dispose()
+
+    assert everything == [1, 2, 3, 4, 5]
+    assert resumed == [4, 5]
+    assert from_start == [2, 3, 4, 5]
+    assert at_end == []
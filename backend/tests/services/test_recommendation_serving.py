@@ -0,0 +1,147 @@
+"""Tests for the materialized top-N recommendation serving store."""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.recommendation_serving import RecommendationServingStore
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return queue
+
+    async def execute(self):
+        return [
+            await getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.calls
+        ]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.strings = {}
+        self.zsets = {}
+        self.mget_calls = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def set(self, key, value, ex=None, xx=False, keepttl=False):
+        if xx and key not in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    async def mget(self, keys):
+        self.mget_calls += 1
+        return [self.strings.get(key) for key in keys]
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+            self.zsets.pop(key, None)
+
+    async def expire(self, key, seconds):
+        return True
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+    async def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    async def zrevrange(self, key, start, end):
+        ranked = sorted(self.zsets.get(key, {}).items(), key=lambda x: -x[1])
+        return [member for member, _ in ranked[start : end + 1]]
+
+
+def _rec(rid, rec_type="feature", status="active", expires_at=None):
+    return SimpleNamespace(
+        id=1,
+        recommendation_id=rid,
+        user_id=7,
+        type=rec_type,
+        title=f"Try {rid}",
+        description="",
+        confidence_score=0.5,
+        priority_score=0.5,
+        relevance_score=0.5,
+        context={"url": "/x"},
+        rec_metadata=None,
+        expires_at=expires_at,
+        model_version="v1",
+        algorithm="hybrid",
+        status=status,
+        impressions=4,
+        clicks=1,
+        created_at=datetime.utcnow() - timedelta(days=2),
+        shown_at=None,
+        clicked_at=None,
+        dismissed_at=None,
+    )
+
+
+@pytest.fixture
+def store():
+    return RecommendationServingStore(FakeRedis(), top_n=3, ttl=60)
+
+
+async def test_serves_ranked_filtered_list_with_one_mget(store):
+    past = datetime.utcnow() - timedelta(hours=1)
+    await store.materialize(
+        {
+            7: [
+                _rec("a"),
+                _rec("b", rec_type="content"),
+                _rec("c", expires_at=past),
+            ]
+        }
+    )
+
+    served = await store.get_user_recommendations(7, limit=5)
+    assert [r.recommendation_id for r in served.recommendations] == ["a", "b"]
+    assert served.recommendations[0].click_through_rate == 0.25
+    assert served.recommendations[0].days_since_created == 2
+    assert store.redis.mget_calls == 1
+
+    served = await store.get_user_recommendations(7, types=["content"], limit=5)
+    assert [r.recommendation_id for r in served.recommendations] == ["b"]
+
+
+async def test_misses_fall_back_to_caller(store):
+    assert await store.get_user_recommendations(7) is None
+
+    # Empty lists are still materialized and served
+    await store.materialize({7: []})
+    served = await store.get_user_recommendations(7)
+    assert served.recommendations == []
+
+    # A truncated list that cannot fill the request defers to Postgres
+    await store.materialize({7: [_rec(str(i)) for i in range(4)]})
+    assert await store.get_user_recommendations(7, limit=3) is not None
+    assert await store.get_user_recommendations(7, limit=4) is None
+
+
+async def test_engagement_updates_served_list(store):
+    await store.materialize({7: [_rec("a"), _rec("b")]})
+
+    await store.apply_engagement(_rec("a", status="dismissed"))
+    served = await store.get_user_recommendations(7)
+    assert [r.recommendation_id for r in served.recommendations] == ["b"]
+
+    await store.invalidate([7])
+    assert await store.get_user_recommendations(7) is None
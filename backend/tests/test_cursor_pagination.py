@@ -10,9 +10,11 @@ Tests cover:
 - Database index usage
 """
 
+import asyncio
 import json
 import time
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from typing import Any, Dict, List
 
 import pytest
@@ -28,6 +30,7 @@ from app.utils.pagination_metrics import PaginationMetrics, performance_monitor
 from fastapi.testclient import TestClient
 from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 from tests.factories import CommunityPostFactory, ProjectFactory, SupportTicketFactory
 
@@ -97,6 +100,41 @@ class TestCursorPaginationSecurity:
         decoded = manager.decode_cursor(cursor)
         assert decoded.last_value == dt.isoformat()
 
+    def test_cursor_value_types_round_trip(self):
+        """Test binary cursor encoding preserves value types."""
+        manager = CursorPaginationManager("test-secret-key")
+
+        for value in [42, 3.5, "open", None]:
+            cursor = manager.encode_cursor(
+                sort_by="priority", sort_direction="asc", last_value=value, last_id=7
+            )
+            decoded = manager.decode_cursor(cursor)
+            assert decoded.last_value == value
+            assert decoded.sort_direction == "asc"
+            assert decoded.last_id == 7
+
+    def test_legacy_json_cursor_still_accepted(self):
+        """Test cursors issued in the previous JSON format keep working."""
+        import base64
+        import hashlib
+        import hmac
+
+        manager = CursorPaginationManager("test-secret-key")
+        data = CursorData(sort_by="created_at", last_id=5).model_dump()
+        json_str = json.dumps(data, sort_keys=True, separators=(",", ":"))
+        signature = hmac.new(
+            b"test-secret-key", json_str.encode(), hashlib.sha256
+        ).hexdigest()
+        legacy = base64.urlsafe_b64encode(
+            json.dumps({"data": data, "signature": signature}).encode()
+        ).decode()
+
+        decoded = manager.decode_cursor(legacy)
+        assert decoded.last_id == 5
+        assert len(manager.encode_cursor(sort_by="created_at", last_id=5)) < len(
+            legacy
+        )
+
 
 @pytest.mark.asyncio
 class TestCursorPaginationQueries:
@@ -682,3 +720,110 @@ class TestPerformanceBenchmarks:
         # Both should be under SLA, but cursor should be more consistent
         assert offset_duration < 1000  # Allow more lenient for offset deep pages
         assert cursor_duration < 200  # Cursor should meet strict SLA
+
+
+class _PageBase(DeclarativeBase):
+    pass
+
+
+class _PageItem(_PageBase):
+    __tablename__ = "page_items"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime] = mapped_column()
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.value
+
+
+class _FakeSession:
+    """Answers queries in order and records the SQL it was sent."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return _Result(self.answers.pop(0))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.mark.asyncio
+class TestTotalsAndPrefetch:
+    """Test count modes and next-page prefetching without a database."""
+
+    async def test_exact_mode_always_counts(self):
+        manager = CursorPaginationManager("test-secret-key")
+        db = _FakeSession(5, 7)
+        query = select(_PageItem)
+
+        assert await manager._get_total(db, query, _PageItem, "k", "exact") == (
+            5,
+            False,
+        )
+        assert await manager._get_total(db, query, _PageItem, "k", "exact") == (
+            7,
+            False,
+        )
+
+    async def test_estimate_mode_refreshes_the_exact_count_in_background(self):
+        background = _FakeSession(42)
+        manager = CursorPaginationManager(
+            "test-secret-key", session_factory=lambda: background
+        )
+        db = _FakeSession(1000)
+        query = select(_PageItem)
+
+        total = await manager._get_total(db, query, _PageItem, "k", "estimate")
+        assert total == (1000, True)
+        assert "reltuples" in db.statements[0]
+
+        await asyncio.gather(*manager._background_tasks)
+        assert await manager._get_total(db, query, _PageItem, "k", "estimate") == (
+            42,
+            True,
+        )
+        assert len(db.statements) == 1
+
+    async def test_prefetched_page_is_served_by_primary_key(self):
+        background = _FakeSession([3, 4, 5])
+        manager = CursorPaginationManager(
+            "test-secret-key", session_factory=lambda: background
+        )
+        cursor = manager.encode_cursor(
+            sort_by="created_at",
+            sort_direction="desc",
+            last_value=datetime(2025, 8, 1),
+            last_id=2,
+        )
+        query = select(_PageItem)
+
+        await manager._prefetch_page(query, _PageItem, cursor, 2, "k")
+        items = [SimpleNamespace(id=4), SimpleNamespace(id=3)]
+        db = _FakeSession(items)
+        page, has_more = await manager._fetch_page(
+            db, query, _PageItem, manager.decode_cursor(cursor), cursor, 2, False, "k"
+        )
+
+        assert [item.id for item in page] == [3, 4]
+        assert has_more
+        assert "IN" in db.statements[0]
+        # A prefetched page is used once
+        assert manager._prefetch_cache.get(("k", cursor, 2)) is None
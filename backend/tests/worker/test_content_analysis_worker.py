@@ -0,0 +1,98 @@
+"""Tests for the content analysis worker."""
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.crud import content_suggestion as crud_content
+from app.services.ai_analysis_pipeline import AIAnalysisPipeline, StubProvider
+from app.services.ai_content_analyzer import AIContentAnalyzer
+from app.worker.content_analysis_worker import (
+    ContentAnalysisWorker,
+    analysis_types_for_job,
+)
+
+
+def _job(job_id, content_id, job_type="full_analysis"):
+    return SimpleNamespace(
+        job_id=job_id,
+        content_id=content_id,
+        job_type=job_type,
+        created_at=datetime.utcnow() - timedelta(minutes=5),
+    )
+
+
+def _item(content_id):
+    return SimpleNamespace(
+        content_id=content_id,
+        title=f"Title {content_id}",
+        description=None,
+        author=None,
+        source=None,
+        content_type="article",
+        category="technology",
+        view_count=0,
+        click_count=0,
+        engagement_rate=0.0,
+    )
+
+
+@asynccontextmanager
+async def _session():
+    yield SimpleNamespace()
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    jobs = [_job(f"j{i}", f"c{i}") for i in range(5)] + [_job("j-missing", "gone")]
+    items = {f"c{i}": _item(f"c{i}") for i in range(5)}
+    job_crud = crud_content.content_analysis_job
+    monkeypatch.setattr(
+        job_crud, "claim_pending_jobs", AsyncMock(side_effect=[jobs, []])
+    )
+    monkeypatch.setattr(job_crud, "update_job_status", AsyncMock())
+    monkeypatch.setattr(
+        crud_content.content_item,
+        "get_by_content_ids",
+        AsyncMock(return_value=items),
+    )
+    monkeypatch.setattr(crud_content.content_item, "update_ai_analysis", AsyncMock())
+
+    provider = StubProvider()
+    analyzer = AIContentAnalyzer(AIAnalysisPipeline(provider, batch_size=2))
+    return ContentAnalysisWorker(
+        claim_size=10, concurrency=2, session_factory=_session, analyzer=analyzer
+    )
+
+
+def test_analysis_types_for_job():
+    assert analysis_types_for_job("full_analysis") is None
+    assert analysis_types_for_job("topics,sentiment") == ["topics", "sentiment"]
+
+
+async def test_run_once_processes_batch_and_checkpoints(worker):
+    claimed = await worker.run_once()
+
+    assert claimed == 6
+    assert worker.stats == {"claimed": 6, "completed": 5, "failed": 1, "batches": 1}
+
+    calls = crud_content.content_analysis_job.update_job_status.await_args_list
+    by_job = {call.kwargs["job_id"]: call.kwargs for call in calls}
+    assert by_job["j0"]["status"] == "completed"
+    assert by_job["j0"]["progress"] == 1.0
+    assert by_job["j0"]["refresh"] is False
+    assert by_job["j-missing"]["status"] == "failed"
+
+    assert await worker.run_once() == 0
+
+
+async def test_chunk_failure_marks_only_unfinished_jobs_failed(worker):
+    worker.analyzer.analyze_content_items = AsyncMock(side_effect=RuntimeError("boom"))
+
+    await worker.run_once()
+
+    calls = crud_content.content_analysis_job.update_job_status.await_args_list
+    assert {c.kwargs["status"] for c in calls} == {"failed"}
+    assert worker.stats["failed"] == 6
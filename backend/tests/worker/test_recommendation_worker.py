@@ -0,0 +1,85 @@
+"""Tests for sharded daily recommendation generation."""
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.worker import recommendation_worker as worker
+
+
+class FakeRedis:
+    def __init__(self, store):
+        self.store = store
+
+    async def hgetall(self, key):
+        return {k: str(v) for k, v in self.store.get(key, {}).items()}
+
+    async def hset(self, key, mapping):
+        self.store.setdefault(key, {}).update(mapping)
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def close(self):
+        pass
+
+
+@asynccontextmanager
+async def _session():
+    yield SimpleNamespace()
+
+
+@pytest.fixture
+def shard_env(monkeypatch):
+    store = {}
+    active_ids = [3, 5, 8, 13, 21]
+    generated = []
+    fail_on = set()
+
+    async def next_batch(db, after_id, end_id, limit):
+        return [i for i in active_ids if after_id < i < end_id][:limit]
+
+    async def generate(db, user_ids, store=None):
+        if fail_on & set(user_ids):
+            raise RuntimeError("database went away")
+        generated.extend(user_ids)
+        return {"users": len(user_ids), "skipped": 0, "errors": 0, "recommendations": 3}
+
+    monkeypatch.setattr(worker.Redis, "from_url", lambda *a, **k: FakeRedis(store))
+    monkeypatch.setattr(worker, "AsyncSessionLocal", _session)
+    monkeypatch.setattr(worker, "_next_user_batch", next_batch)
+    monkeypatch.setattr(worker, "_generate_for_users", generate)
+    monkeypatch.setattr(
+        worker,
+        "get_settings",
+        lambda: SimpleNamespace(redis_url="redis://test", recommendation_batch_size=2),
+    )
+    return SimpleNamespace(store=store, generated=generated, fail_on=fail_on)
+
+
+def test_plan_shards_covers_id_range():
+    assert worker.plan_shards(1, 25, 10) == [(1, 11), (11, 21), (21, 26)]
+    assert worker.plan_shards(7, 7, 10) == [(7, 8)]
+
+
+async def test_shard_checkpoints_and_resumes(shard_env):
+    shard_env.fail_on.add(13)
+    with pytest.raises(RuntimeError):
+        await worker._process_recommendation_shard("run", 1, 30)
+
+    state = shard_env.store[worker._shard_key("run", 1)]
+    assert state["status"] == "running"
+    assert state["cursor"] == 5
+    assert shard_env.generated == [3, 5]
+
+    shard_env.fail_on.clear()
+    result = await worker._process_recommendation_shard("run", 1, 30)
+
+    assert shard_env.generated == [3, 5, 8, 13, 21]
+    assert result["users"] == 5
+    assert result["recommendations"] == 9
+    assert shard_env.store[worker._shard_key("run", 1)]["status"] == "done"
+
+    again = await worker._process_recommendation_shard("run", 1, 30)
+    assert again["already_done"] is True
+    assert shard_env.generated == [3, 5, 8, 13, 21]